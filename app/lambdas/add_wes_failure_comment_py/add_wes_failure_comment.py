@@ -2,21 +2,24 @@
 
 """
 The ICA analysis has failed, we add a comment to the analysis
-"""
 
-# Standard imports
-from os import environ
+Alongside the error message uri, the comment includes the final lines of the error log
+(see dragen_wgts_rna_tools.wes_failure_comments).
+"""
 
-# Local imports
-from orcabus_api_tools.workflow import (
-    add_comment_to_workflow_run, get_workflow_run_from_portal_run_id
-)
+# Layer imports
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.comments import add_comment
+from dragen_wgts_rna_tools.run_context import get_run_context
+from dragen_wgts_rna_tools.workflow_run_resolver import get_workflow_run_resolver
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+from dragen_wgts_rna_tools.wes_failure_comments import build_failure_comment_body, get_failure_comment_author
 
-# Globals
-WORKFLOW_NAME_ENV_VAR = "WORKFLOW_NAME"
-COMMENT_AUTHOR = "{WORKFLOW_NAME}-workflow-service"
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
 
+@instrument_handler
 def handler(event, context) -> dict:
     """
     Add a comment to the ICA analysis indicating failure.
@@ -26,7 +29,8 @@ def handler(event, context) -> dict:
         "errorType": "...",
         "errorMessageUri": "s3://...",
         "portalRunId": "...",
-        "executionArn": "arn:aws:states:..."
+        "executionArn": "arn:aws:states:...",
+        "runContext": {...}  // optional, saves looking up the workflow run id
       }
 
     Output: None (comment is written as a side effect)
@@ -38,28 +42,23 @@ def handler(event, context) -> dict:
     portal_run_id = event.get("portalRunId")
     execution_arn = event.get("executionArn", "")
 
-    # Get the workflow run id from the portal run id
-    workflow_run_id = get_workflow_run_from_portal_run_id(portal_run_id)["orcabusId"]
-
-    # Construct the comment body
-    body = f"The workflow has failed with error type '{error_type}', full traceback can be found at '{error_message_uri}'"
-    footer = f"---\nStep Functions Execution: {execution_arn}"
-    full_comment = f"{body}\n{footer}"
-
-    # Enforce 1024 char limit
-    max_length = 1024
-    if len(full_comment) > max_length:
-        truncation_suffix = "\n... [truncated, see execution ARN for full detail]"
-        available = max_length - len(footer) - len(truncation_suffix) - 1
-        full_comment = f"{body[:available]}{truncation_suffix}\n{footer}"
+    # Get the workflow run id from the run context, or from the portal run id
+    run_context = get_run_context(event)
+    if run_context is not None:
+        workflow_run_id = run_context.orcabus_id
+    else:
+        workflow_run_id = get_workflow_run_resolver().get_immutable_fields_by_portal_run_id(portal_run_id)["orcabusId"]
 
     # Construct the comment
-    add_comment_to_workflow_run(
-        workflow_run_orcabus_id=workflow_run_id,
-        comment=full_comment,
-        author=COMMENT_AUTHOR.format(
-            WORKFLOW_NAME=environ.get(WORKFLOW_NAME_ENV_VAR, "unknown")
-        )
+    add_comment(
+        workflow_run_id=workflow_run_id,
+        body=build_failure_comment_body(
+            error_type=error_type,
+            error_message_uri=error_message_uri,
+            execution_arn=execution_arn,
+        ),
+        author=get_failure_comment_author(),
+        execution_arn=execution_arn,
     )
 
     return {
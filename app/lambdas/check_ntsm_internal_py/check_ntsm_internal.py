@@ -3,30 +3,28 @@
 """
 Check ntsm internal.
 
-Given a list of rgids, collect all fastq set ids.
+Given a list of rgids, collect all fastq set ids
+(from the bulk fetched fastqs of their instrument run, see dragen_wgts_rna_tools.instrument_run_fastqs).
 
 For each fastq set id in the list, run validateNtsmInternal.
 
 If there is more than one fastq set id in the list, run validateNtsmExternal on each fastq set id.
 """
 
-from itertools import product
-
 from orcabus_api_tools.fastq import (
     validate_ntsm_internal,
     validate_ntsm_external,
-    get_fastq_by_rgid
 )
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.draft_population import non_duplicate_cross_product
+from dragen_wgts_rna_tools.instrument_run_fastqs import get_instrument_run_fastq_cache
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
-
-def non_duplicate_cross_product(lst):
-    result = []
-    for a, b in product(lst, repeat=2):
-        if a != b and (b, a) not in result:
-            result.append((a, b))
-    return result
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
 
+@instrument_handler
 def handler(event, context):
     """
     Get fastq set ids from rgids and then validate ntsm internal.
@@ -37,8 +35,11 @@ def handler(event, context):
     fastq_rgid_list = event.get("fastqRgidList", [])
 
     fastq_set_id_list = list(map(
-        lambda rgid_iter_: get_fastq_by_rgid(rgid_iter_)['fastqSetId'],
-        fastq_rgid_list
+        lambda fastq_iter_: fastq_iter_['fastqSetId'],
+        # A snapshot of the instrument run taken before the fastqs were assigned to a fastq set is refreshed
+        get_instrument_run_fastq_cache().get_fastqs_by_rgid_list(
+            fastq_rgid_list, required_fields=("fastqSetId",)
+        )
     ))
 
     if len(fastq_set_id_list) == 0:
@@ -98,117 +98,48 @@ TO
   }
 }
 """
-# Standard imports
-from copy import deepcopy
-from datetime import datetime, timezone
-
 # Layer helpers
-from orcabus_api_tools.workflow import (
-    get_latest_payload_from_workflow_run,
-    get_workflow_run_from_portal_run_id
-)
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.icav2_wes_events import convert_icav2_wes_event_to_wru_event
+from dragen_wgts_rna_tools.status_ledger import RunStatusLedger
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
+# Globals
+# Highest status seen per run, shared across invocations
+RUN_STATUS_LEDGER = RunStatusLedger()
 
+
+@instrument_handler
 def handler(event, context):
     """
-    Perform the following steps:
-    1. Get portal run ID from ICAv2 WES Event Tags
-    2. Look up workflow run / payload using the portal run ID
-    3. Generate the WRSC Event payload based on the existing WRSC Event payload
+    Convert a single ICAv2 WES State Change Event to a WRU event.
+
+    If the run status ledger has already seen a higher status for this run,
+    the event is stale and we return early with isStale set to true (and no WRU event).
     :param event:
     :param context:
     :return:
     """
-
-    # ICAV2 WES State Change Event payload
     icav2_wes_event = event['icav2WesStateChangeEvent']
 
-    # Get the portal run ID from the event tags
-    portal_run_id = icav2_wes_event['tags']['portalRunId']
-
-    # Get the ICAv2 analysis ID from the WES event
-    icav2_analysis_id = icav2_wes_event.get('icav2AnalysisId')
-
-    # Get the workflow run using the portal run ID
-    workflow_run = get_workflow_run_from_portal_run_id(portal_run_id)
-
-    # Get the latest payload from the workflow run
-    latest_payload = get_latest_payload_from_workflow_run(workflow_run['orcabusId'])
-
-    # Check if the status was SUCCEEDED, if so we populate the 'outputs' data payload
-    if icav2_wes_event['status'] == 'SUCCEEDED':
-        # Get the inputs from the latest payload
-        inputs = latest_payload['data']['inputs']
-
-        rna_variant_calling_output_rel_path = "__".join([
-            inputs['sampleName'],
-            inputs['reference']['name'],
-            inputs['reference']['structure'],
-            "dragen_wgts_rna_variant_calling"
-        ]) + "/"
-
-        # Add multiqc report details
-        # These will change if tumor sample name is provided
-        multiqc_output_rel_path = f"{inputs['sampleName']}_multiqc/"
-
-        outputs = dict(filter(
-            lambda kv_iter_: kv_iter_[1] is not None,
-            {
-                'dragenRnaVariantCallingOutputRelPath': rna_variant_calling_output_rel_path,
-                'multiQcOutputRelPath': multiqc_output_rel_path,
-            }.items()
-        ))
-    else:
-        outputs = None
-
-    # Check if the status was FAILED, if so we populate the error message and type
-    if icav2_wes_event['status'] == 'FAILED':
-        error_type = icav2_wes_event.get('errorType', 'UnknownErrorType')
-        error_message_uri = icav2_wes_event.get('errorMessageUri', None)
-    else:
-        error_message_uri = None
-        error_type = None
-
-    # Update the latest payload with the outputs if available
-    if outputs:
-        latest_payload['data']['outputs'] = outputs
-
-    # Propagate the ICAv2 analysis ID to engineParameters.analysisId
-    if icav2_analysis_id:
-        latest_payload['data']['engineParameters']['analysisId'] = icav2_analysis_id
+    if RUN_STATUS_LEDGER.is_stale_event(icav2_wes_event):
+        return {
+            "isStale": True,
+            "workflowRunUpdateEvent": None,
+            "errorMessageUri": None,
+            "errorType": None,
+            "runContext": None,
+        }
 
-    # Update the workflow object to contain 'name' and 'version'
-    workflow = dict(deepcopy(workflow_run['workflow']))
-    if 'workflowName' in workflow:
-        workflow['name'] = workflow.pop('workflowName')
-    if 'workflowVersion' in workflow:
-        workflow['version'] = workflow.pop('workflowVersion')
+    wru_event_object = convert_icav2_wes_event_to_wru_event(icav2_wes_event)
+    RUN_STATUS_LEDGER.record_event(icav2_wes_event)
 
-    # Prepare the WRSC Event payload
     return {
-        "workflowRunUpdateEvent": {
-            # New status
-            "status": icav2_wes_event['status'],
-            # Current time
-            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds').replace("+00:00", "Z"),
-            # Portal Run ID
-            "portalRunId": portal_run_id,
-            # Workflow details
-            "workflow": workflow,
-            "workflowRunName": workflow_run['workflowRunName'],
-            # Linked libraries in workflow run
-            "libraries": workflow_run['libraries'],
-            # Payload containing the original inputs and engine parameters
-            # But with the updated outputs if available
-            "payload": {
-                "version": latest_payload['version'],
-                "data": latest_payload['data']
-            },
-            # Execution ID (ICAv2 analysis ID)
-            **({"executionId": icav2_analysis_id} if icav2_analysis_id else {})
-        },
-        "errorMessageUri": error_message_uri,
-        "errorType": error_type,
+        "isStale": False,
+        **wru_event_object
     }
 
 
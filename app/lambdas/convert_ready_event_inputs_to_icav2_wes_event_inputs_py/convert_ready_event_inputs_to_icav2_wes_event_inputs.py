@@ -103,11 +103,40 @@ With the outputs as follows:
   }
 }
 
+The conversion is driven by the declarative mapping spec in cwl_input_mapping.json:
+  * "files" / "directories" - READY input paths whose values are wrapped as CWL File / Directory objects
+  * "renames" - READY input paths whose keys are renamed in the CWL inputs
+  * "keyCase" - the case applied to all other keys ("snake" or "preserve")
+
+Paths are dot-delimited camelCase keys, with '[]' denoting each item of a list,
+i.e. 'sequenceData.fastqListRows[].read1FileUri'.
+
+The spec is compiled once at import time into a flat lookup of path operations,
+so new File / Directory inputs only require an update to the spec file.
 """
 
-from typing import Dict, Any, Union, List
+# Standard imports
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Any, Callable, NamedTuple, Optional, Tuple
+
+# Globals
+CWL_INPUT_MAPPING_SPEC_PATH = Path(__file__).parent / "cwl_input_mapping.json"
+LIST_ITEM_TOKEN = "[]"
 
 
+class PathOperation(NamedTuple):
+    """
+    A compiled operation for a single READY input path.
+    """
+    # Key to use in the CWL inputs, None to fall back to the key case rule
+    output_key: Optional[str]
+    # CWL class to wrap the value in ('File' / 'Directory'), None to keep the value as is
+    cwl_class: Optional[str]
+
+
+@lru_cache(maxsize=None)
 def to_snake_case(s: str) -> str:
     """
     Convert a string to snake_case.
@@ -117,72 +146,131 @@ def to_snake_case(s: str) -> str:
     return ''.join(['_' + c.lower() if c.isupper() else c for c in s]).lstrip('_')
 
 
-def recursive_snake_case(d: Union[Dict[str, Any] | List[Any] | str]) -> Any:
+def split_spec_path(spec_path: str) -> Tuple[str, ...]:
     """
-    Convert all keys in a dictionary to snake_case recursively.
-    If the value is a list, we also need to convert each item in the list if it is a dictionary.
-    :param d:
+    Split a spec path into its path parts, list items are represented by their own part
+    'sequenceData.fastqListRows[].read1FileUri' -> ('sequenceData', 'fastqListRows', '[]', 'read1FileUri')
+    :param spec_path:
     :return:
     """
-    if not isinstance(d, dict) and not isinstance(d, list):
-        return d
+    path_parts = []
+    for key_iter_ in spec_path.split("."):
+        if key_iter_.endswith(LIST_ITEM_TOKEN):
+            path_parts.extend([key_iter_[:-len(LIST_ITEM_TOKEN)], LIST_ITEM_TOKEN])
+        else:
+            path_parts.append(key_iter_)
+    return tuple(path_parts)
 
-    if isinstance(d, dict):
-        return {to_snake_case(k): recursive_snake_case(v) for k, v in d.items()}
 
-    return [recursive_snake_case(item) for item in d]
+def compile_mapping_spec(mapping_spec: Dict[str, Any]) -> Dict[Tuple[str, ...], PathOperation]:
+    """
+    Compile the mapping spec into a flat lookup of path parts to path operations
+    :param mapping_spec:
+    :return:
+    """
+    cwl_classes = {
+        **{spec_path: "File" for spec_path in mapping_spec.get("files", [])},
+        **{spec_path: "Directory" for spec_path in mapping_spec.get("directories", [])},
+    }
+    renames = mapping_spec.get("renames", {})
+
+    return {
+        split_spec_path(spec_path): PathOperation(
+            output_key=renames.get(spec_path),
+            cwl_class=cwl_classes.get(spec_path),
+        )
+        for spec_path in sorted(set(cwl_classes).union(renames))
+    }
 
 
-def update_fqlr_input_name(input_name: str) -> str:
-    if input_name == 'read1FileUri':
-        return 'read_1'
-    if input_name == 'read2FileUri':
-        return 'read_2'
-    return input_name
+def get_key_case_func(key_case: str) -> Callable[[str], str]:
+    """
+    Get the key case function for the key case rule in the mapping spec
+    :param key_case:
+    :return:
+    """
+    if key_case == "snake":
+        return to_snake_case
+    if key_case == "preserve":
+        return lambda key_iter_: key_iter_
+    raise ValueError(f"Unknown key case '{key_case}', expected one of 'snake' or 'preserve'")
 
 
-def cwlify_file(file_uri: str) -> Dict[str, str]:
+def cwlify(location: str, cwl_class: str) -> Dict[str, str]:
     return {
-        "class": "File",
-        "location": file_uri
+        "class": cwl_class,
+        "location": location
     }
 
 
-def handler(event, context) -> Dict[str, Any]:
+def apply_path_operations(
+        value: Any,
+        path_parts: Tuple[str, ...],
+        path_operations: Dict[Tuple[str, ...], PathOperation],
+        key_case_func: Callable[[str], str],
+) -> Any:
     """
-    Convert the BCLConvert InteropQC ready event to an ICAv2 WES request event detail.
-    :param event:
-    :param context:
+    Build the CWL inputs in a single pass over the READY inputs.
+    :param value: The value at the current path
+    :param path_parts: The path parts of the current value
+    :param path_operations: The compiled path operations
+    :param key_case_func: The function applied to keys without a rename
     :return:
     """
-    inputs = event['inputs']
+    if isinstance(value, list):
+        item_path_parts = path_parts + (LIST_ITEM_TOKEN,)
+        return [
+            apply_path_operations(item_iter_, item_path_parts, path_operations, key_case_func)
+            for item_iter_ in value
+        ]
+
+    if not isinstance(value, dict):
+        return value
+
+    cwl_inputs = {}
+    for key_iter_, value_iter_ in value.items():
+        child_path_parts = path_parts + (key_iter_,)
+        path_operation = path_operations.get(child_path_parts)
 
-    # If sequenceData contains either fastqListRows or tumorFastqListRows, we need to edit to CWL file types
-    for sequence_data_key_iter_ in ['sequenceData']:
-        if 'fastqListRows' not in inputs.get(sequence_data_key_iter_, {}):
+        if path_operation is None:
+            cwl_inputs[key_case_func(key_iter_)] = apply_path_operations(
+                value_iter_, child_path_parts, path_operations, key_case_func
+            )
             continue
-        inputs[sequence_data_key_iter_]['fastqListRows'] = list(map(
-            lambda fqlr_iter_: dict(map(
-                lambda fqlr_item: (
-                    (update_fqlr_input_name(fqlr_item[0]), cwlify_file(fqlr_item[1]))
-                    if not update_fqlr_input_name(fqlr_item[0]) == fqlr_item[0]
-                    else
-                    (fqlr_item[0], fqlr_item[1])  # Keep the original key if it is not read1FileUri or read2FileUri
-                ),
-                fqlr_iter_.items()
-            )),
-            inputs[sequence_data_key_iter_]['fastqListRows']
-        ))
-
-    # Update references
-    inputs['reference']['tarball'] = cwlify_file(inputs['reference']['tarball'])
-    if 'oraReference' in inputs:
-        inputs['oraReference'] = cwlify_file(inputs['oraReference'])
-    if 'annotationFile' in inputs:
-        inputs['annotationFile'] = cwlify_file(inputs['annotationFile'])
 
+        output_key = path_operation.output_key or key_case_func(key_iter_)
+
+        # Only wrap plain uris, values that are already CWL objects are passed through
+        if path_operation.cwl_class is not None and isinstance(value_iter_, str):
+            cwl_inputs[output_key] = cwlify(value_iter_, path_operation.cwl_class)
+        else:
+            cwl_inputs[output_key] = apply_path_operations(
+                value_iter_, child_path_parts, path_operations, key_case_func
+            )
+
+    return cwl_inputs
+
+
+# Compile the mapping spec once per container
+CWL_INPUT_MAPPING_SPEC = json.loads(CWL_INPUT_MAPPING_SPEC_PATH.read_text())
+PATH_OPERATIONS = compile_mapping_spec(CWL_INPUT_MAPPING_SPEC)
+KEY_CASE_FUNC = get_key_case_func(CWL_INPUT_MAPPING_SPEC.get("keyCase", "snake"))
+
+
+def handler(event, context) -> Dict[str, Any]:
+    """
+    Convert the dragen wgts rna ready event inputs to ICAv2 WES request event inputs.
+    :param event:
+    :param context:
+    :return:
+    """
     return {
-        "inputs": recursive_snake_case(inputs)
+        "inputs": apply_path_operations(
+            event['inputs'],
+            path_parts=(),
+            path_operations=PATH_OPERATIONS,
+            key_case_func=KEY_CASE_FUNC,
+        )
     }
 
 
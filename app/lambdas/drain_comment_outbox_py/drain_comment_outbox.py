@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""
+Drain the comment outbox.
+
+Triggered by the comment outbox queue (SQS event source, with partial batch responses).
+Outbox messages are grouped by workflow run, author and execution, so each group is a single
+(deduplicated, coalesced) comment on the workflow run.
+
+Each group is retried a few times with exponential backoff,
+if it still fails its messages are hidden for an increasing time before they are redelivered,
+and after the queue's max receive count they are moved to the dead letter queue.
+Records that are not outbox messages (i.e. a body that is not JSON) fail on their own the same way,
+without failing the rest of the batch.
+
+The delivery lag (time from enqueue to delivery) is logged per workflow run.
+
+For local testing, use a LocalCommentOutbox as the queue stand-in:
+
+    outbox = LocalCommentOutbox()
+    set_comment_outbox(outbox)
+    ... enqueue comments via the comment writer ...
+    handler({"Records": outbox.receive()}, None)
+"""
+
+# Standard imports
+import json
+import logging
+from time import sleep, time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Layer imports
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.comments import CommentWriter
+from dragen_wgts_rna_tools.comment_outbox import LocalCommentOutbox, get_comment_outbox
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+# Globals
+DELIVERY_ATTEMPTS = 3
+DELIVERY_BACKOFF_BASE_SECONDS = 0.5
+# Visibility backoff for redelivery, doubled for each receive
+REDELIVERY_BACKOFF_BASE_SECONDS = 30
+REDELIVERY_BACKOFF_MAX_SECONDS = 900
+OUTBOX_MESSAGE_REQUIRED_KEYS = ("workflowRunId", "author", "messages", "enqueuedAt")
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def get_redelivery_backoff_seconds(receive_count: int) -> int:
+    return min(
+        REDELIVERY_BACKOFF_BASE_SECONDS * 2 ** max(receive_count - 1, 0),
+        REDELIVERY_BACKOFF_MAX_SECONDS
+    )
+
+
+def parse_outbox_message(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The outbox message in the body of an SQS record, None if the body is not an outbox message
+    """
+    try:
+        outbox_message = json.loads(record['body'])
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Could not parse outbox message {record.get('messageId')}: {e}")
+        return None
+    if (
+            not isinstance(outbox_message, dict) or
+            not all(map(lambda key_iter_: key_iter_ in outbox_message, OUTBOX_MESSAGE_REQUIRED_KEYS))
+    ):
+        logger.error(f"Outbox message {record.get('messageId')} is missing one of {list(OUTBOX_MESSAGE_REQUIRED_KEYS)}")
+        return None
+    return outbox_message
+
+
+def group_records(
+        records: List[Dict[str, Any]]
+) -> Tuple[Dict[Tuple[str, str, str], List[Dict[str, Any]]], List[Dict[str, Any]]]:
+    """
+    Group the SQS records by (workflow run id, author, execution arn), preserving order
+    :param records:
+    :return: the groups, and the records that are not outbox messages
+    """
+    groups: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+    invalid_records: List[Dict[str, Any]] = []
+    for record in records:
+        outbox_message = parse_outbox_message(record)
+        if outbox_message is None:
+            invalid_records.append(record)
+            continue
+        groups.setdefault(
+            (outbox_message['workflowRunId'], outbox_message['author'], outbox_message.get('executionArn')),
+            []
+        ).append({**record, "outboxMessage": outbox_message})
+    return groups, invalid_records
+
+
+def deliver_group(workflow_run_id: str, author: str, execution_arn: str, messages: List[str]) -> None:
+    """
+    Write the messages as a single comment, retrying with exponential backoff
+    """
+    for attempt in range(DELIVERY_ATTEMPTS):
+        comment_writer = CommentWriter(
+            author=author,
+            execution_arn=execution_arn,
+            use_outbox=False,
+        )
+        for message in messages:
+            comment_writer.add(workflow_run_id, message)
+        try:
+            comment_writer.flush()
+            return
+        except Exception as e:
+            if attempt + 1 == DELIVERY_ATTEMPTS:
+                raise
+            logger.warning(f"Comment delivery to {workflow_run_id} failed (attempt {attempt + 1}): {e}")
+            sleep(DELIVERY_BACKOFF_BASE_SECONDS * 2 ** attempt)
+
+
+@instrument_handler
+def handler(event, context) -> Dict[str, Any]:
+    """
+    Deliver the comments in the outbox records.
+
+    Input:
+      {
+        "Records": [
+          {
+            "messageId": "...",
+            "receiptHandle": "...",
+            "body": "{\"workflowRunId\": \"wfr.123\", \"author\": \"...\", \"executionArn\": \"...\", \"messages\": [\"...\"], \"enqueuedAt\": 1760000000.0}",
+            "attributes": {"ApproximateReceiveCount": "1"}
+          }
+        ]
+      }
+
+    Output:
+      {
+        "batchItemFailures": [{"itemIdentifier": "<message id>"}],
+        "deliveryLagSeconds": {"wfr.123": 1.2}
+      }
+    """
+    outbox = get_comment_outbox()
+
+    batch_item_failures = []
+    delivery_lag_seconds = {}
+    delivered_receipt_handles = []
+
+    def fail_records(failed_records: List[Dict[str, Any]]) -> None:
+        # Hidden for the redelivery backoff, and moved to the dead letter queue after the max receive count
+        for failed_record in failed_records:
+            batch_item_failures.append({"itemIdentifier": failed_record['messageId']})
+            if outbox is not None:
+                outbox.delay(
+                    failed_record['receiptHandle'],
+                    get_redelivery_backoff_seconds(
+                        int(failed_record.get('attributes', {}).get('ApproximateReceiveCount', 1))
+                    )
+                )
+
+    groups, invalid_records = group_records(event.get("Records", []))
+    # A message that is not an outbox message does not fail the rest of the batch
+    fail_records(invalid_records)
+
+    for (workflow_run_id, author, execution_arn), records in groups.items():
+        try:
+            deliver_group(
+                workflow_run_id=workflow_run_id,
+                author=author,
+                execution_arn=execution_arn,
+                messages=[
+                    message_iter_
+                    for record_iter_ in records
+                    for message_iter_ in record_iter_['outboxMessage']['messages']
+                ],
+            )
+        except Exception as e:
+            logger.error(f"Could not deliver comment(s) to {workflow_run_id}: {e}")
+            fail_records(records)
+            continue
+
+        # Report the lag from the oldest enqueued message in the group
+        delivered_at = time()
+        delivery_lag_seconds[workflow_run_id] = max(
+            delivery_lag_seconds.get(workflow_run_id, 0.0),
+            max(map(
+                lambda record_iter_: delivered_at - record_iter_['outboxMessage']['enqueuedAt'],
+                records
+            ))
+        )
+        delivered_receipt_handles.extend(map(lambda record_iter_: record_iter_['receiptHandle'], records))
+
+    for workflow_run_id, lag_seconds in delivery_lag_seconds.items():
+        logger.info(json.dumps({
+            "workflowRunId": workflow_run_id,
+            "deliveryLagSeconds": round(lag_seconds, 3),
+        }))
+
+    # The SQS event source mapping deletes delivered messages, the local stand-in needs an explicit ack
+    if isinstance(outbox, LocalCommentOutbox):
+        outbox.ack(delivered_receipt_handles)
+
+    return {
+        "batchItemFailures": batch_item_failures,
+        "deliveryLagSeconds": delivery_lag_seconds,
+    }
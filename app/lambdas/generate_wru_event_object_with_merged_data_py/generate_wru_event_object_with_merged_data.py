@@ -5,11 +5,23 @@ Generate a WorkflowRunUpdate event object with merged data.
 
 This Lambda constructs the complete WRU event detail object from the current state
 of the draft population process.
+
+Sections of the payload offloaded to the claim check store (i.e. the fastq list rows) are rehydrated,
+the WRU event detail is returned whole (it is put to the workflow manager, which cannot rehydrate them).
 """
 
-from orcabus_api_tools.workflow import get_workflow_run_from_portal_run_id
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.claim_check import rehydrate
+from dragen_wgts_rna_tools.draft_population import build_workflow_run_update
+from dragen_wgts_rna_tools.run_context import get_run_context
+from dragen_wgts_rna_tools.workflow_run_resolver import get_workflow_run_resolver
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
 
+@instrument_handler
 def handler(event, context):
     """
     Generate WRU event object with merged data for the dragen-wgts-rna pipeline.
@@ -17,11 +29,12 @@ def handler(event, context):
     Input:
     {
         "portalRunId": "...",
+        "runContext": {...},  // optional, if present the workflow run is not looked up
         "libraries": [...],
         "payload": {
             "version": "...",
             "data": {
-                "inputs": {...},
+                "inputs": {...},  // may hold claim check references
                 "tags": {...},
                 "engineParameters": {...}
             }
@@ -42,28 +55,22 @@ def handler(event, context):
     """
     portal_run_id = event["portalRunId"]
     libraries = event.get("libraries", [])
-    payload = event.get("payload", {})
+    payload = rehydrate(event.get("payload", {}))
 
-    # Get the current workflow run object from the API
-    workflow_run = get_workflow_run_from_portal_run_id(portal_run_id=portal_run_id)
+    # Use the run context if we have it,
+    # otherwise get the current workflow run object (from the API, or from a recent lookup in this container)
+    # The run context's linked libraries are not carried over, a workflow manager workflow run object
+    # has no linkedLibraries either, so the update keeps an empty linkedLibraries list on both paths
+    run_context = get_run_context(event)
+    if run_context is not None:
+        workflow_run = {
+            "orcabusId": run_context.orcabus_id,
+            "portalRunId": run_context.portal_run_id,
+            "workflow": run_context.workflow,
+            "workflowRunName": run_context.workflow_run_name,
+        }
+    else:
+        workflow_run = get_workflow_run_resolver().get_by_portal_run_id(portal_run_id)
 
     # Build the workflow run update object
-    workflow_run_update = {
-        "orcabusId": workflow_run["orcabusId"],
-        "portalRunId": workflow_run["portalRunId"],
-        "status": "DRAFT",
-        "workflow": workflow_run["workflow"],
-        "workflowRunName": workflow_run["workflowRunName"],
-        "linkedLibraries": workflow_run.get("linkedLibraries", []),
-        "libraries": list(map(
-            lambda lib: {
-                "libraryId": lib["libraryId"],
-                "orcabusId": lib["orcabusId"],
-                "readsets": lib.get("readsets", []),
-            },
-            libraries
-        )),
-        "payload": payload,
-    }
-
-    return {"workflowRunUpdate": workflow_run_update}
+    return {"workflowRunUpdate": build_workflow_run_update(workflow_run, libraries, payload)}
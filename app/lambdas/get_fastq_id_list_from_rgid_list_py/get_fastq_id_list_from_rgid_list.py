@@ -4,11 +4,19 @@
 Get the fastq ids from the rgid list
 
 Given the rgid list, return the fastq ids that are associated with these rgids.
+The fastqs are looked up in the (bulk fetched) fastqs of their instrument run,
+see dragen_wgts_rna_tools.instrument_run_fastqs
 """
 
-from orcabus_api_tools.fastq import get_fastq_by_rgid
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.instrument_run_fastqs import get_instrument_run_fastq_cache
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
+
+@instrument_handler
 def handler(event, context):
     """
     Given a list of fastq RGIDs, return the corresponding fastq IDs.
@@ -19,8 +27,8 @@ def handler(event, context):
     fastq_rgid_list = event.get("fastqRgidList", [])
 
     all_fastq_ids = sorted(list(map(
-        lambda fastq_rgid_iter_: get_fastq_by_rgid(fastq_rgid_iter_)['id'],
-        fastq_rgid_list
+        lambda fastq_iter_: fastq_iter_['id'],
+        get_instrument_run_fastq_cache().get_fastqs_by_rgid_list(fastq_rgid_list)
     )))
 
     return {
@@ -3,14 +3,37 @@
 """
 Get the fastq list rows from the rgid list
 
-Input is fastqRgidList
+Input is fastqRgidList,
+the fastq ids are looked up in the (bulk fetched) fastqs of their instrument run
+(see dragen_wgts_rna_tools.instrument_run_fastqs)
 
-Output is fastqListRows (list)
+Output is fastqListRows (list),
+offloaded to the claim check store if the rows are large (see dragen_wgts_rna_tools.claim_check)
 """
 
-from orcabus_api_tools.fastq import to_fastq_list_row, get_fastq_by_rgid
+from typing import Any, Dict, List
 
+from orcabus_api_tools.fastq import to_fastq_list_row
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.claim_check import offload
+from dragen_wgts_rna_tools.instrument_run_fastqs import get_instrument_run_fastq_cache
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+
+def has_ora_fastqs(fastq_list_rows: List[Dict[str, Any]]) -> bool:
+    return any(map(
+        lambda fastq_list_row_iter_: (
+            str(fastq_list_row_iter_.get("read1FileUri")).endswith(".ora") or
+            str(fastq_list_row_iter_.get("read2FileUri")).endswith(".ora")
+        ),
+        fastq_list_rows
+    ))
+
+
+@instrument_handler
 def handler(event, context):
     """
     Given a list of rgids, return the fastq list rows
@@ -21,13 +44,19 @@ def handler(event, context):
     fastq_rgid_list = event.get("fastqRgidList", [])
 
     all_fastq_ids = sorted(list(map(
-        lambda fastq_rgid_iter_: get_fastq_by_rgid(fastq_rgid_iter_)['id'],
-        fastq_rgid_list
+        lambda fastq_iter_: fastq_iter_['id'],
+        get_instrument_run_fastq_cache().get_fastqs_by_rgid_list(fastq_rgid_list)
     )))
 
+    fastq_list_rows = list(map(
+        lambda fastq_id_iter_: to_fastq_list_row(fastq_id_iter_),
+        all_fastq_ids
+    ))
+
+    # The state machine picks the ORA reference from the summary if the rows are offloaded
     return {
-        "fastqListRows": list(map(
-            lambda fastq_id_iter_: to_fastq_list_row(fastq_id_iter_),
-            all_fastq_ids
-        ))
+        "fastqListRows": offload(
+            fastq_list_rows,
+            summary={"hasOraFastqs": has_ora_fastqs(fastq_list_rows)}
+        )
     }
@@ -10,16 +10,15 @@ Rgids are returned in the format '<index>+<index2>.<lane>.<instrument_run_id>'
 
 # Layer imports
 from orcabus_api_tools.fastq import get_fastq_sets, get_fastq_list_rows_in_fastq_set
-from orcabus_api_tools.fastq.models import Fastq
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.draft_population import get_rgid_from_fastq
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
-def get_rgid_from_fastq_obj(fastq_obj: Fastq):
-    return ".".join([
-        fastq_obj['index'],
-        str(fastq_obj['lane']),
-        fastq_obj['instrumentRunId']
-    ])
 
+@instrument_handler
 def handler(event, context):
     """
     Given a library id, get the fastq rgids associated with the library.
@@ -44,7 +43,7 @@ def handler(event, context):
 
     return {
         "fastqRgidList": list(map(
-            lambda fastq_iter_: get_rgid_from_fastq_obj(fastq_iter_),
+            lambda fastq_iter_: get_rgid_from_fastq(fastq_iter_),
             fastqs_list
         ))
     }
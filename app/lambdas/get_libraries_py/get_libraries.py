@@ -7,8 +7,10 @@ from typing import List
 
 from orcabus_api_tools.metadata import get_library_from_library_orcabus_id
 from orcabus_api_tools.metadata.models import LibraryBase
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
 
+@instrument_handler
 def handler(event, context):
     """
     Get the libraries from the input, check their metadata,
@@ -3,20 +3,48 @@
 """
 Get the metadata tags from a library id
 
-Given a library id, collect and return the library object
+Given a library id, collect the library object (via the library cache)
+and return only the tag fields the draft needs
 """
 
-
+# Layer imports
 from orcabus_api_tools.metadata import get_library_from_library_id
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.library_cache import LIBRARY_TAG_FIELDS, LibraryCache, project_library
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+# Globals
+LIBRARY_CACHE = LibraryCache()
 
 
+@instrument_handler
 def handler(event, context):
     """
-    Get the library object from a library id
+    Get the tag fields of the library object from a library id
+
+    Input:
+      {
+        "libraryId": "L2400001",
+        "fields": {"subjectId": "subject.subjectId"}  // optional, defaults to LIBRARY_TAG_FIELDS
+      }
+
+    Output:
+      {
+        "tags": {
+          "subjectId": "SBJ00001",
+          "individualId": "SBJ00001"
+        }
+      }
     :param event:
     :param context:
     :return:
     """
     return {
-        "libraryObj": get_library_from_library_id(event['libraryId']),
+        "tags": project_library(
+            LIBRARY_CACHE.get(event['libraryId'], get_library_from_library_id),
+            event.get('fields', LIBRARY_TAG_FIELDS)
+        ),
     }
@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 """
-Given a list of rgids, collect the fastq list row object for each rgid.
+Given a list of rgids, collect the fastq list row object for each rgid
+(from the bulk fetched fastqs of their instrument run, see dragen_wgts_rna_tools.instrument_run_fastqs).
 
 Then sum the qc coverage estimates and
 average out the duplication fraction estimates
@@ -9,10 +10,17 @@ and average out the insert size estimates.
 """
 from typing import List
 
-from orcabus_api_tools.fastq import get_fastq_by_rgid
 from orcabus_api_tools.fastq.models import Fastq
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.draft_population import get_qc_summary_stats
+from dragen_wgts_rna_tools.instrument_run_fastqs import get_instrument_run_fastq_cache
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
 
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
 
+
+@instrument_handler
 def handler(event, context):
     """
     Given a list of rgids, return the fastq list rows
@@ -22,39 +30,11 @@ def handler(event, context):
     """
     fastq_rgid_list = event.get("fastqRgidList", [])
 
-    fastq_obj_list: List[Fastq] = list(map(
-        lambda rgid_iter_: get_fastq_by_rgid(rgid_iter_),
-        fastq_rgid_list
-    ))
+    # A snapshot of the instrument run taken before the fastqs were QC'd is refreshed
+    fastq_obj_list: List[Fastq] = get_instrument_run_fastq_cache().get_fastqs_by_rgid_list(
+        fastq_rgid_list, required_fields=("qc",)
+    )
 
 
     # Collect and return the qc coverage estimates
-    return {
-        "coverageSum": round(
-            (
-                sum(list(map(
-                    lambda fastq_iter_: fastq_iter_['qc']['rawWgsCoverageEstimate'],
-                    fastq_obj_list
-                )))
-            ) if fastq_obj_list else -1,
-            2
-        ),
-        "dupFracAvg": round(
-            (
-                    sum(list(map(
-                        lambda fastq_iter_: fastq_iter_['qc']['duplicationFractionEstimate'],
-                        fastq_obj_list
-                    ))) / len(fastq_obj_list)
-            ) if fastq_obj_list else -1,
-            2
-        ),
-        "insertSizeAvg": round(
-            (
-                    sum(list(map(
-                        lambda fastq_iter_: fastq_iter_['qc']['insertSizeEstimate'],
-                        fastq_obj_list
-                    ))) / len(fastq_obj_list)
-            ) if fastq_obj_list else -1,
-            2
-        )
-    }
+    return get_qc_summary_stats(fastq_obj_list)
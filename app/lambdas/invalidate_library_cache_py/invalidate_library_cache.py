@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Invalidate the library cache on a metadata manager state change.
+
+Triggered by MetadataStateChange events for the LIBRARY, SUBJECT and INDIVIDUAL models.
+A LIBRARY event drops the cached library record,
+a SUBJECT or INDIVIDUAL event drops every cached library record that embeds that subject or individual,
+so the next lookup fetches them from the metadata manager.
+"""
+
+# Standard imports
+import logging
+
+# Layer imports
+from dragen_wgts_rna_tools.library_cache import LibraryCache
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Globals
+LIBRARY_CACHE = LibraryCache()
+
+# Metadata model -> id field of the event data
+MODEL_ID_FIELDS = {
+    "LIBRARY": "libraryId",
+    "SUBJECT": "subjectId",
+    "INDIVIDUAL": "individualId",
+}
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+@instrument_handler
+def handler(event, context):
+    """
+    Drop the library records affected by the state change from the cache
+
+    Input (the event detail):
+      {
+        "action": "UPDATE",
+        "model": "SUBJECT",
+        "refId": "sbj.01J...",
+        "data": {
+          "subjectId": "SBJ00001",
+          ...
+        }
+      }
+
+    Output:
+      {
+        "model": "SUBJECT",
+        "libraryIds": ["L2400001"]  // empty if no cached library is affected
+      }
+    :param event:
+    :param context:
+    :return:
+    """
+    model = event.get("model")
+    model_id = event.get("data", {}).get(MODEL_ID_FIELDS.get(model, ""))
+
+    if model_id is None:
+        logger.info(f"No {model} id in the {model} {event.get('action')} event, nothing to invalidate")
+        return {"model": model, "libraryIds": []}
+
+    if model == "LIBRARY":
+        LIBRARY_CACHE.invalidate(model_id)
+        return {"model": model, "libraryIds": [model_id]}
+
+    library_ids = LIBRARY_CACHE.invalidate_dependents(model, model_id)
+    logger.info(f"Invalidated {len(library_ids)} cached librar(ies) of {model} {model_id}")
+
+    return {"model": model, "libraryIds": library_ids}
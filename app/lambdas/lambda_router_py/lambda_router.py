@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+
+"""
+Route an invocation to one of the other lambda handlers (the 'router' lambda deployment mode).
+
+With one function per handler, every handler has its own pool of execution environments,
+so at a low event rate most invocations are cold starts, and the OrcaBus API sessions, tokens and caches
+are set up again in each pool. In the 'router' deployment mode the handlers are deployed as this one function,
+so they share warm execution environments, the pooled OrcaBus API session (dragen_wgts_rna_tools.api_client)
+and the layer caches.
+
+The handler to run is named by (in order):
+  * the alias the function was invoked through, i.e. arn:aws:lambda:...:function:<router>:get_libraries,
+    the state machines and event targets invoke the routed lambdas through an alias each (see infrastructure/stage/lambda)
+  * the action field of the event, {"action": "get_libraries", "event": {...}}, i.e. for direct invocations
+
+Each handler module is imported the first time it is routed to in the execution environment.
+
+Per handler, the router keeps:
+  * the timeout, ROUTED_HANDLER_TIMEOUT_SECONDS (a JSON object of lambda name to seconds),
+    the remaining time the handler sees (get_remaining_time_in_millis) is capped at its own timeout,
+    and a handler that runs over it is logged as a timeout. The router does not interrupt the handler,
+    the hard limit is the timeout of the router function itself (aliases have no timeout of their own),
+    which is set to the largest routed timeout plus a margin. So a handler with a short timeout
+    can run far past the limit it had as its own function
+  * the metrics, the handler sees its own function name (<router>:<lambda name>) so its instrumentation
+    is tagged with the routed lambda, and a RoutedInvocation EMF record is logged per invocation,
+    with its duration, and whether it started the execution environment (ColdStart) or imported the handler (HandlerInit)
+"""
+
+# Standard imports
+import importlib.util
+import json
+import sys
+from os import environ
+from pathlib import Path
+from time import monotonic, time
+from types import ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Layer imports
+from dragen_wgts_rna_tools.instrumentation import METRICS_NAMESPACE, is_instrumentation_enabled
+
+# Globals
+ROUTED_LAMBDA_NAMES_ENV_VAR = "ROUTED_LAMBDA_NAMES"
+ROUTED_HANDLER_TIMEOUT_SECONDS_ENV_VAR = "ROUTED_HANDLER_TIMEOUT_SECONDS"
+
+LAMBDAS_DIR = Path(__file__).parent.parent
+ROUTER_LAMBDA_NAME = "lambda_router"
+
+_ROUTED_HANDLERS: Dict[str, Callable] = {}
+_IS_COLD_START = True
+
+
+class RoutedContext:
+    """
+    The lambda context as the routed handler sees it: its own function name, and its own deadline
+    """
+
+    def __init__(self, context: Any, lambda_name: str, deadline: Optional[float]):
+        self._context = context
+        self._deadline = deadline
+        self.function_name = f"{getattr(context, 'function_name', None) or ROUTER_LAMBDA_NAME}:{lambda_name}"
+
+    def get_remaining_time_in_millis(self) -> int:
+        remaining_time_ms = []
+        if hasattr(self._context, "get_remaining_time_in_millis"):
+            remaining_time_ms.append(self._context.get_remaining_time_in_millis())
+        if self._deadline is not None:
+            remaining_time_ms.append(max(int((self._deadline - monotonic()) * 1000), 0))
+        return min(remaining_time_ms) if remaining_time_ms else 0
+
+    def __getattr__(self, item: str) -> Any:
+        # Everything else (aws_request_id, invoked_function_arn, memory_limit_in_mb, ...) is the router's
+        return getattr(self._context, item)
+
+
+def get_routed_lambda_names() -> List[str]:
+    """
+    The lambdas deployed in the router, ROUTED_LAMBDA_NAMES (comma separated), else every other lambda beside it
+    """
+    if environ.get(ROUTED_LAMBDA_NAMES_ENV_VAR):
+        return environ[ROUTED_LAMBDA_NAMES_ENV_VAR].split(",")
+    return sorted(map(
+        lambda lambda_dir_iter_: lambda_dir_iter_.name[:-len("_py")],
+        filter(
+            lambda lambda_dir_iter_: (
+                lambda_dir_iter_.name != f"{ROUTER_LAMBDA_NAME}_py" and
+                (lambda_dir_iter_ / f"{lambda_dir_iter_.name[:-len('_py')]}.py").is_file()
+            ),
+            LAMBDAS_DIR.glob("*_py")
+        )
+    ))
+
+
+def get_handler_timeout_seconds(lambda_name: str) -> Optional[float]:
+    return json.loads(environ.get(ROUTED_HANDLER_TIMEOUT_SECONDS_ENV_VAR, "{}")).get(lambda_name)
+
+
+def get_routed_action(event: Any, context: Any) -> Tuple[str, Any]:
+    """
+    The lambda name to route to, and the event to route
+    """
+    routed_lambda_names = get_routed_lambda_names()
+
+    # The alias the router was invoked through
+    invoked_function_arn = getattr(context, "invoked_function_arn", None) or ""
+    qualifier = invoked_function_arn.split(":function:", 1)[-1].partition(":")[2]
+    if qualifier in routed_lambda_names:
+        return qualifier, event
+
+    # Or the action field (handler events may have their own 'action' key, i.e. the metadata state change)
+    if isinstance(event, dict) and event.get("action") in routed_lambda_names and "event" in event:
+        return event["action"], event["event"]
+
+    raise ValueError(
+        f"Could not route the invocation, expected an alias or action in {', '.join(routed_lambda_names)}"
+    )
+
+
+def load_routed_handler(lambda_name: str) -> Tuple[Callable, bool]:
+    """
+    Import app/lambdas/<lambda_name>_py/<lambda_name>.py (once per execution environment),
+    returns the handler and whether it was imported by this call
+    """
+    if lambda_name in _ROUTED_HANDLERS:
+        return _ROUTED_HANDLERS[lambda_name], False
+
+    module: Optional[ModuleType] = sys.modules.get(lambda_name)
+    is_handler_init = module is None
+    if module is None:
+        spec = importlib.util.spec_from_file_location(
+            lambda_name, LAMBDAS_DIR / f"{lambda_name}_py" / f"{lambda_name}.py"
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[lambda_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except Exception:
+            del sys.modules[lambda_name]
+            raise
+    _ROUTED_HANDLERS[lambda_name] = module.handler
+    return module.handler, is_handler_init
+
+
+def to_routed_invocation_emf_record(
+        lambda_name: str,
+        duration_ms: float,
+        is_cold_start: bool,
+        is_handler_init: bool,
+        is_timeout: bool,
+        error: Optional[str],
+) -> Dict[str, Any]:
+    return {
+        "_aws": {
+            "Timestamp": int(time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["LambdaName"]],
+                    "Metrics": [
+                        {"Name": "RoutedDuration", "Unit": "Milliseconds"},
+                        {"Name": "ColdStart", "Unit": "Count"},
+                        {"Name": "HandlerInit", "Unit": "Count"},
+                        {"Name": "RoutedErrors", "Unit": "Count"},
+                        {"Name": "RoutedTimeouts", "Unit": "Count"},
+                    ],
+                }
+            ],
+        },
+        "RecordType": "RoutedInvocation",
+        "LambdaName": lambda_name,
+        "RoutedDuration": round(duration_ms, 2),
+        "ColdStart": int(is_cold_start),
+        "HandlerInit": int(is_handler_init),
+        "RoutedErrors": int(error is not None),
+        "RoutedTimeouts": int(is_timeout),
+        # Properties
+        "Error": error,
+    }
+
+
+def handler(event, context):
+    """
+    Route the event to a handler, through the alias the router was invoked through or the action field
+
+    Input (direct invocations):
+      {
+        "action": "get_libraries",
+        "event": {...}  // the event of the routed handler
+      }
+
+    Output:
+      The output of the routed handler
+    """
+    global _IS_COLD_START
+    is_cold_start, _IS_COLD_START = _IS_COLD_START, False
+
+    lambda_name, routed_event = get_routed_action(event, context)
+
+    start = monotonic()
+    timeout_seconds = get_handler_timeout_seconds(lambda_name)
+    error = None
+    is_handler_init = False
+    try:
+        routed_handler, is_handler_init = load_routed_handler(lambda_name)
+        routed_context = RoutedContext(
+            context, lambda_name,
+            deadline=start + timeout_seconds if timeout_seconds is not None else None
+        )
+        return routed_handler(routed_event, routed_context)
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration_seconds = monotonic() - start
+        if is_instrumentation_enabled():
+            print(json.dumps(to_routed_invocation_emf_record(
+                lambda_name=lambda_name,
+                duration_ms=duration_seconds * 1000,
+                is_cold_start=is_cold_start,
+                is_handler_init=is_handler_init,
+                is_timeout=timeout_seconds is not None and duration_seconds > timeout_seconds,
+                error=error,
+            )), flush=True)
+
+
+# if __name__ == "__main__":
+#     from os import environ
+#     environ['AWS_PROFILE'] = 'umccr-development'
+#     environ['HOSTNAME_SSM_PARAMETER_NAME'] = '/hosted_zone/umccr/name'
+#     environ['ORCABUS_TOKEN_SECRET_ID'] = 'orcabus/token-service-jwt'
+#     print(json.dumps(
+#         handler(
+#             {
+#                 "action": "get_libraries",
+#                 "event": {
+#                     "libraries": [
+#                         {
+#                             "libraryId": "L2401544",
+#                             "orcabusId": "lib.01JBMVHM2D5GCDSZW8NSYP6DA6"
+#                         }
+#                     ]
+#                 }
+#             },
+#             None
+#         ),
+#         indent=4
+#     ))
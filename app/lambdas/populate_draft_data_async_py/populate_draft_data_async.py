@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+
+"""
+Populate a draft in a single invocation (the 'asyncio' populate draft data engine).
+
+Runs the stages of the populate draft data state machine (the 'stepFunctions' engine)
+in one invocation, with the independent stages and remote calls run concurrently on an asyncio event loop.
+The orcabus api calls block, so they run in a thread pool the size of the pooled OrcaBus API session
+(see dragen_wgts_rna_tools.api_client), and share its connections and cached token.
+
+The fastq sync is a callback (the state machine waits for a task token), so the draft is populated in two phases:
+  * prepare: validate the draft, then get the tags (library id, fastq rgids and metadata tags)
+    alongside the default parameters, and fill in the engine parameters.
+    If the tags or engine parameters have changed, return the DRAFT update for the state machine to publish.
+    Otherwise, if the draft has no sequence data, return the fastq ids the state machine waits on,
+    else carry on to the complete phase in the same invocation.
+  * complete: get the fastq list rows, qc summary stats and ntsm check,
+    and add the inputs, reference data and qc tags to the draft.
+    Return the workflow run update, and whether its payload has changed.
+
+Each stage mirrors a state (or lambda) of the populate_draft_data state machine,
+and the workflow run update is built with the same helpers (see dragen_wgts_rna_tools.draft_population),
+so both engines publish the same events.
+"""
+
+# Standard imports
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from os import environ
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from deepdiff import DeepDiff
+
+# Layer imports
+from orcabus_api_tools.fastq import (
+    get_fastq_list_rows_in_fastq_set,
+    get_fastq_sets,
+    to_fastq_list_row,
+    validate_ntsm_external,
+    validate_ntsm_internal,
+)
+from orcabus_api_tools.metadata import get_library_from_library_id
+from dragen_wgts_rna_tools.api_client import POOL_MAXSIZE, init_api_client
+from dragen_wgts_rna_tools.comments import add_comment
+from dragen_wgts_rna_tools.draft_population import (
+    DEFAULT_PAYLOAD_VERSION_ENV_VAR,
+    add_reference_data,
+    build_workflow_run_update,
+    get_draft_schema,
+    get_engine_parameters,
+    get_missing_fields,
+    get_populate_draft_comment_author,
+    get_populate_draft_comment_body,
+    get_provided_engine_parameter_keys,
+    get_qc_summary_stats,
+    get_rgid_from_fastq,
+    is_truthy,
+    is_valid_draft,
+    non_duplicate_cross_product,
+    resolve_default_parameters,
+    sift,
+)
+from dragen_wgts_rna_tools.instrument_run_fastqs import DEFAULT_REQUIRED_FIELDS, get_instrument_run_fastq_cache
+from dragen_wgts_rna_tools.library_cache import LIBRARY_TAG_FIELDS, LibraryCache, project_library
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+# Globals
+DRAFT_STATUS = "DRAFT"
+
+LIBRARY_CACHE = LibraryCache()
+
+
+def get_draft_vars(detail: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The libraries, payload, data, engine parameters, tags and inputs of the draft
+    (as assigned by the 'Get draft payload var' state)
+    """
+    payload = detail.get("payload") if is_truthy(detail.get("payload")) else {
+        "version": environ[DEFAULT_PAYLOAD_VERSION_ENV_VAR]
+    }
+    data = (detail.get("payload") or {}).get("data")
+    data = data if is_truthy(data) else {}
+    return {
+        "libraries": detail.get("libraries"),
+        "payload": payload,
+        "data": data,
+        **{
+            key: data.get(key) if is_truthy(data.get(key)) else {}
+            for key in ("engineParameters", "tags", "inputs")
+        },
+    }
+
+
+async def run_in_thread(func: Callable, *args) -> Any:
+    return await asyncio.to_thread(func, *args)
+
+
+async def run_with_executor(coroutine_func: Callable[..., Awaitable[Any]], *args) -> Any:
+    """
+    Run a coroutine with a thread pool the size of the OrcaBus API session's connection pool
+    (asyncio.run shuts the pool down when the coroutine is done)
+    """
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=POOL_MAXSIZE))
+    return await coroutine_func(*args)
+
+
+def add_populate_draft_comment(
+        detail: Dict[str, Any],
+        execution_arn: Optional[str],
+        comment_type: str,
+        missing_fields: Optional[List[str]] = None
+) -> bool:
+    return add_comment(
+        workflow_run_id=detail["orcabusId"],
+        body=get_populate_draft_comment_body(comment_type, missing_fields),
+        author=get_populate_draft_comment_author(),
+        execution_arn=execution_arn,
+    )
+
+
+def get_fastq_rgid_list_from_library_id(library_id: str) -> List[str]:
+    """
+    The rgids of the library's current fastq set (see get_fastq_rgids_from_library_id)
+    """
+    fastq_sets = get_fastq_sets(library=library_id, currentFastqSet=True)
+
+    if len(fastq_sets) != 1:
+        raise ValueError(f"Expected exactly one current fastq set for library {library_id}, found {len(fastq_sets)}")
+
+    return list(map(
+        lambda fastq_iter_: get_rgid_from_fastq(fastq_iter_),
+        get_fastq_list_rows_in_fastq_set(fastq_sets[0]['id'])
+    ))
+
+
+async def get_fastq_obj_list(
+        fastq_rgid_list: List[str],
+        required_fields: Sequence[str] = DEFAULT_REQUIRED_FIELDS
+) -> List[Dict[str, Any]]:
+    """
+    The fastqs of the rgids, from the (bulk fetched) fastqs of their instrument run
+    """
+    return await run_in_thread(
+        get_instrument_run_fastq_cache().get_fastqs_by_rgid_list, fastq_rgid_list, required_fields
+    )
+
+
+async def get_tags(tags: Dict[str, Any], libraries: Optional[List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    The 'Do we have matching libraries', 'Get primitive tags from linked libraries' and 'Get tags' states,
+    the fastq rgids and metadata tags are collected concurrently
+    """
+    library_id_list = list(map(lambda library_iter_: library_iter_['libraryId'], libraries or []))
+    if not (len(library_id_list) == 1 and tags.get("libraryId") == library_id_list[0]):
+        if not library_id_list:
+            raise ValueError("No libraries provided in the input")
+        if len(library_id_list) > 1:
+            raise ValueError("We expect at most one library in the input")
+        # The draft tags take precedence
+        tags = {"libraryId": library_id_list[0], **tags}
+
+    async def get_fastq_rgid_tags() -> Dict[str, Any]:
+        if is_truthy(tags.get("fastqRgidList")):
+            return {}
+        return {"fastqRgidList": await run_in_thread(get_fastq_rgid_list_from_library_id, tags.get("libraryId"))}
+
+    async def get_metadata_tags() -> Dict[str, Any]:
+        library_tags = project_library(
+            await run_in_thread(LIBRARY_CACHE.get, tags.get("libraryId"), get_library_from_library_id),
+            LIBRARY_TAG_FIELDS
+        )
+        return {
+            "subjectId": library_tags.get("subjectId"),
+            "individualId": library_tags.get("individualId"),
+        }
+
+    fastq_rgid_tags, metadata_tags = await asyncio.gather(get_fastq_rgid_tags(), get_metadata_tags())
+    return sift({**tags, **fastq_rgid_tags, **metadata_tags})
+
+
+def get_change_comment_type(
+        data: Dict[str, Any],
+        tags: Dict[str, Any],
+        engine_parameters: Dict[str, Any]
+) -> Optional[str]:
+    """
+    The 'Tags or Engine Parameters have changed' state, None if neither has changed
+    """
+    tags_changed = (data.get("tags") or {}) != tags
+    engine_parameters_changed = (data.get("engineParameters") or {}) != engine_parameters
+    if tags_changed and engine_parameters_changed:
+        return "both_changed"
+    if tags_changed:
+        return "tags_changed"
+    if engine_parameters_changed:
+        return "engine_parameters_changed"
+    return None
+
+
+def get_draft_update(
+        detail: Dict[str, Any],
+        draft_vars: Dict[str, Any],
+        tags: Dict[str, Any],
+        engine_parameters: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    The 'Put DRAFT update event' detail, the state machine sets its timestamp
+    """
+    payload_data = sift({
+        "inputs": draft_vars["inputs"] if is_truthy(draft_vars["inputs"]) else None,
+        "engineParameters": engine_parameters if is_truthy(engine_parameters) else None,
+        "tags": tags if is_truthy(tags) else None,
+    })
+    return sift({
+        **detail,
+        "id": None,
+        "status": DRAFT_STATUS,
+        "libraries": draft_vars["libraries"],
+        "payload": sift({**draft_vars["payload"], "refId": None, "data": payload_data}),
+    })
+
+
+async def get_ntsm_related(fastq_obj_list: List[Dict[str, Any]]) -> Optional[bool]:
+    """
+    The ntsm check of the fastq sets (see check_ntsm_internal), the pairs are validated concurrently
+    """
+    fastq_set_id_list = list(map(lambda fastq_iter_: fastq_iter_['fastqSetId'], fastq_obj_list))
+
+    if len(fastq_set_id_list) == 0:
+        return None
+
+    if len(fastq_set_id_list) == 1:
+        return await run_in_thread(validate_ntsm_internal, fastq_set_id_list[0])
+
+    # If any pair of fastq set ids fails validation, the result is False
+    return all(await asyncio.gather(*map(
+        lambda fastq_set_id_pair_iter_: run_in_thread(
+            validate_ntsm_external, fastq_set_id_pair_iter_[0], fastq_set_id_pair_iter_[1]
+        ),
+        non_duplicate_cross_product(fastq_set_id_list)
+    )))
+
+
+async def get_sequence_data(inputs: Dict[str, Any], fastq_obj_list: List[Dict[str, Any]]) -> Any:
+    """
+    The first branch of the 'Get Inputs' state (after the fastq sync), the draft sequence data if it has any
+    """
+    if is_truthy(inputs.get("sequenceData")):
+        return inputs["sequenceData"]
+
+    return {
+        "fastqListRows": list(await asyncio.gather(*map(
+            lambda fastq_id_iter_: run_in_thread(to_fastq_list_row, fastq_id_iter_),
+            sorted(map(lambda fastq_iter_: fastq_iter_['id'], fastq_obj_list))
+        )))
+    }
+
+
+async def complete_draft(
+        detail: Dict[str, Any],
+        population: Dict[str, Any],
+        execution_arn: Optional[str]
+) -> Dict[str, Any]:
+    """
+    Add the inputs, reference data and qc tags to the draft, and build the workflow run update
+    """
+    draft_vars = get_draft_vars(detail)
+    tags = population["tags"]
+    engine_parameters = population["engineParameters"]
+    defaults = population["defaults"]
+
+    # Every stage after the fastq sync reads the same fastqs, so each is fetched once
+    fastq_obj_list = await get_fastq_obj_list(
+        tags.get("fastqRgidList") or [], required_fields=("id", "fastqSetId", "qc")
+    )
+    sequence_data, ntsm_related = await asyncio.gather(
+        get_sequence_data(draft_vars["inputs"], fastq_obj_list),
+        get_ntsm_related(fastq_obj_list),
+    )
+    qc_summary_stats = get_qc_summary_stats(fastq_obj_list)
+
+    # The 'Get Inputs' and 'Add reference data' states
+    inputs = sift({
+        **(defaults.get("inputs") if is_truthy(defaults.get("inputs")) else {}),
+        **draft_vars["inputs"],
+        "sequenceData": sequence_data,
+        **sift({"sampleName": tags.get("libraryId")}),
+    })
+    inputs = add_reference_data(inputs, defaults)
+
+    # The 'Add qc tags' state
+    tags = sift({
+        **tags,
+        "preLaunchCoverageEst": qc_summary_stats["coverageSum"],
+        "preLaunchDupFracEst": qc_summary_stats["dupFracAvg"],
+        "preLaunchInsertSizeEst": qc_summary_stats["insertSizeAvg"],
+        "ntsmInternalPassing": ntsm_related,
+    })
+
+    # The 'Generate WRU event object' state, the run context is the draft's own identifiers
+    # (without linked libraries, as for the workflow run object, see generate_wru_event_object_with_merged_data)
+    payload_version = draft_vars["payload"].get("version") or environ[DEFAULT_PAYLOAD_VERSION_ENV_VAR]
+    workflow_run_update = build_workflow_run_update(
+        {
+            "orcabusId": detail["orcabusId"],
+            "portalRunId": detail["portalRunId"],
+            "workflow": detail["workflow"],
+            "workflowRunName": detail["workflowRunName"],
+        },
+        draft_vars["libraries"] or [],
+        {
+            "version": payload_version,
+            "data": {
+                "inputs": inputs,
+                "tags": tags,
+                "engineParameters": engine_parameters,
+            },
+        }
+    )
+
+    # The 'Compare payload' state
+    old_payload = dict(filter(
+        lambda kv_iter_: kv_iter_[0] not in ("orcabusId", "refId"),
+        draft_vars["payload"].items()
+    ))
+    if DeepDiff(old_payload, workflow_run_update["payload"]):
+        return {"hasChanged": True, "workflowRunUpdate": workflow_run_update}
+
+    # Nothing new, comment on what the draft is still missing
+    missing_fields = get_missing_fields(
+        await run_in_thread(get_draft_schema, payload_version),
+        workflow_run_update["payload"]["data"]
+    )
+    await run_in_thread(
+        add_populate_draft_comment, detail, execution_arn, "no_change_missing_fields", missing_fields
+    )
+    return {"hasChanged": False, "workflowRunUpdate": workflow_run_update}
+
+
+async def prepare_draft(detail: Dict[str, Any], execution_arn: Optional[str]) -> Dict[str, Any]:
+    """
+    Validate the draft, then fill in its tags and engine parameters
+    """
+    draft_vars = get_draft_vars(detail)
+    workflow_version = detail["workflow"]["version"]
+    portal_run_id = detail["portalRunId"]
+
+    # The 'Validate draft data' state
+    draft_schema = await run_in_thread(get_draft_schema, draft_vars["payload"].get("version"))
+    if is_valid_draft(draft_schema, draft_vars["data"]):
+        return {"isValid": True}
+
+    # The tags and the default parameters do not depend on each other
+    tags, defaults = await asyncio.gather(
+        get_tags(draft_vars["tags"], draft_vars["libraries"]),
+        run_in_thread(
+            resolve_default_parameters, workflow_version, portal_run_id, None,
+            get_provided_engine_parameter_keys(draft_vars["engineParameters"])
+        ),
+    )
+    engine_parameters = get_engine_parameters(draft_vars["engineParameters"], defaults)
+
+    # Publish the new tags and engine parameters before populating the inputs
+    change_comment_type = get_change_comment_type(draft_vars["data"], tags, engine_parameters)
+    if change_comment_type is not None:
+        await run_in_thread(add_populate_draft_comment, detail, execution_arn, change_comment_type)
+        return {
+            "isValid": False,
+            "draftUpdate": get_draft_update(detail, draft_vars, tags, engine_parameters),
+        }
+
+    await run_in_thread(add_populate_draft_comment, detail, execution_arn, "updating_inputs")
+    population = {
+        "tags": tags,
+        "engineParameters": engine_parameters,
+        "defaults": defaults,
+    }
+
+    # The state machine requests the fastq sync, then calls back with the complete phase
+    if not is_truthy(draft_vars["inputs"].get("sequenceData")):
+        fastq_obj_list = await get_fastq_obj_list(tags.get("fastqRgidList") or [])
+        return {
+            "isValid": False,
+            "fastqIdList": sorted(map(lambda fastq_iter_: fastq_iter_['id'], fastq_obj_list)),
+            "population": population,
+        }
+
+    return {
+        "isValid": False,
+        **(await complete_draft(detail, population, execution_arn)),
+    }
+
+
+@instrument_handler
+def handler(event, context):
+    """
+    Populate a draft workflow run (one phase of it)
+
+    Input:
+      {
+        "phase": "prepare",  // or "complete", after the fastq sync
+        "detail": {...},  // the DRAFT workflow run state change
+        "population": {"tags": {...}, "engineParameters": {...}, "defaults": {...}},  // complete phase only
+        "executionArn": "arn:aws:states:..."
+      }
+
+    Output (one of):
+      {"isValid": true}  // nothing to populate
+      {"isValid": false, "draftUpdate": {...}}  // publish the new tags and engine parameters
+      {"isValid": false, "fastqIdList": [...], "population": {...}}  // prepare phase, wait for the fastq sync
+      {"isValid": false, "hasChanged": true, "workflowRunUpdate": {...}}  // the populated draft
+    """
+    detail = event["detail"]
+    execution_arn = event.get("executionArn")
+
+    if event.get("phase", "prepare") == "complete":
+        return {
+            "isValid": False,
+            **asyncio.run(run_with_executor(complete_draft, detail, event["population"], execution_arn)),
+        }
+
+    return asyncio.run(run_with_executor(prepare_draft, detail, execution_arn))
@@ -24,7 +24,7 @@ Performs the following steps:
 
 # Imports
 from pathlib import Path
-from typing import Dict, Tuple, cast, List
+from typing import Dict, Optional, Tuple, cast, List
 import logging
 from os import environ
 from time import sleep
@@ -38,12 +38,20 @@ from wrapica.project_pipelines import get_project_pipeline_obj
 from wrapica.project import get_project_obj_from_project_id
 
 # Layer imports
-from orcabus_api_tools.workflow import add_comment_to_workflow_run, get_workflow_run
 from orcabus_api_tools.filemanager import get_s3_object_id_from_s3_uri, list_files_recursively
 from orcabus_api_tools.filemanager.errors import S3FileNotFoundError
 
 from icav2_tools import set_icav2_env_vars
 
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.comments import add_comment
+from dragen_wgts_rna_tools.run_context import RunContext, get_run_context
+from dragen_wgts_rna_tools.workflow_run_resolver import get_workflow_run_resolver
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
 # Globals
 WORKFLOW_NAME_ENV_VAR = "WORKFLOW_NAME"
 TEST_BUCKET_ENV_VAR = "TEST_DATA_BUCKET_NAME"
@@ -61,35 +69,19 @@ LOGS_MIDFIX = "logs"
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
-# Comment formatting constants
-MAX_COMMENT_LENGTH = 1024
-TRUNCATION_SUFFIX = "\n... [truncated, see execution ARN for full detail]"
-
-
-def _format_comment_with_arn(body: str, execution_arn: str) -> str:
-    """
-    Append the execution ARN footer to a comment and enforce the 1024 char limit.
-    """
-    footer = f"---\nStep Functions Execution: {execution_arn}"
-    full_comment = f"{body}\n{footer}"
-
-    if len(full_comment) > MAX_COMMENT_LENGTH:
-        available = MAX_COMMENT_LENGTH - len(footer) - len(TRUNCATION_SUFFIX) - 1
-        full_comment = f"{body[:available]}{TRUNCATION_SUFFIX}\n{footer}"
-
-    return full_comment
-
 
 def validate_engine_parameters(
         engine_parameters: Dict,
         workflow_run_id: str,
-        project_prefix: str
+        project_prefix: str,
+        run_context: Optional[RunContext] = None
 ) -> Tuple[bool, str]:
     """
     Validate the engine parameters.
     :param engine_parameters: The engine parameters to validate.
     :param workflow_run_id: The workflow run ID
     :param project_prefix: The project prefix
+    :param run_context: The run context (if any), used in place of looking up the portal run id
     :return: A tuple of (is_valid, comment)
     """
     # Get the project id
@@ -124,7 +116,10 @@ def validate_engine_parameters(
         return False, f"The pipeline {pipeline_id} cannot be found in the project {project_id}"
 
     # Get the portal run id from the workflow run id
-    portal_run_id = get_workflow_run(workflow_run_id)['portalRunId']
+    if run_context is not None:
+        portal_run_id = run_context.portal_run_id
+    else:
+        portal_run_id = get_workflow_run_resolver().get_immutable_fields_by_orcabus_id(workflow_run_id)['portalRunId']
 
     # Confirm that the output uri ends with /<analysis-midfix>/<workflow-name>/<portal-run-id>/
     if not output_uri.endswith(f"/{ANALYSIS_MIDFIX}/{WORKFLOW_NAME}/{portal_run_id}/"):
@@ -237,6 +232,7 @@ def validate_inputs(
     return True, ""
 
 
+@instrument_handler
 def handler(event, context) -> Dict[str, bool]:
     """
     Given a draft schema, validate it against the current schema and print the results.
@@ -245,6 +241,7 @@ def handler(event, context) -> Dict[str, bool]:
       {
         "workflowRunId": "wfr.xxx",
         "executionArn": "arn:aws:states:...",
+        "runContext": { ... },  // optional, saves looking up the portal run id
         "data": {
           "engineParameters": {
             "projectId": "...",
@@ -266,8 +263,9 @@ def handler(event, context) -> Dict[str, bool]:
 
     # Get the event data
     payload_data = event.get('data')
-    workflow_run_id = event.get("workflowRunId", "")
-    execution_arn = event.get("executionArn", "")
+    run_context = get_run_context(event)
+    workflow_run_id = event.get("workflowRunId") or (run_context.orcabus_id if run_context else "")
+    execution_arn = event.get("executionArn") or (run_context.execution_arn if run_context else "")
 
     # Get the ICAv2 project id from the event
     engine_parameters = payload_data.get("engineParameters", {})
@@ -275,37 +273,31 @@ def handler(event, context) -> Dict[str, bool]:
     # Get the project prefix
     project_id = engine_parameters.get("projectId")
     if project_id is None:
-        add_comment_to_workflow_run(
-            workflow_run_orcabus_id=workflow_run_id,
-            comment=_format_comment_with_arn(
-                "Post schema validation failed: projectId is not set",
-                execution_arn
-            ),
-            author=COMMENT_AUTHOR
+        add_comment(
+            workflow_run_id=workflow_run_id,
+            body="Post schema validation failed: projectId is not set",
+            author=COMMENT_AUTHOR,
+            execution_arn=execution_arn
         )
         return {"isValid": False}
 
     try:
         project_prefix = get_s3_key_prefix_by_project_id(project_id)
     except ApiException:
-        add_comment_to_workflow_run(
-            workflow_run_orcabus_id=workflow_run_id,
-            comment=_format_comment_with_arn(
-                f"Post schema validation failed: cannot resolve S3 key prefix for projectId '{project_id}'",
-                execution_arn
-            ),
-            author=COMMENT_AUTHOR
+        add_comment(
+            workflow_run_id=workflow_run_id,
+            body=f"Post schema validation failed: cannot resolve S3 key prefix for projectId '{project_id}'",
+            author=COMMENT_AUTHOR,
+            execution_arn=execution_arn
         )
         return {"isValid": False}
 
     if project_prefix is None:
-        add_comment_to_workflow_run(
-            workflow_run_orcabus_id=workflow_run_id,
-            comment=_format_comment_with_arn(
-                f"Post schema validation failed: no S3 key prefix configured for projectId '{project_id}'",
-                execution_arn
-            ),
-            author=COMMENT_AUTHOR
+        add_comment(
+            workflow_run_id=workflow_run_id,
+            body=f"Post schema validation failed: no S3 key prefix configured for projectId '{project_id}'",
+            author=COMMENT_AUTHOR,
+            execution_arn=execution_arn
         )
         return {"isValid": False}
 
@@ -314,6 +306,7 @@ def handler(event, context) -> Dict[str, bool]:
         engine_parameters,
         workflow_run_id=workflow_run_id,
         project_prefix=project_prefix,
+        run_context=run_context,
     )
 
     # Check if the inputs are also valid
@@ -330,13 +323,11 @@ def handler(event, context) -> Dict[str, bool]:
 
     # Somewhere along the way, the validation failed
     if not is_valid:
-        add_comment_to_workflow_run(
-            workflow_run_orcabus_id=workflow_run_id,
-            comment=_format_comment_with_arn(
-                f"Post schema validation failed: {comment}",
-                execution_arn
-            ),
-            author=COMMENT_AUTHOR
+        add_comment(
+            workflow_run_id=workflow_run_id,
+            body=f"Post schema validation failed: {comment}",
+            author=COMMENT_AUTHOR,
+            execution_arn=execution_arn
         )
         return {
             "isValid": False
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""
+Put the WRU events of a batch of ICAv2 WES State Change Events.
+
+Triggered by the ICAv2 WES event queue (SQS event source, with a batching window and partial batch responses),
+which holds the ICAv2 WES State Change Events in the 'batched' ICAv2 WES event processing mode.
+
+This replaces an icav2 wes event to wrsc event execution per event:
+  1. the events of the batch are coalesced per portal run id, so only the latest status of each run is converted,
+     and events that are stale according to the run status ledger are dropped
+  2. the surviving events are converted to WRU events (see dragen_wgts_rna_tools.icav2_wes_events),
+     a FAILED event also adds the failure comment to the workflow run
+  3. the WRU events are put on the event bus, at most 10 entries per putEvents call
+  4. the run status ledger is updated for the events that were put
+
+If a run could not be converted or its WRU event was not put, all the messages of that run
+(including the superseded ones) are reported as batch item failures and redelivered.
+"""
+
+# Standard imports
+import json
+import logging
+import typing
+from os import environ
+from typing import Any, Dict, List
+
+import boto3
+
+# Layer imports
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.comments import add_comment
+from dragen_wgts_rna_tools.icav2_wes_events import (
+    coalesce_icav2_wes_events,
+    convert_icav2_wes_event_to_wru_event,
+    get_icav2_wes_event_from_record,
+)
+from dragen_wgts_rna_tools.run_context import RunContext
+from dragen_wgts_rna_tools.status_ledger import RunStatusLedger
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+from dragen_wgts_rna_tools.wes_failure_comments import build_failure_comment_body, get_failure_comment_author
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_events import EventBridgeClient
+
+# Globals
+EVENT_BUS_NAME_ENV_VAR = "EVENT_BUS_NAME"
+EVENT_SOURCE_ENV_VAR = "EVENT_SOURCE"
+WORKFLOW_RUN_UPDATE_DETAIL_TYPE_ENV_VAR = "WORKFLOW_RUN_UPDATE_DETAIL_TYPE"
+# The putEvents limit
+MAX_PUT_EVENTS_ENTRIES = 10
+
+# Highest status seen per run, shared across invocations
+RUN_STATUS_LEDGER = RunStatusLedger()
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def add_failure_comment(wru_event_object: Dict[str, Any]) -> None:
+    add_comment(
+        workflow_run_id=RunContext.from_dict(wru_event_object['runContext']).orcabus_id,
+        body=build_failure_comment_body(
+            error_type=wru_event_object['errorType'],
+            error_message_uri=wru_event_object['errorMessageUri'],
+            execution_arn=None,
+        ),
+        author=get_failure_comment_author(),
+    )
+
+
+def get_put_events_entry(workflow_run_update_event: Dict[str, Any]) -> Dict[str, str]:
+    return {
+        "Detail": json.dumps(workflow_run_update_event),
+        "DetailType": environ[WORKFLOW_RUN_UPDATE_DETAIL_TYPE_ENV_VAR],
+        "EventBusName": environ[EVENT_BUS_NAME_ENV_VAR],
+        "Source": environ[EVENT_SOURCE_ENV_VAR],
+    }
+
+
+def put_workflow_run_update_events(
+        events_client: "EventBridgeClient",
+        workflow_run_update_events: List[Dict[str, Any]]
+) -> List[str]:
+    """
+    Put the WRU events, in chunks of MAX_PUT_EVENTS_ENTRIES
+    :param events_client:
+    :param workflow_run_update_events:
+    :return: The portal run ids of the WRU events that were not put
+    """
+    failed_portal_run_ids = []
+    for chunk_start in range(0, len(workflow_run_update_events), MAX_PUT_EVENTS_ENTRIES):
+        chunk = workflow_run_update_events[chunk_start:chunk_start + MAX_PUT_EVENTS_ENTRIES]
+        try:
+            response = events_client.put_events(
+                Entries=list(map(get_put_events_entry, chunk))
+            )
+        except Exception as e:
+            logger.error(f"Could not put {len(chunk)} WRU event(s): {e}")
+            failed_portal_run_ids.extend(map(lambda event_iter_: event_iter_['portalRunId'], chunk))
+            continue
+
+        # Result entries are in the same order as the request entries
+        for workflow_run_update_event, result_entry in zip(chunk, response.get("Entries", [])):
+            if result_entry.get("ErrorCode"):
+                logger.error(
+                    f"Could not put the WRU event of {workflow_run_update_event['portalRunId']}: "
+                    f"{result_entry['ErrorCode']} {result_entry.get('ErrorMessage', '')}"
+                )
+                failed_portal_run_ids.append(workflow_run_update_event['portalRunId'])
+
+    return failed_portal_run_ids
+
+
+@instrument_handler
+def handler(event, context) -> Dict[str, Any]:
+    """
+    Convert a batch of ICAv2 WES State Change Events to WRU events, and put them on the event bus.
+
+    Input:
+      {
+        "Records": [
+          {
+            "messageId": "...",
+            "body": "{\"id\": \"...\", \"detail-type\": \"Icav2WesAnalysisStateChange\", \"detail\": {...}}"
+          }
+        ]
+      }
+
+    Output:
+      {
+        "batchItemFailures": [{"itemIdentifier": "<message id>"}],
+        "putEventCount": 12,
+        "staleEventCount": 3
+      }
+    """
+    batch_item_failures = []
+
+    # Parse the records, keeping the message ids of each run
+    icav2_wes_events = []
+    message_ids_by_portal_run_id: Dict[str, List[str]] = {}
+    for record in event.get("Records", []):
+        try:
+            icav2_wes_event = get_icav2_wes_event_from_record(record)
+            portal_run_id = icav2_wes_event['tags']['portalRunId']
+        except Exception as e:
+            logger.error(f"Could not parse the ICAv2 WES event of message {record.get('messageId')}: {e}")
+            batch_item_failures.append({"itemIdentifier": record['messageId']})
+            continue
+        icav2_wes_events.append(icav2_wes_event)
+        message_ids_by_portal_run_id.setdefault(portal_run_id, []).append(record['messageId'])
+
+    # Only the latest status of each run, and only if the ledger has not seen a higher status
+    coalesced_icav2_wes_events = coalesce_icav2_wes_events(icav2_wes_events)
+    fresh_icav2_wes_events = list(filter(
+        lambda icav2_wes_event_iter_: not RUN_STATUS_LEDGER.is_stale_event(icav2_wes_event_iter_),
+        coalesced_icav2_wes_events
+    ))
+
+    # Convert the events, adding the failure comments
+    failed_portal_run_ids = []
+    converted_icav2_wes_events = []
+    workflow_run_update_events = []
+    for icav2_wes_event in fresh_icav2_wes_events:
+        try:
+            wru_event_object = convert_icav2_wes_event_to_wru_event(icav2_wes_event)
+            if wru_event_object['workflowRunUpdateEvent']['status'] == 'FAILED':
+                add_failure_comment(wru_event_object)
+        except Exception as e:
+            logger.error(f"Could not convert the ICAv2 WES event of {icav2_wes_event['tags']['portalRunId']}: {e}")
+            failed_portal_run_ids.append(icav2_wes_event['tags']['portalRunId'])
+            continue
+        converted_icav2_wes_events.append(icav2_wes_event)
+        workflow_run_update_events.append(wru_event_object['workflowRunUpdateEvent'])
+
+    # Put the WRU events
+    events_client: "EventBridgeClient" = boto3.client("events")
+    unput_portal_run_ids = put_workflow_run_update_events(events_client, workflow_run_update_events)
+    failed_portal_run_ids.extend(unput_portal_run_ids)
+    put_event_count = len(workflow_run_update_events) - len(unput_portal_run_ids)
+
+    # Only record the statuses that reached the event bus
+    for icav2_wes_event in converted_icav2_wes_events:
+        if icav2_wes_event['tags']['portalRunId'] not in failed_portal_run_ids:
+            RUN_STATUS_LEDGER.record_event(icav2_wes_event)
+
+    # Redeliver every message of a failed run
+    for portal_run_id in dict.fromkeys(failed_portal_run_ids):
+        batch_item_failures.extend(map(
+            lambda message_id_iter_: {"itemIdentifier": message_id_iter_},
+            message_ids_by_portal_run_id[portal_run_id]
+        ))
+
+    logger.info(json.dumps({
+        "recordCount": len(event.get("Records", [])),
+        "putEventCount": put_event_count,
+        "staleEventCount": len(coalesced_icav2_wes_events) - len(fresh_icav2_wes_events),
+    }))
+
+    return {
+        "batchItemFailures": batch_item_failures,
+        "putEventCount": put_event_count,
+        "staleEventCount": len(coalesced_icav2_wes_events) - len(fresh_icav2_wes_events),
+    }
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+Resolve the default parameters for a draft.
+
+Collects every SSM default the populate draft state machine needs
+(engine parameters, default inputs and the reference catalog) in a single batched GetParameters call.
+The reference, oraReference and annotationFile defaults come from one lookup in the reference catalog
+(see dragen_wgts_rna_tools.reference_catalog and dragen_wgts_rna_tools.draft_population).
+Values are cached in the warm container (see dragen_wgts_rna_tools.ssm_parameters),
+so most invocations do not call SSM at all.
+
+The defaults of the engine parameters the draft already has are not looked up.
+The other engine parameter defaults and the inputs defaults are required, a missing one fails the invocation
+(a KeyError naming the SSM parameters), reference data the catalog does not hold is omitted from the output.
+"""
+
+# Standard imports
+from typing import Any, Dict
+
+# Layer imports
+from dragen_wgts_rna_tools.draft_population import resolve_default_parameters
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+
+@instrument_handler
+def handler(event, context) -> Dict[str, Any]:
+    """
+    Resolve the default engine parameters, inputs and reference data for a workflow version
+
+    Input:
+      {
+        "workflowVersion": "4.4.4",
+        "portalRunId": "20250101abcd1234",
+        "oraVersion": "2.7.0",  // optional, defaults to the catalog's default for the workflow version
+        "providedEngineParameterKeys": ["pipelineId"]  // optional, the engine parameters the draft already has
+      }
+
+    Output:
+      {
+        "defaults": {
+          "engineParameters": {  // without the provided engine parameters
+            "projectId": "...",
+            "pipelineId": "...",
+            "outputUri": "s3://.../20250101abcd1234/",
+            "logsUri": "s3://.../20250101abcd1234/"
+          },
+          "inputs": {...},
+          "reference": {...},
+          "oraReference": "s3://...",
+          "annotationFile": "s3://...",
+          "referenceCatalogVersion": "2026.10.19"
+        }
+      }
+    """
+    return {
+        "defaults": resolve_default_parameters(
+            workflow_version=event['workflowVersion'],
+            portal_run_id=event['portalRunId'],
+            ora_version=event.get('oraVersion'),
+            provided_engine_parameter_keys=event.get('providedEngineParameterKeys') or [],
+        )
+    }
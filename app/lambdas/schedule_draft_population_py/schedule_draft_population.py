@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+
+"""
+Schedule draft population by instrument run.
+
+Triggered by the draft population queue (SQS event source, with a batching window and partial batch responses),
+which holds the DRAFT workflow run state change events, in the 'byInstrumentRun' draft population scheduling mode.
+
+When an instrument run is demultiplexed, the drafts of all of its libraries arrive at once.
+Rather than have every populate draft data execution look up its own fastqs, the scheduler:
+  1. groups the drafts of the batch by the instrument runs of their rgids
+     (the fastqRgidList tag, and the rgids of the library readsets)
+  2. fetches the fastqs of each instrument run in one bulk call, into the instrument run fastq cache
+     shared with the populate draft data lambdas (see dragen_wgts_rna_tools.instrument_run_fastqs)
+  3. starts a populate draft data execution for each draft, with the event detail as its input
+     (as the event rule targets the state machine in the 'perDraft' mode)
+
+Drafts without rgids yet (i.e. before their tags are populated) are started straight away,
+their fastqs are grouped on their next iteration.
+A draft is still started if its instrument run could not be fetched, its lambdas then look up the fastqs themselves.
+
+Executions are named after the portal run id and the event id, so a redelivered event does not start another execution.
+Messages that are not draft events (i.e. a body that is not JSON) are reported as batch item failures on their own,
+and end up in the dead letter queue.
+"""
+
+# Standard imports
+import json
+import logging
+import typing
+from collections import Counter
+from os import environ
+from typing import Any, Dict, List, Optional
+
+import boto3
+from botocore.exceptions import ClientError
+
+# Layer imports
+from dragen_wgts_rna_tools.api_client import init_api_client
+from dragen_wgts_rna_tools.instrument_run_fastqs import (
+    get_instrument_run_fastq_cache,
+    get_instrument_run_id_from_rgid,
+)
+from dragen_wgts_rna_tools.instrumentation import instrument_handler
+
+# Pooled OrcaBus API session and cached token, set up during the lambda init phase
+init_api_client()
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_stepfunctions import SFNClient
+
+# Globals
+POPULATE_DRAFT_DATA_STATE_MACHINE_ARN_ENV_VAR = "POPULATE_DRAFT_DATA_STATE_MACHINE_ARN"
+EXECUTION_ALREADY_EXISTS_ERROR_CODE = "ExecutionAlreadyExists"
+
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+
+def get_draft_rgid_list(detail: Dict[str, Any]) -> List[str]:
+    """
+    The rgids of a draft, from its fastqRgidList tag and the readsets of its libraries
+    """
+    tags = ((detail.get("payload") or {}).get("data") or {}).get("tags") or {}
+    readset_rgid_list = [
+        readset_iter_['rgid']
+        for library_iter_ in detail.get("libraries") or []
+        for readset_iter_ in library_iter_.get("readsets") or []
+        if readset_iter_.get("rgid")
+    ]
+    return list(dict.fromkeys([*(tags.get("fastqRgidList") or []), *readset_rgid_list]))
+
+
+def get_instrument_run_id_list(detail: Dict[str, Any]) -> List[str]:
+    return list(dict.fromkeys(map(get_instrument_run_id_from_rgid, get_draft_rgid_list(detail))))
+
+
+def parse_draft_event(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    The draft event in the body of an SQS record, None if the body is not a draft event
+    """
+    try:
+        draft_event = json.loads(record['body'])
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Could not parse draft event {record.get('messageId')}: {e}")
+        return None
+    if not isinstance(draft_event, dict) or "id" not in draft_event or not isinstance(draft_event.get("detail"), dict):
+        logger.error(f"Draft event {record.get('messageId')} has no id or detail")
+        return None
+    return draft_event
+
+
+def get_execution_name(event: Dict[str, Any]) -> str:
+    """
+    i.e. '20261019abcd0001--7bf73129-1428-4cd3-a780-95db273d1602' (at most 80 characters)
+    """
+    return f"{event['detail'].get('portalRunId', 'draft')}--{event['id']}"[:80]
+
+
+def start_populate_draft_data_execution(sfn_client: "SFNClient", event: Dict[str, Any]) -> None:
+    try:
+        sfn_client.start_execution(
+            stateMachineArn=environ[POPULATE_DRAFT_DATA_STATE_MACHINE_ARN_ENV_VAR],
+            name=get_execution_name(event),
+            input=json.dumps(event['detail']),
+        )
+    except ClientError as e:
+        if e.response.get("Error", {}).get("Code") != EXECUTION_ALREADY_EXISTS_ERROR_CODE:
+            raise
+        # Already started by an earlier delivery of the event
+        logger.warning(f"Execution {get_execution_name(event)} already exists")
+
+
+@instrument_handler
+def handler(event, context) -> Dict[str, Any]:
+    """
+    Prefetch the instrument runs of a batch of drafts, then start their populate draft data executions.
+
+    Input:
+      {
+        "Records": [
+          {
+            "messageId": "...",
+            "body": "{\"id\": \"7bf73129-...\", \"detail-type\": \"WorkflowRunStateChange\", \"detail\": {...}}"
+          }
+        ]
+      }
+
+    Output:
+      {
+        "batchItemFailures": [{"itemIdentifier": "<message id>"}],
+        "draftCountByInstrumentRun": {"250724_A01052_0269_AHFHWJDSXF": 24},
+        "startedExecutionCount": 24
+      }
+    """
+    batch_item_failures = []
+
+    # A message that is not a draft event fails on its own, not the rest of the batch
+    records = []
+    for record in event.get("Records", []):
+        draft_event = parse_draft_event(record)
+        if draft_event is None:
+            batch_item_failures.append({"itemIdentifier": record['messageId']})
+            continue
+        records.append({**record, "draftEvent": draft_event})
+
+    # Group the drafts by instrument run
+    draft_count_by_instrument_run: Dict[str, int] = dict(Counter(
+        instrument_run_id_iter_
+        for record_iter_ in records
+        for instrument_run_id_iter_ in get_instrument_run_id_list(record_iter_['draftEvent']['detail'])
+    ))
+
+    # One bulk call per instrument run (that no other container has fetched already)
+    instrument_run_fastq_cache = get_instrument_run_fastq_cache()
+    for instrument_run_id in draft_count_by_instrument_run.keys():
+        try:
+            instrument_run_fastq_cache.prefetch(instrument_run_id)
+        except Exception as e:
+            logger.warning(f"Could not prefetch the fastqs of instrument run {instrument_run_id}: {e}")
+    instrument_run_fastq_cache.log_metrics()
+
+    sfn_client: "SFNClient" = boto3.client("stepfunctions")
+    started_execution_count = 0
+    for record in records:
+        try:
+            start_populate_draft_data_execution(sfn_client, record['draftEvent'])
+            started_execution_count += 1
+        except Exception as e:
+            logger.error(f"Could not start the population of draft {get_execution_name(record['draftEvent'])}: {e}")
+            batch_item_failures.append({"itemIdentifier": record['messageId']})
+
+    logger.info(json.dumps({
+        "draftCountByInstrumentRun": draft_count_by_instrument_run,
+        "startedExecutionCount": started_execution_count,
+    }))
+
+    return {
+        "batchItemFailures": batch_item_failures,
+        "draftCountByInstrumentRun": draft_count_by_instrument_run,
+        "startedExecutionCount": started_execution_count,
+    }
@@ -0,0 +1,8 @@
+#!/usr/bin/env python3
+
+"""
+Shared helpers for the dragen wgts rna pipeline manager lambdas.
+
+Deployed as a lambda layer alongside the orcabus_api_tools layer,
+lambdas that need this layer set the needsDragenWgtsRnaToolsLayer requirement flag.
+"""
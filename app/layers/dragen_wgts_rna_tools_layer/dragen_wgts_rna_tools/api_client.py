@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+
+"""
+Pooled OrcaBus API client context.
+
+By default, every orcabus_api_tools call resolves the hostname and the JWT (from SSM and Secrets Manager)
+and opens a fresh HTTPS connection, so loops of API calls pay a TLS handshake each time.
+
+Importing the package patches nothing. The handlers that call the OrcaBus API call init_api_client()
+at module level (so during the lambda init phase), which:
+  * routes the module level requests calls (requests.get, requests.post, ..., which orcabus_api_tools uses)
+    through one keep-alive requests.Session per container
+  * caches the JWT until shortly before it expires, and the hostname for the life of the container
+  * resolves the token and hostname eagerly
+
+The session is installed on the requests module itself, so it covers every orcabus_api_tools module,
+whenever it is imported. The token and hostname helpers are imported by name into other orcabus_api_tools modules,
+so every orcabus_api_tools submodule is imported up front, then patched.
+orcabus_api_tools is patched defensively, any patch point that does not exist in the installed version is skipped.
+Set ORCABUS_API_POOLING=false to turn off the session and token reuse.
+The latency of the API calls is recorded by dragen_wgts_rna_tools.instrumentation.
+"""
+
+# Standard imports
+import base64
+import importlib
+import json
+import logging
+import pkgutil
+import sys
+from functools import wraps
+from os import environ
+from threading import Lock
+from time import time
+from typing import Any, Callable, Dict, Optional
+
+# Globals
+ORCABUS_API_POOLING_ENV_VAR = "ORCABUS_API_POOLING"
+ORCABUS_API_TOOLS_MODULE_NAME = "orcabus_api_tools"
+# Modules of orcabus_api_tools that hold the token / hostname helpers
+ORCABUS_API_TOOLS_PATCH_MODULES = (
+    "orcabus_api_tools.utils.aws_helpers",
+    "orcabus_api_tools.utils.requests_helpers",
+)
+TOKEN_FUNCTION_NAME = "get_orcabus_token"
+HOSTNAME_FUNCTION_NAME = "get_hostname"
+
+# Refresh the token this long before it expires
+TOKEN_EXPIRY_MARGIN_SECONDS = 60
+# Used if the token expiry cannot be read
+DEFAULT_TOKEN_TTL_SECONDS = 300
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+logger = logging.getLogger()
+
+_SESSION: Optional[Any] = None
+_TOKEN_CACHE: Dict[str, Any] = {}
+_HOSTNAME_CACHE: Dict[str, str] = {}
+_LOCK = Lock()
+_INSTALLED = False
+
+
+def is_pooling_enabled() -> bool:
+    return environ.get(ORCABUS_API_POOLING_ENV_VAR, "true").lower() != "false"
+
+
+def get_session():
+    """
+    The keep-alive session shared by this container
+    """
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        _SESSION = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE)
+        _SESSION.mount("https://", adapter)
+        _SESSION.mount("http://", adapter)
+    return _SESSION
+
+
+def get_token_expiry(token: str) -> Optional[float]:
+    """
+    Read the exp claim of a JWT (the signature is not verified, we only use this to know when to refresh)
+    """
+    try:
+        payload = token.split(".")[1]
+        return float(json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))["exp"])
+    except (IndexError, KeyError, ValueError, TypeError):
+        return None
+
+
+def cache_token(get_token_func: Callable[..., str]) -> Callable[..., str]:
+    """
+    Wrap the token getter so that the token is reused until shortly before it expires
+    """
+    @wraps(get_token_func)
+    def get_cached_token(*args, **kwargs) -> str:
+        with _LOCK:
+            if _TOKEN_CACHE.get("refreshAt", 0) > time():
+                return _TOKEN_CACHE["token"]
+        token = get_token_func(*args, **kwargs)
+        expiry = get_token_expiry(token)
+        with _LOCK:
+            _TOKEN_CACHE["token"] = token
+            _TOKEN_CACHE["refreshAt"] = (
+                expiry - TOKEN_EXPIRY_MARGIN_SECONDS if expiry is not None
+                else time() + DEFAULT_TOKEN_TTL_SECONDS
+            )
+        return token
+
+    get_cached_token.__dragen_wgts_rna_tools_wrapped__ = True
+    return get_cached_token
+
+
+def cache_hostname(get_hostname_func: Callable[..., str]) -> Callable[..., str]:
+    """
+    Wrap the hostname getter, the hostname does not change over the life of the container
+    """
+    @wraps(get_hostname_func)
+    def get_cached_hostname(*args, **kwargs) -> str:
+        if "hostname" not in _HOSTNAME_CACHE:
+            _HOSTNAME_CACHE["hostname"] = get_hostname_func(*args, **kwargs)
+        return _HOSTNAME_CACHE["hostname"]
+
+    get_cached_hostname.__dragen_wgts_rna_tools_wrapped__ = True
+    return get_cached_hostname
+
+
+def pool_request(request_func: Callable) -> Callable:
+    """
+    Wrap requests.api.request, that requests.get, requests.post, ... all call,
+    to send the request through the shared session
+    """
+    @wraps(request_func)
+    def pooled_request(method, url, **kwargs):
+        return get_session().request(method=method, url=url, **kwargs)
+
+    pooled_request.__dragen_wgts_rna_tools_wrapped__ = True
+    return pooled_request
+
+
+def install_session() -> None:
+    """
+    Route the module level requests calls through the shared session
+    """
+    try:
+        import requests
+        import requests.api
+    except ImportError:
+        logger.info("requests not found, skipping")
+        return
+
+    if getattr(requests.api.request, "__dragen_wgts_rna_tools_wrapped__", False):
+        return
+    pooled_request = pool_request(requests.api.request)
+    # requests.get, requests.post, ... look up requests.api.request when called,
+    # requests.request is a reference to it taken when requests was imported
+    requests.api.request = pooled_request
+    requests.request = pooled_request
+
+
+def import_orcabus_api_tools_modules() -> None:
+    """
+    Import every orcabus_api_tools submodule,
+    so that none of them imports the token or hostname helpers by name after they are patched
+    """
+    package = sys.modules.get(ORCABUS_API_TOOLS_MODULE_NAME)
+    for module_info in pkgutil.walk_packages(
+            getattr(package, "__path__", []), prefix=f"{ORCABUS_API_TOOLS_MODULE_NAME}.",
+            onerror=lambda module_name_iter_: logger.info(f"{module_name_iter_} could not be imported, skipping")
+    ):
+        try:
+            importlib.import_module(module_info.name)
+        except ImportError:
+            logger.info(f"{module_info.name} could not be imported, skipping")
+
+
+def _patch_module(module) -> None:
+    token_func = getattr(module, TOKEN_FUNCTION_NAME, None)
+    if callable(token_func) and not getattr(token_func, "__dragen_wgts_rna_tools_wrapped__", False):
+        setattr(module, TOKEN_FUNCTION_NAME, cache_token(token_func))
+
+    hostname_func = getattr(module, HOSTNAME_FUNCTION_NAME, None)
+    if callable(hostname_func) and not getattr(hostname_func, "__dragen_wgts_rna_tools_wrapped__", False):
+        setattr(module, HOSTNAME_FUNCTION_NAME, cache_hostname(hostname_func))
+
+
+def init_api_client(warm: bool = True) -> None:
+    """
+    Install the pooled session and token cache into orcabus_api_tools (once per container),
+    then resolve the token and hostname so that the first API call does not pay for them.
+    Nothing is installed if the orcabus_api_tools layer is absent.
+    :param warm:
+    :return:
+    """
+    global _INSTALLED
+    if _INSTALLED:
+        return
+
+    try:
+        importlib.import_module(ORCABUS_API_TOOLS_MODULE_NAME)
+    except ImportError:
+        return
+
+    if not is_pooling_enabled():
+        _INSTALLED = True
+        return
+
+    install_session()
+
+    # Helpers may have been imported by name into other orcabus_api_tools modules, so patch them all
+    import_orcabus_api_tools_modules()
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (
+                module_name == ORCABUS_API_TOOLS_MODULE_NAME or
+                module_name.startswith(f"{ORCABUS_API_TOOLS_MODULE_NAME}.")
+        ):
+            continue
+        _patch_module(module)
+
+    _INSTALLED = True
+
+    if warm:
+        for module_name in ORCABUS_API_TOOLS_PATCH_MODULES:
+            module = sys.modules.get(module_name)
+            for func_name in (TOKEN_FUNCTION_NAME, HOSTNAME_FUNCTION_NAME):
+                func = getattr(module, func_name, None) if module is not None else None
+                if not callable(func):
+                    continue
+                try:
+                    func()
+                except Exception as e:
+                    # Not fatal, the first API call will try again
+                    logger.warning(f"Could not warm {func_name}: {e}")
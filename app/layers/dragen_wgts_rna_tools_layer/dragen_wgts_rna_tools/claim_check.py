@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+
+"""
+Claim check for large payload sections.
+
+Step Functions state and EventBridge event details are limited to 256 KiB,
+and sections like the fastq list rows of a top-up library sequenced over many lanes grow with the run.
+A lambda that returns such a section offloads it to the claim check store when its (canonical) JSON
+is larger than the threshold (env var CLAIM_CHECK_THRESHOLD_BYTES, default 32 KiB),
+and returns a reference in its place:
+
+    {
+        "claimCheck": {
+            "uri": "s3://claim-check-bucket/claim-check/sha256/3f/3f9a....json",
+            "sha256": "3f9a...",
+            "sizeBytes": 44289
+        },
+        "summary": {"hasOraFastqs": true}
+    }
+
+The summary holds the (small) values the state machines still branch on.
+A lambda that reads the section rehydrates it, the store is only read when a reference is found:
+
+    fastq_list_rows = offload(fastq_list_rows, summary={"hasOraFastqs": True})
+    payload = rehydrate(event["payload"])
+
+Objects are keyed by the sha256 of their content, so an identical section (i.e. the same fastq list rows
+in every populate draft data iteration of a workflow run) is only stored once.
+Rehydrated sections are cached for the life of the warm container.
+
+Backends:
+  * S3ClaimCheckStore - used when the CLAIM_CHECK_BUCKET_NAME env var is set,
+    objects expire with the bucket's lifecycle rule.
+    Point boto3 at a local S3 stand-in (i.e. minio) with the AWS_ENDPOINT_URL_S3 env var
+  * LocalClaimCheckStore - in-memory, used for local testing (set CLAIM_CHECK_BACKEND to 'local')
+
+Sections are not offloaded if no store is configured.
+"""
+
+# Standard imports
+import json
+import typing
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from hashlib import sha256
+from io import BytesIO
+from os import environ
+from threading import Lock
+from typing import Any, Dict, Optional, Set
+from urllib.parse import urlparse
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+# Globals
+CLAIM_CHECK_BUCKET_NAME_ENV_VAR = "CLAIM_CHECK_BUCKET_NAME"
+CLAIM_CHECK_KEY_PREFIX_ENV_VAR = "CLAIM_CHECK_KEY_PREFIX"
+CLAIM_CHECK_BACKEND_ENV_VAR = "CLAIM_CHECK_BACKEND"
+CLAIM_CHECK_THRESHOLD_BYTES_ENV_VAR = "CLAIM_CHECK_THRESHOLD_BYTES"
+
+DEFAULT_CLAIM_CHECK_KEY_PREFIX = "claim-check/"
+DEFAULT_CLAIM_CHECK_THRESHOLD_BYTES = 32 * 1024
+
+CLAIM_CHECK_KEY = "claimCheck"
+SUMMARY_KEY = "summary"
+
+# Rehydrated sections kept per container
+MAX_CACHED_SECTIONS = 64
+
+# The error codes of a conditional put of an object that already exists
+PRECONDITION_FAILED_ERROR_CODES = ("PreconditionFailed", "ConditionalRequestConflict")
+
+# The same section always serialises to the same bytes (and so the same sha256), whatever its key order
+CANONICAL_JSON_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"))
+
+_CLAIM_CHECK_STORE: Optional["ClaimCheckStore"] = None
+_CLAIM_CHECK_STORE_RESOLVED = False
+
+
+def to_canonical_json(value: Any) -> bytes:
+    """
+    Written chunk by chunk, rather than joining the list of every chunk of the section
+    """
+    buffer = BytesIO()
+    for chunk in CANONICAL_JSON_ENCODER.iterencode(value):
+        buffer.write(chunk.encode())
+    return buffer.getvalue()
+
+
+def get_canonical_json_size_bytes(value: Any) -> int:
+    """
+    The size of the canonical JSON of a value, without holding the JSON in memory
+    (the encoder escapes non-ASCII characters, so characters are bytes)
+    """
+    return sum(map(len, CANONICAL_JSON_ENCODER.iterencode(value)))
+
+
+def get_claim_check_threshold_bytes() -> int:
+    return int(environ.get(CLAIM_CHECK_THRESHOLD_BYTES_ENV_VAR, DEFAULT_CLAIM_CHECK_THRESHOLD_BYTES))
+
+
+def get_object_key(key_prefix: str, content_sha256: str) -> str:
+    """
+    claim-check/sha256/3f/3f9a....json (the two character prefix spreads the keys over S3 partitions)
+    """
+    return f"{key_prefix}sha256/{content_sha256[:2]}/{content_sha256}.json"
+
+
+class ClaimCheckStore(ABC):
+    """
+    Interface for the claim check store backends
+    """
+
+    def __init__(self):
+        self._cached_sections: Dict[str, bytes] = OrderedDict()
+        self._lock = Lock()
+        self.put_count = 0
+        self.deduplicated_count = 0
+
+    @abstractmethod
+    def put_object(self, content_sha256: str, body: bytes) -> str:
+        """
+        Store the body under its sha256 (if it is not stored already)
+        :return: The uri of the object
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_object(self, uri: str) -> bytes:
+        """
+        Get the body of a stored object
+        """
+        raise NotImplementedError
+
+    def _set_cached(self, content_sha256: str, body: bytes) -> None:
+        with self._lock:
+            self._cached_sections[content_sha256] = body
+            self._cached_sections.move_to_end(content_sha256)
+            while len(self._cached_sections) > MAX_CACHED_SECTIONS:
+                self._cached_sections.popitem(last=False)
+
+    def put(self, body: bytes) -> Dict[str, Any]:
+        """
+        Store a serialised section
+        :return: The claim check of the section
+        """
+        content_sha256 = sha256(body).hexdigest()
+        uri = self.put_object(content_sha256, body)
+        # The section is already at hand, should this container rehydrate it
+        self._set_cached(content_sha256, body)
+        return {
+            "uri": uri,
+            "sha256": content_sha256,
+            "sizeBytes": len(body),
+        }
+
+    def get(self, claim_check: Dict[str, Any]) -> Any:
+        """
+        Get the section of a claim check, from the container cache if we have it
+        """
+        content_sha256 = claim_check['sha256']
+        with self._lock:
+            body = self._cached_sections.get(content_sha256)
+        if body is None:
+            body = self.get_object(claim_check['uri'])
+            if sha256(body).hexdigest() != content_sha256:
+                raise ValueError(f"Claim check {claim_check['uri']} does not match its sha256")
+            self._set_cached(content_sha256, body)
+        return json.loads(body)
+
+
+class LocalClaimCheckStore(ClaimCheckStore):
+    """
+    In-memory claim check store
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._objects: Dict[str, bytes] = {}
+
+    def put_object(self, content_sha256: str, body: bytes) -> str:
+        uri = f"local://{get_object_key(DEFAULT_CLAIM_CHECK_KEY_PREFIX, content_sha256)}"
+        with self._lock:
+            if uri in self._objects:
+                self.deduplicated_count += 1
+            else:
+                self._objects[uri] = body
+                self.put_count += 1
+        return uri
+
+    def get_object(self, uri: str) -> bytes:
+        with self._lock:
+            if uri not in self._objects:
+                raise KeyError(f"No claim check object {uri}")
+            return self._objects[uri]
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+
+class S3ClaimCheckStore(ClaimCheckStore):
+    """
+    S3 backed claim check store.
+    Objects are written with a conditional put (If-None-Match), so a section another container
+    has already stored is not written again, and the keys this container has written are not put again at all.
+    """
+
+    def __init__(self, bucket_name: str, key_prefix: str = DEFAULT_CLAIM_CHECK_KEY_PREFIX):
+        super().__init__()
+        self.bucket_name = bucket_name
+        self.key_prefix = key_prefix
+        self._client: Optional["S3Client"] = None
+        self._stored_keys: Set[str] = set()
+
+    @property
+    def client(self) -> "S3Client":
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("s3")
+        return self._client
+
+    def put_object(self, content_sha256: str, body: bytes) -> str:
+        from botocore.exceptions import ClientError
+
+        key = get_object_key(self.key_prefix, content_sha256)
+        uri = f"s3://{self.bucket_name}/{key}"
+        if key in self._stored_keys:
+            self.deduplicated_count += 1
+            return uri
+
+        try:
+            self.client.put_object(
+                Bucket=self.bucket_name,
+                Key=key,
+                Body=body,
+                ContentType="application/json",
+                IfNoneMatch="*",
+            )
+            self.put_count += 1
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") not in PRECONDITION_FAILED_ERROR_CODES:
+                raise
+            self.deduplicated_count += 1
+        self._stored_keys.add(key)
+        return uri
+
+    def get_object(self, uri: str) -> bytes:
+        uri_obj = urlparse(uri)
+        return self.client.get_object(
+            Bucket=uri_obj.netloc,
+            Key=uri_obj.path.lstrip("/"),
+        )["Body"].read()
+
+
+def get_claim_check_store() -> Optional[ClaimCheckStore]:
+    """
+    Get the claim check store for this container, None if sections should not be offloaded.
+    Set CLAIM_CHECK_BACKEND to 'local' to force the in-memory backend (i.e. for local testing)
+    :return:
+    """
+    global _CLAIM_CHECK_STORE, _CLAIM_CHECK_STORE_RESOLVED
+
+    if not _CLAIM_CHECK_STORE_RESOLVED:
+        if environ.get(CLAIM_CHECK_BACKEND_ENV_VAR, "") == "local":
+            _CLAIM_CHECK_STORE = LocalClaimCheckStore()
+        elif environ.get(CLAIM_CHECK_BUCKET_NAME_ENV_VAR):
+            _CLAIM_CHECK_STORE = S3ClaimCheckStore(
+                environ[CLAIM_CHECK_BUCKET_NAME_ENV_VAR],
+                environ.get(CLAIM_CHECK_KEY_PREFIX_ENV_VAR, DEFAULT_CLAIM_CHECK_KEY_PREFIX),
+            )
+        _CLAIM_CHECK_STORE_RESOLVED = True
+
+    return _CLAIM_CHECK_STORE
+
+
+def set_claim_check_store(claim_check_store: Optional[ClaimCheckStore]) -> None:
+    """
+    Override the claim check store for this container, i.e. to inject a local backend in tests.
+    Pass None to resolve the store from the environment again
+    """
+    global _CLAIM_CHECK_STORE, _CLAIM_CHECK_STORE_RESOLVED
+    _CLAIM_CHECK_STORE = claim_check_store
+    _CLAIM_CHECK_STORE_RESOLVED = claim_check_store is not None
+
+
+def is_claim_check(value: Any) -> bool:
+    return isinstance(value, dict) and isinstance(value.get(CLAIM_CHECK_KEY), dict)
+
+
+def offload(
+        value: Any,
+        summary: Optional[Dict[str, Any]] = None,
+        threshold_bytes: Optional[int] = None
+) -> Any:
+    """
+    Offload a section to the claim check store if it is larger than the threshold
+    :param value: The section, i.e. the fastq list rows
+    :param summary: Values of the section the state machines still need, kept in the reference
+    :param threshold_bytes: Defaults to CLAIM_CHECK_THRESHOLD_BYTES
+    :return: The claim check reference, or the value itself if it is small enough (or no store is configured)
+    """
+    claim_check_store = get_claim_check_store()
+    if claim_check_store is None or is_claim_check(value):
+        return value
+
+    threshold_bytes = threshold_bytes if threshold_bytes is not None else get_claim_check_threshold_bytes()
+    if get_canonical_json_size_bytes(value) <= threshold_bytes:
+        return value
+
+    return {
+        CLAIM_CHECK_KEY: claim_check_store.put(to_canonical_json(value)),
+        **({SUMMARY_KEY: summary} if summary is not None else {}),
+    }
+
+
+def rehydrate(value: Any) -> Any:
+    """
+    Replace every claim check reference in a value (i.e. a lambda event) with its section
+    """
+    if is_claim_check(value):
+        claim_check_store = get_claim_check_store()
+        if claim_check_store is None:
+            raise RuntimeError(
+                f"Cannot rehydrate {value[CLAIM_CHECK_KEY]['uri']}, no claim check store is configured"
+            )
+        return claim_check_store.get(value[CLAIM_CHECK_KEY])
+    if isinstance(value, dict):
+        return {key: rehydrate(sub_value) for key, sub_value in value.items()}
+    if isinstance(value, list):
+        return list(map(rehydrate, value))
+    return value
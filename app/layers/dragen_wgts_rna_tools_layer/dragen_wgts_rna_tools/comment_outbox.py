@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+
+"""
+Comment outbox.
+
+Rather than writing comments to the workflow manager on the state machine's critical path,
+the comment writer enqueues them here and returns straight away.
+The drain_comment_outbox lambda then delivers them in batches, with retries and backoff.
+
+Each outbox message holds the (coalesced) messages for a single workflow run:
+
+    {
+        "workflowRunId": "wfr.123",
+        "author": "dragen-wgts-rna-populate-draft-data-service",
+        "executionArn": "arn:aws:states:...",
+        "messages": ["..."],
+        "enqueuedAt": 1760000000.0
+    }
+
+Backends:
+  * SqsCommentOutbox - used when the COMMENT_OUTBOX_QUEUE_URL env var is set
+  * LocalCommentOutbox - in-memory queue stand-in, used for local testing.
+    Its receive method returns SQS-style records, so they can be passed straight to the drainer.
+"""
+
+# Standard imports
+import json
+import typing
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from os import environ
+from threading import Lock
+from time import time
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_sqs import SQSClient
+
+# Globals
+COMMENT_OUTBOX_QUEUE_URL_ENV_VAR = "COMMENT_OUTBOX_QUEUE_URL"
+COMMENT_OUTBOX_BACKEND_ENV_VAR = "COMMENT_OUTBOX_BACKEND"
+
+# SQS send message batch limit
+SQS_MAX_BATCH_SIZE = 10
+
+_COMMENT_OUTBOX: Optional["CommentOutbox"] = None
+_COMMENT_OUTBOX_RESOLVED = False
+
+
+def build_outbox_message(
+        workflow_run_id: str,
+        author: str,
+        execution_arn: Optional[str],
+        messages: List[str]
+) -> Dict[str, Any]:
+    return {
+        "workflowRunId": workflow_run_id,
+        "author": author,
+        "executionArn": execution_arn,
+        "messages": messages,
+        "enqueuedAt": time(),
+    }
+
+
+class CommentOutbox(ABC):
+    """
+    Interface for the comment outbox backends
+    """
+
+    @abstractmethod
+    def enqueue(self, outbox_messages: List[Dict[str, Any]]) -> None:
+        """
+        Add messages to the outbox
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delay(self, receipt_handle: str, delay_seconds: int) -> None:
+        """
+        Hide a received message for delay_seconds before it is redelivered (backoff on failure)
+        """
+        raise NotImplementedError
+
+
+class LocalCommentOutbox(CommentOutbox):
+    """
+    In-memory queue stand-in, messages are redelivered until acknowledged
+    """
+
+    def __init__(self):
+        # Receipt handle -> (message id, body, available at, receive count)
+        self._messages: Dict[str, List[Any]] = OrderedDict()
+        self._lock = Lock()
+
+    def enqueue(self, outbox_messages: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            for outbox_message in outbox_messages:
+                self._messages[str(uuid4())] = [str(uuid4()), json.dumps(outbox_message), 0.0, 0]
+
+    def receive(self, max_messages: int = SQS_MAX_BATCH_SIZE) -> List[Dict[str, Any]]:
+        """
+        Receive the available messages as SQS event records
+        """
+        records = []
+        with self._lock:
+            now = time()
+            for receipt_handle, message in self._messages.items():
+                if len(records) >= max_messages:
+                    break
+                message_id, body, available_at, receive_count = message
+                if available_at > now:
+                    continue
+                message[3] = receive_count + 1
+                records.append({
+                    "messageId": message_id,
+                    "receiptHandle": receipt_handle,
+                    "body": body,
+                    "attributes": {
+                        "ApproximateReceiveCount": str(message[3]),
+                    },
+                })
+        return records
+
+    def ack(self, receipt_handles: List[str]) -> None:
+        with self._lock:
+            for receipt_handle in receipt_handles:
+                self._messages.pop(receipt_handle, None)
+
+    def delay(self, receipt_handle: str, delay_seconds: int) -> None:
+        with self._lock:
+            if receipt_handle in self._messages:
+                self._messages[receipt_handle][2] = time() + delay_seconds
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+
+class SqsCommentOutbox(CommentOutbox):
+    """
+    SQS backed outbox, received messages are deleted by the lambda event source mapping
+    """
+
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self._client: Optional["SQSClient"] = None
+
+    @property
+    def client(self) -> "SQSClient":
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("sqs")
+        return self._client
+
+    def enqueue(self, outbox_messages: List[Dict[str, Any]]) -> None:
+        for batch_start in range(0, len(outbox_messages), SQS_MAX_BATCH_SIZE):
+            response = self.client.send_message_batch(
+                QueueUrl=self.queue_url,
+                Entries=[
+                    {
+                        "Id": str(index_iter_),
+                        "MessageBody": json.dumps(outbox_message_iter_),
+                    }
+                    for index_iter_, outbox_message_iter_ in enumerate(
+                        outbox_messages[batch_start:batch_start + SQS_MAX_BATCH_SIZE]
+                    )
+                ]
+            )
+            if response.get("Failed"):
+                raise RuntimeError(f"Could not enqueue comments: {response['Failed']}")
+
+    def delay(self, receipt_handle: str, delay_seconds: int) -> None:
+        self.client.change_message_visibility(
+            QueueUrl=self.queue_url,
+            ReceiptHandle=receipt_handle,
+            VisibilityTimeout=delay_seconds,
+        )
+
+
+def get_comment_outbox() -> Optional[CommentOutbox]:
+    """
+    Get the comment outbox for this container, None if comments should be written directly.
+    Set COMMENT_OUTBOX_BACKEND to 'local' to force the in-memory backend (i.e. for local testing)
+    :return:
+    """
+    global _COMMENT_OUTBOX, _COMMENT_OUTBOX_RESOLVED
+
+    if not _COMMENT_OUTBOX_RESOLVED:
+        if environ.get(COMMENT_OUTBOX_BACKEND_ENV_VAR, "") == "local":
+            _COMMENT_OUTBOX = LocalCommentOutbox()
+        elif environ.get(COMMENT_OUTBOX_QUEUE_URL_ENV_VAR):
+            _COMMENT_OUTBOX = SqsCommentOutbox(environ[COMMENT_OUTBOX_QUEUE_URL_ENV_VAR])
+        _COMMENT_OUTBOX_RESOLVED = True
+
+    return _COMMENT_OUTBOX
+
+
+def set_comment_outbox(comment_outbox: Optional[CommentOutbox]) -> None:
+    """
+    Override the comment outbox for this container, i.e. to inject a local backend in tests
+    """
+    global _COMMENT_OUTBOX, _COMMENT_OUTBOX_RESOLVED
+    _COMMENT_OUTBOX = comment_outbox
+    _COMMENT_OUTBOX_RESOLVED = True
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run comment writer.
+
+All lambdas that comment on a workflow run go through here so that:
+  * comments are formatted (execution ARN footer) and truncated to the 1024 char limit in one place
+  * a comment body already posted to a workflow run within the dedup window is not re-posted,
+    i.e. the same 'no change, missing fields' comment on every iteration of a stuck draft
+  * several messages for the same workflow run are coalesced into a single API call
+
+Usage:
+
+    with CommentWriter(author=author, execution_arn=execution_arn) as comment_writer:
+        comment_writer.add(workflow_run_id, "First message")
+        comment_writer.add(workflow_run_id, "Second message")
+
+Comments are written when the writer is flushed (on leaving the context).
+If a comment outbox is configured (see comment_outbox), flushing enqueues the comments instead,
+and the drain_comment_outbox lambda delivers them (deduplicating at delivery time).
+"""
+
+# Standard imports
+import logging
+from collections import OrderedDict
+from hashlib import sha256
+from os import environ
+from typing import Dict, List, Optional
+
+# Layer imports
+from orcabus_api_tools.workflow import add_comment_to_workflow_run
+
+# Local imports
+from .comment_outbox import CommentOutbox, build_outbox_message, get_comment_outbox
+from .state_store import StateStore, get_state_store
+
+# Globals
+MAX_COMMENT_LENGTH = 1024
+TRUNCATION_SUFFIX = "\n... [truncated, see execution ARN for full detail]"
+MESSAGE_SEPARATOR = "\n\n"
+
+COMMENT_HASH_ID_TYPE_PREFIX = "COMMENT_HASH"
+COMMENT_DEDUP_WINDOW_SECONDS_ENV_VAR = "COMMENT_DEDUP_WINDOW_SECONDS"
+DEFAULT_COMMENT_DEDUP_WINDOW_SECONDS = 60 * 60 * 6
+
+logger = logging.getLogger()
+
+
+def format_comment(body: str, execution_arn: Optional[str] = None) -> str:
+    """
+    Append the execution ARN footer (if provided) to a comment and enforce the 1024 char limit.
+    The footer is always kept, the body is truncated.
+    :param body:
+    :param execution_arn:
+    :return:
+    """
+    if execution_arn is None:
+        if len(body) <= MAX_COMMENT_LENGTH:
+            return body
+        return f"{body[:MAX_COMMENT_LENGTH - len(TRUNCATION_SUFFIX)]}{TRUNCATION_SUFFIX}"
+
+    footer = f"---\nStep Functions Execution: {execution_arn}"
+    full_comment = f"{body}\n{footer}"
+
+    if len(full_comment) > MAX_COMMENT_LENGTH:
+        available = MAX_COMMENT_LENGTH - len(footer) - len(TRUNCATION_SUFFIX) - 1  # -1 for newline
+        full_comment = f"{body[:available]}{TRUNCATION_SUFFIX}\n{footer}"
+
+    return full_comment
+
+
+def get_comment_hash(author: str, body: str) -> str:
+    """
+    Content hash of a comment body, the execution ARN footer is not included
+    so that the same message from a later execution is still a duplicate
+    :param author:
+    :param body:
+    :return:
+    """
+    return sha256(f"{author}\n{body}".encode()).hexdigest()
+
+
+def get_dedup_window_seconds() -> int:
+    return int(environ.get(COMMENT_DEDUP_WINDOW_SECONDS_ENV_VAR, DEFAULT_COMMENT_DEDUP_WINDOW_SECONDS))
+
+
+class CommentWriter:
+    """
+    Collects comments per workflow run and writes them on flush,
+    one API call per workflow run, skipping messages already posted within the dedup window.
+    Set use_outbox to False to always write directly (i.e. in the outbox drainer)
+    """
+
+    def __init__(
+            self,
+            author: str,
+            execution_arn: Optional[str] = None,
+            dedup_window_seconds: Optional[int] = None,
+            state_store: Optional[StateStore] = None,
+            use_outbox: bool = True
+    ):
+        self.author = author
+        self.execution_arn = execution_arn
+        self.dedup_window_seconds = (
+            dedup_window_seconds if dedup_window_seconds is not None else get_dedup_window_seconds()
+        )
+        self._state_store = state_store
+        self.use_outbox = use_outbox
+        # Workflow run id -> message hash -> message, ordered by first add
+        self._pending: Dict[str, Dict[str, str]] = OrderedDict()
+
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = get_state_store()
+        return self._state_store
+
+    def add(self, workflow_run_id: str, body: str) -> None:
+        """
+        Queue a message for a workflow run, repeats within the same writer are dropped
+        """
+        self._pending.setdefault(workflow_run_id, OrderedDict()).setdefault(
+            get_comment_hash(self.author, body), body
+        )
+
+    def _is_duplicate(self, workflow_run_id: str, comment_hash: str) -> bool:
+        if self.dedup_window_seconds <= 0:
+            return False
+        return self.state_store.get(
+            workflow_run_id, f"{COMMENT_HASH_ID_TYPE_PREFIX}#{comment_hash}"
+        ) is not None
+
+    def _record(self, workflow_run_id: str, comment_hash: str) -> None:
+        if self.dedup_window_seconds <= 0:
+            return
+        self.state_store.put(
+            workflow_run_id,
+            f"{COMMENT_HASH_ID_TYPE_PREFIX}#{comment_hash}",
+            {"author": self.author},
+            ttl_seconds=self.dedup_window_seconds,
+        )
+
+    @property
+    def outbox(self) -> Optional[CommentOutbox]:
+        return get_comment_outbox() if self.use_outbox else None
+
+    def flush(self) -> List[str]:
+        """
+        Write (or enqueue) the pending comments
+        :return: The workflow run ids that were commented on (or had comments enqueued)
+        """
+        commented_workflow_run_ids = []
+        pending, self._pending = self._pending, OrderedDict()
+
+        outbox = self.outbox
+        if outbox is not None and pending:
+            outbox.enqueue([
+                build_outbox_message(
+                    workflow_run_id=workflow_run_id_iter_,
+                    author=self.author,
+                    execution_arn=self.execution_arn,
+                    messages=list(messages_iter_.values()),
+                )
+                for workflow_run_id_iter_, messages_iter_ in pending.items()
+            ])
+            return list(pending.keys())
+
+        for workflow_run_id, messages in pending.items():
+            new_messages = OrderedDict(filter(
+                lambda message_iter_: not self._is_duplicate(workflow_run_id, message_iter_[0]),
+                messages.items()
+            ))
+
+            if not new_messages:
+                logger.info(f"Skipping duplicate comment(s) on workflow run {workflow_run_id}")
+                continue
+
+            add_comment_to_workflow_run(
+                workflow_run_orcabus_id=workflow_run_id,
+                comment=format_comment(MESSAGE_SEPARATOR.join(new_messages.values()), self.execution_arn),
+                author=self.author,
+            )
+
+            for comment_hash in new_messages.keys():
+                self._record(workflow_run_id, comment_hash)
+
+            commented_workflow_run_ids.append(workflow_run_id)
+
+        return commented_workflow_run_ids
+
+    def __enter__(self) -> "CommentWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        # Don't post half a set of comments if the lambda is failing
+        if exc_type is None:
+            self.flush()
+
+
+def add_comment(
+        workflow_run_id: str,
+        body: str,
+        author: str,
+        execution_arn: Optional[str] = None,
+        dedup_window_seconds: Optional[int] = None,
+) -> bool:
+    """
+    Write a single comment to a workflow run
+    :return: True if the comment was written (or enqueued), False if it was a duplicate
+    """
+    comment_writer = CommentWriter(
+        author=author,
+        execution_arn=execution_arn,
+        dedup_window_seconds=dedup_window_seconds,
+    )
+    comment_writer.add(workflow_run_id, body)
+    return len(comment_writer.flush()) > 0
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+
+"""
+Draft population stages.
+
+The pieces of the populate draft data state machine that are shared by its lambdas
+(one lambda per stage, the 'stepFunctions' engine) and the populate_draft_data_async lambda
+(every stage in a single invocation, the 'asyncio' engine), so that both engines build the same draft:
+  * the complete draft schema of a payload version, and the validation errors and missing fields of a draft
+  * the fastq rgid of a fastq object
+  * the qc summary stats (coverage, duplication fraction and insert size estimates) of a list of fastq objects
+  * the fastq set pairs that are validated with ntsm
+  * the default engine parameters, inputs and reference data of a workflow version,
+    and how they are added to the draft
+  * the workflow run update object
+  * the populate draft comments
+"""
+
+# Standard imports
+import json
+import logging
+import re
+import typing
+from itertools import product
+from os import environ
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import boto3
+
+# Local imports
+from .reference_catalog import REFERENCE_CATALOG_SSM_PARAMETER_NAME_ENV_VAR, get_reference_catalog
+from .ssm_parameters import get_ssm_parameter_cache
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from jsonschema import ValidationError
+    from mypy_boto3_schemas import SchemasClient
+
+# Globals
+SSM_REGISTRY_NAME_ENV_VAR = "SSM_REGISTRY_NAME"
+SSM_SCHEMA_PATH_ENV_VAR = "SSM_SCHEMA_PATH"
+DEFAULT_PAYLOAD_VERSION_ENV_VAR = "DEFAULT_PAYLOAD_VERSION"
+
+DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME_ENV_VAR = "DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME"
+DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME_ENV_VAR = "DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME"
+DEFAULT_LOGS_URI_PREFIX_SSM_PARAMETER_NAME_ENV_VAR = "DEFAULT_LOGS_URI_PREFIX_SSM_PARAMETER_NAME"
+PIPELINE_ID_SSM_PARAMETER_PREFIX_ENV_VAR = "PIPELINE_ID_SSM_PARAMETER_PREFIX"
+DEFAULT_INPUTS_SSM_PARAMETER_PREFIX_ENV_VAR = "DEFAULT_INPUTS_SSM_PARAMETER_PREFIX"
+
+ENGINE_PARAMETER_KEYS = ("projectId", "pipelineId", "outputUri", "logsUri")
+ORA_FILE_URI_REGEX = re.compile(r".ora$")
+
+WORKFLOW_NAME_ENV_VAR = "WORKFLOW_NAME"
+REPOSITORY_GITHUB_URL_ENV_VAR = "REPOSITORY_GITHUB_URL"
+POPULATE_DRAFT_COMMENT_AUTHOR = "{workflow_name}-populate-draft-data-service"
+
+POPULATE_DRAFT_COMMENT_TEMPLATES = {
+    "tags_changed": "Updating draft tags before proceeding to input population.",
+    "engine_parameters_changed": "Updating draft engine parameters before proceeding to input population.",
+    "both_changed": "Updating draft tags and engine parameters before proceeding to input population.",
+    "updating_inputs": "Updating inputs — this may take time to complete if awaiting upstream data or unarchiving.",
+    "no_change_missing_fields": "Draft payload has not changed since last population attempt. The following required schema fields are still missing or incomplete:\n{missing_fields_list}\n\nTo resolve this, either:\nA) Wait for upstream processes to complete (FASTQ data availability, unarchiving)\nB) Manually provide the missing attributes via a WorkflowRunUpdate event\n\nFor details on upstream dependencies and manual submission, see: {repo_url}",
+}
+
+logger = logging.getLogger()
+
+
+def get_rgid_from_fastq(fastq_obj: Dict[str, Any]) -> str:
+    """
+    The rgid of a fastq object, '<index>+<index2>.<lane>.<instrument_run_id>'
+    """
+    return ".".join([
+        fastq_obj['index'],
+        str(fastq_obj['lane']),
+        fastq_obj['instrumentRunId']
+    ])
+
+
+def get_qc_summary_stats(fastq_obj_list: List[Dict[str, Any]]) -> Dict[str, float]:
+    """
+    Sum the qc coverage estimates, and average the duplication fraction and insert size estimates
+    (all -1 if there are no fastqs)
+
+    Output:
+      {
+        "coverageSum": 42.1,
+        "dupFracAvg": 0.12,
+        "insertSizeAvg": 310.5
+      }
+    """
+    def get_qc_values(qc_key: str) -> List[float]:
+        return list(map(
+            lambda fastq_iter_: fastq_iter_['qc'][qc_key],
+            fastq_obj_list
+        ))
+
+    return {
+        "coverageSum": round(
+            sum(get_qc_values('rawWgsCoverageEstimate')) if fastq_obj_list else -1,
+            2
+        ),
+        "dupFracAvg": round(
+            sum(get_qc_values('duplicationFractionEstimate')) / len(fastq_obj_list) if fastq_obj_list else -1,
+            2
+        ),
+        "insertSizeAvg": round(
+            sum(get_qc_values('insertSizeEstimate')) / len(fastq_obj_list) if fastq_obj_list else -1,
+            2
+        ),
+    }
+
+
+def non_duplicate_cross_product(lst: List[Any]) -> List[Tuple[Any, Any]]:
+    """
+    Every unordered pair of distinct items, i.e. the fastq set pairs validated with ntsm external
+    """
+    result = []
+    for a, b in product(lst, repeat=2):
+        if a != b and (b, a) not in result:
+            result.append((a, b))
+    return result
+
+
+def is_truthy(value: Any) -> bool:
+    """
+    The boolean cast of the state machine's JSONata conditions, i.e. '$inputs.reference ? ... : ...'
+    (empty objects, arrays, strings and zero are false, an array is true if any of its items are)
+    """
+    if isinstance(value, list):
+        return any(map(is_truthy, value))
+    return bool(value)
+
+
+def sift(obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Drop the keys with null values, as $sift(function($v, $k){$v != null})
+    """
+    return dict(filter(lambda kv_iter_: kv_iter_[1] is not None, obj.items()))
+
+
+def get_draft_schema(payload_version: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Get the complete data draft schema for the payload version (the default payload version if not set)
+    from the schema registry (the registry and schema names are in SSM)
+    """
+    if payload_version is None:
+        payload_version = environ[DEFAULT_PAYLOAD_VERSION_ENV_VAR]
+
+    schema_path_parameter_name = str(Path(environ[SSM_SCHEMA_PATH_ENV_VAR]) / payload_version)
+    ssm_parameter_cache = get_ssm_parameter_cache()
+    ssm_parameter_cache.get_parameters([environ[SSM_REGISTRY_NAME_ENV_VAR], schema_path_parameter_name])
+    schema_registry = ssm_parameter_cache.get_parameter_value(environ[SSM_REGISTRY_NAME_ENV_VAR])
+    schema_name = json.loads(ssm_parameter_cache.get_parameter_value(schema_path_parameter_name))["schemaName"]
+
+    schemas_client: "SchemasClient" = boto3.client("schemas")
+    response = schemas_client.describe_schema(RegistryName=schema_registry, SchemaName=schema_name)
+    return json.loads(response["Content"])
+
+
+def get_draft_validation_error(schema: Dict[str, Any], data: Dict[str, Any]) -> Optional["ValidationError"]:
+    """
+    The first validation error of the data against the draft schema, None if the data is a complete draft
+    """
+    # jsonschema is a requirement of the lambdas that validate drafts, not of the layer
+    import jsonschema
+
+    try:
+        jsonschema.validate(instance=data, schema=schema)
+    except jsonschema.ValidationError as e:
+        return e
+    return None
+
+
+def is_valid_draft(schema: Dict[str, Any], data: Dict[str, Any]) -> bool:
+    return get_draft_validation_error(schema, data) is None
+
+
+def get_missing_fields(schema: Dict[str, Any], data: Dict[str, Any]) -> List[str]:
+    """
+    The missing (or invalid) fields of the data, i.e. each missing required property,
+    and the path of every other (type, pattern, etc.) error
+    """
+    import jsonschema
+
+    missing_fields = []
+    for error in jsonschema.Draft202012Validator(schema).iter_errors(data):
+        path = ".".join(str(p) for p in error.absolute_path) if error.absolute_path else ""
+        if error.validator == "required":
+            # For required errors, list each missing property
+            for missing_prop in error.validator_value:
+                if missing_prop not in error.instance:
+                    missing_fields.append(f"{path}.{missing_prop}" if path else missing_prop)
+        elif path:
+            # For other errors (type, pattern, etc.)
+            missing_fields.append(f"{path} ({error.message[:50]})")
+    return missing_fields
+
+
+def join_ssm_path(prefix: str, key: str) -> str:
+    return f"{prefix.rstrip('/')}/{key}"
+
+
+def parse_json_value(value: Optional[str]) -> Optional[Any]:
+    return json.loads(value) if value is not None else None
+
+
+def get_provided_engine_parameter_keys(engine_parameters: Dict[str, Any]) -> List[str]:
+    """
+    The engine parameters the draft already has, so their defaults are not looked up
+    """
+    return list(filter(lambda key_iter_: is_truthy(engine_parameters.get(key_iter_)), ENGINE_PARAMETER_KEYS))
+
+
+def resolve_default_parameters(
+        workflow_version: str,
+        portal_run_id: str,
+        ora_version: Optional[str] = None,
+        provided_engine_parameter_keys: Sequence[str] = ()
+) -> Dict[str, Any]:
+    """
+    Resolve the default engine parameters, inputs and reference data for a workflow version,
+    in a single batched (and cached) GetParameters call.
+    The defaults of the engine parameters the draft already has (provided_engine_parameter_keys) are not looked up.
+    The other engine parameter defaults and the inputs defaults are required,
+    a KeyError is raised if any of them does not exist in SSM.
+    Reference data the catalog does not hold is omitted (the draft may provide it).
+
+    Output:
+      {
+        "engineParameters": {"projectId": "...", "pipelineId": "...", "outputUri": "...", "logsUri": "..."},
+        "inputs": {...},
+        "reference": {...},
+        "oraReference": "s3://...",
+        "annotationFile": "s3://...",
+        "referenceCatalogVersion": "2026.10.19"
+      }
+    """
+    ssm_parameter_cache = get_ssm_parameter_cache()
+
+    # Engine parameter key -> (SSM parameter name, default from the parameter value)
+    engine_parameter_defaults = {
+        "projectId": (
+            environ[DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME_ENV_VAR],
+            lambda value: value
+        ),
+        "pipelineId": (
+            join_ssm_path(environ[PIPELINE_ID_SSM_PARAMETER_PREFIX_ENV_VAR], workflow_version),
+            lambda value: value
+        ),
+        "outputUri": (
+            environ[DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME_ENV_VAR],
+            lambda value: f"{value}{portal_run_id}/"
+        ),
+        "logsUri": (
+            environ[DEFAULT_LOGS_URI_PREFIX_SSM_PARAMETER_NAME_ENV_VAR],
+            lambda value: f"{value}{portal_run_id}/"
+        ),
+    }
+    missing_engine_parameter_keys = list(filter(
+        lambda key_iter_: key_iter_ not in provided_engine_parameter_keys,
+        engine_parameter_defaults.keys()
+    ))
+
+    parameter_names = {
+        **{
+            key_iter_: engine_parameter_defaults[key_iter_][0]
+            for key_iter_ in missing_engine_parameter_keys
+        },
+        "inputs": join_ssm_path(environ[DEFAULT_INPUTS_SSM_PARAMETER_PREFIX_ENV_VAR], workflow_version),
+    }
+
+    # One batched call for everything keyed by the workflow version, and the reference catalog
+    parameter_values = ssm_parameter_cache.get_parameters([
+        *parameter_names.values(),
+        environ[REFERENCE_CATALOG_SSM_PARAMETER_NAME_ENV_VAR]
+    ])
+    values = {
+        key: parameter_values[parameter_name]
+        for key, parameter_name in parameter_names.items()
+    }
+
+    # The reference inputs, in one lookup from the (already fetched) reference catalog
+    reference_catalog = get_reference_catalog()
+    try:
+        reference_inputs = reference_catalog.get_reference_inputs_for_workflow_version(workflow_version, ora_version)
+    except KeyError as e:
+        logger.warning(e.args[0])
+        reference_inputs = {}
+
+    # Without these the analysis cannot be launched, so fail the execution
+    missing_defaults = list(filter(lambda key_iter_: values[key_iter_] is None, values.keys()))
+    if missing_defaults:
+        raise KeyError(
+            f"No SSM default found for {', '.join(missing_defaults)} (workflow version {workflow_version}): "
+            f"{', '.join(map(lambda key_iter_: parameter_names[key_iter_], missing_defaults))}"
+        )
+
+    defaults = {
+        "engineParameters": {
+            key_iter_: engine_parameter_defaults[key_iter_][1](values[key_iter_])
+            for key_iter_ in missing_engine_parameter_keys
+        },
+        "inputs": parse_json_value(values['inputs']),
+        "reference": reference_inputs.get('reference'),
+        "oraReference": reference_inputs.get('oraReference'),
+        "annotationFile": reference_inputs.get('annotationFile'),
+        "referenceCatalogVersion": reference_catalog.catalog_version,
+    }
+
+    # Omit the reference data that does not exist
+    return dict(filter(
+        lambda kv_iter_: kv_iter_[1] is not None,
+        defaults.items()
+    ))
+
+
+def get_engine_parameters(engine_parameters: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The 'Get Engine parameters' state, the draft engine parameters falling back to the resolved defaults
+    """
+    default_engine_parameters = defaults.get("engineParameters") or {}
+    return sift({
+        key: engine_parameters.get(key) if is_truthy(engine_parameters.get(key)) else default_engine_parameters.get(key)
+        for key in ENGINE_PARAMETER_KEYS
+    })
+
+
+def has_ora_fastqs(sequence_data: Any) -> bool:
+    fastq_list_rows = sequence_data.get("fastqListRows") if isinstance(sequence_data, dict) else None
+    return any(map(
+        lambda file_uri_iter_: isinstance(file_uri_iter_, str) and ORA_FILE_URI_REGEX.search(file_uri_iter_) is not None,
+        sum(map(
+            lambda fastq_list_row_iter_: [fastq_list_row_iter_.get("read1FileUri"), fastq_list_row_iter_.get("read2FileUri")],
+            fastq_list_rows if isinstance(fastq_list_rows, list) else []
+        ), [])
+    ))
+
+
+def add_reference_data(inputs: Dict[str, Any], defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The 'Add reference data' state, the resolved reference defaults where the draft does not have them
+    (the ora reference only if the fastqs are ora compressed)
+    """
+    reference_data = {}
+    for key in ("reference", "annotationFile"):
+        value = inputs.get(key) if is_truthy(inputs.get(key)) else defaults.get(key)
+        # A missing default leaves the draft value as is
+        if value is not None:
+            reference_data[key] = value
+
+    if is_truthy(inputs.get("oraReference")):
+        reference_data["oraReference"] = inputs["oraReference"]
+    elif has_ora_fastqs(inputs.get("sequenceData")):
+        if defaults.get("oraReference") is not None:
+            reference_data["oraReference"] = defaults["oraReference"]
+    else:
+        # Not needed, dropped from the inputs
+        reference_data["oraReference"] = None
+
+    return sift({**inputs, **reference_data})
+
+
+def build_workflow_run_update(
+        workflow_run: Dict[str, Any],
+        libraries: List[Dict[str, Any]],
+        payload: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    The DRAFT workflow run update object, from the workflow run (or its run context),
+    the draft libraries and the populated payload
+    """
+    return {
+        "orcabusId": workflow_run["orcabusId"],
+        "portalRunId": workflow_run["portalRunId"],
+        "status": "DRAFT",
+        "workflow": workflow_run["workflow"],
+        "workflowRunName": workflow_run["workflowRunName"],
+        "linkedLibraries": workflow_run.get("linkedLibraries", []),
+        "libraries": list(map(
+            lambda lib: {
+                "libraryId": lib["libraryId"],
+                "orcabusId": lib["orcabusId"],
+                "readsets": lib.get("readsets", []),
+            },
+            libraries
+        )),
+        "payload": payload,
+    }
+
+
+def get_populate_draft_comment_author() -> str:
+    return POPULATE_DRAFT_COMMENT_AUTHOR.format(workflow_name=environ.get(WORKFLOW_NAME_ENV_VAR, "unknown"))
+
+
+def get_populate_draft_comment_body(comment_type: str, missing_fields: Optional[List[str]] = None) -> str:
+    """
+    The comment body for a populate draft stage (see POPULATE_DRAFT_COMMENT_TEMPLATES)
+    """
+    body = POPULATE_DRAFT_COMMENT_TEMPLATES.get(comment_type, f"State update: {comment_type}")
+
+    # Handle the no_change_missing_fields template specially
+    if comment_type == "no_change_missing_fields":
+        repo_url = environ.get(REPOSITORY_GITHUB_URL_ENV_VAR, "")
+        if missing_fields:
+            missing_fields_list = "\n- ".join([""] + missing_fields)  # prefix each with \n-
+        else:
+            missing_fields_list = "\n- (none detected)"
+        body = body.format(missing_fields_list=missing_fields_list, repo_url=repo_url)
+
+    return body
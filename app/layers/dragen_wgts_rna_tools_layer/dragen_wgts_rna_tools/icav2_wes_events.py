@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+
+"""
+ICAv2 WES State Change Events to Workflow Run Update (WRU) events.
+
+Shared by the convert_icav2_wes_event_to_wru_event lambda (one event per state machine execution)
+and the put_icav2_wes_wru_events lambda (a batch of events from the ICAv2 WES event queue).
+
+Only the lookups each status needs are made (see FETCH_PLAN_BY_STATUS),
+and the workflow run is resolved through the shared workflow run resolver.
+"""
+
+# Standard imports
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Layer imports
+from orcabus_api_tools.workflow import get_latest_payload_from_workflow_run
+
+# Local imports
+from .run_context import RunContext
+from .status_ledger import STATUS_RANK, get_run_status_key
+from .workflow_run_resolver import get_workflow_run_resolver
+
+
+class FetchPlan(NamedTuple):
+    """
+    The remote lookups required to build the WRU event for a given ICAv2 WES status.
+    """
+    # Include the latest payload in the WRU event
+    # (non-terminal statuses still include it once the event carries the ICAv2 analysis id, see needs_payload)
+    needs_payload: bool
+    # Derive the outputs from the payload inputs
+    needs_outputs: bool
+
+
+# Globals
+# Terminal statuses always carry the payload (with the outputs on SUCCEEDED),
+# non-terminal statuses only carry it once the ICAv2 analysis id is known, so the workflow manager
+# learns the analysis id (engineParameters.analysisId) as soon as the analysis is launched
+FETCH_PLAN_BY_STATUS: Dict[str, FetchPlan] = {
+    'SUBMITTED': FetchPlan(needs_payload=False, needs_outputs=False),
+    'PENDING': FetchPlan(needs_payload=False, needs_outputs=False),
+    'INITIALIZING': FetchPlan(needs_payload=False, needs_outputs=False),
+    'RUNNING': FetchPlan(needs_payload=False, needs_outputs=False),
+    'SUCCEEDED': FetchPlan(needs_payload=True, needs_outputs=True),
+    'FAILED': FetchPlan(needs_payload=True, needs_outputs=False),
+    'ABORTED': FetchPlan(needs_payload=True, needs_outputs=False),
+}
+# Unknown statuses fall back to the full fetch
+DEFAULT_FETCH_PLAN = FetchPlan(needs_payload=True, needs_outputs=False)
+
+def get_fetch_plan(status: str) -> FetchPlan:
+    return FETCH_PLAN_BY_STATUS.get(status, DEFAULT_FETCH_PLAN)
+
+
+def needs_payload(fetch_plan: FetchPlan, icav2_analysis_id: Optional[str]) -> bool:
+    """
+    The payload carries the ICAv2 analysis id to the workflow manager, whatever the status
+    """
+    return fetch_plan.needs_payload or bool(icav2_analysis_id)
+
+
+def get_outputs_from_inputs(inputs: Dict[str, Any]) -> Dict[str, str]:
+    """
+    Derive the relative output paths from the payload inputs
+    :param inputs:
+    :return:
+    """
+    rna_variant_calling_output_rel_path = "__".join([
+        inputs['sampleName'],
+        inputs['reference']['name'],
+        inputs['reference']['structure'],
+        "dragen_wgts_rna_variant_calling"
+    ]) + "/"
+
+    # Add multiqc report details
+    # These will change if tumor sample name is provided
+    multiqc_output_rel_path = f"{inputs['sampleName']}_multiqc/"
+
+    return dict(filter(
+        lambda kv_iter_: kv_iter_[1] is not None,
+        {
+            'dragenRnaVariantCallingOutputRelPath': rna_variant_calling_output_rel_path,
+            'multiQcOutputRelPath': multiqc_output_rel_path,
+        }.items()
+    ))
+
+
+def convert_icav2_wes_event_to_wru_event(icav2_wes_event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Perform the following steps:
+    1. Get portal run ID from ICAv2 WES Event Tags
+    2. Look up the workflow run (and the latest payload, see needs_payload) using the portal run ID
+    3. Generate the WRSC Event payload based on the existing WRSC Event payload
+
+    The payload lookup is only skipped for non-terminal statuses (SUBMITTED, PENDING, INITIALIZING, RUNNING)
+    sent before the ICAv2 analysis id is known, these events have nothing to add to the payload.
+    :param icav2_wes_event: The ICAv2 WES State Change Event detail
+    :return:
+    """
+    status = icav2_wes_event['status']
+    fetch_plan = get_fetch_plan(status)
+
+    # Get the portal run ID from the event tags
+    portal_run_id = icav2_wes_event['tags']['portalRunId']
+
+    # Get the ICAv2 analysis ID from the WES event
+    icav2_analysis_id = icav2_wes_event.get('icav2AnalysisId')
+
+    # Get the workflow run using the portal run ID
+    # Resolved via the shared workflow run resolver, which reuses the object from a previous invocation
+    workflow_run = get_workflow_run_resolver().get_by_portal_run_id(portal_run_id)
+
+    # Get the latest payload from the workflow run
+    latest_payload: Optional[Dict[str, Any]] = None
+    if needs_payload(fetch_plan, icav2_analysis_id):
+        latest_payload = get_latest_payload_from_workflow_run(workflow_run['orcabusId'])
+
+        # Check if the status was SUCCEEDED, if so we populate the 'outputs' data payload
+        if fetch_plan.needs_outputs:
+            latest_payload['data']['outputs'] = get_outputs_from_inputs(latest_payload['data']['inputs'])
+
+        # Propagate the ICAv2 analysis ID to engineParameters.analysisId
+        if icav2_analysis_id:
+            latest_payload['data']['engineParameters']['analysisId'] = icav2_analysis_id
+
+    # Check if the status was FAILED, if so we populate the error message and type
+    if status == 'FAILED':
+        error_type = icav2_wes_event.get('errorType', 'UnknownErrorType')
+        error_message_uri = icav2_wes_event.get('errorMessageUri', None)
+    else:
+        error_message_uri = None
+        error_type = None
+
+    # Update the workflow object to contain 'name' and 'version'
+    # We build a new dict rather than editing the (possibly cached) workflow run object
+    workflow = {
+        {'workflowName': 'name', 'workflowVersion': 'version'}.get(key_iter_, key_iter_): value_iter_
+        for key_iter_, value_iter_ in workflow_run['workflow'].items()
+    }
+
+    # Prepare the WRSC Event payload
+    return {
+        "workflowRunUpdateEvent": {
+            # New status
+            "status": status,
+            # Current time
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec='seconds').replace("+00:00", "Z"),
+            # Portal Run ID
+            "portalRunId": portal_run_id,
+            # Workflow details
+            "workflow": workflow,
+            "workflowRunName": workflow_run['workflowRunName'],
+            # Linked libraries in workflow run
+            "libraries": workflow_run['libraries'],
+            # Payload containing the original inputs and engine parameters
+            # But with the updated outputs if available
+            **(
+                {
+                    "payload": {
+                        "version": latest_payload['version'],
+                        "data": latest_payload['data']
+                    }
+                } if latest_payload is not None else {}
+            ),
+            # Execution ID (ICAv2 analysis ID)
+            **({"executionId": icav2_analysis_id} if icav2_analysis_id else {})
+        },
+        "errorMessageUri": error_message_uri,
+        "errorType": error_type,
+        # Passed on to the failure comment, so it does not need to look up the workflow run again
+        "runContext": RunContext.from_workflow_run(workflow_run).to_dict(),
+    }
+
+
+def get_icav2_wes_event_from_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the ICAv2 WES State Change Event detail from an SQS record.
+    The record body may be the full EventBridge event or just the event detail
+    :param record:
+    :return:
+    """
+    body = json.loads(record['body']) if isinstance(record.get('body'), str) else record.get('body', record)
+    return body.get('detail', body)
+
+
+def coalesce_icav2_wes_events(icav2_wes_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Group the events by ICAv2 WES analysis (of a portal run, see get_run_status_key) and drop statuses
+    that have been superseded by another status for the same analysis within the batch
+    (using the same ranking as the status ledger).
+
+    For each analysis, only the event with the highest ranked status is kept
+    (the latest in the buffer if more than one event shares that rank),
+    so a late RUNNING event that arrives after a SUCCEEDED event is dropped too,
+    while the events of a resubmitted run (a new analysis) are kept.
+    Events with a status not in STATUS_RANK are always kept.
+    :param icav2_wes_events:
+    :return: The surviving events, grouped by analysis
+    """
+    events_by_run_status_key: Dict[str, List[Dict[str, Any]]] = {}
+    for icav2_wes_event_iter_ in icav2_wes_events:
+        events_by_run_status_key.setdefault(
+            get_run_status_key(icav2_wes_event_iter_), []
+        ).append(icav2_wes_event_iter_)
+
+    surviving_events = []
+    for analysis_events in events_by_run_status_key.values():
+        ranked_events = list(filter(
+            lambda icav2_wes_event_iter_: icav2_wes_event_iter_['status'] in STATUS_RANK,
+            analysis_events
+        ))
+        latest_ranked_event = max(
+            reversed(ranked_events),
+            key=lambda icav2_wes_event_iter_: STATUS_RANK[icav2_wes_event_iter_['status']],
+            default=None
+        )
+        surviving_events.extend(filter(
+            lambda icav2_wes_event_iter_: (
+                icav2_wes_event_iter_ is latest_ranked_event or
+                icav2_wes_event_iter_['status'] not in STATUS_RANK
+            ),
+            analysis_events
+        ))
+
+    return surviving_events
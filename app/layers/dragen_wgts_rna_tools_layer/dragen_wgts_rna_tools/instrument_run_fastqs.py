@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+
+"""
+Instrument run fastq cache.
+
+When an instrument run is demultiplexed, the drafts of all of its libraries are populated at once,
+and each draft looked up its fastqs one rgid at a time (get_fastq_by_rgid), in several lambdas, on every iteration.
+
+Rgids end with the instrument run id ('<index>+<index2>.<lane>.<instrument_run_id>'),
+so the cache fetches every fastq of an instrument run in one bulk call (get_fastqs_in_instrument_run_id)
+and answers the lookups of every draft of the run from that snapshot:
+  1. a warm-container cache (short TTL)
+  2. the persistent state store, shared with the other lambdas (the snapshot is offloaded to
+     the claim check store if it is too large for a state table item), for about as long as
+     the drafts of a run take to populate, as fastqs are still assigned to sets and QC'd after the run is listed
+  3. the fastq manager, in one bulk call per instrument run
+
+The snapshot holds only the fields the draft population uses (FASTQ_FIELDS).
+A snapshot that does not have a requested fastq, or has a null in a field the caller requires
+(i.e. the fastq set id of a fastq listed before its set was assigned), is refreshed once.
+Any fastq the instrument run still does not list is looked up by its rgid, as before,
+as are the rgids the instrument run lists more than one fastq for.
+
+The schedule_draft_population lambda prefetches the instrument runs of a batch of drafts
+before it starts their populate draft data executions.
+
+Use get_instrument_run_fastq_cache() so that all lookups in a container share the same cache.
+"""
+
+# Standard imports
+import json
+import logging
+from threading import Lock
+from time import monotonic
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Layer imports
+from orcabus_api_tools.fastq import get_fastq_by_rgid, get_fastqs_in_instrument_run_id
+
+# Local imports
+from .claim_check import offload, rehydrate
+from .draft_population import get_rgid_from_fastq
+from .state_store import StateStore, get_state_store
+
+# Globals
+INSTRUMENT_RUN_FASTQS_ID_TYPE = "INSTRUMENT_RUN_FASTQS"
+LOCAL_CACHE_TTL_SECONDS = 60
+PERSISTENT_CACHE_TTL_SECONDS = 10 * 60
+
+# Fields of the fastq object used by the draft population
+FASTQ_FIELDS = ("id", "fastqSetId", "index", "lane", "instrumentRunId", "library", "qc")
+QC_FIELDS = ("rawWgsCoverageEstimate", "duplicationFractionEstimate", "insertSizeEstimate")
+# Fields every lookup requires
+DEFAULT_REQUIRED_FIELDS = ("id",)
+
+# Snapshots larger than this are offloaded to the claim check store (a state table item is at most 400 KB)
+MAX_PERSISTED_SNAPSHOT_BYTES = 256 * 1024
+
+logger = logging.getLogger()
+
+_INSTRUMENT_RUN_FASTQ_CACHE: Optional["InstrumentRunFastqCache"] = None
+
+
+def get_instrument_run_id_from_rgid(rgid: str) -> str:
+    """
+    i.e. 'GTTCGCCG+CAATGAGC.4.250724_A01052_0269_AHFHWJDSXF' -> '250724_A01052_0269_AHFHWJDSXF'
+    """
+    return rgid.split(".", 2)[-1]
+
+
+def group_rgids_by_instrument_run_id(fastq_rgid_list: List[str]) -> Dict[str, List[str]]:
+    """
+    Group rgids by their instrument run id, preserving order
+    """
+    rgids_by_instrument_run_id: Dict[str, List[str]] = {}
+    for rgid in fastq_rgid_list:
+        rgids_by_instrument_run_id.setdefault(get_instrument_run_id_from_rgid(rgid), []).append(rgid)
+    return rgids_by_instrument_run_id
+
+
+def project_fastq(fastq_obj: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Project a fastq object to FASTQ_FIELDS (and its qc to QC_FIELDS)
+    """
+    projected_fastq = {
+        field_iter_: fastq_obj.get(field_iter_)
+        for field_iter_ in FASTQ_FIELDS
+    }
+    if projected_fastq['qc'] is not None:
+        projected_fastq['qc'] = {
+            qc_field_iter_: projected_fastq['qc'].get(qc_field_iter_)
+            for qc_field_iter_ in QC_FIELDS
+        }
+    return projected_fastq
+
+
+def has_fastqs(
+        fastqs_by_rgid: Dict[str, Optional[Dict[str, Any]]],
+        fastq_rgid_list: List[str],
+        required_fields: Sequence[str]
+) -> bool:
+    """
+    Whether the snapshot lists every rgid, with none of the required fields null
+    (an rgid listed more than once, None in the snapshot, is looked up on its own)
+    """
+    return all(map(
+        lambda rgid_iter_: (
+            rgid_iter_ in fastqs_by_rgid and (
+                fastqs_by_rgid[rgid_iter_] is None or
+                all(map(
+                    lambda field_iter_: fastqs_by_rgid[rgid_iter_].get(field_iter_) is not None,
+                    required_fields
+                ))
+            )
+        ),
+        fastq_rgid_list
+    ))
+
+
+class InstrumentRunFastqCache:
+    """
+    Two-level cache of the fastqs of an instrument run, keyed by instrument run id
+    """
+
+    def __init__(
+            self,
+            state_store: Optional[StateStore] = None,
+            local_ttl_seconds: int = LOCAL_CACHE_TTL_SECONDS,
+            persistent_ttl_seconds: int = PERSISTENT_CACHE_TTL_SECONDS,
+    ):
+        self._state_store = state_store
+        self.local_ttl_seconds = local_ttl_seconds
+        self.persistent_ttl_seconds = persistent_ttl_seconds
+        # Instrument run id -> (expiry, fastqs by rgid)
+        self._local_cache: Dict[str, Tuple[float, Dict[str, Optional[Dict[str, Any]]]]] = {}
+        self._lock = Lock()
+        self._metrics: Dict[str, int] = {
+            "hits": 0,
+            "persistentHits": 0,
+            "prefetches": 0,
+            "refreshes": 0,
+            "fallbackLookups": 0,
+            "duplicateRgids": 0,
+        }
+
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = get_state_store()
+        return self._state_store
+
+    def _count(self, metric_name: str, count: int = 1) -> None:
+        with self._lock:
+            self._metrics[metric_name] += count
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def log_metrics(self) -> None:
+        logger.info(json.dumps({"instrumentRunFastqCache": self.get_metrics()}))
+
+    def _get_local(self, instrument_run_id: str) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+        with self._lock:
+            cached_entry = self._local_cache.get(instrument_run_id)
+            if cached_entry is None:
+                return None
+            if cached_entry[0] <= monotonic():
+                del self._local_cache[instrument_run_id]
+                return None
+            return cached_entry[1]
+
+    def _put_local(self, instrument_run_id: str, fastqs_by_rgid: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        with self._lock:
+            now = monotonic()
+            # Drop any expired entries so the cache does not grow over the life of the container
+            for instrument_run_id_iter_ in [
+                key_iter_ for key_iter_, (expiry_iter_, _) in self._local_cache.items()
+                if expiry_iter_ <= now
+            ]:
+                del self._local_cache[instrument_run_id_iter_]
+            self._local_cache[instrument_run_id] = (now + self.local_ttl_seconds, fastqs_by_rgid)
+
+    def _get_persisted(self, instrument_run_id: str) -> Optional[Dict[str, Optional[Dict[str, Any]]]]:
+        snapshot = self.state_store.get(instrument_run_id, INSTRUMENT_RUN_FASTQS_ID_TYPE)
+        if snapshot is None:
+            return None
+        return {
+            **{
+                get_rgid_from_fastq(fastq_iter_): fastq_iter_
+                for fastq_iter_ in rehydrate(snapshot['fastqs'])
+            },
+            **dict.fromkeys(snapshot.get('duplicateRgids', []))
+        }
+
+    def _put_persisted(self, instrument_run_id: str, fastqs_by_rgid: Dict[str, Optional[Dict[str, Any]]]) -> None:
+        try:
+            self.state_store.put(
+                instrument_run_id, INSTRUMENT_RUN_FASTQS_ID_TYPE,
+                {
+                    "instrumentRunId": instrument_run_id,
+                    "fastqs": offload(
+                        list(filter(lambda fastq_iter_: fastq_iter_ is not None, fastqs_by_rgid.values())),
+                        threshold_bytes=MAX_PERSISTED_SNAPSHOT_BYTES
+                    ),
+                    "duplicateRgids": list(filter(
+                        lambda rgid_iter_: fastqs_by_rgid[rgid_iter_] is None,
+                        fastqs_by_rgid.keys()
+                    )),
+                },
+                ttl_seconds=self.persistent_ttl_seconds
+            )
+        except Exception as e:
+            # The other containers fetch the instrument run themselves
+            logger.warning(f"Could not persist the fastqs of instrument run {instrument_run_id}: {e}")
+
+    def fetch(self, instrument_run_id: str) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch every fastq of an instrument run in one bulk call, and share the snapshot with the other containers
+        (an rgid the instrument run lists more than one fastq for is kept as None, it is looked up on its own)
+        """
+        self._count("prefetches")
+        fastqs_by_rgid: Dict[str, Optional[Dict[str, Any]]] = {}
+        duplicate_rgids = []
+        for fastq_obj in get_fastqs_in_instrument_run_id(instrument_run_id):
+            rgid = get_rgid_from_fastq(fastq_obj)
+            if rgid in fastqs_by_rgid:
+                duplicate_rgids.append(rgid)
+            fastqs_by_rgid[rgid] = project_fastq(fastq_obj)
+
+        if duplicate_rgids:
+            duplicate_rgids = list(dict.fromkeys(duplicate_rgids))
+            logger.warning(
+                f"Instrument run {instrument_run_id} lists more than one fastq for rgids {', '.join(duplicate_rgids)}, "
+                f"looking them up by rgid"
+            )
+            self._count("duplicateRgids", len(duplicate_rgids))
+            fastqs_by_rgid.update(dict.fromkeys(duplicate_rgids))
+
+        self._put_persisted(instrument_run_id, fastqs_by_rgid)
+        self._put_local(instrument_run_id, fastqs_by_rgid)
+        return fastqs_by_rgid
+
+    def _get_snapshot(self, instrument_run_id: str) -> Tuple[Dict[str, Optional[Dict[str, Any]]], bool]:
+        """
+        The fastqs of an instrument run by rgid, and whether they were just fetched
+        """
+        fastqs_by_rgid = self._get_local(instrument_run_id)
+        if fastqs_by_rgid is not None:
+            self._count("hits")
+            return fastqs_by_rgid, False
+
+        fastqs_by_rgid = self._get_persisted(instrument_run_id)
+        if fastqs_by_rgid is not None:
+            self._count("persistentHits")
+            self._put_local(instrument_run_id, fastqs_by_rgid)
+            return fastqs_by_rgid, False
+
+        return self.fetch(instrument_run_id), True
+
+    def prefetch(self, instrument_run_id: str) -> bool:
+        """
+        Make sure the fastqs of an instrument run are cached
+        :return: True if they were fetched
+        """
+        _, is_fetched = self._get_snapshot(instrument_run_id)
+        return is_fetched
+
+    def get_fastqs_by_rgid_list(
+            self,
+            fastq_rgid_list: List[str],
+            required_fields: Sequence[str] = DEFAULT_REQUIRED_FIELDS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get the (projected) fastq objects of a list of rgids, in the same order
+        :param fastq_rgid_list:
+        :param required_fields: The fields the caller uses, a snapshot taken before they were set
+          (i.e. before the fastqs were QC'd or assigned to a fastq set) is refreshed
+        """
+        fastqs_by_rgid: Dict[str, Dict[str, Any]] = {}
+        for instrument_run_id, rgid_list in group_rgids_by_instrument_run_id(fastq_rgid_list).items():
+            run_fastqs_by_rgid, is_fetched = self._get_snapshot(instrument_run_id)
+            if not is_fetched and not has_fastqs(run_fastqs_by_rgid, rgid_list, required_fields):
+                # The snapshot is older than these fastqs (or the fields required)
+                self._count("refreshes")
+                run_fastqs_by_rgid = self.fetch(instrument_run_id)
+            fastqs_by_rgid.update({
+                rgid_iter_: run_fastqs_by_rgid[rgid_iter_]
+                for rgid_iter_ in rgid_list
+                if run_fastqs_by_rgid.get(rgid_iter_) is not None
+            })
+
+        # Fastqs the instrument run does not list (or lists more than once) are looked up on their own
+        # (and raise as before if they do not exist)
+        for rgid in filter(lambda rgid_iter_: rgid_iter_ not in fastqs_by_rgid, fastq_rgid_list):
+            self._count("fallbackLookups")
+            fastqs_by_rgid[rgid] = project_fastq(get_fastq_by_rgid(rgid))
+
+        return list(map(
+            lambda rgid_iter_: fastqs_by_rgid[rgid_iter_],
+            fastq_rgid_list
+        ))
+
+
+def get_instrument_run_fastq_cache() -> InstrumentRunFastqCache:
+    """
+    Get the instrument run fastq cache shared by this container
+    """
+    global _INSTRUMENT_RUN_FASTQ_CACHE
+    if _INSTRUMENT_RUN_FASTQ_CACHE is None:
+        _INSTRUMENT_RUN_FASTQ_CACHE = InstrumentRunFastqCache()
+    return _INSTRUMENT_RUN_FASTQ_CACHE
+
+
+def set_instrument_run_fastq_cache(instrument_run_fastq_cache: Optional[InstrumentRunFastqCache]) -> None:
+    """
+    Override the instrument run fastq cache for this container, i.e. to inject a local state store in tests
+    """
+    global _INSTRUMENT_RUN_FASTQ_CACHE
+    _INSTRUMENT_RUN_FASTQ_CACHE = instrument_run_fastq_cache
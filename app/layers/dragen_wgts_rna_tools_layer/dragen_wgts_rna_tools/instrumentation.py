@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+
+"""
+Outbound call instrumentation.
+
+Every outbound HTTP call a handler makes (the OrcaBus Fastq, metadata, workflow manager and file manager APIs,
+ICAv2, and AWS services such as SSM, Schemas, S3, DynamoDB and SQS) goes through
+urllib3's connection pools, so that one point is wrapped to record, per call:
+  * the dependency (derived from the host, i.e. 'fastq', 'metadata', 'icav2', 'ssm', 'schemas')
+  * the duration (to the response headers, for streamed responses), response status
+    and request / response payload size
+
+  * the endpoint, the AWS operation (i.e. 'AmazonSSM.GetParameters') or the method and path template
+    for everything else (i.e. 'GET /api/v1/fastq/{id}')
+
+Calls are logged as CloudWatch Embedded Metric Format (EMF) records when the invocation completes,
+tagged with the lambda name and the portalRunId of the invocation (if the event carries one).
+
+Each invocation also logs a single InvocationCallCount record, with the number of remote calls
+(the RemoteCalls metric) and the call counts by endpoint and by dependency.
+Summed by portalRunId, these give the calls made per workflow run,
+see app/tests/benchmarks/call_report.py for the offline report.
+
+Decorate the handler to turn it on:
+
+    @instrument_handler
+    def handler(event, context):
+        ...
+
+Set DEPENDENCY_INSTRUMENTATION=off to disable, the decorator then returns the handler untouched
+and nothing is patched, so it costs nothing.
+"""
+
+# Standard imports
+import json
+import re
+import threading
+from collections import Counter
+from functools import wraps
+from os import environ
+from threading import Lock
+from time import monotonic, time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+# Globals
+DEPENDENCY_INSTRUMENTATION_ENV_VAR = "DEPENDENCY_INSTRUMENTATION"
+LAMBDA_FUNCTION_NAME_ENV_VAR = "AWS_LAMBDA_FUNCTION_NAME"
+METRICS_NAMESPACE = "OrcaBus/DragenWgtsRnaPipelineManager"
+
+# The OrcaBus API hosts are <service>.<domain>
+ORCABUS_DEPENDENCY_NAME_BY_HOST_PREFIX = {
+    "fastq": "fastq",
+    "metadata": "metadata",
+    "workflow": "workflow",
+    "file": "filemanager",
+}
+ICAV2_HOST_SUFFIX = "illumina.com"
+AWS_HOST_SUFFIX = "amazonaws.com"
+AWS_TARGET_HEADER = "X-Amz-Target"
+
+# Path segments that are ids, i.e. fqr.01J..., wfr.01J..., 20250101abcd1234, uuids
+ID_PATH_SEGMENT_REGEX = re.compile(
+    r"^(?:[a-z]{3}\.[0-9A-Za-z]+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|(?=.*\d)[0-9A-Za-z_-]{6,})$"
+)
+
+# Flush early if an invocation makes a lot of calls
+MAX_BUFFERED_CALLS = 100
+
+_CALLS: List["DependencyCall"] = []
+_LOCK = Lock()
+_LOCAL = threading.local()
+_INVOCATION: Dict[str, Optional[str]] = {"lambdaName": None, "portalRunId": None}
+_INVOCATION_CALLS_BY_ENDPOINT: Counter = Counter()
+_INVOCATION_CALLS_BY_DEPENDENCY: Counter = Counter()
+_INSTALLED = False
+
+
+class DependencyCall(NamedTuple):
+    dependency: str
+    host: str
+    method: str
+    endpoint: str
+    status: Optional[int]
+    duration_ms: float
+    request_bytes: int
+    response_bytes: int
+    error: Optional[str]
+    timestamp_ms: int
+    lambda_name: Optional[str]
+    portal_run_id: Optional[str]
+
+
+def is_instrumentation_enabled() -> bool:
+    return environ.get(DEPENDENCY_INSTRUMENTATION_ENV_VAR, "emf").lower() not in ("off", "false", "none")
+
+
+def get_dependency_name(host: str) -> str:
+    """
+    Map a host to a dependency name, i.e.
+    fastq.prod.umccr.org -> fastq, ica.illumina.com -> icav2,
+    ssm.ap-southeast-2.amazonaws.com -> ssm, bucket.s3.ap-southeast-2.amazonaws.com -> s3
+    """
+    host = (host or "").lower()
+    labels = host.split(".")
+    if host.endswith(AWS_HOST_SUFFIX) and len(labels) >= 4:
+        return labels[-4]
+    if host.endswith(ICAV2_HOST_SUFFIX):
+        return "icav2"
+    return ORCABUS_DEPENDENCY_NAME_BY_HOST_PREFIX.get(labels[0], labels[0])
+
+
+def get_request_host(pool_host: str, headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    The Host header if one was set (i.e. calls redirected to a local stand-in server), else the pool host
+    """
+    for header_name, header_value in (headers or {}).items():
+        if header_name.lower() == "host":
+            return header_value.split(":", 1)[0]
+    return pool_host
+
+
+def get_endpoint_name(dependency: str, method: str, url: str, headers: Optional[Dict[str, str]] = None) -> str:
+    """
+    Get a low cardinality name for the endpoint of a call, i.e.
+    AmazonSSM.GetParameters (from the X-Amz-Target header), PUT /{key} for S3,
+    GET /api/v1/fastq/{id} for the OrcaBus APIs
+    """
+    for header_name, header_value in (headers or {}).items():
+        if header_name.lower() == AWS_TARGET_HEADER.lower():
+            return header_value
+
+    path = (url or "/").split("?", 1)[0]
+    # Drop the scheme and host if the url is absolute
+    if "://" in path:
+        path = "/" + path.split("://", 1)[1].partition("/")[2]
+    if dependency == "s3":
+        return f"{method} /{{key}}"
+
+    return f"{method} " + "/".join(map(
+        lambda segment_iter_: "{id}" if ID_PATH_SEGMENT_REGEX.match(segment_iter_) else segment_iter_,
+        path.split("/")
+    ))
+
+
+def get_portal_run_id(event: Any) -> Optional[str]:
+    """
+    Find the portalRunId in a handler event, if it has one
+    """
+    if not isinstance(event, dict):
+        return None
+    for container in (
+        event,
+        event.get("runContext"),
+        event.get("detail"),
+        event.get("workflowRunUpdate"),
+        (event.get("icav2WesStateChangeEvent") or {}).get("tags"),
+    ):
+        if isinstance(container, dict) and container.get("portalRunId"):
+            return container["portalRunId"]
+    return None
+
+
+def get_payload_size(body: Any) -> int:
+    if isinstance(body, (bytes, bytearray, str)):
+        return len(body)
+    return 0
+
+
+def record_call(dependency_call: DependencyCall) -> None:
+    with _LOCK:
+        _CALLS.append(dependency_call)
+        _INVOCATION_CALLS_BY_ENDPOINT[f"{dependency_call.dependency} {dependency_call.endpoint}"] += 1
+        _INVOCATION_CALLS_BY_DEPENDENCY[dependency_call.dependency] += 1
+        should_flush = len(_CALLS) >= MAX_BUFFERED_CALLS
+    if should_flush:
+        flush_metrics()
+
+
+def to_emf_record(dependency_call: DependencyCall) -> Dict[str, Any]:
+    return {
+        "_aws": {
+            "Timestamp": dependency_call.timestamp_ms,
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["LambdaName", "Dependency"], ["Dependency"]],
+                    "Metrics": [
+                        {"Name": "DependencyLatency", "Unit": "Milliseconds"},
+                        {"Name": "DependencyResponseBytes", "Unit": "Bytes"},
+                        {"Name": "DependencyErrors", "Unit": "Count"},
+                    ],
+                }
+            ],
+        },
+        "RecordType": "DependencyCall",
+        "LambdaName": dependency_call.lambda_name or "local",
+        "Dependency": dependency_call.dependency,
+        "DependencyLatency": round(dependency_call.duration_ms, 2),
+        "DependencyResponseBytes": dependency_call.response_bytes,
+        "DependencyErrors": int(
+            dependency_call.error is not None or (dependency_call.status or 0) >= 400
+        ),
+        # Properties, searchable in logs insights but not metric dimensions
+        "PortalRunId": dependency_call.portal_run_id,
+        "Host": dependency_call.host,
+        "Method": dependency_call.method,
+        "Endpoint": dependency_call.endpoint,
+        "Status": dependency_call.status,
+        "Error": dependency_call.error,
+        "RequestBytes": dependency_call.request_bytes,
+    }
+
+
+def to_invocation_emf_record(
+        lambda_name: Optional[str],
+        portal_run_id: Optional[str],
+        calls_by_endpoint: Dict[str, int],
+        calls_by_dependency: Dict[str, int],
+) -> Dict[str, Any]:
+    return {
+        "_aws": {
+            "Timestamp": int(time() * 1000),
+            "CloudWatchMetrics": [
+                {
+                    "Namespace": METRICS_NAMESPACE,
+                    "Dimensions": [["LambdaName"]],
+                    "Metrics": [
+                        {"Name": "RemoteCalls", "Unit": "Count"},
+                    ],
+                }
+            ],
+        },
+        "RecordType": "InvocationCallCount",
+        "LambdaName": lambda_name or "local",
+        "RemoteCalls": sum(calls_by_endpoint.values()),
+        # Properties
+        "PortalRunId": portal_run_id,
+        "CallsByEndpoint": dict(calls_by_endpoint),
+        "CallsByDependency": dict(calls_by_dependency),
+    }
+
+
+def flush_invocation_call_count() -> Dict[str, Any]:
+    """
+    Write the call counts of the invocation as a single EMF record and reset them
+    (the record is written even if the invocation made no calls, so every invocation is counted)
+    """
+    with _LOCK:
+        invocation_emf_record = to_invocation_emf_record(
+            lambda_name=_INVOCATION["lambdaName"],
+            portal_run_id=_INVOCATION["portalRunId"],
+            calls_by_endpoint=_INVOCATION_CALLS_BY_ENDPOINT,
+            calls_by_dependency=_INVOCATION_CALLS_BY_DEPENDENCY,
+        )
+        _INVOCATION_CALLS_BY_ENDPOINT.clear()
+        _INVOCATION_CALLS_BY_DEPENDENCY.clear()
+    print(json.dumps(invocation_emf_record), flush=True)
+    return invocation_emf_record
+
+
+def flush_metrics() -> List[DependencyCall]:
+    """
+    Write the buffered calls as EMF records (one JSON document per line on stdout)
+    """
+    global _CALLS
+    with _LOCK:
+        calls, _CALLS = _CALLS, []
+    for dependency_call in calls:
+        print(json.dumps(to_emf_record(dependency_call)), flush=True)
+    return calls
+
+
+def _instrument_urlopen(urlopen_func: Callable) -> Callable:
+    @wraps(urlopen_func)
+    def instrumented_urlopen(self, method, url, *args, **kwargs):
+        # urllib3 retries and redirects call urlopen again, only the outermost call is recorded
+        depth = getattr(_LOCAL, "depth", 0)
+        if depth > 0:
+            return urlopen_func(self, method, url, *args, **kwargs)
+
+        _LOCAL.depth = depth + 1
+        start = monotonic()
+        status = None
+        response_bytes = 0
+        error = None
+        try:
+            response = urlopen_func(self, method, url, *args, **kwargs)
+            status = response.status
+            response_bytes = int(response.headers.get("Content-Length") or 0)
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _LOCAL.depth = depth
+            headers = kwargs.get("headers", args[1] if len(args) > 1 else None)
+            host = get_request_host(self.host, headers)
+            dependency = get_dependency_name(host)
+            record_call(DependencyCall(
+                dependency=dependency,
+                host=host,
+                method=method,
+                endpoint=get_endpoint_name(dependency, method, url, headers),
+                status=status,
+                duration_ms=(monotonic() - start) * 1000,
+                request_bytes=get_payload_size(kwargs.get("body", args[0] if args else None)),
+                response_bytes=response_bytes,
+                error=error,
+                timestamp_ms=int(time() * 1000),
+                # Calls made in the init phase have no portalRunId
+                lambda_name=_INVOCATION["lambdaName"] or environ.get(LAMBDA_FUNCTION_NAME_ENV_VAR),
+                portal_run_id=_INVOCATION["portalRunId"],
+            ))
+
+    instrumented_urlopen.__dragen_wgts_rna_tools_wrapped__ = True
+    return instrumented_urlopen
+
+
+def install_instrumentation() -> None:
+    """
+    Wrap urllib3's connection pool urlopen (once per container)
+    """
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    try:
+        from urllib3.connectionpool import HTTPConnectionPool
+    except ImportError:
+        # Nothing to instrument
+        _INSTALLED = True
+        return
+
+    if not getattr(HTTPConnectionPool.urlopen, "__dragen_wgts_rna_tools_wrapped__", False):
+        HTTPConnectionPool.urlopen = _instrument_urlopen(HTTPConnectionPool.urlopen)
+    _INSTALLED = True
+
+
+def instrument_handler(handler_func: Callable) -> Callable:
+    """
+    Record the outbound calls of each invocation and log them as EMF when it completes,
+    along with the invocation's call counts.
+    Returns the handler untouched if instrumentation is disabled.
+    """
+    if not is_instrumentation_enabled():
+        return handler_func
+
+    install_instrumentation()
+
+    @wraps(handler_func)
+    def instrumented_handler(event, context):
+        _INVOCATION["lambdaName"] = getattr(context, "function_name", None) or environ.get(LAMBDA_FUNCTION_NAME_ENV_VAR)
+        _INVOCATION["portalRunId"] = get_portal_run_id(event)
+        # Calls made in the init phase are not part of any invocation's count
+        with _LOCK:
+            _INVOCATION_CALLS_BY_ENDPOINT.clear()
+            _INVOCATION_CALLS_BY_DEPENDENCY.clear()
+        try:
+            return handler_func(event, context)
+        finally:
+            flush_metrics()
+            flush_invocation_call_count()
+            _INVOCATION["portalRunId"] = None
+
+    return instrumented_handler
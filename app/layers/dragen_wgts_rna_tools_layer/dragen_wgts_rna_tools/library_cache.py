@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+
+"""
+Library record cache.
+
+Library records (and the subject / individual they belong to) rarely change,
+but are looked up on every iteration of the populate draft data state machine.
+
+Lookups go through:
+  1. a warm-container cache (short TTL, as other containers cannot invalidate it)
+  2. the persistent state store (longer TTL, invalidated by metadata manager LIBRARY, SUBJECT and INDIVIDUAL events)
+  3. the metadata manager
+
+A library record embeds its subject and individuals, so when a record is persisted
+a dependency item is also written under each of them, i.e. ('SUBJECT#SBJ00001', 'DEPENDENT_LIBRARY#L2400001').
+A SUBJECT or INDIVIDUAL event then invalidates every cached library listed under that subject or individual.
+
+Records can be projected down to only the fields a caller needs, i.e.
+
+    project_library(library_obj, {"subjectId": "subject.subjectId"})
+    # {"subjectId": "SBJ00001"}
+"""
+
+# Standard imports
+import re
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+# Local imports
+from .state_store import StateStore, get_state_store
+
+# Globals
+LIBRARY_ID_TYPE = "LIBRARY"
+DEPENDENT_LIBRARY_ID_TYPE_PREFIX = "DEPENDENT_LIBRARY#"
+LOCAL_CACHE_TTL_SECONDS = 60
+PERSISTENT_CACHE_TTL_SECONDS = 60 * 60 * 24
+
+# Fields of the library record used for the draft tags
+LIBRARY_TAG_FIELDS: Dict[str, str] = {
+    "subjectId": "subject.subjectId",
+    "individualId": "subject.individualSet[0].individualId",
+}
+
+# Metadata model -> field path of its ids in the library record
+LIBRARY_DEPENDENCY_FIELDS: Dict[str, str] = {
+    "SUBJECT": "subject.subjectId",
+    "INDIVIDUAL": "subject.individualSet[*].individualId",
+}
+
+PATH_TOKEN_REGEX = re.compile(r"([^.\[\]]+)|\[(\d+)\]")
+
+
+def split_field_path(field_path: str) -> List[Union[str, int]]:
+    """
+    Split a field path into keys and list indexes,
+    i.e. 'subject.individualSet[0].individualId' -> ['subject', 'individualSet', 0, 'individualId']
+    """
+    return [
+        int(index_iter_) if index_iter_ else key_iter_
+        for key_iter_, index_iter_ in PATH_TOKEN_REGEX.findall(field_path)
+    ]
+
+
+def get_field(obj: Any, field_path: str) -> Any:
+    """
+    Get the value at a field path, None if any part of the path is missing
+    """
+    for token in split_field_path(field_path):
+        try:
+            obj = obj[token]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return obj
+
+
+def get_library_dependencies(library_obj: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """
+    The (model, id) of the subject and individuals embedded in a library record,
+    i.e. [('SUBJECT', 'SBJ00001'), ('INDIVIDUAL', 'IND00001')]
+    """
+    dependencies = []
+    for model, field_path in LIBRARY_DEPENDENCY_FIELDS.items():
+        list_path, _, item_path = field_path.partition("[*].")
+        field_values = (
+            list(map(lambda item_iter_: get_field(item_iter_, item_path), get_field(library_obj, list_path) or []))
+            if item_path else [get_field(library_obj, field_path)]
+        )
+        dependencies.extend(
+            (model, field_value_iter_) for field_value_iter_ in field_values if field_value_iter_ is not None
+        )
+    return dependencies
+
+
+def get_dependency_id(model: str, model_id: str) -> str:
+    return f"{model}#{model_id}"
+
+
+def project_library(library_obj: Dict[str, Any], fields: Dict[str, str]) -> Dict[str, Any]:
+    """
+    Project a library record to a flat dict of output key -> value at field path
+    """
+    return {
+        output_key_iter_: get_field(library_obj, field_path_iter_)
+        for output_key_iter_, field_path_iter_ in fields.items()
+    }
+
+
+class LibraryCache:
+    """
+    Two-level cache of library records keyed by library id
+    """
+
+    def __init__(
+            self,
+            state_store: Optional[StateStore] = None,
+            local_ttl_seconds: int = LOCAL_CACHE_TTL_SECONDS,
+            persistent_ttl_seconds: int = PERSISTENT_CACHE_TTL_SECONDS,
+    ):
+        self._state_store = state_store
+        self.local_ttl_seconds = local_ttl_seconds
+        self.persistent_ttl_seconds = persistent_ttl_seconds
+        # Library id -> (expiry, library object)
+        self._local_cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = get_state_store()
+        return self._state_store
+
+    def _get_local(self, library_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached_entry = self._local_cache.get(library_id)
+            if cached_entry is None:
+                return None
+            if cached_entry[0] <= monotonic():
+                del self._local_cache[library_id]
+                return None
+            return cached_entry[1]
+
+    def _put_local(self, library_id: str, library_obj: Dict[str, Any]) -> None:
+        with self._lock:
+            now = monotonic()
+            # Drop any expired entries so the cache does not grow over the life of the container
+            for library_id_iter_ in [
+                key_iter_ for key_iter_, (expiry_iter_, _) in self._local_cache.items()
+                if expiry_iter_ <= now
+            ]:
+                del self._local_cache[library_id_iter_]
+            self._local_cache[library_id] = (now + self.local_ttl_seconds, library_obj)
+
+    def get(
+            self,
+            library_id: str,
+            fetch: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        Get a library record, calling fetch(library_id) on a miss
+        """
+        library_obj = self._get_local(library_id)
+        if library_obj is not None:
+            return library_obj
+
+        library_obj = self.state_store.get(library_id, LIBRARY_ID_TYPE)
+        if library_obj is None:
+            library_obj = fetch(library_id)
+            # Written before the record, so a record is never persisted without its dependencies
+            for model, model_id in get_library_dependencies(library_obj):
+                self.state_store.put(
+                    get_dependency_id(model, model_id), f"{DEPENDENT_LIBRARY_ID_TYPE_PREFIX}{library_id}",
+                    {"libraryId": library_id},
+                    ttl_seconds=self.persistent_ttl_seconds
+                )
+            self.state_store.put(
+                library_id, LIBRARY_ID_TYPE, library_obj,
+                ttl_seconds=self.persistent_ttl_seconds
+            )
+
+        self._put_local(library_id, library_obj)
+        return library_obj
+
+    def invalidate(self, library_id: str) -> None:
+        """
+        Drop a library record from both levels of the cache
+        """
+        with self._lock:
+            self._local_cache.pop(library_id, None)
+        self.state_store.delete(library_id, LIBRARY_ID_TYPE)
+
+    def invalidate_dependents(self, model: str, model_id: str) -> List[str]:
+        """
+        Drop the library records that embed a subject or individual
+        :param model: SUBJECT or INDIVIDUAL
+        :param model_id: The subject id or individual id
+        :return: The library ids that were invalidated
+        """
+        dependency_id = get_dependency_id(model, model_id)
+        library_ids = []
+        for dependency_id_type, dependency in self.state_store.get_all(
+                dependency_id, DEPENDENT_LIBRARY_ID_TYPE_PREFIX
+        ).items():
+            self.invalidate(dependency['libraryId'])
+            self.state_store.delete(dependency_id, dependency_id_type)
+            library_ids.append(dependency['libraryId'])
+        return library_ids
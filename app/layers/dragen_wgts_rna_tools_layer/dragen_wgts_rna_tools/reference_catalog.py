@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+"""
+Versioned reference data catalog.
+
+A single JSON document (deployed as the reference-catalog SSM parameter) describing every
+reference tarball, ORA reference and annotation file, plus the default keys per workflow version:
+
+    {
+        "catalogVersion": "2026.10.19",
+        "references": [{"name": "hg38", "structure": "linear", "tarball": "s3://..."}],
+        "oraReferences": [{"oraVersion": "2.7.0", "oraReference": "s3://..."}],
+        "annotations": [{"annotationVersion": "44", "annotationFile": "s3://..."}],
+        "workflowDefaults": {
+            "4.4.4": {"genome": "hg38", "structure": "linear", "annotationVersion": "44", "oraVersion": "2.7.0"}
+        }
+    }
+
+The document is loaded once per container into an in-memory index keyed by
+(genome, structure, annotation version, ORA version), so the reference, oraReference and annotationFile
+inputs come back from a single lookup. The index is only rebuilt if the catalog document changes
+(it is keyed on the sha256 of the document, so an edit that does not bump the catalog version is still picked up).
+
+The catalog does not need AWS, i.e. for bulk draft population offline:
+
+    catalog = ReferenceCatalog.from_file("reference_catalog.json")
+    catalog.get_reference_inputs_for_workflow_version("4.4.4")
+
+or from the command line:
+
+    python3 -m dragen_wgts_rna_tools.reference_catalog reference_catalog.json --workflow-version 4.4.4
+"""
+
+# Standard imports
+import hashlib
+import json
+from itertools import product
+from os import environ
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+# Globals
+REFERENCE_CATALOG_SSM_PARAMETER_NAME_ENV_VAR = "REFERENCE_CATALOG_SSM_PARAMETER_NAME"
+# Load the catalog from a local file instead of SSM (takes precedence)
+REFERENCE_CATALOG_PATH_ENV_VAR = "REFERENCE_CATALOG_PATH"
+
+_REFERENCE_CATALOG: Optional["ReferenceCatalog"] = None
+# The sha256 of the document the index was built from, None if the catalog was set with set_reference_catalog
+_REFERENCE_CATALOG_SHA256: Optional[str] = None
+
+
+class ReferenceKey(NamedTuple):
+    genome: str
+    structure: str
+    annotation_version: str
+    ora_version: str
+
+    @classmethod
+    def from_dict(cls, reference_key_dict: Dict[str, str]) -> "ReferenceKey":
+        return cls(
+            genome=reference_key_dict['genome'],
+            structure=reference_key_dict['structure'],
+            annotation_version=reference_key_dict['annotationVersion'],
+            ora_version=reference_key_dict['oraVersion'],
+        )
+
+
+class ReferenceCatalog:
+    """
+    In-memory index over a reference catalog document
+    """
+
+    def __init__(self, catalog: Dict[str, Any]):
+        self.catalog_version: str = catalog['catalogVersion']
+        self.workflow_defaults: Dict[str, ReferenceKey] = {
+            workflow_version: ReferenceKey.from_dict(reference_key_dict)
+            for workflow_version, reference_key_dict in catalog.get('workflowDefaults', {}).items()
+        }
+        self._index: Dict[ReferenceKey, Dict[str, Any]] = {
+            ReferenceKey(
+                genome=reference['name'],
+                structure=reference['structure'],
+                annotation_version=annotation['annotationVersion'],
+                ora_version=ora_reference['oraVersion'],
+            ): {
+                "reference": reference,
+                "oraReference": ora_reference['oraReference'],
+                "annotationFile": annotation['annotationFile'],
+            }
+            for reference, annotation, ora_reference in product(
+                catalog.get('references', []),
+                catalog.get('annotations', []),
+                catalog.get('oraReferences', []),
+            )
+        }
+
+    @classmethod
+    def from_json(cls, catalog_json: str) -> "ReferenceCatalog":
+        return cls(json.loads(catalog_json))
+
+    @classmethod
+    def from_file(cls, catalog_path: Union[str, Path]) -> "ReferenceCatalog":
+        return cls.from_json(Path(catalog_path).read_text())
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get_reference_inputs(self, reference_key: ReferenceKey) -> Dict[str, Any]:
+        """
+        Get the reference, oraReference and annotationFile inputs for a key
+        :raises KeyError: if the catalog has no entry for the key
+        """
+        try:
+            return self._index[reference_key]
+        except KeyError:
+            raise KeyError(f"No reference data in catalog {self.catalog_version} for {reference_key}")
+
+    def get_default_key(self, workflow_version: str, ora_version: Optional[str] = None) -> ReferenceKey:
+        try:
+            reference_key = self.workflow_defaults[workflow_version]
+        except KeyError:
+            raise KeyError(f"No default reference data in catalog {self.catalog_version} for workflow version {workflow_version}")
+        if ora_version is not None:
+            reference_key = reference_key._replace(ora_version=ora_version)
+        return reference_key
+
+    def get_reference_inputs_for_workflow_version(
+            self,
+            workflow_version: str,
+            ora_version: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get the default reference, oraReference and annotationFile inputs for a workflow version,
+        along with the key they were resolved from
+        """
+        reference_key = self.get_default_key(workflow_version, ora_version)
+        return {
+            **self.get_reference_inputs(reference_key),
+            "annotationVersion": reference_key.annotation_version,
+            "oraVersion": reference_key.ora_version,
+        }
+
+
+def load_reference_catalog(catalog_json: str) -> ReferenceCatalog:
+    """
+    Index the catalog document, reusing the container's index if the document has not changed
+    """
+    global _REFERENCE_CATALOG, _REFERENCE_CATALOG_SHA256
+    catalog_sha256 = hashlib.sha256(catalog_json.encode()).hexdigest()
+    if _REFERENCE_CATALOG is not None and catalog_sha256 == _REFERENCE_CATALOG_SHA256:
+        return _REFERENCE_CATALOG
+    _REFERENCE_CATALOG = ReferenceCatalog(json.loads(catalog_json))
+    _REFERENCE_CATALOG_SHA256 = catalog_sha256
+    return _REFERENCE_CATALOG
+
+
+def get_reference_catalog() -> ReferenceCatalog:
+    """
+    Get the reference catalog, from REFERENCE_CATALOG_PATH if set, otherwise from the
+    REFERENCE_CATALOG_SSM_PARAMETER_NAME SSM parameter (through the SSM parameter cache)
+    """
+    # Set with set_reference_catalog
+    if _REFERENCE_CATALOG is not None and _REFERENCE_CATALOG_SHA256 is None:
+        return _REFERENCE_CATALOG
+
+    if environ.get(REFERENCE_CATALOG_PATH_ENV_VAR):
+        return load_reference_catalog(Path(environ[REFERENCE_CATALOG_PATH_ENV_VAR]).read_text())
+
+    from .ssm_parameters import get_ssm_parameter_cache
+    return load_reference_catalog(
+        get_ssm_parameter_cache().get_parameter_value(environ[REFERENCE_CATALOG_SSM_PARAMETER_NAME_ENV_VAR])
+    )
+
+
+def set_reference_catalog(reference_catalog: Optional[ReferenceCatalog]) -> None:
+    """
+    Override the container's reference catalog, i.e. for local testing
+    """
+    global _REFERENCE_CATALOG, _REFERENCE_CATALOG_SHA256
+    _REFERENCE_CATALOG = reference_catalog
+    _REFERENCE_CATALOG_SHA256 = None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Look up the reference inputs in a reference catalog document")
+    parser.add_argument("catalog_path")
+    parser.add_argument("--workflow-version", required=True)
+    parser.add_argument("--ora-version")
+    args = parser.parse_args()
+
+    print(json.dumps(
+        ReferenceCatalog.from_file(args.catalog_path).get_reference_inputs_for_workflow_version(
+            args.workflow_version, args.ora_version
+        ),
+        indent=4
+    ))
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run context.
+
+The immutable identifiers of a workflow run, built once when a state machine starts
+(from the triggering WorkflowRunStateChange event) and passed to the lambdas as 'runContext':
+
+    {
+        "orcabusId": "wfr.01J...",
+        "portalRunId": "20250101abcd1234",
+        "workflow": {"orcabusId": "wfl.01J...", "name": "dragen-wgts-rna", "version": "4.4.4"},
+        "workflowRunName": "umccr--automated--dragen-wgts-rna--4-4-4--20250101abcd1234",
+        "linkedLibraries": [{"libraryId": "L2400001", "orcabusId": "lib.01J..."}],
+        "executionArn": "arn:aws:states:..."
+    }
+
+Lambdas that would otherwise look up the workflow run use the context when it is present,
+and fall back to the workflow run resolver when it is not.
+"""
+
+# Standard imports
+from typing import Any, Dict, List, NamedTuple, Optional
+
+# Globals
+RUN_CONTEXT_KEY = "runContext"
+
+
+class RunContext(NamedTuple):
+    orcabus_id: str
+    portal_run_id: str
+    workflow: Dict[str, Any]
+    workflow_run_name: str
+    linked_libraries: List[Dict[str, str]]
+    execution_arn: Optional[str] = None
+
+    @classmethod
+    def from_dict(cls, run_context_dict: Dict[str, Any]) -> "RunContext":
+        return cls(
+            orcabus_id=run_context_dict['orcabusId'],
+            portal_run_id=run_context_dict['portalRunId'],
+            workflow=run_context_dict['workflow'],
+            workflow_run_name=run_context_dict['workflowRunName'],
+            linked_libraries=run_context_dict.get('linkedLibraries') or [],
+            execution_arn=run_context_dict.get('executionArn'),
+        )
+
+    @classmethod
+    def from_workflow_run(
+            cls,
+            workflow_run: Dict[str, Any],
+            execution_arn: Optional[str] = None
+    ) -> "RunContext":
+        """
+        Build the context from a workflow manager workflow run object
+        """
+        return cls(
+            orcabus_id=workflow_run['orcabusId'],
+            portal_run_id=workflow_run['portalRunId'],
+            workflow=workflow_run['workflow'],
+            workflow_run_name=workflow_run['workflowRunName'],
+            linked_libraries=list(map(
+                lambda library_iter_: {
+                    "libraryId": library_iter_['libraryId'],
+                    "orcabusId": library_iter_['orcabusId'],
+                },
+                workflow_run.get('libraries') or []
+            )),
+            execution_arn=execution_arn,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "orcabusId": self.orcabus_id,
+            "portalRunId": self.portal_run_id,
+            "workflow": self.workflow,
+            "workflowRunName": self.workflow_run_name,
+            "linkedLibraries": self.linked_libraries,
+            "executionArn": self.execution_arn,
+        }
+
+
+def get_run_context(event: Dict[str, Any]) -> Optional[RunContext]:
+    """
+    Get the run context from a lambda event, None if it is absent or incomplete
+    """
+    run_context_dict = event.get(RUN_CONTEXT_KEY)
+    if not run_context_dict:
+        return None
+    try:
+        return RunContext.from_dict(run_context_dict)
+    except KeyError:
+        return None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+"""
+SSM parameter cache.
+
+Resolves SSM parameters in batches (GetParameters, up to 10 names per call, or GetParametersByPath)
+and caches the values for the life of the warm container, with a TTL
+(env var SSM_PARAMETER_CACHE_TTL_SECONDS, default 5 minutes).
+
+    ssm_parameter_cache = get_ssm_parameter_cache()
+    values = ssm_parameter_cache.get_parameters(["/a/b", "/a/c"])  # {"/a/b": "...", "/a/c": None}
+    value = ssm_parameter_cache.get_parameter_value("/a/b")  # raises KeyError if the parameter does not exist
+
+Parameters that do not exist are cached as None (for the same TTL),
+so a missing default does not cost an SSM call on every invocation.
+"""
+
+# Standard imports
+import typing
+from os import environ
+from threading import Lock
+from time import monotonic
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_ssm import SSMClient
+
+# Globals
+SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR = "SSM_PARAMETER_CACHE_TTL_SECONDS"
+DEFAULT_SSM_PARAMETER_CACHE_TTL_SECONDS = 300
+# GetParameters accepts at most 10 names per call
+GET_PARAMETERS_MAX_NAMES = 10
+
+_SSM_PARAMETER_CACHE: Optional["SsmParameterCache"] = None
+
+
+class SsmParameterCache:
+    """
+    Container-level cache of SSM parameter values, filled with batched SSM calls
+    """
+
+    def __init__(self, ttl_seconds: Optional[int] = None, client: Optional["SSMClient"] = None):
+        self.ttl_seconds = (
+            ttl_seconds if ttl_seconds is not None
+            else int(environ.get(SSM_PARAMETER_CACHE_TTL_SECONDS_ENV_VAR, DEFAULT_SSM_PARAMETER_CACHE_TTL_SECONDS))
+        )
+        self._client = client
+        self._values: Dict[str, Tuple[float, Optional[str]]] = {}
+        self._lock = Lock()
+        self.ssm_calls = 0
+
+    @property
+    def client(self) -> "SSMClient":
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("ssm")
+        return self._client
+
+    def _get_cached(self, name: str) -> Tuple[bool, Optional[str]]:
+        with self._lock:
+            cached = self._values.get(name)
+        if cached is None or cached[0] <= monotonic():
+            return False, None
+        return True, cached[1]
+
+    def _set_cached(self, values: Dict[str, Optional[str]]) -> None:
+        expires_at = monotonic() + self.ttl_seconds
+        with self._lock:
+            for name, value in values.items():
+                self._values[name] = (expires_at, value)
+
+    def get_parameters(self, names: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Get the values of the parameters (None for parameters that do not exist),
+        the names not in the cache are fetched with as few GetParameters calls as possible
+        :param names:
+        :return:
+        """
+        names = list(dict.fromkeys(names))
+        values: Dict[str, Optional[str]] = {}
+        missing_names: List[str] = []
+        for name in names:
+            is_cached, value = self._get_cached(name)
+            if is_cached:
+                values[name] = value
+            else:
+                missing_names.append(name)
+
+        for batch_start in range(0, len(missing_names), GET_PARAMETERS_MAX_NAMES):
+            batch_names = missing_names[batch_start:batch_start + GET_PARAMETERS_MAX_NAMES]
+            response = self.client.get_parameters(Names=batch_names, WithDecryption=True)
+            self.ssm_calls += 1
+            batch_values: Dict[str, Optional[str]] = dict.fromkeys(batch_names)
+            for parameter in response["Parameters"]:
+                batch_values[parameter["Name"]] = parameter["Value"]
+            self._set_cached(batch_values)
+            values.update(batch_values)
+
+        return {name: values[name] for name in names}
+
+    def get_parameters_by_path(self, path: str, recursive: bool = True) -> Dict[str, str]:
+        """
+        Get all parameters under a path, the values are also cached by name
+        (so subsequent get_parameters calls for these names do not call SSM)
+        :param path:
+        :param recursive:
+        :return:
+        """
+        values: Dict[str, str] = {}
+        paginator = self.client.get_paginator("get_parameters_by_path")
+        for page in paginator.paginate(Path=path, Recursive=recursive, WithDecryption=True):
+            self.ssm_calls += 1
+            for parameter in page["Parameters"]:
+                values[parameter["Name"]] = parameter["Value"]
+        self._set_cached(values)
+        return values
+
+    def get_parameter_value(self, name: str) -> str:
+        value = self.get_parameters([name])[name]
+        if value is None:
+            raise KeyError(f"SSM parameter {name} does not exist")
+        return value
+
+    def invalidate(self, name: Optional[str] = None) -> None:
+        with self._lock:
+            if name is None:
+                self._values.clear()
+            else:
+                self._values.pop(name, None)
+
+
+def get_ssm_parameter_cache() -> SsmParameterCache:
+    global _SSM_PARAMETER_CACHE
+    if _SSM_PARAMETER_CACHE is None:
+        _SSM_PARAMETER_CACHE = SsmParameterCache()
+    return _SSM_PARAMETER_CACHE
+
+
+def set_ssm_parameter_cache(ssm_parameter_cache: Optional[SsmParameterCache]) -> None:
+    """
+    Override the SSM parameter cache, i.e. with a stubbed client for local testing
+    """
+    global _SSM_PARAMETER_CACHE
+    _SSM_PARAMETER_CACHE = ssm_parameter_cache
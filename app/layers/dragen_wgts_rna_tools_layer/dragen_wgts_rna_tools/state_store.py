@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+"""
+Small key-value state store shared across invocations (and lambdas).
+
+Items are addressed by an id and an id type, i.e. ('20250617ac346b29', 'RUN_STATUS'),
+and hold a JSON-serialisable value with an optional expiry.
+
+Backends:
+  * DynamoDbStateStore - used when the STATE_TABLE_NAME env var is set
+  * LocalStateStore - in-memory, used for local testing (or when no table is configured,
+    in which case state is only shared within the warm container)
+"""
+
+# Standard imports
+import json
+import typing
+from abc import ABC, abstractmethod
+from os import environ
+from threading import Lock
+from time import time
+from typing import Any, Dict, Optional, Tuple
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_dynamodb import DynamoDBClient
+
+# Globals
+STATE_TABLE_NAME_ENV_VAR = "STATE_TABLE_NAME"
+STATE_STORE_BACKEND_ENV_VAR = "STATE_STORE_BACKEND"
+
+# Table attributes
+ID_ATTRIBUTE = "id"
+ID_TYPE_ATTRIBUTE = "idType"
+VALUE_ATTRIBUTE = "value"
+VERSION_ATTRIBUTE = "version"
+EXPIRES_AT_ATTRIBUTE = "expiresAt"
+
+_STATE_STORE: Optional["StateStore"] = None
+
+
+class StateStore(ABC):
+    """
+    Interface for the state store backends
+    """
+
+    @abstractmethod
+    def get(self, id_: str, id_type: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the value for an item, None if the item does not exist or has expired
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put(self, id_: str, id_type: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
+        """
+        Put the value for an item, overwriting any existing value
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_if_newer(
+            self,
+            id_: str,
+            id_type: str,
+            value: Dict[str, Any],
+            version: str,
+            ttl_seconds: Optional[int] = None
+    ) -> bool:
+        """
+        Put the value for an item only if the item does not exist
+        or the existing version is less than or equal to the new version.
+        Versions are compared as strings.
+        :return: True if the value was written
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, id_: str, id_type: str) -> None:
+        """
+        Delete an item if it exists
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_all(self, id_: str, id_type_prefix: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the values of the (unexpired) items of an id whose id type starts with id_type_prefix
+        :return: id type -> value
+        """
+        raise NotImplementedError
+
+
+def _get_expires_at(ttl_seconds: Optional[int]) -> Optional[int]:
+    return int(time()) + ttl_seconds if ttl_seconds is not None else None
+
+
+class LocalStateStore(StateStore):
+    """
+    In-memory state store
+    """
+
+    def __init__(self):
+        self._items: Dict[Tuple[str, str], Tuple[Dict[str, Any], Optional[str], Optional[int]]] = {}
+        self._lock = Lock()
+
+    def get(self, id_: str, id_type: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get((id_, id_type))
+            if item is None:
+                return None
+            value, _, expires_at = item
+            if expires_at is not None and expires_at <= time():
+                del self._items[(id_, id_type)]
+                return None
+            # Return a copy, as we would from a remote backend
+            return json.loads(json.dumps(value))
+
+    def put(self, id_: str, id_type: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
+        with self._lock:
+            self._items[(id_, id_type)] = (
+                json.loads(json.dumps(value)), None, _get_expires_at(ttl_seconds)
+            )
+
+    def put_if_newer(
+            self,
+            id_: str,
+            id_type: str,
+            value: Dict[str, Any],
+            version: str,
+            ttl_seconds: Optional[int] = None
+    ) -> bool:
+        with self._lock:
+            existing_item = self._items.get((id_, id_type))
+            if (
+                    existing_item is not None and
+                    existing_item[1] is not None and
+                    (existing_item[2] is None or existing_item[2] > time()) and
+                    existing_item[1] > version
+            ):
+                return False
+            self._items[(id_, id_type)] = (
+                json.loads(json.dumps(value)), version, _get_expires_at(ttl_seconds)
+            )
+            return True
+
+    def delete(self, id_: str, id_type: str) -> None:
+        with self._lock:
+            self._items.pop((id_, id_type), None)
+
+    def get_all(self, id_: str, id_type_prefix: str) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                item_id_type_iter_: json.loads(json.dumps(value_iter_))
+                for (item_id_iter_, item_id_type_iter_), (value_iter_, _, expires_at_iter_) in self._items.items()
+                if (
+                    item_id_iter_ == id_ and
+                    item_id_type_iter_.startswith(id_type_prefix) and
+                    (expires_at_iter_ is None or expires_at_iter_ > time())
+                )
+            }
+
+
+class DynamoDbStateStore(StateStore):
+    """
+    DynamoDB backed state store, expired items are removed by the table's TTL
+    but may be returned by a read until then, so we also check the expiry on read.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self._client: Optional["DynamoDBClient"] = None
+
+    @property
+    def client(self) -> "DynamoDBClient":
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("dynamodb")
+        return self._client
+
+    @staticmethod
+    def _get_key(id_: str, id_type: str) -> Dict[str, Dict[str, str]]:
+        return {
+            ID_ATTRIBUTE: {"S": id_},
+            ID_TYPE_ATTRIBUTE: {"S": id_type},
+        }
+
+    def _get_item(
+            self, id_: str, id_type: str, value: Dict[str, Any],
+            version: Optional[str], ttl_seconds: Optional[int]
+    ) -> Dict[str, Dict[str, str]]:
+        expires_at = _get_expires_at(ttl_seconds)
+        return {
+            **self._get_key(id_, id_type),
+            VALUE_ATTRIBUTE: {"S": json.dumps(value)},
+            **({VERSION_ATTRIBUTE: {"S": version}} if version is not None else {}),
+            **({EXPIRES_AT_ATTRIBUTE: {"N": str(expires_at)}} if expires_at is not None else {}),
+        }
+
+    def get(self, id_: str, id_type: str) -> Optional[Dict[str, Any]]:
+        item = self.client.get_item(
+            TableName=self.table_name,
+            Key=self._get_key(id_, id_type),
+            ConsistentRead=True,
+        ).get("Item")
+
+        if item is None:
+            return None
+        if EXPIRES_AT_ATTRIBUTE in item and int(item[EXPIRES_AT_ATTRIBUTE]["N"]) <= time():
+            return None
+        return json.loads(item[VALUE_ATTRIBUTE]["S"])
+
+    def put(self, id_: str, id_type: str, value: Dict[str, Any], ttl_seconds: Optional[int] = None) -> None:
+        self.client.put_item(
+            TableName=self.table_name,
+            Item=self._get_item(id_, id_type, value, None, ttl_seconds),
+        )
+
+    def put_if_newer(
+            self,
+            id_: str,
+            id_type: str,
+            value: Dict[str, Any],
+            version: str,
+            ttl_seconds: Optional[int] = None
+    ) -> bool:
+        try:
+            self.client.put_item(
+                TableName=self.table_name,
+                Item=self._get_item(id_, id_type, value, version, ttl_seconds),
+                ConditionExpression=(
+                    f"attribute_not_exists({VERSION_ATTRIBUTE}) OR "
+                    f"{VERSION_ATTRIBUTE} <= :version OR "
+                    f"{EXPIRES_AT_ATTRIBUTE} <= :now"
+                ),
+                ExpressionAttributeValues={
+                    ":version": {"S": version},
+                    ":now": {"N": str(int(time()))},
+                },
+            )
+        except self.client.exceptions.ConditionalCheckFailedException:
+            return False
+        return True
+
+    def delete(self, id_: str, id_type: str) -> None:
+        self.client.delete_item(
+            TableName=self.table_name,
+            Key=self._get_key(id_, id_type),
+        )
+
+    def get_all(self, id_: str, id_type_prefix: str) -> Dict[str, Dict[str, Any]]:
+        items = []
+        query_kwargs = {}
+        while True:
+            response = self.client.query(
+                TableName=self.table_name,
+                KeyConditionExpression=f"{ID_ATTRIBUTE} = :id AND begins_with({ID_TYPE_ATTRIBUTE}, :idTypePrefix)",
+                ExpressionAttributeValues={
+                    ":id": {"S": id_},
+                    ":idTypePrefix": {"S": id_type_prefix},
+                },
+                ConsistentRead=True,
+                **query_kwargs
+            )
+            items.extend(response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs = {"ExclusiveStartKey": response["LastEvaluatedKey"]}
+
+        return {
+            item_iter_[ID_TYPE_ATTRIBUTE]["S"]: json.loads(item_iter_[VALUE_ATTRIBUTE]["S"])
+            for item_iter_ in items
+            if not (
+                EXPIRES_AT_ATTRIBUTE in item_iter_ and
+                int(item_iter_[EXPIRES_AT_ATTRIBUTE]["N"]) <= time()
+            )
+        }
+
+
+def get_state_store() -> StateStore:
+    """
+    Get the state store for this container.
+    Set STATE_STORE_BACKEND to 'local' to force the in-memory backend (i.e. for local testing)
+    :return:
+    """
+    global _STATE_STORE
+
+    if _STATE_STORE is None:
+        if (
+                environ.get(STATE_STORE_BACKEND_ENV_VAR, "") != "local" and
+                environ.get(STATE_TABLE_NAME_ENV_VAR)
+        ):
+            _STATE_STORE = DynamoDbStateStore(environ[STATE_TABLE_NAME_ENV_VAR])
+        else:
+            _STATE_STORE = LocalStateStore()
+
+    return _STATE_STORE
+
+
+def set_state_store(state_store: Optional[StateStore]) -> None:
+    """
+    Override the state store for this container, i.e. to inject a local backend in tests
+    """
+    global _STATE_STORE
+    _STATE_STORE = state_store
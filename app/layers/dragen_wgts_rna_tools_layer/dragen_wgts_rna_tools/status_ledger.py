@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+
+"""
+Monotonic run status ledger.
+
+Records the highest ICAv2 WES status seen for each ICAv2 WES analysis of a portal run (and the time of that event),
+so that out-of-order events (i.e. a late RUNNING event after a SUCCEEDED event) can be skipped
+before making any remote calls.
+
+Entries are keyed on the portal run id and the ICAv2 WES analysis id, so a resubmission of a portal run
+after a FAILED or ABORTED analysis (a new analysis) starts from an empty ledger entry.
+"""
+
+# Standard imports
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+# Local imports
+from .state_store import StateStore, get_state_store
+
+# Globals
+RUN_STATUS_ID_TYPE = "RUN_STATUS"
+# Keep ledger entries for a month after the last status update
+RUN_STATUS_TTL_SECONDS = 60 * 60 * 24 * 30
+
+# Order of the ICAv2 WES statuses over the life of an analysis,
+# terminal statuses share the highest rank, statuses not listed here are never considered stale
+STATUS_RANK: Dict[str, int] = {
+    'SUBMITTED': 0,
+    'PENDING': 1,
+    'INITIALIZING': 2,
+    'RUNNING': 3,
+    'SUCCEEDED': 4,
+    'FAILED': 4,
+    'ABORTED': 4,
+}
+
+
+def get_run_status_key(icav2_wes_event: Dict[str, Any]) -> str:
+    """
+    The ledger key of an ICAv2 WES State Change Event, the portal run id and the ICAv2 WES analysis id
+    (the id of the WES analysis is set on submission, the ICAv2 analysis id only once the analysis is launched)
+    :param icav2_wes_event:
+    :return: i.e. '20250417abcd1234#iwa.01JWAGE5PWS5JN48VWNPYSTJRN'
+    """
+    analysis_id = icav2_wes_event.get('id') or icav2_wes_event.get('icav2AnalysisId') or ""
+    return f"{icav2_wes_event['tags']['portalRunId']}#{analysis_id}"
+
+
+def get_epoch_milliseconds(timestamp: Optional[str]) -> int:
+    """
+    Parse an ISO 8601 timestamp to epoch milliseconds, timestamps without a timezone are in UTC
+    (i.e. the submissionTime of the ICAv2 WES events)
+    :param timestamp:
+    :return: 0 if the timestamp is missing or cannot be parsed
+    """
+    if not timestamp:
+        return 0
+    try:
+        timestamp_obj = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except ValueError:
+        return 0
+    if timestamp_obj.tzinfo is None:
+        timestamp_obj = timestamp_obj.replace(tzinfo=timezone.utc)
+    return int(timestamp_obj.timestamp() * 1000)
+
+
+def get_icav2_wes_event_time(icav2_wes_event: Dict[str, Any]) -> int:
+    """
+    Get the time of an ICAv2 WES State Change Event in epoch milliseconds,
+    the most recent of the end, start and submission times present in the event
+    :param icav2_wes_event:
+    :return:
+    """
+    return get_epoch_milliseconds(
+        icav2_wes_event.get('endTime') or
+        icav2_wes_event.get('startTime') or
+        icav2_wes_event.get('submissionTime')
+    )
+
+
+def get_status_version(status: str, event_time: int) -> str:
+    """
+    The ledger version of a status, ordered by status rank and then by event time
+    (zero padded, as versions are compared as strings)
+    :param status:
+    :param event_time: Epoch milliseconds
+    :return: i.e. '04#001750214792146'
+    """
+    return f"{STATUS_RANK[status]:02d}#{event_time:015d}"
+
+
+class RunStatusLedger:
+    """
+    Ledger of the highest status seen per ICAv2 WES analysis of a portal run (see get_run_status_key)
+    """
+
+    def __init__(self, state_store: Optional[StateStore] = None):
+        self.state_store = state_store if state_store is not None else get_state_store()
+
+    def get_latest_status(self, run_status_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the highest status recorded for an ICAv2 WES analysis of a portal run
+        :param run_status_key:
+        :return: {"status": "...", "eventTime": 1750214792146, "version": "..."} or None
+        """
+        return self.state_store.get(run_status_key, RUN_STATUS_ID_TYPE)
+
+    def is_stale(self, run_status_key: str, status: str, event_time: int) -> bool:
+        """
+        An event is stale if a higher status (or the same status at a later time)
+        has already been recorded for the analysis.
+        Repeats of the recorded event are not stale, so that retries are not skipped.
+        :param run_status_key:
+        :param status:
+        :param event_time: Epoch milliseconds
+        :return:
+        """
+        if status not in STATUS_RANK:
+            return False
+
+        latest_status = self.get_latest_status(run_status_key)
+        if latest_status is None:
+            return False
+
+        return latest_status['version'] > get_status_version(status, event_time)
+
+    def record(self, run_status_key: str, status: str, event_time: int) -> bool:
+        """
+        Record a status for the analysis, only if it is not lower than the status already recorded
+        :param run_status_key:
+        :param status:
+        :param event_time: Epoch milliseconds
+        :return: True if the status was recorded
+        """
+        if status not in STATUS_RANK:
+            return False
+
+        version = get_status_version(status, event_time)
+        return self.state_store.put_if_newer(
+            run_status_key,
+            RUN_STATUS_ID_TYPE,
+            {
+                "status": status,
+                "eventTime": event_time,
+                "version": version,
+            },
+            version=version,
+            ttl_seconds=RUN_STATUS_TTL_SECONDS,
+        )
+
+    def is_stale_event(self, icav2_wes_event: Dict[str, Any]) -> bool:
+        """
+        Check the ledger for a higher status already seen for the analysis of an ICAv2 WES State Change Event,
+        this requires no calls to the workflow manager
+        :param icav2_wes_event:
+        :return:
+        """
+        return self.is_stale(
+            run_status_key=get_run_status_key(icav2_wes_event),
+            status=icav2_wes_event['status'],
+            event_time=get_icav2_wes_event_time(icav2_wes_event),
+        )
+
+    def record_event(self, icav2_wes_event: Dict[str, Any]) -> bool:
+        """
+        Record the status of a converted ICAv2 WES State Change Event
+        :param icav2_wes_event:
+        :return: True if the status was recorded
+        """
+        return self.record(
+            run_status_key=get_run_status_key(icav2_wes_event),
+            status=icav2_wes_event['status'],
+            event_time=get_icav2_wes_event_time(icav2_wes_event),
+        )
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+
+"""
+Failure comments for failed ICAv2 WES analyses.
+
+Alongside the error message uri, we include the final lines of the error log in the comment.
+Only the tail of the error object is read (via an S3 ranged GET), so memory use is capped
+at ERROR_LOG_TAIL_BYTES regardless of the size of the log.
+
+The S3 client honours the AWS_ENDPOINT_URL_S3 env var, so a local S3 stand-in can be used for testing.
+"""
+
+# Standard imports
+import logging
+import typing
+from os import environ
+from typing import Optional
+from urllib.parse import urlparse
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Local imports
+from .comments import MAX_COMMENT_LENGTH
+
+# Type checking imports
+if typing.TYPE_CHECKING:
+    from mypy_boto3_s3 import S3Client
+
+# Globals
+WORKFLOW_NAME_ENV_VAR = "WORKFLOW_NAME"
+COMMENT_AUTHOR = "{WORKFLOW_NAME}-workflow-service"
+
+# Only the last few KB of the error log are needed to fit the final traceback lines into a comment
+ERROR_LOG_TAIL_BYTES = 8 * 1024
+ERROR_LOG_CHUNK_BYTES = 1024
+TRACEBACK_HEADER = "Traceback (most recent call last)"
+ERROR_LOG_PREFIX = "\n\nFinal lines of the error log:\n"
+
+logger = logging.getLogger()
+
+_S3_CLIENT: Optional["S3Client"] = None
+
+
+def get_s3_client() -> "S3Client":
+    global _S3_CLIENT
+    if _S3_CLIENT is None:
+        _S3_CLIENT = boto3.client("s3")
+    return _S3_CLIENT
+
+
+def read_s3_object_tail(s3_uri: str, max_bytes: int = ERROR_LOG_TAIL_BYTES) -> str:
+    """
+    Read the last max_bytes of an S3 object.
+
+    We request a suffix range, and stream the body so that at most max_bytes (plus one chunk) is held in memory,
+    even if the endpoint ignores the range header and returns the whole object.
+    If the object was truncated, the first (partial) line is dropped.
+    :param s3_uri:
+    :param max_bytes:
+    :return:
+    """
+    s3_uri_obj = urlparse(s3_uri)
+
+    response = get_s3_client().get_object(
+        Bucket=s3_uri_obj.netloc,
+        Key=s3_uri_obj.path.lstrip("/"),
+        Range=f"bytes=-{max_bytes}"
+    )
+
+    tail = bytearray()
+    total_bytes_read = 0
+    for chunk in response['Body'].iter_chunks(chunk_size=ERROR_LOG_CHUNK_BYTES):
+        total_bytes_read += len(chunk)
+        tail.extend(chunk)
+        if len(tail) > max_bytes:
+            del tail[:len(tail) - max_bytes]
+
+    # Content-Range is 'bytes <start>-<end>/<size>', a non-zero start means we only have the tail of the object
+    content_range = response.get('ContentRange', "")
+    is_truncated = (
+        (bool(content_range) and not content_range.startswith("bytes 0-")) or
+        total_bytes_read > max_bytes
+    )
+
+    tail_str = tail.decode("utf-8", errors="replace")
+    if is_truncated and "\n" in tail_str:
+        tail_str = tail_str.split("\n", 1)[1]
+
+    return tail_str
+
+
+def get_final_traceback_lines(error_log_tail: str, max_length: int) -> str:
+    """
+    Get the final lines of the error log that fit within max_length characters.
+    Starts from the last traceback header in the tail if there is one, then drops lines from the front until it fits.
+    :param error_log_tail:
+    :param max_length:
+    :return:
+    """
+    lines = [line.rstrip() for line in error_log_tail.splitlines() if line.strip()]
+
+    traceback_header_indexes = [
+        index_iter_ for index_iter_, line_iter_ in enumerate(lines)
+        if TRACEBACK_HEADER in line_iter_
+    ]
+    if traceback_header_indexes:
+        lines = lines[traceback_header_indexes[-1]:]
+
+    final_lines = []
+    length = 0
+    for line_iter_ in reversed(lines):
+        # +1 for the newline
+        if length + len(line_iter_) + 1 > max_length:
+            break
+        final_lines.insert(0, line_iter_)
+        length += len(line_iter_) + 1
+
+    return "\n".join(final_lines)
+
+
+def build_failure_comment_body(
+        error_type: Optional[str],
+        error_message_uri: Optional[str],
+        execution_arn: Optional[str] = None
+) -> str:
+    """
+    Build the failure comment body, including the final lines of the error log where we can read it.
+    The execution arn is only used to work out how much room the footer leaves us.
+    :param error_type:
+    :param error_message_uri:
+    :param execution_arn:
+    :return:
+    """
+    body = f"The workflow has failed with error type '{error_type}', full traceback can be found at '{error_message_uri}'"
+    footer = f"---\nStep Functions Execution: {execution_arn}" if execution_arn else ""
+
+    # Add the final lines of the error log if we have the room
+    available = MAX_COMMENT_LENGTH - len(body) - len(ERROR_LOG_PREFIX) - len(footer) - 1
+    if error_message_uri and error_message_uri.startswith("s3://") and available > 0:
+        try:
+            error_log_tail = read_s3_object_tail(error_message_uri)
+        except (ClientError, BotoCoreError) as e:
+            logger.warning(f"Could not read the error log at '{error_message_uri}': {e}")
+        else:
+            final_lines = get_final_traceback_lines(error_log_tail, available)
+            if final_lines:
+                body = f"{body}{ERROR_LOG_PREFIX}{final_lines}"
+
+    return body
+
+
+def get_failure_comment_author() -> str:
+    return COMMENT_AUTHOR.format(WORKFLOW_NAME=environ.get(WORKFLOW_NAME_ENV_VAR, "unknown"))
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+
+"""
+Workflow run resolver.
+
+Several lambdas look up the same workflow run (by portal run id or orcabus id) over the life of a run.
+The resolver keeps:
+  * a bounded LRU of workflow run objects, with a TTL, in each warm container
+  * an optional persistent index of the immutable fields of a workflow run
+    (orcabusId, portalRunId, workflow, workflowRunName) in the state store, shared across lambdas.
+    Enabled by default when a state table is configured.
+
+Use get_workflow_run_resolver() so that all lookups in a container share the same resolver,
+and get_immutable_fields_by_* where only the immutable fields are needed,
+as these can be answered from the persistent index.
+
+Hits and misses are counted per container, see get_metrics()
+"""
+
+# Standard imports
+import json
+import logging
+from collections import OrderedDict
+from os import environ
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Layer imports
+from orcabus_api_tools.workflow import get_workflow_run, get_workflow_run_from_portal_run_id
+
+# Local imports
+from .state_store import STATE_TABLE_NAME_ENV_VAR, StateStore, get_state_store
+
+# Globals
+WORKFLOW_RUN_INDEX_ID_TYPE = "WORKFLOW_RUN_INDEX"
+# Consecutive lookups for the same run usually happen within minutes of each other,
+# the fields we use from the workflow run object (workflow, name, libraries) do not change over a run
+WORKFLOW_RUN_CACHE_TTL_SECONDS = 300
+WORKFLOW_RUN_CACHE_MAX_SIZE = 256
+# Immutable fields never go stale, the TTL only keeps the table tidy
+WORKFLOW_RUN_INDEX_TTL_SECONDS = 60 * 60 * 24 * 90
+
+IMMUTABLE_WORKFLOW_RUN_FIELDS = (
+    "orcabusId",
+    "portalRunId",
+    "workflow",
+    "workflowRunName",
+)
+
+PORTAL_RUN_ID_KEY = "portalRunId"
+ORCABUS_ID_KEY = "orcabusId"
+
+logger = logging.getLogger()
+
+_WORKFLOW_RUN_RESOLVER: Optional["WorkflowRunResolver"] = None
+
+
+def get_immutable_fields(workflow_run: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        field_iter_: workflow_run.get(field_iter_)
+        for field_iter_ in IMMUTABLE_WORKFLOW_RUN_FIELDS
+    }
+
+
+class WorkflowRunResolver:
+    """
+    Resolve workflow runs by portal run id or orcabus id
+    """
+
+    def __init__(
+            self,
+            max_size: int = WORKFLOW_RUN_CACHE_MAX_SIZE,
+            ttl_seconds: int = WORKFLOW_RUN_CACHE_TTL_SECONDS,
+            state_store: Optional[StateStore] = None,
+            use_persistent_index: Optional[bool] = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._state_store = state_store
+        self.use_persistent_index = (
+            use_persistent_index if use_persistent_index is not None
+            else (state_store is not None or bool(environ.get(STATE_TABLE_NAME_ENV_VAR)))
+        )
+        # (key type, key) -> (expiry, workflow run object), least recently used first
+        self._cache: Dict[Tuple[str, str], Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._lock = Lock()
+        self._metrics: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "indexHits": 0,
+            "indexMisses": 0,
+        }
+
+    @property
+    def state_store(self) -> StateStore:
+        if self._state_store is None:
+            self._state_store = get_state_store()
+        return self._state_store
+
+    def _count(self, metric_name: str) -> None:
+        with self._lock:
+            self._metrics[metric_name] += 1
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._metrics)
+
+    def log_metrics(self) -> None:
+        logger.info(json.dumps({"workflowRunResolver": self.get_metrics()}))
+
+    def _get_cached(self, key_type: str, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            cached_entry = self._cache.get((key_type, key))
+            if cached_entry is None:
+                return None
+            if cached_entry[0] <= monotonic():
+                del self._cache[(key_type, key)]
+                return None
+            self._cache.move_to_end((key_type, key))
+            return cached_entry[1]
+
+    def _put_cached(self, workflow_run: Dict[str, Any]) -> None:
+        with self._lock:
+            expiry = monotonic() + self.ttl_seconds
+            for key_type in (PORTAL_RUN_ID_KEY, ORCABUS_ID_KEY):
+                if workflow_run.get(key_type) is None:
+                    continue
+                self._cache[(key_type, workflow_run[key_type])] = (expiry, workflow_run)
+                self._cache.move_to_end((key_type, workflow_run[key_type]))
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+
+    def _get_indexed(self, key_type: str, key: str) -> Optional[Dict[str, Any]]:
+        if not self.use_persistent_index:
+            return None
+        immutable_fields = self.state_store.get(f"{key_type}#{key}", WORKFLOW_RUN_INDEX_ID_TYPE)
+        self._count("indexHits" if immutable_fields is not None else "indexMisses")
+        return immutable_fields
+
+    def _put_indexed(self, workflow_run: Dict[str, Any]) -> None:
+        if not self.use_persistent_index:
+            return
+        immutable_fields = get_immutable_fields(workflow_run)
+        for key_type in (PORTAL_RUN_ID_KEY, ORCABUS_ID_KEY):
+            if workflow_run.get(key_type) is None:
+                continue
+            self.state_store.put(
+                f"{key_type}#{workflow_run[key_type]}", WORKFLOW_RUN_INDEX_ID_TYPE,
+                immutable_fields, ttl_seconds=WORKFLOW_RUN_INDEX_TTL_SECONDS
+            )
+
+    def _resolve(
+            self,
+            key_type: str,
+            key: str,
+            fetch: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        workflow_run = self._get_cached(key_type, key)
+        if workflow_run is not None:
+            self._count("hits")
+            return workflow_run
+
+        self._count("misses")
+        workflow_run = fetch(key)
+        self._put_cached(workflow_run)
+        self._put_indexed(workflow_run)
+        return workflow_run
+
+    def _resolve_immutable_fields(
+            self,
+            key_type: str,
+            key: str,
+            fetch: Callable[[str], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        workflow_run = self._get_cached(key_type, key)
+        if workflow_run is not None:
+            self._count("hits")
+            return get_immutable_fields(workflow_run)
+
+        immutable_fields = self._get_indexed(key_type, key)
+        if immutable_fields is not None:
+            return immutable_fields
+
+        return get_immutable_fields(self._resolve(key_type, key, fetch))
+
+    def get_by_portal_run_id(self, portal_run_id: str) -> Dict[str, Any]:
+        """
+        Get the workflow run object for a portal run id
+        """
+        return self._resolve(PORTAL_RUN_ID_KEY, portal_run_id, get_workflow_run_from_portal_run_id)
+
+    def get_by_orcabus_id(self, workflow_run_id: str) -> Dict[str, Any]:
+        """
+        Get the workflow run object for a workflow run orcabus id
+        """
+        return self._resolve(ORCABUS_ID_KEY, workflow_run_id, get_workflow_run)
+
+    def get_immutable_fields_by_portal_run_id(self, portal_run_id: str) -> Dict[str, Any]:
+        """
+        Get the immutable fields (IMMUTABLE_WORKFLOW_RUN_FIELDS) of the workflow run for a portal run id
+        """
+        return self._resolve_immutable_fields(
+            PORTAL_RUN_ID_KEY, portal_run_id, get_workflow_run_from_portal_run_id
+        )
+
+    def get_immutable_fields_by_orcabus_id(self, workflow_run_id: str) -> Dict[str, Any]:
+        """
+        Get the immutable fields (IMMUTABLE_WORKFLOW_RUN_FIELDS) of the workflow run for a workflow run orcabus id
+        """
+        return self._resolve_immutable_fields(
+            ORCABUS_ID_KEY, workflow_run_id, get_workflow_run
+        )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+
+def get_workflow_run_resolver() -> WorkflowRunResolver:
+    """
+    Get the workflow run resolver shared by this container
+    """
+    global _WORKFLOW_RUN_RESOLVER
+    if _WORKFLOW_RUN_RESOLVER is None:
+        _WORKFLOW_RUN_RESOLVER = WorkflowRunResolver()
+    return _WORKFLOW_RUN_RESOLVER
+
+
+def set_workflow_run_resolver(workflow_run_resolver: Optional[WorkflowRunResolver]) -> None:
+    """
+    Override the workflow run resolver for this container, i.e. to inject a local state store in tests
+    """
+    global _WORKFLOW_RUN_RESOLVER
+    _WORKFLOW_RUN_RESOLVER = workflow_run_resolver
@@ -0,0 +1,694 @@
+#!/usr/bin/env python3
+
+"""
+Local stand-in server for the OrcaBus Fastq, Metadata, Workflow and File manager APIs.
+
+Serves the endpoints orcabus_api_tools calls (fastq by RGID or instrument run, fastq sets, NTSM validation,
+library lookups, workflow runs, states, payloads and comments, file manager objects and listings) from a SyntheticDataset,
+over real HTTP (keep-alive), so that throughput tests exercise the real client code paths without OrcaBus.
+
+Every request can be delayed (latency, plus uniform jitter), throttled (a token bucket per service,
+answered with 429 like the OrcaBus APIs) or failed (a random fraction of requests, answered with error_status).
+All of these can be set globally or per service ('fastq', 'metadata', 'workflow', 'filemanager'),
+on the command line or at run time through the admin endpoints:
+
+  * GET  /_standin/stats   request counts by service, endpoint and status
+  * GET  /_standin/config
+  * POST /_standin/config  {"latencyMs": 40, "services": {"fastq": {"rateLimit": 20}}}
+  * POST /_standin/reset   clear the stats and the comments
+
+Point the handlers of a process (running the real orcabus_api_tools) at it with install_standin_redirect,
+the original host is kept in the Host header, and the token and hostname are not looked up, so no AWS access is needed:
+
+    python3 api_standin.py --port 8080 --library-count 16 --lane-count 8 --latency-ms 40 --jitter-ms 20 \\
+      --rate-limit 50 --error-rate 0.01 --seed 7
+
+    from api_standin import install_standin_redirect
+    install_standin_redirect("http://localhost:8080")
+"""
+
+# Standard imports
+import base64
+import json
+import random
+import re
+import sys
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Pattern, Tuple
+from urllib.parse import parse_qs, urlencode
+
+# Local imports
+from fakes import SyntheticDataset
+
+# Globals
+SERVICE_NAMES = ("fastq", "metadata", "workflow", "filemanager")
+DEFAULT_ROWS_PER_PAGE = 100
+ADMIN_PATH_PREFIX = "/_standin"
+
+# Used in place of the SSM hostname and the JWT when calling the stand-in server
+STANDIN_HOSTNAME = "standin.local"
+STANDIN_TOKEN = ".".join([
+    base64.urlsafe_b64encode(json.dumps(header_iter_).encode()).decode().rstrip("=")
+    for header_iter_ in ({"alg": "none", "typ": "JWT"}, {"sub": "standin", "exp": 4102444800})
+] + [""])
+
+
+class ServiceConfig(NamedTuple):
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    # Requests per second, 0 is unlimited
+    rate_limit: float = 0.0
+    error_rate: float = 0.0
+    error_status: int = 503
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "latencyMs": self.latency_ms,
+            "jitterMs": self.jitter_ms,
+            "rateLimit": self.rate_limit,
+            "errorRate": self.error_rate,
+            "errorStatus": self.error_status,
+        }
+
+    def update(self, config_dict: Dict[str, Any]) -> "ServiceConfig":
+        return self._replace(**{
+            field_name: type(getattr(self, field_name))(config_dict[camel_name])
+            for field_name, camel_name in (
+                ("latency_ms", "latencyMs"),
+                ("jitter_ms", "jitterMs"),
+                ("rate_limit", "rateLimit"),
+                ("error_rate", "errorRate"),
+                ("error_status", "errorStatus"),
+            )
+            if camel_name in config_dict
+        })
+
+
+class Route(NamedTuple):
+    service: str
+    method: str
+    template: str
+    pattern: Pattern
+    handler_name: str
+
+
+class TokenBucket:
+    """
+    Allows rate requests per second on average, with bursts of up to rate requests
+    """
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = monotonic()
+        self.lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            now = monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            if self.tokens < 1:
+                return False
+            self.tokens -= 1
+            return True
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def make_route(service: str, method: str, template: str, handler_name: str) -> Route:
+    """
+    /api/v1/fastq/{id}/toFastqListRow -> ^/api/v1/fastq/(?P<id>[^/]+)/toFastqListRow/?$
+    """
+    return Route(
+        service=service,
+        method=method,
+        template=template,
+        pattern=re.compile("^" + re.sub(r"\{(\w+)}", r"(?P<\1>[^/]+)", template) + "/?$"),
+        handler_name=handler_name,
+    )
+
+
+ROUTES: List[Route] = [
+    # Fastq manager
+    make_route("fastq", "GET", "/api/v1/fastq", "list_fastqs"),
+    make_route("fastq", "GET", "/api/v1/fastq/{id}", "get_fastq"),
+    make_route("fastq", "GET", "/api/v1/fastq/{id}/toFastqListRow", "get_fastq_list_row"),
+    make_route("fastq", "GET", "/api/v1/fastqSet", "list_fastq_sets"),
+    make_route("fastq", "GET", "/api/v1/fastqSet/{id}", "get_fastq_set"),
+    make_route("fastq", "GET", "/api/v1/fastqSet/{id}/toFastqListRows", "get_fastq_set_list_rows"),
+    make_route("fastq", "GET", "/api/v1/fastqSet/{id}/validateNtsmInternal", "validate_ntsm_internal"),
+    make_route("fastq", "GET", "/api/v1/fastqSet/{id}/validateNtsmExternal/{otherId}", "validate_ntsm_external"),
+    # Metadata manager
+    make_route("metadata", "GET", "/api/v1/library", "list_libraries"),
+    make_route("metadata", "GET", "/api/v1/library/{id}", "get_library"),
+    # Workflow manager
+    make_route("workflow", "GET", "/api/v1/workflowrun", "list_workflow_runs"),
+    make_route("workflow", "GET", "/api/v1/workflowrun/{id}", "get_workflow_run"),
+    make_route("workflow", "GET", "/api/v1/workflowrun/{id}/state", "list_workflow_run_states"),
+    make_route("workflow", "GET", "/api/v1/workflowrun/{id}/comment", "list_workflow_run_comments"),
+    make_route("workflow", "POST", "/api/v1/workflowrun/{id}/comment", "add_workflow_run_comment"),
+    make_route("workflow", "GET", "/api/v1/payload/{id}", "get_payload"),
+    # File manager
+    make_route("filemanager", "GET", "/api/v1/s3", "list_s3_objects"),
+    make_route("filemanager", "GET", "/api/v1/s3/presign/{id}", "presign_s3_object"),
+    make_route("filemanager", "GET", "/api/v1/s3/{id}", "get_s3_object"),
+]
+
+
+class StandinApi:
+    """
+    The API state (dataset, comments, fault injection config and stats), shared by the request threads
+    """
+
+    def __init__(
+            self,
+            dataset: SyntheticDataset,
+            default_config: ServiceConfig = ServiceConfig(),
+            service_configs: Optional[Dict[str, ServiceConfig]] = None,
+            seed: Optional[int] = None,
+    ):
+        self.dataset = dataset
+        self.default_config = default_config
+        self.service_configs: Dict[str, ServiceConfig] = dict(service_configs or {})
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.token_buckets: Dict[str, TokenBucket] = {}
+        self.stats: Counter = Counter()
+        self.comments: Dict[str, List[Dict[str, Any]]] = {}
+
+        self.fastq_sets = {
+            fastq['fastqSetId']: {
+                "id": fastq['fastqSetId'],
+                "library": fastq['library'],
+                "isCurrentFastqSet": True,
+                "fastqSet": list(filter(
+                    lambda fastq_iter_: fastq_iter_['fastqSetId'] == fastq['fastqSetId'],
+                    dataset.fastqs
+                )),
+            }
+            for fastq in dataset.fastqs
+        }
+        self.payload = dataset.get_payload()
+        self.s3_objects = list(map(self._make_s3_object, self._get_s3_uris()))
+        self.s3_objects_by_id = {s3_object['s3ObjectId']: s3_object for s3_object in self.s3_objects}
+
+    def _get_s3_uris(self) -> List[str]:
+        inputs = self.payload['data']['inputs']
+        return [
+            *[
+                read_iter_['s3Uri']
+                for fastq_iter_ in self.dataset.fastqs
+                for read_iter_ in (fastq_iter_['readSet']['r1'], fastq_iter_['readSet']['r2'])
+            ],
+            inputs['reference']['tarball'],
+            inputs['annotationFile'],
+            inputs['oraReference'],
+        ]
+
+    @staticmethod
+    def _make_s3_object(s3_uri: str) -> Dict[str, Any]:
+        bucket, key = s3_uri[len("s3://"):].split("/", 1)
+        return {
+            "s3ObjectId": str(uuid.uuid5(uuid.NAMESPACE_URL, s3_uri)),
+            "bucket": bucket,
+            "key": key,
+            "size": 1024 * 1024,
+            "eTag": uuid.uuid5(uuid.NAMESPACE_OID, s3_uri).hex,
+            "isCurrentState": True,
+        }
+
+    # Fault injection
+    def get_config(self, service: str) -> ServiceConfig:
+        return self.service_configs.get(service, self.default_config)
+
+    def update_config(self, config_dict: Dict[str, Any]) -> None:
+        with self.lock:
+            self.default_config = self.default_config.update(config_dict)
+            for service, service_config_dict in config_dict.get("services", {}).items():
+                self.service_configs[service] = self.get_config(service).update(service_config_dict)
+            # Rate limits may have changed
+            self.token_buckets.clear()
+
+    def get_config_dict(self) -> Dict[str, Any]:
+        return {
+            **self.default_config.to_dict(),
+            "services": {
+                service: service_config.to_dict()
+                for service, service_config in self.service_configs.items()
+            },
+        }
+
+    def inject_faults(self, service: str) -> None:
+        """
+        Delay, throttle or fail the request, as configured for the service
+        """
+        config = self.get_config(service)
+
+        if config.rate_limit > 0:
+            with self.lock:
+                if service not in self.token_buckets:
+                    self.token_buckets[service] = TokenBucket(config.rate_limit)
+                token_bucket = self.token_buckets[service]
+            if not token_bucket.try_acquire():
+                raise ApiError(429, "Request was throttled.")
+
+        with self.lock:
+            delay_ms = config.latency_ms + self.random.uniform(0, config.jitter_ms)
+            is_error = self.random.random() < config.error_rate
+        if delay_ms > 0:
+            sleep(delay_ms / 1000)
+        if is_error:
+            raise ApiError(config.error_status, "Injected error")
+
+    def record(self, service: str, method: str, template: str, status: int) -> None:
+        with self.lock:
+            self.stats[(service, f"{method} {template}", status)] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self.lock:
+            stats = dict(self.stats)
+        requests_by_endpoint: Counter = Counter()
+        requests_by_service: Counter = Counter()
+        requests_by_status: Counter = Counter()
+        for (service, endpoint, status), count in stats.items():
+            requests_by_service[service] += count
+            requests_by_endpoint[f"{service} {endpoint}"] += count
+            requests_by_status[str(status)] += count
+        return {
+            "requests": sum(stats.values()),
+            "requestsByService": dict(requests_by_service),
+            "requestsByEndpoint": dict(requests_by_endpoint.most_common()),
+            "requestsByStatus": dict(requests_by_status),
+        }
+
+    def reset(self) -> None:
+        with self.lock:
+            self.stats.clear()
+            self.comments.clear()
+            self.token_buckets.clear()
+
+    # Helpers
+    @staticmethod
+    def paginate(results: List[Dict[str, Any]], query: Dict[str, str], base_url: str) -> Dict[str, Any]:
+        """
+        The OrcaBus list response, {"links": {...}, "pagination": {...}, "results": [...]}
+        """
+        page = int(query.get("page", 1))
+        rows_per_page = int(query.get("rowsPerPage", DEFAULT_ROWS_PER_PAGE))
+        start = (page - 1) * rows_per_page
+
+        def get_page_link(page_number: int) -> str:
+            return f"{base_url}?{urlencode({**query, 'page': page_number})}"
+
+        return {
+            "links": {
+                "previous": get_page_link(page - 1) if page > 1 else None,
+                "next": get_page_link(page + 1) if start + rows_per_page < len(results) else None,
+            },
+            "pagination": {"count": len(results), "page": page, "rowsPerPage": rows_per_page},
+            "results": results[start:start + rows_per_page],
+        }
+
+    @staticmethod
+    def get_or_404(items_by_id: Dict[str, Any], item_id: str) -> Any:
+        if item_id not in items_by_id:
+            raise ApiError(404, "Not found.")
+        return items_by_id[item_id]
+
+    # Fastq manager
+    def list_fastqs(self, query: Dict[str, str], base_url: str, **kwargs) -> Dict[str, Any]:
+        fastqs = self.dataset.fastqs
+        if "rgid" in query:
+            fastqs = list(filter(lambda fastq_iter_: self.dataset.get_rgid(fastq_iter_) == query['rgid'], fastqs))
+        if "library" in query:
+            fastqs = list(filter(
+                lambda fastq_iter_: query['library'] in (
+                    fastq_iter_['library']['libraryId'], fastq_iter_['library']['orcabusId']
+                ),
+                fastqs
+            ))
+        if "fastqSetId" in query:
+            fastqs = list(filter(lambda fastq_iter_: fastq_iter_['fastqSetId'] == query['fastqSetId'], fastqs))
+        if "instrumentRunId" in query:
+            fastqs = list(filter(lambda fastq_iter_: fastq_iter_['instrumentRunId'] == query['instrumentRunId'], fastqs))
+        return self.paginate(fastqs, query, base_url)
+
+    def get_fastq(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404(self.dataset.fastqs_by_id, id)
+
+    def get_fastq_list_row(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.dataset.get_fastq_list_row(self.get_or_404(self.dataset.fastqs_by_id, id))
+
+    def list_fastq_sets(self, query: Dict[str, str], base_url: str, **kwargs) -> Dict[str, Any]:
+        fastq_sets = list(self.fastq_sets.values())
+        if "library" in query:
+            fastq_sets = list(filter(
+                lambda fastq_set_iter_: query['library'] in (
+                    fastq_set_iter_['library']['libraryId'], fastq_set_iter_['library']['orcabusId']
+                ),
+                fastq_sets
+            ))
+        return self.paginate(fastq_sets, query, base_url)
+
+    def get_fastq_set(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404(self.fastq_sets, id)
+
+    def get_fastq_set_list_rows(self, id: str, **kwargs) -> List[Dict[str, Any]]:
+        return list(map(self.dataset.get_fastq_list_row, self.get_or_404(self.fastq_sets, id)['fastqSet']))
+
+    def validate_ntsm_internal(self, id: str, **kwargs) -> Dict[str, Any]:
+        self.get_or_404(self.fastq_sets, id)
+        return {"related": True}
+
+    def validate_ntsm_external(self, id: str, otherId: str, **kwargs) -> Dict[str, Any]:
+        self.get_or_404(self.fastq_sets, id)
+        self.get_or_404(self.fastq_sets, otherId)
+        return {"related": True}
+
+    # Metadata manager
+    def list_libraries(self, query: Dict[str, str], base_url: str, **kwargs) -> Dict[str, Any]:
+        libraries = self.dataset.libraries
+        if "libraryId" in query:
+            libraries = list(filter(lambda library_iter_: library_iter_['libraryId'] == query['libraryId'], libraries))
+        return self.paginate(libraries, query, base_url)
+
+    def get_library(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404(self.dataset.libraries_by_orcabus_id, id)
+
+    # Workflow manager
+    def get_workflow_runs_by_id(self) -> Dict[str, Dict[str, Any]]:
+        return {self.dataset.workflow_run['orcabusId']: self.dataset.workflow_run}
+
+    def list_workflow_runs(self, query: Dict[str, str], base_url: str, **kwargs) -> Dict[str, Any]:
+        workflow_runs = list(self.get_workflow_runs_by_id().values())
+        if "portalRunId" in query:
+            workflow_runs = list(filter(
+                lambda workflow_run_iter_: workflow_run_iter_['portalRunId'] == query['portalRunId'],
+                workflow_runs
+            ))
+        return self.paginate(workflow_runs, query, base_url)
+
+    def get_workflow_run(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404(self.get_workflow_runs_by_id(), id)
+
+    def list_workflow_run_states(self, id: str, **kwargs) -> List[Dict[str, Any]]:
+        self.get_or_404(self.get_workflow_runs_by_id(), id)
+        return [
+            {
+                "orcabusId": "stt.01K7XBENCHMARKSTATEAAAAAA",
+                "status": "DRAFT",
+                "timestamp": "2026-10-19T00:00:00Z",
+                "payload": self.payload['orcabusId'],
+            }
+        ]
+
+    def get_payload(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404({self.payload['orcabusId']: self.payload}, id)
+
+    def list_workflow_run_comments(self, id: str, **kwargs) -> List[Dict[str, Any]]:
+        self.get_or_404(self.get_workflow_runs_by_id(), id)
+        with self.lock:
+            return list(self.comments.get(id, []))
+
+    def add_workflow_run_comment(self, id: str, body: Optional[Dict[str, Any]] = None, **kwargs) -> Dict[str, Any]:
+        self.get_or_404(self.get_workflow_runs_by_id(), id)
+        if not body or "comment" not in body:
+            raise ApiError(400, "comment is required")
+        with self.lock:
+            comments = self.comments.setdefault(id, [])
+            comment = {
+                "orcabusId": f"cmt.01K7XBENCHMARK{len(comments):012d}",
+                "workflowRun": id,
+                "comment": body['comment'],
+                "createdBy": body.get("createdBy"),
+            }
+            comments.append(comment)
+        return comment
+
+    # File manager
+    def list_s3_objects(self, query: Dict[str, str], base_url: str, **kwargs) -> Dict[str, Any]:
+        s3_objects = self.s3_objects
+        if "bucket" in query:
+            s3_objects = list(filter(lambda s3_object_iter_: s3_object_iter_['bucket'] == query['bucket'], s3_objects))
+        if "key" in query:
+            # The file manager supports * wildcards in the key
+            key_regex = re.compile("^" + ".*".join(map(re.escape, query['key'].split("*"))) + "$")
+            s3_objects = list(filter(lambda s3_object_iter_: key_regex.match(s3_object_iter_['key']), s3_objects))
+        return self.paginate(s3_objects, query, base_url)
+
+    def get_s3_object(self, id: str, **kwargs) -> Dict[str, Any]:
+        return self.get_or_404(self.s3_objects_by_id, id)
+
+    def presign_s3_object(self, id: str, **kwargs) -> str:
+        s3_object = self.get_or_404(self.s3_objects_by_id, id)
+        return f"https://{s3_object['bucket']}.s3.ap-southeast-2.amazonaws.com/{s3_object['key']}?X-Amz-Signature=standin"
+
+    # Dispatch
+    def handle(
+            self, method: str, raw_path: str, host: str, body: Optional[Dict[str, Any]]
+    ) -> Tuple[int, Any]:
+        path, _, query_string = raw_path.partition("?")
+        query = {key: values[-1] for key, values in parse_qs(query_string).items()}
+
+        for route in ROUTES:
+            match = route.pattern.match(path)
+            if match is None or route.method != method:
+                continue
+            status = 200
+            try:
+                self.inject_faults(route.service)
+                handler: Callable = getattr(self, route.handler_name)
+                response = handler(
+                    query=query, base_url=f"http://{host}{path}", body=body, **match.groupdict()
+                )
+                if method == "POST":
+                    status = 201
+                return status, response
+            except ApiError as e:
+                status = e.status
+                return status, {"detail": e.detail}
+            finally:
+                self.record(route.service, method, route.template, status)
+
+        self.record("unknown", method, path, 404)
+        return 404, {"detail": "Not found."}
+
+
+class StandinRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so that pooled sessions reuse their connections
+    protocol_version = "HTTP/1.1"
+    # The headers and body are written separately, do not let Nagle hold back the body on a kept-alive connection
+    disable_nagle_algorithm = True
+    server: "StandinHttpServer"
+
+    def log_message(self, format: str, *args) -> None:
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def read_body(self) -> Optional[Dict[str, Any]]:
+        content_length = int(self.headers.get("Content-Length") or 0)
+        if content_length == 0:
+            return None
+        try:
+            return json.loads(self.rfile.read(content_length))
+        except json.JSONDecodeError:
+            return None
+
+    def send_json(self, status: int, response: Any) -> None:
+        response_bytes = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(response_bytes)))
+        if status == 429:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(response_bytes)
+
+    def handle_admin(self, method: str) -> None:
+        api = self.server.api
+        if method == "GET" and self.path == f"{ADMIN_PATH_PREFIX}/stats":
+            return self.send_json(200, api.get_stats())
+        if method == "GET" and self.path == f"{ADMIN_PATH_PREFIX}/config":
+            return self.send_json(200, api.get_config_dict())
+        if method == "POST" and self.path == f"{ADMIN_PATH_PREFIX}/config":
+            api.update_config(self.read_body() or {})
+            return self.send_json(200, api.get_config_dict())
+        if method == "POST" and self.path == f"{ADMIN_PATH_PREFIX}/reset":
+            api.reset()
+            return self.send_json(200, {})
+        return self.send_json(404, {"detail": "Not found."})
+
+    def handle_api(self, method: str) -> None:
+        if self.path.startswith(ADMIN_PATH_PREFIX):
+            return self.handle_admin(method)
+        body = self.read_body() if method in ("POST", "PATCH", "PUT") else None
+        status, response = self.server.api.handle(
+            method, self.path, self.headers.get("Host", f"localhost:{self.server.server_port}"), body
+        )
+        self.send_json(status, response)
+
+    def do_GET(self) -> None:
+        self.handle_api("GET")
+
+    def do_POST(self) -> None:
+        self.handle_api("POST")
+
+
+class StandinHttpServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, api: StandinApi, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        super().__init__((host, port), StandinRequestHandler)
+        self.api = api
+        self.verbose = verbose
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server_address[0]}:{self.server_port}"
+
+    def start(self) -> "StandinHttpServer":
+        """
+        Serve from a background thread, i.e. from a test fixture
+        """
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def redirect_to_standin(
+        url: str,
+        headers: Optional[Dict[str, str]],
+        standin_url: str
+) -> Tuple[str, Optional[Dict[str, str]]]:
+    """
+    Send the request to the stand-in server, with the original host in the Host header,
+    i.e. https://fastq.dev.umccr.org/api/v1/fastq?rgid=... -> http://localhost:8080/api/v1/fastq?rgid=...
+    :return: The url and headers
+    """
+    if not isinstance(url, str) or "://" not in url:
+        return url, headers
+    host, _, path = url.split("://", 1)[1].partition("/")
+    return f"{standin_url.rstrip('/')}/{path}", {**(headers or {}), "Host": host}
+
+
+def install_standin_redirect(standin_url: str) -> Callable[[], None]:
+    """
+    Send the OrcaBus API calls of this process to the stand-in server,
+    through the pooled session of dragen_wgts_rna_tools.api_client (installed first, so it wraps the redirect),
+    with the stand-in token and hostname in place of the orcabus_api_tools token and hostname lookups
+    :return: A function that removes the redirect
+    """
+    import requests
+    import requests.api
+    from dragen_wgts_rna_tools.api_client import (
+        HOSTNAME_FUNCTION_NAME,
+        ORCABUS_API_TOOLS_MODULE_NAME,
+        TOKEN_FUNCTION_NAME,
+        init_api_client,
+    )
+
+    init_api_client(warm=False)
+    request_func = requests.api.request
+
+    def redirected_request(method, url, **kwargs):
+        url, kwargs["headers"] = redirect_to_standin(url, kwargs.get("headers"), standin_url)
+        return request_func(method, url, **kwargs)
+
+    patches = [(requests.api, "request", redirected_request), (requests, "request", redirected_request)]
+    for module_name, module in list(sys.modules.items()):
+        if module is None or not (
+                module_name == ORCABUS_API_TOOLS_MODULE_NAME or
+                module_name.startswith(f"{ORCABUS_API_TOOLS_MODULE_NAME}.")
+        ):
+            continue
+        for func_name, standin_value in ((TOKEN_FUNCTION_NAME, STANDIN_TOKEN), (HOSTNAME_FUNCTION_NAME, STANDIN_HOSTNAME)):
+            if callable(getattr(module, func_name, None)):
+                patches.append((module, func_name, lambda *args, standin_value_=standin_value, **kwargs: standin_value_))
+
+    originals = list(map(lambda patch_iter_: (patch_iter_[0], patch_iter_[1], getattr(*patch_iter_[:2])), patches))
+    for obj, attribute_name, value in patches:
+        setattr(obj, attribute_name, value)
+
+    def remove_standin_redirect() -> None:
+        for obj_, attribute_name_, value_ in originals:
+            setattr(obj_, attribute_name_, value_)
+
+    return remove_standin_redirect
+
+
+def parse_service_configs(service_options: List[str], default_config: ServiceConfig) -> Dict[str, ServiceConfig]:
+    """
+    ['fastq:latencyMs=120,rateLimit=20', 'workflow:errorRate=0.1'] -> {'fastq': ServiceConfig(...), ...}
+    """
+    service_configs: Dict[str, ServiceConfig] = {}
+    for service_option in service_options:
+        service, _, settings = service_option.partition(":")
+        if service not in SERVICE_NAMES:
+            raise ValueError(f"Unknown service '{service}', expected one of {', '.join(SERVICE_NAMES)}")
+        service_configs[service] = service_configs.get(service, default_config).update(dict(
+            map(lambda setting_iter_: setting_iter_.split("=", 1), filter(None, settings.split(",")))
+        ))
+    return service_configs
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve a local stand-in for the OrcaBus APIs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--library-count", type=int, default=1)
+    parser.add_argument("--lane-count", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="Requests per second per service (0 is unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests to fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument(
+        "--service", action="append", default=[],
+        help="Per service overrides, i.e. --service fastq:latencyMs=120,rateLimit=20 (repeatable)"
+    )
+    parser.add_argument("--seed", type=int, default=None, help="Seed for the jitter and injected errors")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+
+    default_service_config = ServiceConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_limit=args.rate_limit,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+    )
+    standin_server = StandinHttpServer(
+        StandinApi(
+            SyntheticDataset(library_count=args.library_count, lane_count=args.lane_count),
+            default_config=default_service_config,
+            service_configs=parse_service_configs(args.service, default_service_config),
+            seed=args.seed,
+        ),
+        host=args.host,
+        port=args.port,
+        verbose=args.verbose,
+    )
+    print(f"Serving the OrcaBus API stand-in on {standin_server.url}", flush=True)
+    try:
+        standin_server.serve_forever()
+    except KeyboardInterrupt:
+        standin_server.server_close()
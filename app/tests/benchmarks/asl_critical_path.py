@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+
+"""
+Static critical path analysis of the ASL templates.
+
+Builds the data dependencies between the states of each template in app/step-functions-templates
+from the JSONata variables they read ($tags, $inputs, ...) and write (Assign), and from $states.input,
+then for every path through the state machine (Choice branches, not Catch transitions) reports:
+  * sequentialTasks - the chain of Tasks as written (a Parallel or Map counts as its longest branch)
+  * lambdaHops - the lambda invocations in that chain
+  * dependencyDepth - the chain of Tasks left if every state started as soon as the states it depends on finished
+  * the states that could share a Parallel - Tasks that are run one after another although they could start together
+
+A Choice is a barrier, nothing is moved across it. So are the Tasks whose ordering is a side effect rather than data:
+.waitForTaskToken callbacks (i.e. 'Wait for fastq', the fastq sync works on what the earlier states produced),
+events:putEvents tasks and the comment lambdas (the workflow run's comments and events are read in the order they were added).
+Reading a variable depends on its last writer, and writing a variable waits on its last writer and
+on the states reading the previous value (these may share a Parallel, as the branches all see the previous value).
+
+Needs no AWS credentials or third party packages, so it can run before every deployment:
+
+    python3 asl_critical_path.py --format text
+    python3 asl_critical_path.py --baseline baselines/critical_paths.json
+
+With --baseline, exits non-zero if the sequential tasks or lambda hops of a template exceed the baseline.
+Rewrite the baseline with --update-baseline when a template change is intended.
+"""
+
+# Standard imports
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set
+
+# Local imports
+from local_sfn import (
+    LAMBDA_INVOKE_RESOURCE,
+    PUT_EVENTS_RESOURCE,
+    WAIT_FOR_TASK_TOKEN_SUFFIX,
+    get_template_names,
+    load_state_machine_definition,
+)
+
+# Globals
+COMMENT_REGEX = re.compile(r"/\*.*?\*/", re.DOTALL)
+STRING_REGEX = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+VARIABLE_REGEX = re.compile(r"\$(\w+)")
+LOCAL_BINDING_REGEX = re.compile(r"\$(\w+)\s*:=")
+FUNCTION_PARAMETERS_REGEX = re.compile(r"function\s*\(([^)]*)\)")
+STATES_INPUT_REGEX = re.compile(r"\$states\.input\b")
+# The lambdas that add a comment to the workflow run, i.e. ${__add_populate_draft_comment_lambda_function_arn__}
+COMMENT_FUNCTION_NAME_REGEX = re.compile(r"comment", re.IGNORECASE)
+
+# Referenced as $name, but not variables
+JSONATA_FUNCTION_NAMES = frozenset({
+    "abs", "append", "assert", "average", "base64decode", "base64encode", "boolean", "ceil", "clone",
+    "contains", "count", "decodeUrl", "decodeUrlComponent", "distinct", "each", "encodeUrl",
+    "encodeUrlComponent", "error", "eval", "exists", "filter", "floor", "formatBase", "formatInteger",
+    "formatNumber", "fromMillis", "join", "keys", "length", "lookup", "lowercase", "map", "match", "max",
+    "merge", "millis", "min", "not", "now", "number", "pad", "parse", "parseInteger", "partition", "power",
+    "random", "reduce", "replace", "reverse", "round", "shuffle", "sift", "single", "sort", "split",
+    "spread", "sqrt", "string", "substring", "substringAfter", "substringBefore", "sum", "toMillis",
+    "trim", "type", "uppercase", "uuid", "zip",
+    # The step functions reserved variable
+    "states",
+})
+
+NESTED_STATE_MACHINE_KEYS = ("Branches", "ItemProcessor", "Iterator")
+
+
+class StateNode(NamedTuple):
+    name: str
+    state_type: str
+    reads: Set[str]
+    writes: Set[str]
+    reads_input: bool
+    task_weight: int
+    lambda_hops: int
+    # Nothing is moved across it
+    is_barrier: bool
+
+    @property
+    def is_input_producer(self) -> bool:
+        """
+        Whether the next state's input is this state's output, rather than this state's input passed through
+        """
+        return self.state_type not in ["Choice", "Pass"] or self.reads_input
+
+
+class NestedReport(NamedTuple):
+    sequential_tasks: int
+    lambda_hops: int
+    reads: Set[str]
+    writes: Set[str]
+    reads_input: bool
+
+
+class PathReport(NamedTuple):
+    states: List[str]
+    tasks: List[str]
+    sequential_tasks: int
+    lambda_hops: int
+    dependency_depth: int
+    parallel_candidates: List[List[str]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "end": self.states[-1],
+            "tasks": self.tasks,
+            "sequentialTasks": self.sequential_tasks,
+            "lambdaHops": self.lambda_hops,
+            "dependencyDepth": self.dependency_depth,
+            "parallelCandidates": self.parallel_candidates,
+        }
+
+
+class TemplateReport(NamedTuple):
+    template_name: str
+    paths: List[PathReport]
+
+    @property
+    def critical_path(self) -> PathReport:
+        return max(
+            self.paths,
+            key=lambda path_iter_: (path_iter_.sequential_tasks, path_iter_.lambda_hops, path_iter_.dependency_depth)
+        )
+
+    @property
+    def parallel_candidates(self) -> List[List[str]]:
+        parallel_candidates = []
+        for path_report in self.paths:
+            parallel_candidates.extend(filter(
+                lambda candidate_iter_: candidate_iter_ not in parallel_candidates,
+                path_report.parallel_candidates
+            ))
+        return parallel_candidates
+
+    def get_summary(self) -> Dict[str, int]:
+        return {
+            "sequentialTasks": self.critical_path.sequential_tasks,
+            "lambdaHops": max(map(lambda path_iter_: path_iter_.lambda_hops, self.paths)),
+            "dependencyDepth": max(map(lambda path_iter_: path_iter_.dependency_depth, self.paths)),
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "templateName": self.template_name,
+            **self.get_summary(),
+            "criticalPath": self.critical_path.tasks,
+            "parallelCandidates": self.parallel_candidates,
+            "paths": list(map(lambda path_iter_: path_iter_.to_dict(), self.paths)),
+        }
+
+
+def get_expressions(value: Any) -> List[str]:
+    """
+    The '{% ... %}' expressions of a state (recursively through objects and arrays), not of its nested state machines
+    """
+    if isinstance(value, str):
+        return [value[2:-2]] if value.startswith("{%") and value.endswith("%}") else []
+    if isinstance(value, dict):
+        return sum(
+            map(
+                lambda item_iter_: get_expressions(item_iter_[1]),
+                filter(lambda item_iter_: item_iter_[0] not in NESTED_STATE_MACHINE_KEYS, value.items())
+            ),
+            []
+        )
+    if isinstance(value, list):
+        return sum(map(get_expressions, value), [])
+    return []
+
+
+def get_expression_variables(expression: str) -> Set[str]:
+    """
+    The variables read by a JSONata expression, less functions and its own local variables
+
+    "$merge([$tags, {'a': $x}]) ~> $sift(function($v, $k){$v != null})" -> {"tags", "x"}
+    """
+    expression = STRING_REGEX.sub("''", COMMENT_REGEX.sub("", expression))
+    local_variables = set(LOCAL_BINDING_REGEX.findall(expression))
+    for function_parameters in FUNCTION_PARAMETERS_REGEX.findall(expression):
+        local_variables.update(VARIABLE_REGEX.findall(function_parameters))
+    return set(VARIABLE_REGEX.findall(expression)) - local_variables - JSONATA_FUNCTION_NAMES
+
+
+def get_state_writes(state: Dict[str, Any]) -> Set[str]:
+    """
+    The variables assigned by a state, or by any of its choice rules
+    """
+    writes = set(state.get("Assign", {}).keys())
+    for choice_rule in state.get("Choices", []):
+        writes.update(choice_rule.get("Assign", {}).keys())
+    return writes
+
+
+def get_nested_state_machines(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    if state['Type'] == "Parallel":
+        return state['Branches']
+    if state['Type'] == "Map":
+        return [state.get("ItemProcessor", state.get("Iterator"))]
+    return []
+
+
+def get_paths(state_machine: Dict[str, Any]) -> List[List[str]]:
+    """
+    Every path of state names from StartAt to an end state, following Next, Choices and Default
+    """
+    paths = []
+
+    def walk(path: List[str]) -> None:
+        state = state_machine['States'][path[-1]]
+        next_state_names = list(filter(
+            lambda next_state_name_iter_: next_state_name_iter_ is not None,
+            [state.get("Next"), *map(lambda rule_iter_: rule_iter_.get("Next"), state.get("Choices", [])), state.get("Default")]
+        ))
+        if not next_state_names:
+            paths.append(path)
+            return
+        for next_state_name in dict.fromkeys(next_state_names):
+            # A loop back is the end of the path
+            if next_state_name in path:
+                paths.append(path)
+                continue
+            walk(path + [next_state_name])
+
+    walk([state_machine['StartAt']])
+    return paths
+
+
+def is_ordering_barrier_task(state: Dict[str, Any]) -> bool:
+    """
+    Whether a Task must stay in order with the states around it, although no state reads what it writes:
+    a callback, an event put or a comment
+    """
+    resource = state['Resource']
+    if resource.endswith(WAIT_FOR_TASK_TOKEN_SUFFIX) or resource == PUT_EVENTS_RESOURCE:
+        return True
+    return (
+        resource.startswith(LAMBDA_INVOKE_RESOURCE) and
+        COMMENT_FUNCTION_NAME_REGEX.search(str(state.get('Arguments', {}).get('FunctionName', ""))) is not None
+    )
+
+
+def get_state_node(state_name: str, state: Dict[str, Any]) -> StateNode:
+    expressions = get_expressions(state)
+    reads = set().union(*map(get_expression_variables, expressions))
+    reads_input = any(map(lambda expression_iter_: STATES_INPUT_REGEX.search(expression_iter_) is not None, expressions))
+    task_weight = 0
+    lambda_hops = 0
+    is_barrier = state['Type'] == "Choice"
+
+    if state['Type'] == "Task":
+        task_weight = 1
+        lambda_hops = int(state['Resource'].startswith(LAMBDA_INVOKE_RESOURCE))
+        is_barrier = is_ordering_barrier_task(state)
+
+    for nested_state_machine in get_nested_state_machines(state):
+        nested_report = analyse_state_machine(nested_state_machine)
+        task_weight = max(task_weight, nested_report.sequential_tasks)
+        lambda_hops = max(lambda_hops, nested_report.lambda_hops)
+        # The outer variables read inside the branch, and the branch's own input
+        reads.update(nested_report.reads - nested_report.writes)
+        reads_input = reads_input or nested_report.reads_input
+
+    return StateNode(
+        name=state_name,
+        state_type=state['Type'],
+        reads=reads,
+        writes=get_state_writes(state),
+        reads_input=reads_input,
+        task_weight=task_weight,
+        lambda_hops=lambda_hops,
+        is_barrier=is_barrier,
+    )
+
+
+def analyse_state_machine(state_machine: Dict[str, Any]) -> NestedReport:
+    """
+    The longest chain of a branch (or Map item processor), and what it reads from outside of it
+    """
+    state_nodes = {
+        state_name: get_state_node(state_name, state)
+        for state_name, state in state_machine['States'].items()
+    }
+    paths = list(map(
+        lambda path_iter_: list(map(lambda state_name_iter_: state_nodes[state_name_iter_], path_iter_)),
+        get_paths(state_machine)
+    ))
+
+    def reads_branch_input(path: List[StateNode]) -> bool:
+        # Until the first state that produces an output, states are given the branch's input
+        for state_node in path:
+            if state_node.reads_input:
+                return True
+            if state_node.is_input_producer:
+                return False
+        return False
+
+    return NestedReport(
+        sequential_tasks=max(map(lambda path_iter_: sum(map(lambda node_iter_: node_iter_.task_weight, path_iter_)), paths)),
+        lambda_hops=max(map(lambda path_iter_: sum(map(lambda node_iter_: node_iter_.lambda_hops, path_iter_)), paths)),
+        reads=set().union(*map(lambda node_iter_: node_iter_.reads, state_nodes.values())),
+        writes=set().union(*map(lambda node_iter_: node_iter_.writes, state_nodes.values())),
+        reads_input=any(map(reads_branch_input, paths)),
+    )
+
+
+def get_earliest_starts(path: List[StateNode]) -> List[int]:
+    """
+    When each state of a path could start (in tasks), if it only waited on the states it depends on
+    """
+    starts: List[int] = []
+    finishes: List[int] = []
+
+    for index, state_node in enumerate(path):
+        previous_nodes = list(enumerate(path[:index]))
+
+        def get_last_writer(variable: str) -> Optional[int]:
+            writers = list(filter(lambda previous_iter_: variable in previous_iter_[1].writes, previous_nodes))
+            return writers[-1][0] if writers else None
+
+        start = 0
+
+        # Read after write, and write after write
+        for variable in state_node.reads | state_node.writes:
+            last_writer = get_last_writer(variable)
+            if last_writer is not None:
+                start = max(start, finishes[last_writer])
+
+        # Write after read, the previous value must be read first (or at the same time, in a shared Parallel)
+        for variable in state_node.writes:
+            last_writer = get_last_writer(variable)
+            for previous_index, previous_node in previous_nodes:
+                if variable in previous_node.reads and (last_writer is None or previous_index > last_writer):
+                    start = max(start, starts[previous_index])
+
+        # The state's input is the output of the last state that produced one
+        if state_node.reads_input:
+            producers = list(filter(lambda previous_iter_: previous_iter_[1].is_input_producer, previous_nodes))
+            if producers:
+                start = max(start, finishes[producers[-1][0]])
+
+        # Barriers, nothing after one starts before it finishes
+        for previous_index, previous_node in previous_nodes:
+            if previous_node.is_barrier:
+                start = max(start, finishes[previous_index])
+        # and nothing before one finishes after it starts (a Choice takes no time, so only waits on the starts)
+        if state_node.state_type == "Choice":
+            start = max([start, *starts])
+        elif state_node.is_barrier:
+            start = max([start, *finishes])
+
+        starts.append(start)
+        finishes.append(start + state_node.task_weight)
+
+    return starts
+
+
+def analyse_path(path: List[StateNode]) -> PathReport:
+    starts = get_earliest_starts(path)
+    task_indexes = list(filter(lambda index_iter_: path[index_iter_].task_weight > 0, range(len(path))))
+
+    # Tasks that could start together, but run one after another
+    parallel_candidates = []
+    for start in dict.fromkeys(map(lambda index_iter_: starts[index_iter_], task_indexes)):
+        candidate = list(map(
+            lambda index_iter_: path[index_iter_].name,
+            filter(lambda index_iter_: starts[index_iter_] == start, task_indexes)
+        ))
+        if len(candidate) > 1:
+            parallel_candidates.append(candidate)
+
+    return PathReport(
+        states=list(map(lambda node_iter_: node_iter_.name, path)),
+        tasks=list(map(lambda index_iter_: path[index_iter_].name, task_indexes)),
+        sequential_tasks=sum(map(lambda node_iter_: node_iter_.task_weight, path)),
+        lambda_hops=sum(map(lambda node_iter_: node_iter_.lambda_hops, path)),
+        dependency_depth=max(
+            [0, *map(lambda index_iter_: starts[index_iter_] + path[index_iter_].task_weight, range(len(path)))]
+        ),
+        parallel_candidates=parallel_candidates,
+    )
+
+
+def analyse_definition(template_name: str, definition: Dict[str, Any]) -> TemplateReport:
+    state_nodes = {
+        state_name: get_state_node(state_name, state)
+        for state_name, state in definition['States'].items()
+    }
+    return TemplateReport(
+        template_name=template_name,
+        paths=list(map(
+            lambda path_iter_: analyse_path(list(map(lambda state_name_iter_: state_nodes[state_name_iter_], path_iter_))),
+            get_paths(definition)
+        )),
+    )
+
+
+def analyse_template(template_name: str) -> TemplateReport:
+    return analyse_definition(template_name, load_state_machine_definition(template_name))
+
+
+def get_baseline_regressions(
+        template_reports: List[TemplateReport], baseline: Dict[str, Dict[str, int]]
+) -> List[str]:
+    """
+    The templates whose sequential tasks or lambda hops exceed the baseline
+    """
+    regressions = []
+    for template_report in template_reports:
+        template_baseline = baseline.get(template_report.template_name)
+        if template_baseline is None:
+            regressions.append(f"{template_report.template_name}: not in the baseline")
+            continue
+        for key, value in template_report.get_summary().items():
+            if key in ["sequentialTasks", "lambdaHops"] and value > template_baseline[key]:
+                regressions.append(f"{template_report.template_name}: {key} {template_baseline[key]} -> {value}")
+    return regressions
+
+
+def format_report_text(template_report: TemplateReport) -> str:
+    summary = template_report.get_summary()
+    lines = [
+        template_report.template_name,
+        f"  sequential tasks  {summary['sequentialTasks']:>3}  {' -> '.join(template_report.critical_path.tasks)}",
+        f"  lambda hops       {summary['lambdaHops']:>3}",
+        f"  dependency depth  {summary['dependencyDepth']:>3}",
+    ]
+    if template_report.parallel_candidates:
+        lines.append("  could share a Parallel:")
+        lines.extend(map(
+            lambda candidate_iter_: f"    {' | '.join(candidate_iter_)}",
+            template_report.parallel_candidates
+        ))
+    lines.append("  paths (sequential tasks / lambda hops / dependency depth):")
+    lines.extend(map(
+        lambda path_iter_: (
+            f"    {path_iter_.sequential_tasks:>3} {path_iter_.lambda_hops:>3} {path_iter_.dependency_depth:>3}  "
+            f"to {path_iter_.states[-1]}"
+        ),
+        template_report.paths
+    ))
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Critical path and lambda hops of the step functions templates")
+    parser.add_argument("template_names", nargs="*", help="Defaults to every template")
+    parser.add_argument("--format", choices=["json", "text"], default="text")
+    parser.add_argument("--baseline", help="Fail if a template has more sequential tasks or lambda hops than this (JSON)")
+    parser.add_argument("--update-baseline", action="store_true", help="Rewrite the baseline instead")
+    args = parser.parse_args()
+    unknown_template_names = set(args.template_names) - set(get_template_names())
+    if unknown_template_names:
+        parser.error(f"Unknown templates: {', '.join(sorted(unknown_template_names))}")
+
+    analysed_template_reports = list(map(analyse_template, args.template_names or get_template_names()))
+
+    if args.format == "text":
+        print("\n\n".join(map(format_report_text, analysed_template_reports)))
+    else:
+        print(json.dumps(list(map(lambda report_iter_: report_iter_.to_dict(), analysed_template_reports)), indent=4))
+
+    if args.baseline and args.update_baseline:
+        baseline_path = Path(args.baseline)
+        baseline_path.write_text(json.dumps(
+            {
+                **(json.loads(baseline_path.read_text()) if baseline_path.exists() else {}),
+                **{
+                    report_iter_.template_name: report_iter_.get_summary()
+                    for report_iter_ in analysed_template_reports
+                },
+            },
+            indent=2,
+            sort_keys=True
+        ) + "\n")
+    elif args.baseline:
+        baseline_regressions = get_baseline_regressions(
+            analysed_template_reports, json.loads(Path(args.baseline).read_text())
+        )
+        if baseline_regressions:
+            print("\nLonger than the baseline:\n" + "\n".join(baseline_regressions), file=sys.stderr)
+            sys.exit(1)
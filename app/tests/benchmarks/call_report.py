@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+
+"""
+Calls per workflow run report.
+
+Aggregates the InvocationCallCount records (see dragen_wgts_rna_tools.instrumentation)
+from exported lambda logs into the number of remote calls made per workflow run (portalRunId),
+in total, by dependency and by endpoint, with percentiles across runs.
+
+Accepts any mix of:
+  * CloudWatch logs exported to S3 (gzipped, '<timestamp> <message>' lines)
+  * raw log lines (one EMF JSON document per line)
+  * the JSON output of 'aws logs filter-log-events'
+
+    aws logs filter-log-events \\
+      --log-group-name /aws/lambda/<function name> \\
+      --filter-pattern '{ $.RecordType = "InvocationCallCount" }' > calls.json
+
+    python3 call_report.py calls.json exported/*.gz --format text
+"""
+
+# Standard imports
+import gzip
+import json
+import math
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+# Globals
+INVOCATION_CALL_COUNT_RECORD_TYPE = "InvocationCallCount"
+PERCENTILES = (50, 90, 95, 99)
+
+
+class RunCallCount:
+    """
+    The remote calls made on behalf of a single workflow run, over all of its invocations
+    """
+
+    def __init__(self, portal_run_id: str):
+        self.portal_run_id = portal_run_id
+        self.invocations = 0
+        self.calls = 0
+        self.calls_by_dependency: Counter = Counter()
+        self.calls_by_endpoint: Counter = Counter()
+        self.calls_by_lambda: Counter = Counter()
+
+    def add(self, invocation_record: Dict[str, Any]) -> None:
+        self.invocations += 1
+        self.calls += int(invocation_record.get("RemoteCalls", 0))
+        self.calls_by_dependency.update(invocation_record.get("CallsByDependency", {}))
+        self.calls_by_endpoint.update(invocation_record.get("CallsByEndpoint", {}))
+        self.calls_by_lambda[invocation_record.get("LambdaName", "local")] += int(invocation_record.get("RemoteCalls", 0))
+
+
+def get_percentile(sorted_values: List[int], percentile: float) -> int:
+    """
+    Nearest-rank percentile of an (ascending) sorted list
+    """
+    if not sorted_values:
+        return 0
+    rank = max(math.ceil(percentile / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def get_distribution(values: Iterable[int]) -> Dict[str, Union[int, float]]:
+    sorted_values = sorted(values)
+    return {
+        **{
+            f"p{percentile}": get_percentile(sorted_values, percentile)
+            for percentile in PERCENTILES
+        },
+        "max": sorted_values[-1] if sorted_values else 0,
+        "mean": round(sum(sorted_values) / len(sorted_values), 2) if sorted_values else 0,
+    }
+
+
+def read_log_lines(log_path: Union[str, Path]) -> Iterator[str]:
+    """
+    Read the log messages from an exported log file, plain or gzipped,
+    or from the JSON output of 'aws logs filter-log-events'
+    """
+    log_path = Path(log_path)
+    opener = gzip.open if log_path.suffix == ".gz" else open
+    with opener(log_path, "rt") as log_h:
+        contents = log_h.read()
+
+    # aws logs filter-log-events output
+    if contents.lstrip().startswith("{") and '"events"' in contents:
+        try:
+            yield from map(lambda event_iter_: event_iter_['message'], json.loads(contents)['events'])
+            return
+        except (json.JSONDecodeError, KeyError, TypeError):
+            pass
+
+    yield from contents.splitlines()
+
+
+def parse_invocation_record(log_line: str) -> Optional[Dict[str, Any]]:
+    """
+    Get the InvocationCallCount record from a log line, if it is one.
+    The JSON document may be prefixed, i.e. with the timestamp in S3 exports
+    """
+    if INVOCATION_CALL_COUNT_RECORD_TYPE not in log_line:
+        return None
+    try:
+        record = json.loads(log_line[log_line.index("{"):])
+    except (ValueError, json.JSONDecodeError):
+        return None
+    if not isinstance(record, dict) or record.get("RecordType") != INVOCATION_CALL_COUNT_RECORD_TYPE:
+        return None
+    return record
+
+
+def get_run_call_counts(log_lines: Iterable[str]) -> Dict[Optional[str], RunCallCount]:
+    """
+    Sum the invocation call counts by portalRunId
+    (invocations without a portalRunId are summed under None)
+    """
+    run_call_counts: Dict[Optional[str], RunCallCount] = {}
+    for log_line in log_lines:
+        invocation_record = parse_invocation_record(log_line)
+        if invocation_record is None:
+            continue
+        portal_run_id = invocation_record.get("PortalRunId")
+        if portal_run_id not in run_call_counts:
+            run_call_counts[portal_run_id] = RunCallCount(portal_run_id)
+        run_call_counts[portal_run_id].add(invocation_record)
+    return run_call_counts
+
+
+def get_calls_per_run_report(run_call_counts: Dict[Optional[str], RunCallCount]) -> Dict[str, Any]:
+    """
+    Generate the calls per run report
+
+    Output:
+      {
+        "runs": 120,
+        "callsPerRun": {"p50": 41, "p90": 60, "p95": 72, "p99": 90, "max": 95, "mean": 44.2},
+        "callsPerRunByDependency": {"fastq": {"p50": ...}, ...},
+        "callsPerRunByEndpoint": {"fastq GET /api/v1/fastq/{id}": {"p50": ...}, ...},
+        "topRuns": [{"portalRunId": "...", "calls": 95, "invocations": 18}],
+        "unattributed": {"invocations": 3, "calls": 7}
+      }
+    """
+    attributed_runs = [
+        run_call_count_iter_
+        for portal_run_id_iter_, run_call_count_iter_ in run_call_counts.items()
+        if portal_run_id_iter_ is not None
+    ]
+    unattributed = run_call_counts.get(None)
+
+    dependencies = sorted(set(
+        dependency_iter_
+        for run_iter_ in attributed_runs
+        for dependency_iter_ in run_iter_.calls_by_dependency
+    ))
+    endpoints = sorted(set(
+        endpoint_iter_
+        for run_iter_ in attributed_runs
+        for endpoint_iter_ in run_iter_.calls_by_endpoint
+    ))
+
+    # A run that did not call an endpoint counts as zero calls to it
+    calls_per_run_by_endpoint = {
+        endpoint: get_distribution(map(lambda run_iter_: run_iter_.calls_by_endpoint[endpoint], attributed_runs))
+        for endpoint in endpoints
+    }
+
+    return {
+        "runs": len(attributed_runs),
+        "callsPerRun": get_distribution(map(lambda run_iter_: run_iter_.calls, attributed_runs)),
+        "invocationsPerRun": get_distribution(map(lambda run_iter_: run_iter_.invocations, attributed_runs)),
+        "callsPerRunByDependency": {
+            dependency: get_distribution(map(lambda run_iter_: run_iter_.calls_by_dependency[dependency], attributed_runs))
+            for dependency in dependencies
+        },
+        "callsPerRunByEndpoint": dict(sorted(
+            calls_per_run_by_endpoint.items(),
+            key=lambda kv_iter_: kv_iter_[1]['mean'],
+            reverse=True
+        )),
+        "topRuns": list(map(
+            lambda run_iter_: {
+                "portalRunId": run_iter_.portal_run_id,
+                "calls": run_iter_.calls,
+                "invocations": run_iter_.invocations,
+                "callsByLambda": dict(run_iter_.calls_by_lambda.most_common()),
+            },
+            sorted(attributed_runs, key=lambda run_iter_: run_iter_.calls, reverse=True)[:10]
+        )),
+        "unattributed": {
+            "invocations": unattributed.invocations if unattributed is not None else 0,
+            "calls": unattributed.calls if unattributed is not None else 0,
+        },
+    }
+
+
+def format_report_text(report: Dict[str, Any]) -> str:
+    columns = ["p50", "p90", "p95", "p99", "max", "mean"]
+
+    def format_row(name: str, distribution: Dict[str, Any]) -> str:
+        return f"{name:<60}" + "".join(map(lambda column_iter_: f"{distribution[column_iter_]:>9}", columns))
+
+    header = f"{'':<60}" + "".join(map(lambda column_iter_: f"{column_iter_:>9}", columns))
+    lines = [
+        f"Workflow runs: {report['runs']}",
+        f"Unattributed: {report['unattributed']['calls']} calls in {report['unattributed']['invocations']} invocations",
+        "",
+        header,
+        format_row("calls per run", report['callsPerRun']),
+        format_row("invocations per run", report['invocationsPerRun']),
+        "",
+        "By dependency",
+        *map(lambda kv_iter_: format_row(kv_iter_[0], kv_iter_[1]), report['callsPerRunByDependency'].items()),
+        "",
+        "By endpoint",
+        *map(lambda kv_iter_: format_row(kv_iter_[0], kv_iter_[1]), report['callsPerRunByEndpoint'].items()),
+        "",
+        "Top runs",
+        *map(
+            lambda run_iter_: f"{run_iter_['portalRunId']:<60}{run_iter_['calls']:>9} calls in {run_iter_['invocations']} invocations",
+            report['topRuns']
+        ),
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import argparse
+    from itertools import chain
+
+    parser = argparse.ArgumentParser(description="Report the remote calls per workflow run from exported lambda logs")
+    parser.add_argument("log_paths", nargs="+", help="Exported log files (plain, .gz or filter-log-events JSON)")
+    parser.add_argument("--format", choices=["json", "text"], default="json")
+    args = parser.parse_args()
+
+    calls_per_run_report = get_calls_per_run_report(
+        get_run_call_counts(chain.from_iterable(map(read_log_lines, args.log_paths)))
+    )
+
+    if args.format == "text":
+        print(format_report_text(calls_per_run_report))
+    else:
+        print(json.dumps(calls_per_run_report, indent=4))
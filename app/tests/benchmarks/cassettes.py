@@ -0,0 +1,677 @@
+#!/usr/bin/env python3
+
+"""
+Record / replay harness for the lambda handlers.
+
+A cassette holds one handler invocation: the input event, the handler result, and every response of the
+remote dependencies it called (orcabus_api_tools, wrapica and the boto3 SSM, Schemas and S3 clients), i.e.
+
+    {
+        "lambdaName": "get_fastq_list_rows_from_rgid_list",
+        "handlerName": "handler",
+        "event": {...},
+        "environment": {...},
+        "durationMs": 812.5,
+        "result": {...},
+        "interactions": [
+            {"operation": "get_fastq_by_rgid", "arguments": {"args": [...], "kwargs": {}}, "durationMs": 95.1, "response": ...},
+            ...
+        ]
+    }
+
+Operations are named after the functions the handlers call (the methods of the FakeBackend in fakes.py).
+The DynamoDB state store and the SQS comment outbox are not recorded, replays use the local state store
+(as the benchmarks do).
+
+Record a production event against the real services (needs the layer requirements installed, and credentials):
+
+    python3 cassettes.py record get_fastq_list_rows_from_rgid_list --event event.json --cassette cassettes/rows.json
+
+Or against the fake backend, with the default event for the handler (see harness.get_default_handler_event):
+
+    python3 cassettes.py record get_fastq_list_rows_from_rgid_list --fake-backend --lane-count 8 --cassette cassettes/rows.json
+
+Replay offline (each remote call answered from the cassette, after its recorded duration times --latency-scale):
+
+    python3 cassettes.py replay cassettes/ --rounds 5 --format text
+
+The replay report gives, per cassette, the recorded and replayed (median) handler durations,
+the change in the number of calls by operation, the calls not found in the cassette (misses),
+and whether the replayed result matches the recorded one.
+"""
+
+# Standard imports
+import base64
+import importlib
+import json
+import sys
+import threading
+from collections import Counter, defaultdict, deque
+from datetime import datetime
+from os import environ
+from pathlib import Path
+from statistics import median
+from time import perf_counter, sleep
+from types import SimpleNamespace
+from typing import Any, Callable, Deque, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Local imports
+from fakes import (
+    FAKE_MODULE_FUNCTIONS,
+    FakeBackend,
+    FakeBotoClient,
+    FakeStreamingBody,
+    SyntheticDataset,
+    fake_boto3_client,
+    get_fake_backend,
+    set_fake_backend,
+)
+from harness import (
+    BENCHMARK_ENVIRONMENT,
+    LAYER_DIR,
+    get_default_handler_event,
+    load_handler_module,
+    reset_container_state,
+    set_up_lambda_environment,
+)
+
+# Globals
+# Tags the values that are not plain JSON
+CASSETTE_TYPE_KEY = "__cassetteType__"
+
+# Paginated operations, recorded as the list of their pages
+PAGINATED_OPERATIONS = {
+    "ssm": ("get_parameters_by_path",),
+}
+
+RECORDED_OPERATIONS = frozenset(
+    sum(FAKE_MODULE_FUNCTIONS.values(), ()) +
+    sum(FakeBotoClient.OPERATIONS.values(), ()) +
+    sum(PAGINATED_OPERATIONS.values(), ())
+)
+
+# Replays always use the in-memory state store and skip the dependency instrumentation
+REPLAY_ENVIRONMENT_OVERRIDES = {
+    "STATE_STORE_BACKEND": "local",
+    "DEPENDENCY_INSTRUMENTATION": "off",
+}
+
+
+class CassetteMissError(Exception):
+    """
+    The handler made a call that is not in the cassette
+    """
+    pass
+
+
+class Interaction(NamedTuple):
+    operation: str
+    arguments: Dict[str, Any]
+    duration_ms: float
+    response: Any
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "operation": self.operation,
+            "arguments": self.arguments,
+            "durationMs": self.duration_ms,
+            "response": self.response,
+        }
+
+    @classmethod
+    def from_dict(cls, interaction_dict: Dict[str, Any]) -> "Interaction":
+        return cls(
+            operation=interaction_dict['operation'],
+            arguments=interaction_dict['arguments'],
+            duration_ms=interaction_dict['durationMs'],
+            response=interaction_dict['response'],
+        )
+
+
+class Cassette(NamedTuple):
+    lambda_name: str
+    handler_name: str
+    event: Any
+    environment: Dict[str, str]
+    duration_ms: float
+    result: Any
+    interactions: List[Interaction]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "lambdaName": self.lambda_name,
+            "handlerName": self.handler_name,
+            "event": self.event,
+            "environment": self.environment,
+            "durationMs": self.duration_ms,
+            "result": self.result,
+            "interactions": list(map(lambda interaction_iter_: interaction_iter_.to_dict(), self.interactions)),
+        }
+
+    @classmethod
+    def from_dict(cls, cassette_dict: Dict[str, Any]) -> "Cassette":
+        return cls(
+            lambda_name=cassette_dict['lambdaName'],
+            handler_name=cassette_dict.get('handlerName', "handler"),
+            event=cassette_dict['event'],
+            environment=cassette_dict.get('environment', {}),
+            duration_ms=cassette_dict['durationMs'],
+            result=cassette_dict.get('result'),
+            interactions=list(map(Interaction.from_dict, cassette_dict['interactions'])),
+        )
+
+    def get_call_counts(self) -> Counter:
+        return Counter(map(lambda interaction_iter_: interaction_iter_.operation, self.interactions))
+
+
+class ReplayReport(NamedTuple):
+    cassette_path: str
+    lambda_name: str
+    recorded_duration_ms: float
+    replay_duration_ms: float
+    recorded_calls: int
+    replay_calls: int
+    call_deltas: Dict[str, int]
+    misses: List[str]
+    output_matches: bool
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cassettePath": self.cassette_path,
+            "lambdaName": self.lambda_name,
+            "recordedDurationMs": self.recorded_duration_ms,
+            "replayDurationMs": self.replay_duration_ms,
+            "recordedCalls": self.recorded_calls,
+            "replayCalls": self.replay_calls,
+            "callDeltas": self.call_deltas,
+            "misses": self.misses,
+            "outputMatches": self.output_matches,
+        }
+
+
+class ValueEncoder:
+    """
+    Encodes responses, results and arguments as JSON.
+
+    Objects (i.e. wrapica / libica models) are encoded by their to_dict() or their attributes and replayed
+    as namespaces, streaming bodies and iterators are read in full, so the encoder keeps track of whether it
+    consumed anything (the caller then needs the decoded copy rather than the original value)
+    """
+
+    def __init__(self):
+        self.consumed = False
+
+    def encode(self, value: Any) -> Any:
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if isinstance(value, dict):
+            return {str(key): self.encode(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return list(map(self.encode, value))
+        if isinstance(value, (bytes, bytearray)):
+            return {CASSETTE_TYPE_KEY: "bytes", "base64": base64.b64encode(bytes(value)).decode()}
+        if isinstance(value, datetime):
+            return {CASSETTE_TYPE_KEY: "datetime", "isoformat": value.isoformat()}
+        if isinstance(value, BaseException):
+            return {
+                CASSETTE_TYPE_KEY: "exception",
+                "module": type(value).__module__,
+                "name": type(value).__name__,
+                "message": str(value),
+            }
+        if callable(getattr(value, "read", None)):
+            self.consumed = True
+            return {CASSETTE_TYPE_KEY: "streamingBody", "base64": base64.b64encode(value.read()).decode()}
+        if callable(getattr(value, "to_dict", None)):
+            return {CASSETTE_TYPE_KEY: "object", "attributes": self.encode(value.to_dict())}
+        if hasattr(value, "__next__"):
+            self.consumed = True
+            return {CASSETTE_TYPE_KEY: "iterator", "items": list(map(self.encode, value))}
+        if hasattr(value, "__dict__"):
+            return {
+                CASSETTE_TYPE_KEY: "object",
+                "attributes": {
+                    key: self.encode(item)
+                    for key, item in vars(value).items()
+                    if not key.startswith("_")
+                },
+            }
+        return str(value)
+
+
+def encode_value(value: Any) -> Any:
+    return ValueEncoder().encode(value)
+
+
+def get_exception_class(module_name: str, class_name: str) -> type:
+    """
+    The recorded exception class, or the class of the same name in the (fake) modules of the replay
+    (i.e. libica.openapi.v3.exceptions.ApiException is replayed as the fake libica.openapi.v3.ApiException)
+    """
+    exception_class = getattr(sys.modules.get(module_name), class_name, None)
+    if isinstance(exception_class, type) and issubclass(exception_class, BaseException):
+        return exception_class
+    module_names = list(filter(
+        lambda module_name_iter_: module_name_iter_.split(".")[0] == module_name.split(".")[0],
+        list(sys.modules)
+    )) + ["builtins"]
+    for module_name_iter in module_names:
+        exception_class = getattr(sys.modules.get(module_name_iter), class_name, None)
+        if isinstance(exception_class, type) and issubclass(exception_class, BaseException):
+            return exception_class
+    return RuntimeError
+
+
+def decode_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return list(map(decode_value, value))
+    if not isinstance(value, dict):
+        return value
+    cassette_type = value.get(CASSETTE_TYPE_KEY)
+    if cassette_type is None:
+        return {key: decode_value(item) for key, item in value.items()}
+    if cassette_type == "bytes":
+        return base64.b64decode(value['base64'])
+    if cassette_type == "datetime":
+        return datetime.fromisoformat(value['isoformat'])
+    if cassette_type == "exception":
+        return get_exception_class(value['module'], value['name'])(value['message'])
+    if cassette_type == "streamingBody":
+        return FakeStreamingBody(base64.b64decode(value['base64']))
+    if cassette_type == "iterator":
+        return iter(list(map(decode_value, value['items'])))
+    if cassette_type == "object":
+        return SimpleNamespace(**{key: decode_value(item) for key, item in value['attributes'].items()})
+    raise ValueError(f"Unknown cassette type {cassette_type}")
+
+
+def get_call_key(operation: str, arguments: Dict[str, Any]) -> str:
+    return json.dumps([operation, arguments], sort_keys=True)
+
+
+class CassetteRecorder:
+    """
+    Times and records the outermost remote calls of an invocation
+    (calls made from within a recorded call, i.e. orcabus_api_tools calling itself, are part of it)
+    """
+
+    def __init__(self):
+        self.interactions: List[Interaction] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def record_call(self, operation: str, func: Callable, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+        if getattr(self._local, "depth", 0) > 0:
+            return func(*args, **kwargs)
+
+        arguments = encode_value({"args": args, "kwargs": kwargs})
+        self._local.depth = 1
+        start_time = perf_counter()
+        try:
+            response = func(*args, **kwargs)
+            # Read paginators and generators within the timed call
+            if operation in sum(PAGINATED_OPERATIONS.values(), ()):
+                response = list(response)
+        except Exception as exception:
+            self._append(operation, arguments, start_time, encode_value(exception))
+            raise
+        finally:
+            self._local.depth = 0
+
+        value_encoder = ValueEncoder()
+        encoded_response = value_encoder.encode(response)
+        self._append(operation, arguments, start_time, encoded_response)
+        # The response was read in full, so hand the handler a copy
+        return decode_value(encoded_response) if value_encoder.consumed else response
+
+    def _append(self, operation: str, arguments: Dict[str, Any], start_time: float, response: Any) -> None:
+        with self._lock:
+            self.interactions.append(Interaction(
+                operation=operation,
+                arguments=arguments,
+                duration_ms=round((perf_counter() - start_time) * 1000, 3),
+                response=response,
+            ))
+
+    def wrap(self, operation: str, func: Callable) -> Callable:
+        def recorded_func(*args, **kwargs):
+            return self.record_call(operation, func, args, kwargs)
+
+        recorded_func.__name__ = operation
+        return recorded_func
+
+
+class RecordingBackend:
+    """
+    Records the calls to a fake backend, stands in for it with set_fake_backend
+    """
+
+    def __init__(self, fake_backend: FakeBackend, recorder: CassetteRecorder):
+        self.fake_backend = fake_backend
+        self.recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self.fake_backend, name)
+        if name in RECORDED_OPERATIONS:
+            return self.recorder.wrap(name, attribute)
+        return attribute
+
+
+class RecordingPaginator:
+    def __init__(self, paginator: Any, operation: str, recorder: CassetteRecorder):
+        self.paginate = recorder.wrap(operation, paginator.paginate)
+
+
+class RecordingBotoClient:
+    """
+    Records the SSM, Schemas and S3 operations of a real boto3 client
+    """
+
+    def __init__(self, client: Any, service_name: str, recorder: CassetteRecorder):
+        self._client = client
+        self._service_name = service_name
+        self._recorder = recorder
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._client, name)
+        if name in FakeBotoClient.OPERATIONS.get(self._service_name, ()):
+            return self._recorder.wrap(name, attribute)
+        return attribute
+
+    def get_paginator(self, operation_name: str) -> Any:
+        paginator = self._client.get_paginator(operation_name)
+        if operation_name in PAGINATED_OPERATIONS.get(self._service_name, ()):
+            return RecordingPaginator(paginator, operation_name, self._recorder)
+        return paginator
+
+
+def patch_real_dependencies(recorder: CassetteRecorder) -> None:
+    """
+    Record the real orcabus_api_tools, wrapica and boto3 calls,
+    must run before the handler (and the layer) import the functions by name
+    """
+    import boto3
+
+    for module_name, function_names in FAKE_MODULE_FUNCTIONS.items():
+        module = importlib.import_module(module_name)
+        for function_name in function_names:
+            setattr(module, function_name, recorder.wrap(function_name, getattr(module, function_name)))
+
+    boto3_client = boto3.client
+
+    def recording_boto3_client(service_name: str, *args, **kwargs) -> Any:
+        client = boto3_client(service_name, *args, **kwargs)
+        if service_name in FakeBotoClient.OPERATIONS:
+            return RecordingBotoClient(client, service_name, recorder)
+        return client
+
+    boto3.client = recording_boto3_client
+
+
+def invoke_handler(handler: Callable, event: Any) -> Tuple[Any, float]:
+    """
+    Output: the encoded result (or the exception), and the duration of the invocation in milliseconds
+    """
+    start_time = perf_counter()
+    try:
+        # Handlers may update the event in place
+        result = handler(json.loads(json.dumps(event)), None)
+    except Exception as exception:
+        result = exception
+    return encode_value(result), round((perf_counter() - start_time) * 1000, 3)
+
+
+def record_cassette(
+        lambda_name: str,
+        event: Any,
+        handler_name: str = "handler",
+        fake_backend: Optional[FakeBackend] = None,
+) -> Cassette:
+    """
+    Invoke the handler once and record it. Against the fake backend if given,
+    otherwise against the real services in the environment of the caller (one lambda per process,
+    as the real dependencies are patched before the handler imports them)
+    """
+    recorder = CassetteRecorder()
+
+    if fake_backend is not None:
+        set_up_lambda_environment()
+        import boto3
+        boto3.client = fake_boto3_client
+        module = load_handler_module(lambda_name)
+        reset_container_state(module)
+        set_fake_backend(RecordingBackend(fake_backend, recorder))
+        try:
+            result, duration_ms = invoke_handler(getattr(module, handler_name), event)
+        finally:
+            set_fake_backend(fake_backend)
+    else:
+        if str(LAYER_DIR) not in sys.path:
+            sys.path.insert(0, str(LAYER_DIR))
+        patch_real_dependencies(recorder)
+        module = load_handler_module(lambda_name)
+        result, duration_ms = invoke_handler(getattr(module, handler_name), event)
+
+    return Cassette(
+        lambda_name=lambda_name,
+        handler_name=handler_name,
+        event=event,
+        environment={key: environ[key] for key in BENCHMARK_ENVIRONMENT if key in environ},
+        duration_ms=duration_ms,
+        result=result,
+        interactions=recorder.interactions,
+    )
+
+
+class CassettePlayer:
+    """
+    Answers the remote calls of a replay from a cassette, stands in for the fake backend with set_fake_backend.
+
+    Calls are matched on the operation and arguments, repeated calls are answered in the order they were recorded
+    """
+
+    def __init__(self, cassette: Cassette, latency_scale: float = 1.0):
+        self.cassette = cassette
+        self.latency_scale = latency_scale
+        self.calls: Counter = Counter()
+        self.misses: List[str] = []
+        self._lock = threading.Lock()
+        self._interactions_by_key: Dict[str, Deque[Interaction]] = {}
+        self.rewind()
+
+    def rewind(self) -> None:
+        interactions_by_key: Dict[str, Deque[Interaction]] = defaultdict(deque)
+        for interaction in self.cassette.interactions:
+            interactions_by_key[get_call_key(interaction.operation, interaction.arguments)].append(interaction)
+        with self._lock:
+            self._interactions_by_key = dict(interactions_by_key)
+            self.calls.clear()
+            self.misses.clear()
+
+    def play(self, operation: str, args: Tuple, kwargs: Dict[str, Any]) -> Any:
+        call_key = get_call_key(operation, encode_value({"args": args, "kwargs": kwargs}))
+        with self._lock:
+            self.calls[operation] += 1
+            interactions = self._interactions_by_key.get(call_key)
+            interaction = interactions.popleft() if interactions else None
+            if interaction is None:
+                self.misses.append(call_key)
+        if interaction is None:
+            raise CassetteMissError(f"No recorded call for {call_key}")
+
+        if self.latency_scale > 0:
+            sleep(interaction.duration_ms / 1000 * self.latency_scale)
+        response = decode_value(interaction.response)
+        if isinstance(response, BaseException):
+            raise response
+        return response
+
+    def __getattr__(self, name: str) -> Callable:
+        if name not in RECORDED_OPERATIONS:
+            raise AttributeError(name)
+
+        def played_func(*args, **kwargs):
+            return self.play(name, args, kwargs)
+
+        played_func.__name__ = name
+        return played_func
+
+
+def read_cassette(cassette_path: Union[str, Path]) -> Cassette:
+    return Cassette.from_dict(json.loads(Path(cassette_path).read_text()))
+
+
+def write_cassette(cassette: Cassette, cassette_path: Union[str, Path]) -> None:
+    Path(cassette_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(cassette_path).write_text(json.dumps(cassette.to_dict(), indent=4) + "\n")
+
+
+def get_cassette_paths(paths: Iterable[Union[str, Path]]) -> List[Path]:
+    return sum(
+        map(
+            lambda path_iter_: sorted(Path(path_iter_).rglob("*.json")) if Path(path_iter_).is_dir() else [Path(path_iter_)],
+            paths
+        ),
+        []
+    )
+
+
+def replay_cassette(
+        cassette: Cassette,
+        rounds: int = 5,
+        latency_scale: float = 1.0,
+        cassette_path: str = "",
+) -> ReplayReport:
+    """
+    Replay the invocation offline, from a cold container on every round
+    """
+    set_up_lambda_environment()
+    environ.update({**cassette.environment, **REPLAY_ENVIRONMENT_OVERRIDES})
+    import boto3
+    boto3.client = fake_boto3_client
+
+    module = load_handler_module(cassette.lambda_name)
+    handler = getattr(module, cassette.handler_name)
+    cassette_player = CassettePlayer(cassette, latency_scale=latency_scale)
+
+    previous_backend = None
+    try:
+        previous_backend = get_fake_backend()
+    except RuntimeError:
+        pass
+    set_fake_backend(cassette_player)
+
+    replay_durations_ms: List[float] = []
+    try:
+        for _ in range(max(rounds, 1)):
+            reset_container_state(module)
+            cassette_player.rewind()
+            result, duration_ms = invoke_handler(handler, cassette.event)
+            replay_durations_ms.append(duration_ms)
+    finally:
+        set_fake_backend(previous_backend)
+
+    recorded_calls = cassette.get_call_counts()
+    return ReplayReport(
+        cassette_path=cassette_path,
+        lambda_name=cassette.lambda_name,
+        recorded_duration_ms=cassette.duration_ms,
+        replay_duration_ms=round(median(replay_durations_ms), 3),
+        recorded_calls=sum(recorded_calls.values()),
+        replay_calls=sum(cassette_player.calls.values()),
+        call_deltas={
+            operation: cassette_player.calls[operation] - recorded_calls[operation]
+            for operation in sorted(set(recorded_calls) | set(cassette_player.calls))
+            if cassette_player.calls[operation] != recorded_calls[operation]
+        },
+        misses=list(cassette_player.misses),
+        output_matches=result == cassette.result,
+    )
+
+
+def format_replay_reports_text(replay_reports: List[ReplayReport]) -> str:
+    report_lines = [
+        f"{'cassette':<48} {'lambda':<52} {'recorded ms':>12} {'replay ms':>10} {'calls':>9} {'misses':>6}  output"
+    ]
+    for replay_report in replay_reports:
+        report_lines.append(
+            f"{replay_report.cassette_path:<48} {replay_report.lambda_name:<52} "
+            f"{replay_report.recorded_duration_ms:>12.1f} {replay_report.replay_duration_ms:>10.1f} "
+            f"{replay_report.recorded_calls:>4}>{replay_report.replay_calls:<4} {len(replay_report.misses):>6}  "
+            f"{'matches' if replay_report.output_matches else 'DIFFERS'}"
+        )
+        for operation, call_delta in replay_report.call_deltas.items():
+            report_lines.append(f"    {operation}: {call_delta:+d} calls")
+    return "\n".join(report_lines)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Record and replay lambda handler invocations")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Invoke a handler and record it to a cassette")
+    record_parser.add_argument("lambda_name", help="i.e. get_fastq_list_rows_from_rgid_list")
+    record_parser.add_argument("--cassette", required=True, help="The cassette file to write")
+    record_parser.add_argument("--event", help="The event JSON file ('-' for stdin), required unless --fake-backend")
+    record_parser.add_argument("--handler-name", default="handler")
+    record_parser.add_argument(
+        "--fake-backend", action="store_true",
+        help="Record against the fake backend rather than the real services (the event defaults to the handler default)"
+    )
+    record_parser.add_argument("--library-count", type=int, default=1)
+    record_parser.add_argument("--lane-count", type=int, default=1)
+    record_parser.add_argument("--latency-ms", type=float, default=0, help="Latency of each fake backend call")
+
+    replay_parser = subparsers.add_parser("replay", help="Replay cassettes offline and report the deltas")
+    replay_parser.add_argument("cassette_paths", nargs="+", help="Cassette files, or directories of them")
+    replay_parser.add_argument("--rounds", type=int, default=5)
+    replay_parser.add_argument(
+        "--latency-scale", type=float, default=1.0,
+        help="Multiplies the recorded duration of each remote call (0 replays without latency)"
+    )
+    replay_parser.add_argument("--format", choices=["json", "text"], default="text")
+
+    args = parser.parse_args()
+
+    if args.command == "record":
+        handler_event = None
+        if args.event == "-":
+            handler_event = json.load(sys.stdin)
+        elif args.event is not None:
+            handler_event = json.loads(Path(args.event).read_text())
+
+        recording_backend = None
+        if args.fake_backend:
+            recording_backend = FakeBackend(
+                SyntheticDataset(library_count=args.library_count, lane_count=args.lane_count),
+                latency_seconds=args.latency_ms / 1000,
+            )
+            if handler_event is None:
+                handler_event = get_default_handler_event(args.lambda_name, recording_backend.dataset)
+        elif handler_event is None:
+            parser.error("--event is required unless --fake-backend is set")
+
+        recorded_cassette = record_cassette(
+            args.lambda_name, handler_event, handler_name=args.handler_name, fake_backend=recording_backend
+        )
+        write_cassette(recorded_cassette, args.cassette)
+        print(
+            f"Recorded {len(recorded_cassette.interactions)} calls in {recorded_cassette.duration_ms:.1f} ms to {args.cassette}",
+            file=sys.stderr
+        )
+    else:
+        replay_reports = list(map(
+            lambda cassette_path_iter_: replay_cassette(
+                read_cassette(cassette_path_iter_),
+                rounds=args.rounds,
+                latency_scale=args.latency_scale,
+                cassette_path=str(cassette_path_iter_),
+            ),
+            get_cassette_paths(args.cassette_paths)
+        ))
+        if args.format == "text":
+            print(format_replay_reports_text(replay_reports))
+        else:
+            print(json.dumps(list(map(lambda report_iter_: report_iter_.to_dict(), replay_reports)), indent=4))
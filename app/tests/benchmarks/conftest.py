@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+
+"""
+Handler micro-benchmarks.
+
+Every handler runs in-process against the fakes in fakes.py (no AWS or OrcaBus access needed),
+over a sweep of payload sizes (--library-counts, --lane-counts), with an optional injected latency
+per remote call (--injected-latency-ms).
+
+Each benchmark records, besides the pytest-benchmark timings:
+  * peakMemoryBytes: the peak traced memory of a single invocation
+  * remoteCalls / remoteCallsByEndpoint: the remote calls made by a single (cold container) invocation
+
+The remote call counts and peak memory do not depend on the machine, so they are committed in
+baselines/handler_baselines.json and checked on every run: a benchmark fails if it makes more remote calls
+than its baseline, or needs more than MAX_PEAK_MEMORY_RATIO times its baseline memory (plus PEAK_MEMORY_HEADROOM_BYTES).
+Timings do depend on the machine, so they are saved and compared locally with pytest-benchmark
+(see the Makefile benchmark targets).
+"""
+
+# Standard imports
+import json
+import tracemalloc
+from os import environ
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Test imports
+import pytest
+
+# Local imports
+from api_standin import ServiceConfig, StandinApi, StandinHttpServer, install_standin_redirect
+from fakes import FakeBackend, SyntheticDataset, fake_boto3_client, set_fake_backend
+from harness import load_handler_module, reset_container_state, set_up_lambda_environment
+
+# Globals
+HANDLER_BASELINES_PATH = Path(__file__).parent / "baselines" / "handler_baselines.json"
+MAX_PEAK_MEMORY_RATIO = 1.5
+# Small allocations vary between python builds, so allow some headroom on top of the ratio
+PEAK_MEMORY_HEADROOM_BYTES = 64 * 1024
+
+DEFAULT_LIBRARY_COUNTS = "1,4,16"
+DEFAULT_LANE_COUNTS = "1,4,8"
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("handler benchmarks")
+    group.addoption(
+        "--injected-latency-ms", type=float, default=float(environ.get("BENCHMARK_INJECTED_LATENCY_MS", 0)),
+        help="Latency added to every fake remote call (default 0, or BENCHMARK_INJECTED_LATENCY_MS)"
+    )
+    group.addoption(
+        "--library-counts", default=DEFAULT_LIBRARY_COUNTS,
+        help=f"Comma separated library counts to sweep (default {DEFAULT_LIBRARY_COUNTS})"
+    )
+    group.addoption(
+        "--lane-counts", default=DEFAULT_LANE_COUNTS,
+        help=f"Comma separated lane counts (per library) to sweep (default {DEFAULT_LANE_COUNTS})"
+    )
+    group.addoption(
+        "--update-handler-baselines", action="store_true", default=False,
+        help="Write the remote call counts and peak memory of this run to baselines/handler_baselines.json"
+    )
+
+
+def get_counts(option_value: str) -> List[int]:
+    return list(map(int, filter(None, option_value.split(","))))
+
+
+def pytest_generate_tests(metafunc):
+    # Only the benchmarks that ask for a size are swept over it
+    if "library_count" in metafunc.fixturenames:
+        library_counts = get_counts(metafunc.config.getoption("library_counts"))
+        metafunc.parametrize(
+            "library_count", library_counts,
+            ids=list(map(lambda count_iter_: f"libraries{count_iter_}", library_counts))
+        )
+    if "lane_count" in metafunc.fixturenames:
+        lane_counts = get_counts(metafunc.config.getoption("lane_counts"))
+        metafunc.parametrize(
+            "lane_count", lane_counts,
+            ids=list(map(lambda count_iter_: f"lanes{count_iter_}", lane_counts))
+        )
+
+
+def pytest_configure(config):
+    set_up_lambda_environment()
+    config._handler_measurements = {}
+
+
+def pytest_sessionfinish(session, exitstatus):
+    handler_measurements = getattr(session.config, "_handler_measurements", {})
+    if not session.config.getoption("update_handler_baselines") or not handler_measurements:
+        return
+    handler_baselines = get_handler_baselines()
+    handler_baselines.update(handler_measurements)
+    HANDLER_BASELINES_PATH.parent.mkdir(parents=True, exist_ok=True)
+    HANDLER_BASELINES_PATH.write_text(json.dumps(dict(sorted(handler_baselines.items())), indent=2) + "\n")
+
+
+def get_handler_baselines() -> Dict[str, Dict[str, int]]:
+    if not HANDLER_BASELINES_PATH.is_file():
+        return {}
+    return json.loads(HANDLER_BASELINES_PATH.read_text())
+
+
+@pytest.fixture(autouse=True)
+def fake_boto3(monkeypatch):
+    import boto3
+    monkeypatch.setattr(boto3, "client", fake_boto3_client)
+
+
+@pytest.fixture
+def fake_backend_factory(request) -> Callable[..., FakeBackend]:
+    """
+    Build the synthetic dataset and make its fake backend current
+    """
+    latency_seconds = request.config.getoption("injected_latency_ms") / 1000
+
+    def make_fake_backend(library_count: int = 1, lane_count: int = 1) -> FakeBackend:
+        fake_backend = FakeBackend(
+            SyntheticDataset(library_count=library_count, lane_count=lane_count),
+            latency_seconds=latency_seconds,
+        )
+        set_fake_backend(fake_backend)
+        return fake_backend
+
+    yield make_fake_backend
+    set_fake_backend(None)
+
+
+@pytest.fixture
+def api_standin(request) -> Callable[..., StandinHttpServer]:
+    """
+    Start a stand-in OrcaBus API server on a free port, over the synthetic dataset
+    """
+    standin_servers: List[StandinHttpServer] = []
+
+    def start_api_standin(
+            library_count: int = 1,
+            lane_count: int = 1,
+            service_config: ServiceConfig = ServiceConfig(),
+            seed: Optional[int] = 0,
+    ) -> StandinHttpServer:
+        standin_server = StandinHttpServer(StandinApi(
+            SyntheticDataset(library_count=library_count, lane_count=lane_count),
+            default_config=service_config,
+            seed=seed,
+        )).start()
+        standin_servers.append(standin_server)
+        return standin_server
+
+    yield start_api_standin
+    for standin_server in standin_servers:
+        standin_server.stop()
+
+
+@pytest.fixture
+def api_standin_redirect() -> Callable[[StandinHttpServer], None]:
+    """
+    Send the OrcaBus API calls of the handlers to a stand-in server, until the end of the test
+    """
+    remove_standin_redirects: List[Callable[[], None]] = []
+
+    def redirect_to_api_standin(standin_server: StandinHttpServer) -> None:
+        remove_standin_redirects.append(install_standin_redirect(standin_server.url))
+
+    yield redirect_to_api_standin
+    for remove_standin_redirect in reversed(remove_standin_redirects):
+        remove_standin_redirect()
+
+
+@pytest.fixture
+def run_handler_benchmark(request, benchmark):
+    """
+    Benchmark a handler for an event, from a cold container on every round,
+    and record the peak memory and remote calls of a single invocation
+    """
+
+    def run(
+            lambda_name: str,
+            fake_backend: FakeBackend,
+            event: Dict[str, Any],
+            handler_name: str = "handler",
+            rounds: int = 20,
+    ) -> Any:
+        module = load_handler_module(lambda_name)
+        handler = getattr(module, handler_name)
+
+        def setup():
+            reset_container_state(module)
+            # Handlers may update the event in place
+            return (json.loads(json.dumps(event)), None), {}
+
+        # One traced invocation for the memory and the remote calls
+        args, _ = setup()
+        fake_backend.reset_calls()
+        tracemalloc.start()
+        try:
+            result = handler(*args)
+            _, peak_memory_bytes = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        remote_calls_by_endpoint = dict(sorted(fake_backend.calls.items()))
+        remote_calls = sum(remote_calls_by_endpoint.values())
+
+        benchmark.extra_info.update({
+            "peakMemoryBytes": peak_memory_bytes,
+            "remoteCalls": remote_calls,
+            "remoteCallsByEndpoint": remote_calls_by_endpoint,
+            "injectedLatencyMs": request.config.getoption("injected_latency_ms"),
+        })
+
+        # Timed invocations
+        benchmark.pedantic(handler, setup=setup, rounds=rounds, warmup_rounds=1)
+
+        request.config._handler_measurements[request.node.name] = {
+            "remoteCalls": remote_calls,
+            "peakMemoryBytes": peak_memory_bytes,
+        }
+        handler_baseline = get_handler_baselines().get(request.node.name)
+        if not request.config.getoption("update_handler_baselines") and handler_baseline is not None:
+            assert remote_calls <= handler_baseline['remoteCalls'], (
+                f"{request.node.name} made {remote_calls} remote calls, the baseline is "
+                f"{handler_baseline['remoteCalls']}: {remote_calls_by_endpoint}"
+            )
+            max_peak_memory_bytes = (
+                handler_baseline['peakMemoryBytes'] * MAX_PEAK_MEMORY_RATIO + PEAK_MEMORY_HEADROOM_BYTES
+            )
+            assert peak_memory_bytes <= max_peak_memory_bytes, (
+                f"{request.node.name} peak memory is {peak_memory_bytes} bytes, the baseline is "
+                f"{handler_baseline['peakMemoryBytes']} bytes"
+            )
+
+        return result
+
+    return run
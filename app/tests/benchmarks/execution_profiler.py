@@ -0,0 +1,758 @@
+#!/usr/bin/env python3
+
+"""
+Execution history profiler.
+
+Reads Step Functions execution histories exported from the deployed state machines,
+works out which template each execution ran (from the names of the states it entered), and reports:
+  * the duration of every state, by path (i.e. 'Get Inputs/0/Wait for fastq'), as percentiles over the executions
+  * retries, the attempts past the first of a Task
+  * the callback wait of .waitForTaskToken tasks, i.e. how long the fastq sync took to reply to 'Wait for fastq'
+  * likely cold starts, inferred per lambda from the invocations in the histories:
+    an invocation is a cold start if every execution environment of the function was busy,
+    or idle for longer than --cold-start-idle-minutes
+    (an overestimate if the histories do not cover every execution in the period)
+  * the duration of each branch of a Parallel (or iteration of a Map), and how often it was the slowest
+
+Works on local files only, as exported with:
+
+    aws stepfunctions get-execution-history --execution-arn <execution arn> > histories/<execution name>.json
+
+Then:
+
+    python3 execution_profiler.py histories/ --format text --timelines 3
+    python3 execution_profiler.py histories/ --format trace > trace.json  # open in https://ui.perfetto.dev
+
+Each history file holds the 'get-execution-history' output ({"events": [...]}, optionally with an
+'executionArn' key), a list of events, or a list of either. Directories are read recursively (*.json).
+"""
+
+# Standard imports
+import json
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Local imports
+from call_report import get_distribution
+from local_sfn import (
+    ExecutionResult,
+    StateTiming,
+    format_timeline_text,
+    get_lambda_name_from_arn,
+    get_template_names,
+    load_state_machine_definition,
+)
+
+# Globals
+STATE_ENTERED_SUFFIX = "StateEntered"
+STATE_EXITED_SUFFIX = "StateExited"
+TASK_EVENT_PREFIXES = ("Task", "LambdaFunction")
+BRANCH_STARTED_EVENT_TYPES = ("ParallelStateStarted", "MapIterationStarted")
+EXECUTION_END_EVENT_TYPES = {
+    "ExecutionSucceeded": "SUCCEEDED",
+    "ExecutionFailed": "FAILED",
+    "ExecutionTimedOut": "TIMED_OUT",
+    "ExecutionAborted": "ABORTED",
+}
+WAIT_FOR_TASK_TOKEN_SUFFIX = ".waitForTaskToken"
+UNKNOWN_TEMPLATE_NAME = "unknown"
+
+DEFAULT_COLD_START_IDLE_MINUTES = 15
+
+
+class StateVisit(NamedTuple):
+    # i.e. 'Get Inputs/0/Wait for fastq', as in the local step functions executor
+    path: str
+    state_name: str
+    state_type: str
+    # The lambda name, the integration (i.e. 'events:putEvents.waitForTaskToken') or None
+    resource: Optional[str]
+    start_ms: float
+    end_ms: float
+    attempts: int
+    # From the task submitted to the task token callback
+    callback_wait_ms: Optional[float]
+    likely_cold_start: bool
+    status: str
+    # The (start, end) epoch seconds of each lambda invocation, one per attempt
+    invocations: List[Tuple[float, float]]
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms
+
+    def to_state_timing(self) -> StateTiming:
+        return StateTiming(
+            path=self.path,
+            state_name=self.state_name,
+            state_type=self.state_type,
+            resource=self.resource,
+            start_ms=self.start_ms,
+            end_ms=self.end_ms,
+            attempts=self.attempts,
+            simulated_delay_seconds=0.0,
+            status=self.status,
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            **self.to_state_timing().to_dict(),
+            "callbackWaitMs": round(self.callback_wait_ms, 3) if self.callback_wait_ms is not None else None,
+            "likelyColdStart": self.likely_cold_start,
+        }
+
+
+class ExecutionProfile(NamedTuple):
+    execution_name: str
+    template_name: str
+    status: str
+    error: Optional[str]
+    cause: Optional[str]
+    # Epoch seconds
+    started_at: float
+    duration_ms: float
+    visits: List[StateVisit]
+
+    def to_execution_result(self) -> ExecutionResult:
+        """
+        As an execution result of the local step functions executor, i.e. for format_timeline_text
+        """
+        return ExecutionResult(
+            status=self.status,
+            output=None,
+            error=self.error,
+            cause=self.cause,
+            duration_ms=self.duration_ms,
+            timeline=list(map(lambda visit_iter_: visit_iter_.to_state_timing(), self.visits)),
+            events=[],
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "executionName": self.execution_name,
+            "templateName": self.template_name,
+            "status": self.status,
+            "error": self.error,
+            "cause": self.cause,
+            "durationMs": round(self.duration_ms, 3),
+            "states": list(map(lambda visit_iter_: visit_iter_.to_dict(), self.visits)),
+        }
+
+
+def parse_timestamp(timestamp: Union[str, int, float]) -> float:
+    """
+    Epoch seconds, from an ISO 8601 timestamp or epoch seconds (see the cli_timestamp_format of the AWS CLI)
+    """
+    if isinstance(timestamp, (int, float)):
+        return float(timestamp)
+    return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+
+def read_execution_histories(history_path: Union[str, Path]) -> List[Tuple[str, List[Dict[str, Any]]]]:
+    """
+    The (execution name, events) of every history in a file, or in the *.json files under a directory
+    """
+    history_path = Path(history_path)
+    if history_path.is_dir():
+        return sum(map(read_execution_histories, sorted(history_path.rglob("*.json"))), [])
+
+    contents = json.loads(history_path.read_text())
+    # A single history, or a list of histories
+    if isinstance(contents, dict) or (contents and isinstance(contents[0], dict) and "type" in contents[0]):
+        contents = [contents]
+
+    execution_histories = []
+    for history_index, history in enumerate(contents):
+        if isinstance(history, list):
+            history = {"events": history}
+        execution_name = (
+            history['executionArn'].rsplit(":", 1)[-1] if "executionArn" in history
+            else history_path.stem if len(contents) == 1
+            else f"{history_path.stem}.{history_index}"
+        )
+        execution_histories.append((execution_name, history['events']))
+    return execution_histories
+
+
+def get_nested_definitions(state: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    The branches of a Parallel, or the item processor of a Map
+    """
+    return state.get("Branches", []) + list(filter(None, [state.get("ItemProcessor", state.get("Iterator"))]))
+
+
+def get_state_names(definition: Dict[str, Any]) -> List[str]:
+    """
+    The names of all states in a definition, including those in Parallel branches and Map item processors
+    """
+    state_names = []
+    for state_name, state in definition['States'].items():
+        state_names.append(state_name)
+        for nested_definition in get_nested_definitions(state):
+            state_names.extend(get_state_names(nested_definition))
+    return state_names
+
+
+def get_template_definitions() -> Dict[str, Dict[str, Any]]:
+    return {
+        template_name: load_state_machine_definition(template_name)
+        for template_name in get_template_names()
+    }
+
+
+def get_template_name(events: List[Dict[str, Any]], template_definitions: Dict[str, Dict[str, Any]]) -> str:
+    """
+    The template whose states include every state entered in the execution
+    """
+    entered_state_names = set(map(
+        lambda event_iter_: get_event_details(event_iter_)['name'],
+        filter(lambda event_iter_: event_iter_['type'].endswith(STATE_ENTERED_SUFFIX), events)
+    ))
+    for template_name, definition in template_definitions.items():
+        if entered_state_names and entered_state_names <= set(get_state_names(definition)):
+            return template_name
+    return UNKNOWN_TEMPLATE_NAME
+
+
+def get_branch_index(parallel_state: Optional[Dict[str, Any]], state_name: str, fallback_index: int) -> int:
+    """
+    The index of the Parallel branch starting at state_name, or the order the branches started in if the state is not known
+    """
+    if parallel_state is None:
+        return fallback_index
+    start_state_names = list(map(lambda branch_iter_: branch_iter_['StartAt'], parallel_state.get("Branches", [])))
+    return start_state_names.index(state_name) if state_name in start_state_names else fallback_index
+
+
+def find_state(definition: Optional[Dict[str, Any]], state_name: str) -> Optional[Dict[str, Any]]:
+    if definition is None:
+        return None
+    for name, state in definition['States'].items():
+        if name == state_name:
+            return state
+        for nested_definition in get_nested_definitions(state):
+            nested_state = find_state(nested_definition, state_name)
+            if nested_state is not None:
+                return nested_state
+    return None
+
+
+def get_task_resource(task_event_details: Dict[str, Any]) -> Optional[str]:
+    """
+    The lambda name of a lambda:invoke task, or the integration, i.e. 'events:putEvents.waitForTaskToken'
+    """
+    resource_type = task_event_details.get("resourceType")
+    resource = task_event_details.get("resource")
+    if resource_type == "lambda" and resource is not None and resource.startswith("invoke"):
+        try:
+            return get_lambda_name_from_arn(json.loads(task_event_details['parameters'])['FunctionName'])
+        except (KeyError, TypeError, json.JSONDecodeError):
+            pass
+    if resource is not None and resource.startswith("arn:aws:lambda:"):
+        return get_lambda_name_from_arn(resource)
+    return f"{resource_type}:{resource}" if resource_type is not None else resource
+
+
+def get_event_details(event: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The <eventType>EventDetails of an event, i.e. taskScheduledEventDetails
+    """
+    return next(
+        (value for key, value in event.items() if key.endswith("EventDetails") and isinstance(value, dict)),
+        {}
+    )
+
+
+def parse_execution_history(
+        execution_name: str,
+        events: List[Dict[str, Any]],
+        template_definitions: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> ExecutionProfile:
+    """
+    Follow the previousEventId of each event back to the state it belongs to,
+    and time each state visit from the execution start
+    """
+    template_definitions = template_definitions if template_definitions is not None else get_template_definitions()
+    events = sorted(events, key=lambda event_iter_: event_iter_['id'])
+    template_name = get_template_name(events, template_definitions)
+    definition = template_definitions.get(template_name)
+
+    started_at = parse_timestamp(events[0]['timestamp'])
+    ended_at = parse_timestamp(events[-1]['timestamp'])
+    status, error, cause = "RUNNING", None, None
+
+    def get_ms(timestamp: float, since: float = started_at) -> float:
+        # Timestamps are to the millisecond, less the float error of epoch seconds
+        return round((timestamp - since) * 1000, 3)
+
+    # The state visit each event belongs to, by event id
+    visits: List[Dict[str, Any]] = []
+    visits_by_event_id: Dict[int, Dict[str, Any]] = {}
+    events_by_id = {event['id']: event for event in events}
+
+    def get_enclosing_visit(visit: Optional[Dict[str, Any]], state_type: str) -> Optional[Dict[str, Any]]:
+        while visit is not None and visit['stateType'] != state_type:
+            visit = visit['parent']
+        return visit
+
+    for event in events:
+        event_type = event['type']
+        event_details = get_event_details(event)
+        timestamp = parse_timestamp(event['timestamp'])
+        previous_event = events_by_id.get(event.get("previousEventId"))
+        previous_visit = visits_by_event_id.get(event.get("previousEventId"))
+
+        if event_type.endswith(STATE_ENTERED_SUFFIX):
+            state_name = event_details['name']
+            if previous_event is not None and previous_event['type'] in BRANCH_STARTED_EVENT_TYPES:
+                # The first state of a Parallel branch or Map iteration
+                parent = previous_visit
+                if previous_event['type'] == "MapIterationStarted":
+                    branch_index = previous_event['mapIterationStartedEventDetails'].get("index", 0)
+                else:
+                    branch_index = get_branch_index(
+                        find_state(definition, parent['stateName']), state_name, parent['branchCount']
+                    )
+                parent['branchCount'] += 1
+                path_prefix = f"{parent['path']}/{branch_index}/"
+            elif previous_visit is not None:
+                # The next state in the same block
+                parent = previous_visit['parent']
+                path_prefix = previous_visit['pathPrefix']
+                # A caught task goes on to the next state of its catcher
+                if previous_visit['end'] is None:
+                    previous_visit['end'] = timestamp
+                    previous_visit['status'] = "CAUGHT"
+            else:
+                parent, path_prefix = None, ""
+            visit = {
+                "path": f"{path_prefix}{state_name}",
+                "pathPrefix": path_prefix,
+                "parent": parent,
+                "stateName": state_name,
+                "stateType": event_type[:-len(STATE_ENTERED_SUFFIX)],
+                "resource": None,
+                "start": timestamp,
+                "end": None,
+                "attempts": 0,
+                "taskStarted": None,
+                "taskSubmitted": None,
+                "isLambda": False,
+                "callbackWait": None,
+                "status": "SUCCEEDED",
+                "branchCount": 0,
+                "invocations": [],
+            }
+            visits.append(visit)
+            visits_by_event_id[event['id']] = visit
+
+        elif event_type.endswith(STATE_EXITED_SUFFIX):
+            visit = previous_visit
+            if visit is None or visit['stateName'] != event_details.get("name") or visit['end'] is not None:
+                # i.e. a Parallel exited after the last state of its slowest branch
+                visit = next(
+                    filter(
+                        lambda visit_iter_: visit_iter_['stateName'] == event_details.get("name") and visit_iter_['end'] is None,
+                        reversed(visits)
+                    ),
+                    None
+                )
+            if visit is not None:
+                visit['end'] = timestamp
+                # The state failed, but was caught
+                if visit['status'] == "FAILED":
+                    visit['status'] = "CAUGHT"
+                visits_by_event_id[event['id']] = visit
+
+        elif event_type.startswith(("Parallel", "Map")):
+            # Parallel / Map state events, after the last state of a branch or iteration
+            visit = get_enclosing_visit(previous_visit, "Map" if event_type.startswith("Map") else "Parallel")
+            if visit is not None:
+                if event_type.endswith(("StateFailed", "StateAborted")):
+                    visit['status'] = "FAILED"
+                visits_by_event_id[event['id']] = visit
+
+        elif event_type.startswith(TASK_EVENT_PREFIXES) and previous_visit is not None:
+            visit = previous_visit
+            visits_by_event_id[event['id']] = visit
+            event_stage = event_type[len("Task"):] if event_type.startswith("Task") else event_type[len("LambdaFunction"):]
+            if event_stage == "Scheduled":
+                visit['attempts'] += 1
+                visit['resource'] = get_task_resource(event_details)
+                visit['isLambda'] = event_type.startswith("LambdaFunction") or event_details.get("resourceType") == "lambda"
+                visit['taskStarted'], visit['taskSubmitted'] = None, None
+            elif event_stage == "Started":
+                visit['taskStarted'] = timestamp
+            elif event_stage == "Submitted":
+                visit['taskSubmitted'] = timestamp
+            elif event_stage in ("Succeeded", "Failed", "TimedOut"):
+                visit['status'] = "SUCCEEDED" if event_stage == "Succeeded" else "FAILED"
+                if visit['taskSubmitted'] is not None and str(visit['resource']).endswith(WAIT_FOR_TASK_TOKEN_SUFFIX):
+                    visit['callbackWait'] = get_ms(timestamp, since=visit['taskSubmitted'])
+                if visit['taskStarted'] is not None and visit['isLambda']:
+                    visit['invocations'].append((visit['taskStarted'], timestamp))
+
+        elif event_type in EXECUTION_END_EVENT_TYPES:
+            status = EXECUTION_END_EVENT_TYPES[event_type]
+            error, cause = event_details.get("error"), event_details.get("cause")
+            ended_at = timestamp
+
+        elif previous_visit is not None:
+            visits_by_event_id[event['id']] = previous_visit
+
+    return ExecutionProfile(
+        execution_name=execution_name,
+        template_name=template_name,
+        status=status,
+        error=error,
+        cause=cause,
+        started_at=started_at,
+        duration_ms=get_ms(ended_at),
+        visits=list(map(
+            lambda visit_iter_: StateVisit(
+                path=visit_iter_['path'],
+                state_name=visit_iter_['stateName'],
+                state_type=visit_iter_['stateType'],
+                resource=visit_iter_['resource'],
+                start_ms=get_ms(visit_iter_['start']),
+                # States that never exited ran until the execution ended
+                end_ms=get_ms(visit_iter_['end'] if visit_iter_['end'] is not None else ended_at),
+                attempts=visit_iter_['attempts'],
+                callback_wait_ms=visit_iter_['callbackWait'],
+                likely_cold_start=False,
+                status=visit_iter_['status'] if visit_iter_['end'] is not None or status == "RUNNING" else "FAILED",
+                invocations=visit_iter_['invocations'],
+            ),
+            visits
+        )),
+    )
+
+
+def get_cold_start_flags(
+        invocations: List[Tuple[str, float, float]], idle_minutes: float = DEFAULT_COLD_START_IDLE_MINUTES
+) -> List[bool]:
+    """
+    Replay (function name, start, end) invocations in time order, per function, over a pool of execution environments.
+    An invocation that finds no environment free (and idle for less than idle_minutes) starts a new one, a cold start.
+    Returns whether each invocation was a cold start
+    """
+    cold_start_flags = [False] * len(invocations)
+    # The time each environment of each function was last freed
+    environments_free_at_by_function: Dict[str, List[float]] = {}
+    for invocation_index in sorted(
+        range(len(invocations)), key=lambda index_iter_: invocations[index_iter_][1:]
+    ):
+        function_name, invocation_start, invocation_end = invocations[invocation_index]
+        environments_free_at = environments_free_at_by_function.setdefault(function_name, [])
+        warm_environments = list(filter(
+            lambda free_at_iter_: free_at_iter_ <= invocation_start and invocation_start - free_at_iter_ <= idle_minutes * 60,
+            environments_free_at
+        ))
+        if warm_environments:
+            # The most recently used environment
+            environments_free_at.remove(max(warm_environments))
+        else:
+            cold_start_flags[invocation_index] = True
+        environments_free_at.append(invocation_end)
+
+    return cold_start_flags
+
+
+def mark_likely_cold_starts(
+        execution_profiles: List[ExecutionProfile], idle_minutes: float = DEFAULT_COLD_START_IDLE_MINUTES
+) -> List[ExecutionProfile]:
+    """
+    Mark the visits whose lambda invocations were likely cold starts (see get_cold_start_flags)
+    """
+    invocations: List[Tuple[str, float, float]] = []
+    invocation_visits: List[Tuple[int, int]] = []
+    for profile_index, execution_profile in enumerate(execution_profiles):
+        for visit_index, visit in enumerate(execution_profile.visits):
+            for invocation_start, invocation_end in visit.invocations:
+                invocations.append((visit.resource, invocation_start, invocation_end))
+                invocation_visits.append((profile_index, visit_index))
+
+    cold_start_visits = set(map(
+        lambda invocation_iter_: invocation_iter_[1],
+        filter(
+            lambda invocation_iter_: invocation_iter_[0],
+            zip(get_cold_start_flags(invocations, idle_minutes=idle_minutes), invocation_visits)
+        )
+    ))
+
+    return list(map(
+        lambda profile_iter_: profile_iter_[1]._replace(visits=list(map(
+            lambda visit_iter_: visit_iter_[1]._replace(
+                likely_cold_start=(profile_iter_[0], visit_iter_[0]) in cold_start_visits
+            ),
+            enumerate(profile_iter_[1].visits)
+        ))),
+        enumerate(execution_profiles)
+    ))
+
+
+def get_branch_durations(execution_profile: ExecutionProfile) -> Dict[str, Dict[str, float]]:
+    """
+    The duration of each branch of each Parallel (or iteration of a Map), from the start of the Parallel
+
+    Output:
+      {"Get Inputs": {"0": 5230.0, "1": 12.5}, ...}
+    """
+    branch_durations: Dict[str, Dict[str, float]] = {}
+    for parallel_visit in filter(lambda visit_iter_: visit_iter_.state_type in ("Parallel", "Map"), execution_profile.visits):
+        branch_ends: Dict[str, float] = {}
+        for visit in execution_profile.visits:
+            if not visit.path.startswith(f"{parallel_visit.path}/"):
+                continue
+            branch_index = visit.path[len(parallel_visit.path) + 1:].split("/", 1)[0]
+            branch_ends[branch_index] = max(branch_ends.get(branch_index, visit.end_ms), visit.end_ms)
+        branch_durations[parallel_visit.path] = {
+            branch_index: branch_end - parallel_visit.start_ms
+            for branch_index, branch_end in branch_ends.items()
+        }
+    return branch_durations
+
+
+def get_rounded_distribution(values: Iterable[float]) -> Dict[str, float]:
+    return {
+        key: round(value, 1)
+        for key, value in get_distribution(values).items()
+    }
+
+
+def get_profile_report(execution_profiles: List[ExecutionProfile]) -> Dict[str, Any]:
+    """
+    Aggregate the execution profiles by template
+
+    Output:
+      {
+        "executions": 40,
+        "templates": {
+          "populate_draft_data": {
+            "executions": 40,
+            "statuses": {"SUCCEEDED": 39, "FAILED": 1},
+            "durationMs": {"p50": ..., "p90": ..., "p95": ..., "p99": ..., "max": ..., "mean": ...},
+            "states": {
+              "Get Inputs/0/Wait for fastq": {
+                "visits": 40, "durationMs": {...}, "retries": 0, "retriedVisits": 0,
+                "likelyColdStarts": 0, "callbackWaitMs": {...}
+              }
+            },
+            "branches": {"Get Inputs": {"0": {"durationMs": {...}, "slowest": 38}, "1": {...}}}
+          }
+        }
+      }
+    """
+    templates = {}
+    for template_name in sorted(set(map(lambda profile_iter_: profile_iter_.template_name, execution_profiles))):
+        template_profiles = list(filter(lambda profile_iter_: profile_iter_.template_name == template_name, execution_profiles))
+        visits = [visit_iter_ for profile_iter_ in template_profiles for visit_iter_ in profile_iter_.visits]
+
+        # In the order the states usually start in
+        mean_start_ms: Dict[str, List[float]] = {}
+        for visit in visits:
+            mean_start_ms.setdefault(visit.path, []).append(visit.start_ms)
+        paths = sorted(mean_start_ms, key=lambda path_iter_: sum(mean_start_ms[path_iter_]) / len(mean_start_ms[path_iter_]))
+
+        states = {}
+        for path in paths:
+            path_visits = list(filter(lambda visit_iter_: visit_iter_.path == path, visits))
+            callback_waits = list(filter(
+                lambda callback_wait_iter_: callback_wait_iter_ is not None,
+                map(lambda visit_iter_: visit_iter_.callback_wait_ms, path_visits)
+            ))
+            states[path] = {
+                "stateType": path_visits[0].state_type,
+                "resource": path_visits[0].resource,
+                "visits": len(path_visits),
+                "durationMs": get_rounded_distribution(map(lambda visit_iter_: visit_iter_.duration_ms, path_visits)),
+                "retries": sum(map(lambda visit_iter_: max(visit_iter_.attempts - 1, 0), path_visits)),
+                "retriedVisits": len(list(filter(lambda visit_iter_: visit_iter_.attempts > 1, path_visits))),
+                "likelyColdStarts": len(list(filter(lambda visit_iter_: visit_iter_.likely_cold_start, path_visits))),
+                **({"callbackWaitMs": get_rounded_distribution(callback_waits)} if callback_waits else {}),
+            }
+
+        branch_durations_list = list(map(get_branch_durations, template_profiles))
+        branches = {}
+        for parallel_path in sorted(set(key_iter_ for durations_iter_ in branch_durations_list for key_iter_ in durations_iter_)):
+            branch_indexes = sorted(
+                set(
+                    branch_index_iter_
+                    for durations_iter_ in branch_durations_list
+                    for branch_index_iter_ in durations_iter_.get(parallel_path, {})
+                ),
+                key=lambda branch_index_iter_: int(branch_index_iter_) if branch_index_iter_.isdigit() else branch_index_iter_
+            )
+            slowest_branches = Counter(
+                max(durations_iter_[parallel_path], key=durations_iter_[parallel_path].get)
+                for durations_iter_ in branch_durations_list
+                if durations_iter_.get(parallel_path)
+            )
+            branches[parallel_path] = {
+                branch_index: {
+                    "durationMs": get_rounded_distribution(
+                        durations_iter_[parallel_path][branch_index]
+                        for durations_iter_ in branch_durations_list
+                        if branch_index in durations_iter_.get(parallel_path, {})
+                    ),
+                    "slowest": slowest_branches[branch_index],
+                }
+                for branch_index in branch_indexes
+            }
+
+        templates[template_name] = {
+            "executions": len(template_profiles),
+            "statuses": dict(Counter(map(lambda profile_iter_: profile_iter_.status, template_profiles)).most_common()),
+            "durationMs": get_rounded_distribution(map(lambda profile_iter_: profile_iter_.duration_ms, template_profiles)),
+            "states": states,
+            "branches": branches,
+        }
+
+    return {
+        "executions": len(execution_profiles),
+        "templates": templates,
+    }
+
+
+def format_report_text(
+        report: Dict[str, Any], execution_profiles: List[ExecutionProfile], timeline_count: int = 0
+) -> str:
+    """
+    The percentile tables of each template, then the timelines of its slowest executions
+    """
+    columns = ["p50", "p90", "p99", "max"]
+    path_width = max(
+        [len(path_iter_) for template_iter_ in report['templates'].values() for path_iter_ in template_iter_['states']] + [20]
+    )
+
+    def format_distribution(distribution: Dict[str, float]) -> str:
+        return "".join(map(lambda column_iter_: f"{distribution[column_iter_]:>10.1f}", columns))
+
+    lines = [f"Executions: {report['executions']}"]
+    for template_name, template_report in report['templates'].items():
+        lines.extend([
+            "",
+            f"{template_name}: {template_report['executions']} executions "
+            f"({', '.join(map(lambda kv_iter_: f'{kv_iter_[1]} {kv_iter_[0]}', template_report['statuses'].items()))})",
+            "",
+            f"{'ms':<{path_width}}  {'visits':>6}" + "".join(map(lambda column_iter_: f"{column_iter_:>10}", columns))
+            + f"{'retries':>9}{'cold':>6}{'callback p50':>14}",
+            f"{'execution':<{path_width}}  {template_report['executions']:>6}" + format_distribution(template_report['durationMs']),
+        ])
+        for path, state_report in template_report['states'].items():
+            callback_wait = state_report.get("callbackWaitMs")
+            lines.append(
+                f"{path:<{path_width}}  {state_report['visits']:>6}" + format_distribution(state_report['durationMs'])
+                + f"{state_report['retries']:>9}{state_report['likelyColdStarts']:>6}"
+                + (f"{callback_wait['p50']:>14.1f}" if callback_wait is not None else f"{'':>14}")
+            )
+
+        if template_report['branches']:
+            lines.extend([
+                "",
+                f"{'branch ms':<{path_width}}  {'slowest':>6}" + "".join(map(lambda column_iter_: f"{column_iter_:>10}", columns)),
+            ])
+            for parallel_path, branch_reports in template_report['branches'].items():
+                for branch_index, branch_report in branch_reports.items():
+                    lines.append(
+                        f"{f'{parallel_path}/{branch_index}':<{path_width}}  {branch_report['slowest']:>6}"
+                        + format_distribution(branch_report['durationMs'])
+                    )
+
+        slowest_profiles = sorted(
+            filter(lambda profile_iter_: profile_iter_.template_name == template_name, execution_profiles),
+            key=lambda profile_iter_: profile_iter_.duration_ms,
+            reverse=True
+        )[:timeline_count]
+        for execution_profile in slowest_profiles:
+            lines.extend([
+                "",
+                execution_profile.execution_name,
+                format_timeline_text(execution_profile.to_execution_result()),
+            ])
+
+    return "\n".join(lines)
+
+
+def get_trace_events(execution_profiles: List[ExecutionProfile]) -> Dict[str, Any]:
+    """
+    The state visits as Chrome trace events (a process per execution, a thread per branch),
+    to browse as a flame chart in Perfetto or chrome://tracing
+    """
+    trace_events = []
+    for process_id, execution_profile in enumerate(execution_profiles, start=1):
+        trace_events.append({
+            "name": "process_name", "ph": "M", "pid": process_id,
+            "args": {"name": f"{execution_profile.template_name} {execution_profile.execution_name}"},
+        })
+        thread_ids: Dict[str, int] = {}
+        for visit in execution_profile.visits:
+            branch_path = visit.path[:-len(visit.state_name)].rstrip("/") or "main"
+            if branch_path not in thread_ids:
+                thread_ids[branch_path] = len(thread_ids) + 1
+                trace_events.append({
+                    "name": "thread_name", "ph": "M", "pid": process_id, "tid": thread_ids[branch_path],
+                    "args": {"name": branch_path},
+                })
+            trace_events.append({
+                "name": visit.state_name,
+                "cat": visit.state_type,
+                "ph": "X",
+                "pid": process_id,
+                "tid": thread_ids[branch_path],
+                "ts": round((execution_profile.started_at * 1000 + visit.start_ms) * 1000),
+                "dur": round(visit.duration_ms * 1000),
+                "args": {
+                    "resource": visit.resource,
+                    "attempts": visit.attempts,
+                    "status": visit.status,
+                    "callbackWaitMs": visit.callback_wait_ms,
+                    "likelyColdStart": visit.likely_cold_start,
+                },
+            })
+    return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+
+def get_execution_profiles(
+        history_paths: Iterable[Union[str, Path]], idle_minutes: float = DEFAULT_COLD_START_IDLE_MINUTES
+) -> List[ExecutionProfile]:
+    template_definitions = get_template_definitions()
+    return mark_likely_cold_starts(
+        list(map(
+            lambda history_iter_: parse_execution_history(history_iter_[0], history_iter_[1], template_definitions),
+            sum(map(read_execution_histories, history_paths), [])
+        )),
+        idle_minutes=idle_minutes
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Profile exported step functions execution histories")
+    parser.add_argument("history_paths", nargs="+", help="get-execution-history JSON files, or directories of them")
+    parser.add_argument("--template-name", help="Only report the executions of this template")
+    parser.add_argument("--format", choices=["json", "text", "trace"], default="text")
+    parser.add_argument("--timelines", type=int, default=0, help="Print the timelines of the N slowest executions (text)")
+    parser.add_argument("--cold-start-idle-minutes", type=float, default=DEFAULT_COLD_START_IDLE_MINUTES)
+    args = parser.parse_args()
+
+    profiled_executions = list(filter(
+        lambda profile_iter_: args.template_name is None or profile_iter_.template_name == args.template_name,
+        get_execution_profiles(args.history_paths, idle_minutes=args.cold_start_idle_minutes)
+    ))
+
+    if args.format == "trace":
+        print(json.dumps(get_trace_events(profiled_executions)))
+    elif args.format == "text":
+        print(format_report_text(get_profile_report(profiled_executions), profiled_executions, args.timelines))
+    else:
+        print(json.dumps(
+            {
+                **get_profile_report(profiled_executions),
+                "executionProfiles": list(map(lambda profile_iter_: profile_iter_.to_dict(), profiled_executions)),
+            },
+            indent=4
+        ))
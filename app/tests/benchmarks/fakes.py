@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+
+"""
+In-process fakes for the remote dependencies of the handlers.
+
+  * orcabus_api_tools (fastq, metadata, workflow and filemanager), wrapica, icav2_tools and libica
+    are registered as fake modules in sys.modules, so the handlers import them instead of the real packages
+  * boto3.client returns fake SSM, Schemas, S3, Step Functions, EventBridge and SQS clients,
+    objects put to S3 (i.e. by the claim check store) are kept by the fake backend, an in-memory S3 stand-in,
+    as are the step functions executions started (i.e. by the draft population scheduler)
+    the events put (i.e. by the ICAv2 WES event batch lambda)
+    and the messages sent to SQS (i.e. by the comment outbox)
+
+Every fake call is answered from a SyntheticDataset, counted by endpoint,
+and (optionally) delayed by a fixed injected latency to stand in for the network round trip.
+
+    dataset = SyntheticDataset(library_count=4, lane_count=8)
+    backend = FakeBackend(dataset, latency_seconds=0.02)
+    set_fake_backend(backend)
+    install_fake_modules()
+"""
+
+# Standard imports
+import io
+import json
+import sys
+from collections import Counter
+from hashlib import md5
+from pathlib import Path
+from threading import Lock
+from time import sleep
+from types import ModuleType, SimpleNamespace
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Globals
+WORKFLOW_NAME = "dragen-wgts-rna"
+WORKFLOW_VERSION = "4.4.4"
+PAYLOAD_VERSION = "2025.08.05"
+PORTAL_RUN_ID = "20261019abcd0001"
+PROJECT_ID = "ea19a3f5-6c43-4e3a-8bbe-3c1e2c6f1a2b"
+PIPELINE_ID = "5d7f8c4b-8a51-4f3c-9b7e-1a2b3c4d5e6f"
+PROJECT_PREFIX = "s3://pipeline-cache-bucket/byob-icav2/project/"
+REF_DATA_BUCKET = "reference-data-bucket"
+TEST_DATA_BUCKET = "test-data-bucket"
+CLAIM_CHECK_BUCKET = "claim-check-bucket"
+INSTRUMENT_RUN_ID = "261019_A01052_0300_AHFHWJDSXF"
+
+SCHEMA_PATH = (
+    Path(__file__).parent.parent.parent /
+    "event-schemas" / "complete-data-draft" / PAYLOAD_VERSION / "complete-data-draft-schema.json"
+)
+
+# The functions of the remote dependencies that the handlers import, all answered by the fake backend
+FAKE_MODULE_FUNCTIONS: Dict[str, Tuple[str, ...]] = {
+    "orcabus_api_tools.fastq": (
+        "get_fastq_by_rgid", "get_fastqs_in_instrument_run_id", "get_fastq_sets", "get_fastq_list_rows_in_fastq_set",
+        "to_fastq_list_row", "validate_ntsm_internal", "validate_ntsm_external",
+    ),
+    "orcabus_api_tools.metadata": ("get_library_from_library_id", "get_library_from_library_orcabus_id"),
+    "orcabus_api_tools.workflow": (
+        "get_workflow_run", "get_workflow_run_from_portal_run_id",
+        "get_latest_payload_from_workflow_run", "add_comment_to_workflow_run",
+    ),
+    "orcabus_api_tools.filemanager": ("get_s3_object_id_from_s3_uri", "list_files_recursively"),
+    "wrapica.project": ("get_project_obj_from_project_id",),
+    "wrapica.project_pipelines": ("get_project_pipeline_obj",),
+    "wrapica.storage_configuration": ("get_s3_key_prefix_by_project_id",),
+    "wrapica.project_data": ("coerce_data_id_or_uri_to_project_data_obj", "get_project_data_obj_by_id"),
+}
+
+_FAKE_BACKEND: Optional["FakeBackend"] = None
+
+
+class FakeApiException(Exception):
+    """
+    Stands in for libica.openapi.v3.ApiException
+    """
+
+
+class FakeS3FileNotFoundError(Exception):
+    """
+    Stands in for orcabus_api_tools.filemanager.errors.S3FileNotFoundError
+    """
+
+
+class SyntheticDataset:
+    """
+    A workflow run over library_count libraries, each sequenced over lane_count lanes,
+    with the library, fastq, workflow run, payload and file records the handlers look up
+    """
+
+    def __init__(self, library_count: int = 1, lane_count: int = 1):
+        self.library_count = library_count
+        self.lane_count = lane_count
+
+        self.libraries: List[Dict[str, Any]] = list(map(
+            lambda library_index_iter_: self._make_library(library_index_iter_),
+            range(library_count)
+        ))
+        self.libraries_by_id = {library['libraryId']: library for library in self.libraries}
+        self.libraries_by_orcabus_id = {library['orcabusId']: library for library in self.libraries}
+
+        self.fastqs: List[Dict[str, Any]] = [
+            self._make_fastq(library, lane)
+            for library in self.libraries
+            for lane in range(1, lane_count + 1)
+        ]
+        self.fastqs_by_rgid = {self.get_rgid(fastq): fastq for fastq in self.fastqs}
+        self.fastqs_by_id = {fastq['id']: fastq for fastq in self.fastqs}
+
+        self.workflow_run = {
+            "orcabusId": "wfr.01K7XBENCHMARKWORKFLOWRUN",
+            "portalRunId": PORTAL_RUN_ID,
+            "workflow": {
+                "orcabusId": "wfl.01K7XBENCHMARKWORKFLOWAA",
+                "workflowName": WORKFLOW_NAME,
+                "workflowVersion": WORKFLOW_VERSION,
+            },
+            "workflowRunName": f"umccr--automated--{WORKFLOW_NAME}--4-4-4--{PORTAL_RUN_ID}",
+            "libraries": list(map(
+                lambda library_iter_: {"libraryId": library_iter_['libraryId'], "orcabusId": library_iter_['orcabusId']},
+                self.libraries
+            )),
+        }
+
+    @staticmethod
+    def get_rgid(fastq: Dict[str, Any]) -> str:
+        return ".".join([fastq['index'], str(fastq['lane']), fastq['instrumentRunId']])
+
+    @staticmethod
+    def _make_library(library_index: int) -> Dict[str, Any]:
+        return {
+            "orcabusId": f"lib.01K7XBENCHMARKLIBRARY{library_index:04d}",
+            "libraryId": f"L26{library_index:05d}",
+            "phenotype": "tumor",
+            "workflow": "clinical",
+            "type": "WTS",
+            "assay": "NebRNA",
+            "subject": {
+                "orcabusId": f"sbj.01K7XBENCHMARKSUBJECT{library_index:04d}",
+                "subjectId": f"SBJ{library_index:05d}",
+                "individualSet": [
+                    {
+                        "orcabusId": f"idv.01K7XBENCHMARKINDIVID{library_index:04d}",
+                        "individualId": f"SBJ{library_index:05d}",
+                        "source": "lab",
+                    }
+                ],
+            },
+        }
+
+    @staticmethod
+    def _make_index(library_id: str) -> str:
+        """
+        A distinct (dual) index per library, i.e. L2600005 -> AAAAAAAC+AAAAAAAC
+        """
+        library_number = int(library_id[1:])
+        index = "".join(map(
+            lambda position_iter_: "ACGT"[(library_number >> (2 * position_iter_)) & 3],
+            reversed(range(8))
+        ))
+        return f"{index}+{index[::-1]}"
+
+    def _make_fastq(self, library: Dict[str, Any], lane: int) -> Dict[str, Any]:
+        fastq_prefix = (
+            f"s3://{TEST_DATA_BUCKET}/primary/{INSTRUMENT_RUN_ID}/{library['libraryId']}/"
+            f"{library['libraryId']}_S1_L{lane:03d}"
+        )
+        return {
+            "id": f"fqr.01K7X{library['libraryId']}L{lane:03d}",
+            "fastqSetId": f"fqs.01K7XBENCHMARK{library['libraryId']}",
+            "index": self._make_index(library['libraryId']),
+            "lane": lane,
+            "instrumentRunId": INSTRUMENT_RUN_ID,
+            "library": {"orcabusId": library['orcabusId'], "libraryId": library['libraryId']},
+            "readSet": {
+                "r1": {"s3Uri": f"{fastq_prefix}_R1_001.fastq.ora"},
+                "r2": {"s3Uri": f"{fastq_prefix}_R2_001.fastq.ora"},
+                "compressionFormat": "ORA",
+            },
+            "qc": {
+                "rawWgsCoverageEstimate": 12.5,
+                "duplicationFractionEstimate": 0.12,
+                "insertSizeEstimate": 310.0,
+            },
+        }
+
+    def get_fastq_list_row(self, fastq: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "rgid": self.get_rgid(fastq),
+            "rglb": fastq['library']['libraryId'],
+            "rgsm": fastq['library']['libraryId'],
+            "lane": fastq['lane'],
+            "read1FileUri": fastq['readSet']['r1']['s3Uri'],
+            "read2FileUri": fastq['readSet']['r2']['s3Uri'],
+        }
+
+    def get_rgid_list(self) -> List[str]:
+        return list(self.fastqs_by_rgid.keys())
+
+    def get_payload_data(self) -> Dict[str, Any]:
+        """
+        A complete (schema valid) draft payload for the workflow run
+        """
+        library = self.libraries[0]
+        return {
+            "inputs": {
+                "sampleName": library['libraryId'],
+                "sequenceData": {
+                    "fastqListRows": list(map(self.get_fastq_list_row, self.fastqs)),
+                },
+                "reference": {
+                    "name": "hg38",
+                    "structure": "linear",
+                    "tarball": f"s3://{REF_DATA_BUCKET}/dragen-hash-tables/v11-r5/hg38-rna.tar.gz",
+                },
+                "annotationFile": f"s3://{REF_DATA_BUCKET}/gencode/hg38/v44/gencode.v44.annotation.gtf",
+                "oraReference": f"s3://{REF_DATA_BUCKET}/dragen-ora/v2/ora_reference_v2.tar.gz",
+                "alignmentOptions": {},
+                "snvVariantCallerOptions": {"enableVcfCompression": True, "enableVcfIndexing": True},
+                "geneFusionDetectionOptions": {"enableRnaGeneFusion": True},
+                "geneExpressionQuantificationOptions": {"enableRnaQuantification": True},
+                "spliceVariantCallerOptions": {"enableRnaSpliceVariant": True},
+            },
+            "tags": {
+                "libraryId": library['libraryId'],
+                "fastqRgidList": self.get_rgid_list(),
+                "subjectId": library['subject']['subjectId'],
+                "individualId": library['subject']['individualSet'][0]['individualId'],
+            },
+            "engineParameters": {
+                "projectId": PROJECT_ID,
+                "pipelineId": PIPELINE_ID,
+                "outputUri": f"{PROJECT_PREFIX}analysis/{WORKFLOW_NAME}/{PORTAL_RUN_ID}/",
+                "logsUri": f"{PROJECT_PREFIX}logs/{WORKFLOW_NAME}/{PORTAL_RUN_ID}/",
+            },
+        }
+
+    def get_payload(self) -> Dict[str, Any]:
+        return {
+            "orcabusId": "pld.01K7XBENCHMARKPAYLOADAAAA",
+            "version": PAYLOAD_VERSION,
+            "data": self.get_payload_data(),
+        }
+
+    def get_draft_detail(self) -> Dict[str, Any]:
+        """
+        The DRAFT workflow run state change for the workflow run, without a payload
+        """
+        return {
+            "orcabusId": self.workflow_run['orcabusId'],
+            "portalRunId": self.workflow_run['portalRunId'],
+            "workflowRunName": self.workflow_run['workflowRunName'],
+            "workflow": {
+                "orcabusId": self.workflow_run['workflow']['orcabusId'],
+                "name": self.workflow_run['workflow']['workflowName'],
+                "version": self.workflow_run['workflow']['workflowVersion'],
+            },
+            "status": "DRAFT",
+            "timestamp": "2026-10-19T00:00:00Z",
+            "libraries": self.workflow_run['libraries'],
+        }
+
+    def get_library_draft_detail(self, library_index: int) -> Dict[str, Any]:
+        """
+        The DRAFT workflow run state change for a single library, with the readsets (fastq ids and rgids) of the library
+        """
+        library = self.workflow_run['libraries'][library_index]
+        return {
+            **self.get_draft_detail(),
+            "libraries": [{
+                **library,
+                "readsets": [
+                    {"orcabusId": fastq['id'], "rgid": self.get_rgid(fastq)}
+                    for fastq in self.fastqs
+                    if fastq['library']['libraryId'] == library['libraryId']
+                ],
+            }],
+        }
+
+    def get_ssm_parameters(self) -> Dict[str, str]:
+        return {
+            "/orcabus/workflows/dragen-wgts-rna/schemas/registry": "orcabus.workflows.dragen-wgts-rna",
+            f"/orcabus/workflows/dragen-wgts-rna/schemas/complete-data-draft/{PAYLOAD_VERSION}": json.dumps({
+                "schemaName": "orcabus.workflows.dragen-wgts-rna@CompleteDataDraft",
+                "schemaVersion": "1",
+            }),
+            "/orcabus/workflows/dragen-wgts-rna/default-project-id": PROJECT_ID,
+            "/orcabus/workflows/dragen-wgts-rna/output-prefix": f"{PROJECT_PREFIX}analysis/{WORKFLOW_NAME}/",
+            "/orcabus/workflows/dragen-wgts-rna/logs-prefix": f"{PROJECT_PREFIX}logs/{WORKFLOW_NAME}/",
+            f"/orcabus/workflows/dragen-wgts-rna/pipeline-ids-by-workflow-version/{WORKFLOW_VERSION}": PIPELINE_ID,
+            f"/orcabus/workflows/dragen-wgts-rna/default-inputs-by-workflow-version/{WORKFLOW_VERSION}": json.dumps({
+                "alignmentOptions": {},
+                "geneFusionDetectionOptions": {"enableRnaGeneFusion": True},
+            }),
+            "/orcabus/workflows/dragen-wgts-rna/reference-catalog": json.dumps(self.get_reference_catalog()),
+        }
+
+    @staticmethod
+    def get_reference_catalog() -> Dict[str, Any]:
+        return {
+            "catalogVersion": "2026.10.19",
+            "references": [
+                {"name": "hg38", "structure": "linear", "tarball": f"s3://{REF_DATA_BUCKET}/dragen-hash-tables/v11-r5/hg38-rna.tar.gz"},
+            ],
+            "oraReferences": [
+                {"oraVersion": "2.7.0", "oraReference": f"s3://{REF_DATA_BUCKET}/dragen-ora/v2/ora_reference_v2.tar.gz"},
+            ],
+            "annotations": [
+                {"annotationVersion": "44", "annotationFile": f"s3://{REF_DATA_BUCKET}/gencode/hg38/v44/gencode.v44.annotation.gtf"},
+            ],
+            "workflowDefaults": {
+                WORKFLOW_VERSION: {"genome": "hg38", "structure": "linear", "annotationVersion": "44", "oraVersion": "2.7.0"},
+            },
+        }
+
+    @staticmethod
+    def get_error_log(line_count: int = 400) -> bytes:
+        return "\n".join([
+            *map(lambda line_index_iter_: f"INFO step {line_index_iter_} complete", range(line_count)),
+            "Traceback (most recent call last):",
+            '  File "/opt/dragen/run.py", line 42, in <module>',
+            "RuntimeError: DRAGEN exited with code 1",
+        ]).encode()
+
+
+class FakeBackend:
+    """
+    Answers the fake remote calls from a synthetic dataset,
+    counts them by endpoint and delays each one by the injected latency
+    """
+
+    def __init__(self, dataset: SyntheticDataset, latency_seconds: float = 0.0):
+        self.dataset = dataset
+        self.latency_seconds = latency_seconds
+        self.calls: Counter = Counter()
+        self.comments: List[Dict[str, str]] = []
+        self.ssm_parameters = dataset.get_ssm_parameters()
+        # (bucket, key) -> body, of the objects put to S3
+        self.s3_objects: Dict[Tuple[str, str], bytes] = {}
+        # Execution name -> the start execution request, of the step functions executions started
+        self.executions: Dict[str, Dict[str, str]] = {}
+        # The entries of the events put on the event bus
+        self.events: List[Dict[str, str]] = []
+        # Queue url -> message bodies sent, and receipt handle -> visibility timeout of the messages delayed
+        self.sqs_messages: Dict[str, List[str]] = {}
+        self.sqs_visibility_timeouts: Dict[str, int] = {}
+        # Handlers may call from several threads (i.e. populate_draft_data_async)
+        self._lock = Lock()
+
+    def call(self, endpoint: str) -> None:
+        with self._lock:
+            self.calls[endpoint] += 1
+        if self.latency_seconds > 0:
+            sleep(self.latency_seconds)
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+        self.comments.clear()
+
+    # Fastq manager
+    def get_fastq_by_rgid(self, rgid: str) -> Dict[str, Any]:
+        self.call("fastq.get_fastq_by_rgid")
+        return self.dataset.fastqs_by_rgid[rgid]
+
+    def get_fastqs_in_instrument_run_id(self, instrument_run_id: str) -> List[Dict[str, Any]]:
+        self.call("fastq.get_fastqs_in_instrument_run_id")
+        return list(filter(lambda fastq_iter_: fastq_iter_['instrumentRunId'] == instrument_run_id, self.dataset.fastqs))
+
+    def get_fastq_sets(self, library: str, currentFastqSet: bool = True, **kwargs) -> List[Dict[str, Any]]:
+        self.call("fastq.get_fastq_sets")
+        return [{"id": f"fqs.01K7XBENCHMARK{library}", "library": self.dataset.libraries_by_id[library]}]
+
+    def get_fastq_list_rows_in_fastq_set(self, fastq_set_id: str) -> List[Dict[str, Any]]:
+        self.call("fastq.get_fastq_list_rows_in_fastq_set")
+        return list(filter(lambda fastq_iter_: fastq_iter_['fastqSetId'] == fastq_set_id, self.dataset.fastqs))
+
+    def to_fastq_list_row(self, fastq_id: str) -> Dict[str, Any]:
+        self.call("fastq.to_fastq_list_row")
+        return self.dataset.get_fastq_list_row(self.dataset.fastqs_by_id[fastq_id])
+
+    def validate_ntsm_internal(self, fastq_set_id: str) -> bool:
+        self.call("fastq.validate_ntsm_internal")
+        return True
+
+    def validate_ntsm_external(self, fastq_set_id_a: str, fastq_set_id_b: str) -> bool:
+        self.call("fastq.validate_ntsm_external")
+        return True
+
+    # Metadata manager
+    def get_library_from_library_id(self, library_id: str) -> Dict[str, Any]:
+        self.call("metadata.get_library_from_library_id")
+        return self.dataset.libraries_by_id[library_id]
+
+    def get_library_from_library_orcabus_id(self, library_orcabus_id: str) -> Dict[str, Any]:
+        self.call("metadata.get_library_from_library_orcabus_id")
+        return self.dataset.libraries_by_orcabus_id[library_orcabus_id]
+
+    # Workflow manager
+    def get_workflow_run(self, workflow_run_orcabus_id: str) -> Dict[str, Any]:
+        self.call("workflow.get_workflow_run")
+        return json.loads(json.dumps(self.dataset.workflow_run))
+
+    def get_workflow_run_from_portal_run_id(self, portal_run_id: str) -> Dict[str, Any]:
+        self.call("workflow.get_workflow_run_from_portal_run_id")
+        return json.loads(json.dumps(self.dataset.workflow_run))
+
+    def get_latest_payload_from_workflow_run(self, workflow_run_orcabus_id: str) -> Dict[str, Any]:
+        self.call("workflow.get_latest_payload_from_workflow_run")
+        return self.dataset.get_payload()
+
+    def add_comment_to_workflow_run(self, workflow_run_orcabus_id: str, comment: str, author: str) -> Dict[str, Any]:
+        self.call("workflow.add_comment_to_workflow_run")
+        self.comments.append({"workflowRunId": workflow_run_orcabus_id, "comment": comment, "author": author})
+        return {"orcabusId": f"cmt.{len(self.comments):026d}"}
+
+    # File manager
+    def get_s3_object_id_from_s3_uri(self, s3_uri: str) -> str:
+        self.call("filemanager.get_s3_object_id_from_s3_uri")
+        return f"s3o.{abs(hash(s3_uri)):026d}"
+
+    def list_files_recursively(self, bucket: str, key: str) -> List[Dict[str, Any]]:
+        self.call("filemanager.list_files_recursively")
+        return [{"bucket": bucket, "key": f"{key}file.txt"}]
+
+    # ICAv2 (wrapica)
+    def get_project_obj_from_project_id(self, project_id: str) -> Dict[str, Any]:
+        self.call("icav2.get_project_obj_from_project_id")
+        if project_id != PROJECT_ID:
+            raise FakeApiException(f"Project {project_id} not found")
+        return {"id": project_id}
+
+    def get_project_pipeline_obj(self, project_id: str, pipeline_id: str) -> Dict[str, Any]:
+        self.call("icav2.get_project_pipeline_obj")
+        return {"pipeline": {"id": pipeline_id}}
+
+    def get_s3_key_prefix_by_project_id(self, project_id: str) -> str:
+        self.call("icav2.get_s3_key_prefix_by_project_id")
+        return PROJECT_PREFIX
+
+    def coerce_data_id_or_uri_to_project_data_obj(self, data_id_or_uri: str, **kwargs) -> Any:
+        self.call("icav2.coerce_data_id_or_uri_to_project_data_obj")
+        return FakeProjectData(data_id_or_uri)
+
+    def get_project_data_obj_by_id(self, project_id: str, data_id: str) -> Any:
+        self.call("icav2.get_project_data_obj_by_id")
+        return FakeProjectData(data_id)
+
+    # AWS
+    def get_parameters(self, Names: List[str], **kwargs) -> Dict[str, Any]:
+        self.call("ssm.GetParameters")
+        return {
+            "Parameters": [
+                {"Name": name, "Value": self.ssm_parameters[name]}
+                for name in Names
+                if name in self.ssm_parameters
+            ],
+            "InvalidParameters": list(filter(lambda name_iter_: name_iter_ not in self.ssm_parameters, Names)),
+        }
+
+    def get_parameters_by_path(self, Path: str, **kwargs) -> Iterator[Dict[str, Any]]:
+        self.call("ssm.GetParametersByPath")
+        yield {
+            "Parameters": [
+                {"Name": name, "Value": value}
+                for name, value in self.ssm_parameters.items()
+                if name.startswith(Path)
+            ]
+        }
+
+    def describe_schema(self, RegistryName: str, SchemaName: str, **kwargs) -> Dict[str, Any]:
+        self.call("schemas.DescribeSchema")
+        return {"Content": SCHEMA_PATH.read_text(), "SchemaName": SchemaName}
+
+    def put_object(self, Bucket: str, Key: str, Body: bytes, IfNoneMatch: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        from botocore.exceptions import ClientError
+
+        self.call("s3.PutObject")
+        with self._lock:
+            if IfNoneMatch == "*" and (Bucket, Key) in self.s3_objects:
+                raise ClientError(
+                    {"Error": {"Code": "PreconditionFailed", "Message": "At least one of the pre-conditions failed"}},
+                    "PutObject"
+                )
+            self.s3_objects[(Bucket, Key)] = Body
+        return {"ETag": f'"{md5(Body).hexdigest()}"'}
+
+    def get_object(self, Bucket: str, Key: str, Range: Optional[str] = None, **kwargs) -> Dict[str, Any]:
+        self.call("s3.GetObject")
+        # Any object that was not put is a WES error log
+        body = self.s3_objects.get((Bucket, Key)) or self.dataset.get_error_log()
+        content_range = f"bytes 0-{len(body) - 1}/{len(body)}"
+        if Range is not None and Range.startswith("bytes=-"):
+            suffix_length = int(Range[len("bytes=-"):])
+            if suffix_length < len(body):
+                content_range = f"bytes {len(body) - suffix_length}-{len(body) - 1}/{len(body)}"
+                body = body[-suffix_length:]
+        return {"Body": FakeStreamingBody(body), "ContentRange": content_range}
+
+
+    def start_execution(self, stateMachineArn: str, name: str, input: str, **kwargs) -> Dict[str, Any]:
+        from botocore.exceptions import ClientError
+
+        self.call("stepfunctions.StartExecution")
+        execution_arn = f"{stateMachineArn.replace(':stateMachine:', ':execution:')}:{name}"
+        with self._lock:
+            # Starting an execution again with the same name and input is idempotent
+            if name in self.executions and self.executions[name]['input'] != input:
+                raise ClientError(
+                    {"Error": {"Code": "ExecutionAlreadyExists", "Message": f"Execution already exists: '{execution_arn}'"}},
+                    "StartExecution"
+                )
+            self.executions[name] = {"stateMachineArn": stateMachineArn, "name": name, "input": input}
+        return {"executionArn": execution_arn, "startDate": "2026-10-19T00:00:00Z"}
+
+    # EventBridge
+    def put_events(self, Entries: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        if len(Entries) > 10:
+            raise ValueError(f"At most 10 entries per putEvents call, got {len(Entries)}")
+        self.call("events.PutEvents")
+        with self._lock:
+            self.events.extend(Entries)
+        return {
+            "FailedEntryCount": 0,
+            "Entries": [{"EventId": f"event-{len(self.events) - len(Entries) + index}"} for index in range(len(Entries))],
+        }
+
+    # SQS
+    def send_message_batch(self, QueueUrl: str, Entries: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        if len(Entries) > 10:
+            raise ValueError(f"At most 10 entries per sendMessageBatch call, got {len(Entries)}")
+        self.call("sqs.SendMessageBatch")
+        with self._lock:
+            self.sqs_messages.setdefault(QueueUrl, []).extend(map(lambda entry_iter_: entry_iter_['MessageBody'], Entries))
+        return {"Successful": [{"Id": entry_iter_['Id']} for entry_iter_ in Entries], "Failed": []}
+
+    def change_message_visibility(self, QueueUrl: str, ReceiptHandle: str, VisibilityTimeout: int, **kwargs) -> Dict:
+        self.call("sqs.ChangeMessageVisibility")
+        with self._lock:
+            self.sqs_visibility_timeouts[ReceiptHandle] = VisibilityTimeout
+        return {}
+
+
+class FakeProjectData:
+    """
+    Just enough of a wrapica ProjectData object, the handlers only read project_data_obj.data.id
+    """
+
+    def __init__(self, data_id: str):
+        self.data = SimpleNamespace(id=data_id)
+
+
+class FakeStreamingBody:
+    def __init__(self, body: bytes):
+        self._body = io.BytesIO(body)
+
+    def iter_chunks(self, chunk_size: int = 1024) -> Iterator[bytes]:
+        while True:
+            chunk = self._body.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+
+    def read(self) -> bytes:
+        return self._body.read()
+
+
+class FakePaginator:
+    def __init__(self, paginate_func: Callable[..., Iterator[Dict[str, Any]]]):
+        self.paginate = paginate_func
+
+
+class FakeBotoClient:
+    """
+    A boto3 client for the SSM, Schemas, S3, Step Functions, EventBridge or SQS service, backed by the fake backend
+    """
+
+    OPERATIONS = {
+        "ssm": ("get_parameters",),
+        "schemas": ("describe_schema",),
+        "s3": ("get_object", "put_object"),
+        "stepfunctions": ("start_execution",),
+        "events": ("put_events",),
+        "sqs": ("send_message_batch", "change_message_visibility"),
+    }
+
+    def __init__(self, service_name: str):
+        if service_name not in self.OPERATIONS:
+            raise ValueError(f"No fake boto3 client for {service_name}")
+        self.service_name = service_name
+        for operation in self.OPERATIONS[service_name]:
+            setattr(self, operation, delegate_to_backend(operation))
+
+    def get_paginator(self, operation_name: str) -> FakePaginator:
+        if self.service_name != "ssm" or operation_name != "get_parameters_by_path":
+            raise ValueError(f"No fake paginator for {self.service_name} {operation_name}")
+        return FakePaginator(delegate_to_backend("get_parameters_by_path"))
+
+
+def get_fake_backend() -> "FakeBackend":
+    if _FAKE_BACKEND is None:
+        raise RuntimeError("No fake backend set, call set_fake_backend first")
+    return _FAKE_BACKEND
+
+
+def set_fake_backend(fake_backend: Optional[FakeBackend]) -> None:
+    global _FAKE_BACKEND
+    _FAKE_BACKEND = fake_backend
+
+
+def delegate_to_backend(method_name: str) -> Callable:
+    """
+    A module level function that calls the backend that is current at call time,
+    so the handlers (which import these functions by name once) always see the latest backend
+    """
+    def fake_func(*args, **kwargs):
+        return getattr(get_fake_backend(), method_name)(*args, **kwargs)
+
+    fake_func.__name__ = method_name
+    return fake_func
+
+
+def _make_module(module_name: str, attributes: Dict[str, Any]) -> ModuleType:
+    module = ModuleType(module_name)
+    module.__dict__.update(attributes)
+    # Mark as a package so that submodules can be imported from it
+    module.__path__ = []
+    return module
+
+
+def install_fake_modules() -> None:
+    """
+    Register the fake orcabus_api_tools, wrapica, icav2_tools and libica modules,
+    these shadow the real packages (if installed) for the rest of the session
+    """
+    fake_modules: Dict[str, Dict[str, Any]] = {
+        "orcabus_api_tools": {},
+        "orcabus_api_tools.fastq.models": {"Fastq": Dict[str, Any]},
+        "orcabus_api_tools.metadata.models": {"LibraryBase": Dict[str, Any]},
+        "orcabus_api_tools.filemanager.errors": {"S3FileNotFoundError": FakeS3FileNotFoundError},
+        "wrapica": {},
+        "icav2_tools": {"set_icav2_env_vars": lambda: None},
+        "libica": {},
+        "libica.openapi": {},
+        "libica.openapi.v3": {"ApiException": FakeApiException},
+    }
+    for module_name, function_names in FAKE_MODULE_FUNCTIONS.items():
+        fake_modules[module_name] = {
+            function_name: delegate_to_backend(function_name)
+            for function_name in function_names
+        }
+    for module_name, attributes in fake_modules.items():
+        sys.modules[module_name] = _make_module(module_name, attributes)
+
+
+def fake_boto3_client(service_name: str, *args, **kwargs) -> FakeBotoClient:
+    return FakeBotoClient(service_name)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+
+"""
+Runs the lambda handlers in-process, against the fakes in fakes.py:
+sets up the lambda environment, imports the handlers and resets their container state.
+
+Shared by the benchmarks (conftest.py), the local step functions executor (local_sfn.py)
+and the record / replay harness (cassettes.py).
+"""
+
+# Standard imports
+import importlib.util
+import json
+import re
+import sys
+from os import environ
+from pathlib import Path
+from time import time
+from types import ModuleType
+from typing import Any, Dict, List
+
+# Local imports
+from fakes import (
+    CLAIM_CHECK_BUCKET,
+    PAYLOAD_VERSION,
+    PORTAL_RUN_ID,
+    REF_DATA_BUCKET,
+    TEST_DATA_BUCKET,
+    WORKFLOW_NAME,
+    WORKFLOW_VERSION,
+    SyntheticDataset,
+    install_fake_modules,
+)
+
+# Globals
+APP_DIR = Path(__file__).parent.parent.parent
+LAMBDAS_DIR = APP_DIR / "lambdas"
+LAYER_DIR = APP_DIR / "layers" / "dragen_wgts_rna_tools_layer"
+LAMBDA_INTERFACES_PATH = APP_DIR.parent / "infrastructure" / "stage" / "lambda" / "interfaces.ts"
+LAMBDA_NAME_LIST_REGEX = re.compile(r"export const lambdaNameList: LambdaNameList\[] = \[(.*?)];", re.DOTALL)
+
+HANDLER_EXECUTION_ARN = "arn:aws:states:ap-southeast-2:123456789012:execution:populateDraftDataSfn:benchmark"
+POPULATE_DRAFT_DATA_STATE_MACHINE_ARN = (
+    "arn:aws:states:ap-southeast-2:123456789012:stateMachine:orca-dragen-wgts-rna--populateDraftData"
+)
+
+# The environment of the deployed lambdas (see infrastructure/stage/lambda)
+BENCHMARK_ENVIRONMENT = {
+    "AWS_DEFAULT_REGION": "ap-southeast-2",
+    "WORKFLOW_NAME": WORKFLOW_NAME,
+    "TEST_DATA_BUCKET_NAME": TEST_DATA_BUCKET,
+    "REF_DATA_BUCKET_NAME": REF_DATA_BUCKET,
+    "DEFAULT_PAYLOAD_VERSION": PAYLOAD_VERSION,
+    "SSM_REGISTRY_NAME": "/orcabus/workflows/dragen-wgts-rna/schemas/registry",
+    "SSM_SCHEMA_PATH": "/orcabus/workflows/dragen-wgts-rna/schemas/complete-data-draft",
+    "DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME": "/orcabus/workflows/dragen-wgts-rna/default-project-id",
+    "DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME": "/orcabus/workflows/dragen-wgts-rna/output-prefix",
+    "DEFAULT_LOGS_URI_PREFIX_SSM_PARAMETER_NAME": "/orcabus/workflows/dragen-wgts-rna/logs-prefix",
+    "PIPELINE_ID_SSM_PARAMETER_PREFIX": "/orcabus/workflows/dragen-wgts-rna/pipeline-ids-by-workflow-version",
+    "DEFAULT_INPUTS_SSM_PARAMETER_PREFIX": "/orcabus/workflows/dragen-wgts-rna/default-inputs-by-workflow-version",
+    "REFERENCE_CATALOG_SSM_PARAMETER_NAME": "/orcabus/workflows/dragen-wgts-rna/reference-catalog",
+    "REPOSITORY_GITHUB_URL": "https://github.com/OrcaBus/service-dragen-wgts-rna-pipeline-manager",
+    "POPULATE_DRAFT_DATA_STATE_MACHINE_ARN": POPULATE_DRAFT_DATA_STATE_MACHINE_ARN,
+    "EVENT_BUS_NAME": "OrcaBusMain",
+    "EVENT_SOURCE": "orcabus.dragenwgtsrna",
+    "WORKFLOW_RUN_UPDATE_DETAIL_TYPE": "WorkflowRunUpdate",
+    # Use the in-memory state store and write comments directly
+    "STATE_STORE_BACKEND": "local",
+    # Large payload sections are offloaded to the fake S3 (see fakes.FakeBackend.put_object)
+    "CLAIM_CHECK_BUCKET_NAME": CLAIM_CHECK_BUCKET,
+    # The fakes do not go over HTTP, remote calls are counted by the fake backend instead
+    "DEPENDENCY_INSTRUMENTATION": "off",
+}
+
+_HANDLER_MODULES: Dict[str, ModuleType] = {}
+
+
+def set_up_lambda_environment() -> None:
+    """
+    Set the lambda environment variables, put the layer on the path and install the fake modules
+    """
+    environ.update(BENCHMARK_ENVIRONMENT)
+    if str(LAYER_DIR) not in sys.path:
+        sys.path.insert(0, str(LAYER_DIR))
+    install_fake_modules()
+
+
+def load_handler_module(lambda_name: str) -> ModuleType:
+    """
+    Import app/lambdas/<lambda_name>_py/<lambda_name>.py (once per session, like a warm container)
+    """
+    if lambda_name not in _HANDLER_MODULES:
+        module_path = LAMBDAS_DIR / f"{lambda_name}_py" / f"{lambda_name}.py"
+        spec = importlib.util.spec_from_file_location(lambda_name, module_path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[lambda_name] = module
+        spec.loader.exec_module(module)
+        _HANDLER_MODULES[lambda_name] = module
+    return _HANDLER_MODULES[lambda_name]
+
+
+def reset_container_state(module: ModuleType) -> None:
+    """
+    Start each invocation from a cold container: drop the state store, caches and resolvers,
+    so every invocation makes the same remote calls
+    """
+    from dragen_wgts_rna_tools.claim_check import set_claim_check_store
+    from dragen_wgts_rna_tools.instrument_run_fastqs import set_instrument_run_fastq_cache
+    from dragen_wgts_rna_tools.library_cache import LibraryCache
+    from dragen_wgts_rna_tools.ssm_parameters import set_ssm_parameter_cache
+    from dragen_wgts_rna_tools.state_store import LocalStateStore, set_state_store
+    from dragen_wgts_rna_tools.status_ledger import RunStatusLedger
+    from dragen_wgts_rna_tools.workflow_run_resolver import set_workflow_run_resolver
+    from dragen_wgts_rna_tools import reference_catalog
+
+    set_state_store(LocalStateStore())
+    set_claim_check_store(None)
+    set_instrument_run_fastq_cache(None)
+    set_ssm_parameter_cache(None)
+    set_workflow_run_resolver(None)
+    reference_catalog.set_reference_catalog(None)
+
+    # Module level caches of the handler
+    for attribute_name, attribute_value in list(vars(module).items()):
+        if isinstance(attribute_value, LibraryCache):
+            setattr(module, attribute_name, LibraryCache())
+        elif isinstance(attribute_value, RunStatusLedger):
+            setattr(module, attribute_name, RunStatusLedger())
+
+    # The handlers the lambda router routes to share its container
+    if hasattr(module, "get_routed_lambda_names"):
+        for routed_lambda_name in filter(lambda name_iter_: name_iter_ in sys.modules, module.get_routed_lambda_names()):
+            reset_container_state(sys.modules[routed_lambda_name])
+
+
+def get_lambda_name_list() -> List[str]:
+    """
+    The lambdas deployed by CDK (lambdaNameList in infrastructure/stage/lambda/interfaces.ts), as snake case
+    """
+    lambda_name_list = LAMBDA_NAME_LIST_REGEX.search(LAMBDA_INTERFACES_PATH.read_text()).group(1)
+    return list(map(
+        lambda camel_case_iter_: re.sub(r"(?<!^)(?=[A-Z])", "_", camel_case_iter_).lower(),
+        re.findall(r"'(\w+)'", lambda_name_list)
+    ))
+
+
+def get_icav2_wes_event(portal_run_id: str, status: str, end_time: str = "2026-10-19T02:00:00Z") -> Dict[str, Any]:
+    """
+    An ICAv2 WES state change event detail for a run of the synthetic dataset
+    """
+    return {
+        "id": "iwa.01K7XBENCHMARKANALYSIS00",
+        "name": f"umccr--automated--dragen-wgts-rna--4-4-4--{portal_run_id}",
+        "status": status,
+        "submissionTime": "2026-10-19T00:00:00Z",
+        "startTime": "2026-10-19T00:05:00Z",
+        **({"endTime": end_time} if status in ("SUCCEEDED", "FAILED", "ABORTED") else {}),
+        "icav2AnalysisId": "b1a2c3d4-0000-4000-8000-000000000001",
+        "tags": {"portalRunId": portal_run_id},
+        **(
+            {"errorType": "RuntimeError", "errorMessageUri": f"s3://{TEST_DATA_BUCKET}/logs/{portal_run_id}/error.log"}
+            if status == "FAILED" else {}
+        ),
+    }
+
+
+def get_default_handler_event(lambda_name: str, dataset: SyntheticDataset) -> Dict[str, Any]:
+    """
+    An event for each handler, built from the synthetic dataset (as the state machines would send it)
+    """
+    library = dataset.libraries[0]
+    workflow_run = dataset.workflow_run
+    rgid_list_event = {"fastqRgidList": dataset.get_rgid_list()}
+    default_handler_events = {
+        # Populate draft data
+        "get_libraries": lambda: {"libraries": workflow_run['libraries'][:1]},
+        "get_metadata_tags": lambda: {"libraryId": library['libraryId']},
+        "invalidate_library_cache": lambda: {
+            "action": "UPDATE", "model": "LIBRARY", "data": {"libraryId": library['libraryId']}
+        },
+        "get_fastq_rgids_from_library_id": lambda: {"libraryId": library['libraryId']},
+        "get_fastq_id_list_from_rgid_list": lambda: rgid_list_event,
+        "get_fastq_list_rows_from_rgid_list": lambda: rgid_list_event,
+        "get_qc_summary_stats_from_rgid_list": lambda: rgid_list_event,
+        "check_ntsm_internal": lambda: rgid_list_event,
+        "resolve_default_parameters": lambda: {"workflowVersion": WORKFLOW_VERSION, "portalRunId": PORTAL_RUN_ID},
+        "compare_payload": lambda: {"oldPayload": dataset.get_payload(), "newPayload": dataset.get_payload()},
+        "generate_wru_event_object_with_merged_data": lambda: {
+            "portalRunId": PORTAL_RUN_ID, "libraries": workflow_run['libraries'], "payload": dataset.get_payload(),
+        },
+        "get_missing_schema_fields": lambda: {"payloadVersion": PAYLOAD_VERSION, "data": dataset.get_payload_data()},
+        "populate_draft_data_async": lambda: {
+            "phase": "prepare",
+            "detail": {**dataset.get_draft_detail(), "libraries": workflow_run['libraries'][:1]},
+            "executionArn": HANDLER_EXECUTION_ARN,
+        },
+        "add_populate_draft_comment": lambda: {
+            "workflowRunId": workflow_run['orcabusId'],
+            "commentType": "no_change_missing_fields",
+            "missingFields": ["inputs.annotationFile"],
+            "executionArn": HANDLER_EXECUTION_ARN,
+        },
+        # Validate draft data
+        "validate_draft_complete_schema": lambda: {
+            "payloadVersion": PAYLOAD_VERSION,
+            "data": dataset.get_payload_data(),
+            "workflowRunId": workflow_run['orcabusId'],
+            "addCommentOnError": False,
+        },
+        "post_schema_validation": lambda: {
+            "workflowRunId": workflow_run['orcabusId'],
+            "executionArn": HANDLER_EXECUTION_ARN,
+            "data": dataset.get_payload_data(),
+        },
+        # Ready to ICAv2 WES request
+        "convert_ready_event_inputs_to_icav2_wes_event_inputs": lambda: {"inputs": dataset.get_payload_data()['inputs']},
+        # ICAv2 WES events to workflow run updates
+        "convert_icav2_wes_event_to_wru_event": lambda: {
+            "icav2WesStateChangeEvent": get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED")
+        },
+        # The 'batched' ICAv2 WES event processing mode
+        "put_icav2_wes_wru_events": lambda: {
+            "Records": [
+                {
+                    "messageId": str(status_index),
+                    "receiptHandle": str(status_index),
+                    "body": json.dumps({
+                        "detail-type": "Icav2WesAnalysisStateChange",
+                        "detail": get_icav2_wes_event(PORTAL_RUN_ID, status),
+                    }),
+                    "attributes": {"ApproximateReceiveCount": "1"},
+                }
+                for status_index, status in enumerate(("RUNNING", "SUCCEEDED"))
+            ]
+        },
+        "add_wes_failure_comment": lambda: {
+            "errorType": "RuntimeError",
+            "errorMessageUri": f"s3://{TEST_DATA_BUCKET}/logs/{PORTAL_RUN_ID}/error.log",
+            "portalRunId": PORTAL_RUN_ID,
+            "executionArn": HANDLER_EXECUTION_ARN,
+        },
+        # Comment outbox
+        "drain_comment_outbox": lambda: {
+            "Records": [{
+                "messageId": "0",
+                "receiptHandle": "0",
+                "body": json.dumps({
+                    "workflowRunId": workflow_run['orcabusId'],
+                    "author": "dragen-wgts-rna-populate-draft-data-service",
+                    "executionArn": HANDLER_EXECUTION_ARN,
+                    "messages": ["Draft populated"],
+                    "enqueuedAt": time(),
+                }),
+                "attributes": {"ApproximateReceiveCount": "1"},
+            }]
+        },
+        # Draft population scheduling (the 'byInstrumentRun' draft population scheduling mode)
+        "schedule_draft_population": lambda: {
+            "Records": [{
+                "messageId": "0",
+                "receiptHandle": "0",
+                "body": json.dumps({
+                    "id": "7bf73129-1428-4cd3-a780-95db273d1602",
+                    "detail-type": "WorkflowRunStateChange",
+                    "detail": dataset.get_library_draft_detail(0),
+                }),
+                "attributes": {"ApproximateReceiveCount": "1"},
+            }]
+        },
+        # The router (the 'router' lambda deployment mode), routed by the action field
+        "lambda_router": lambda: {
+            "action": "get_metadata_tags",
+            "event": {"libraryId": library['libraryId']},
+        },
+    }
+    if lambda_name not in default_handler_events:
+        raise ValueError(f"No default event for {lambda_name}")
+    return default_handler_events[lambda_name]()
@@ -0,0 +1,788 @@
+#!/usr/bin/env python3
+
+"""
+Local Step Functions executor.
+
+Interprets the JSONata ASL templates in app/step-functions-templates in-process:
+  * ${__..._lambda_function_arn__} placeholders are substituted with local lambda ARNs,
+    and lambda:invoke tasks call the python handlers directly (see harness.py)
+  * events:putEvents tasks are recorded, not sent, and .waitForTaskToken tasks are answered
+    by a task token responder (the fastq sync service replies straight away by default)
+  * aws-sdk integrations (i.e. ssm:getParameter) are answered by stubs
+  * Parallel branches (and Map iterations) run concurrently, in threads
+
+Supports the Pass, Task, Choice, Parallel, Map, Wait, Succeed and Fail states,
+with Arguments / Output / Assign, Retry and Catch. Retry and Wait delays are scaled by time_scale
+(0 by default, so they are recorded but not slept).
+
+Each execution returns a per-state timeline (start, duration and attempts of every state,
+including the states inside Parallel branches), i.e. to profile the end-to-end latency of populate_draft_data
+offline and compare restructurings of the templates:
+
+    python3 local_sfn.py populate_draft_data --library-count 4 --lane-count 8 --latency-ms 20 --format text
+"""
+
+# Standard imports
+import json
+import random
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from time import monotonic, sleep
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from uuid import uuid4
+
+# Local imports
+from fakes import PAYLOAD_VERSION, FakeBackend, SyntheticDataset
+
+# Globals
+STEP_FUNCTIONS_TEMPLATES_DIR = Path(__file__).parent.parent.parent / "step-functions-templates"
+TEMPLATE_SUFFIX = "_sfn_template.asl.json"
+
+LOCAL_ACCOUNT_ID = "123456789012"
+LOCAL_REGION = "ap-southeast-2"
+
+PLACEHOLDER_REGEX = re.compile(r"\$\{(__\w+?__)}")
+LAMBDA_ARN_PLACEHOLDER_REGEX = re.compile(r"^__(\w+)_lambda_function_arn__$")
+
+LAMBDA_INVOKE_RESOURCE = "arn:aws:states:::lambda:invoke"
+PUT_EVENTS_RESOURCE = "arn:aws:states:::events:putEvents"
+WAIT_FOR_TASK_TOKEN_SUFFIX = ".waitForTaskToken"
+AWS_SDK_RESOURCE_PREFIX = "arn:aws:states:::aws-sdk:"
+
+# The substitutions made by the stateless stack (see infrastructure/stage/step-functions/index.ts)
+DEFAULT_SUBSTITUTIONS = {
+    "__event_bus_name__": "OrcaBusMain",
+    "__workflow_run_state_change_event_detail_type__": "WorkflowRunStateChange",
+    "__workflow_run_update_event_detail_type__": "WorkflowRunUpdate",
+    "__default_payload_version__": PAYLOAD_VERSION,
+    "__icav2_wes_request_detail_type__": "Icav2WesRequest",
+    "__fastq_sync_detail_type__": "FastqSync",
+    "__stack_source__": "orcabus.dragenwgtsrna",
+    "__draft_event_status__": "DRAFT",
+    "__ready_event_status__": "READY",
+    "__pipeline_cache_uri__": "s3://pipeline-cache-bucket/byob-icav2/",
+    "__pipeline_cache_bucket__": "pipeline-cache-bucket",
+    "__pipeline_cache_prefix__": "byob-icav2/",
+}
+
+DEFAULT_RETRY_INTERVAL_SECONDS = 1
+DEFAULT_RETRY_MAX_ATTEMPTS = 3
+DEFAULT_RETRY_BACKOFF_RATE = 2.0
+
+_COMPILED_EXPRESSIONS = threading.local()
+
+
+class StatesError(Exception):
+    """
+    An ASL error, i.e. States.TaskFailed or the error type raised by a lambda
+    """
+
+    def __init__(self, error: str, cause: str = ""):
+        super().__init__(f"{error}: {cause}")
+        self.error = error
+        self.cause = cause
+
+
+class StateTiming(NamedTuple):
+    # i.e. 'Get tags/1/Get subject and individual id tags' for a state in the second branch of 'Get tags'
+    path: str
+    state_name: str
+    state_type: str
+    # The lambda name, the integration (i.e. 'events:putEvents.waitForTaskToken') or None
+    resource: Optional[str]
+    start_ms: float
+    end_ms: float
+    attempts: int
+    # Retry and Wait delays, slept for time_scale times as long
+    simulated_delay_seconds: float
+    status: str
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "stateName": self.state_name,
+            "stateType": self.state_type,
+            "resource": self.resource,
+            "startMs": round(self.start_ms, 3),
+            "endMs": round(self.end_ms, 3),
+            "durationMs": round(self.duration_ms, 3),
+            "attempts": self.attempts,
+            "simulatedDelaySeconds": self.simulated_delay_seconds,
+            "status": self.status,
+        }
+
+
+class ExecutionResult(NamedTuple):
+    status: str
+    output: Any
+    error: Optional[str]
+    cause: Optional[str]
+    duration_ms: float
+    timeline: List[StateTiming]
+    # The entries of every events:putEvents task, in order
+    events: List[Dict[str, Any]]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "output": self.output,
+            "error": self.error,
+            "cause": self.cause,
+            "durationMs": round(self.duration_ms, 3),
+            "timeline": list(map(lambda timing_iter_: timing_iter_.to_dict(), self.timeline)),
+            "events": self.events,
+        }
+
+
+def get_local_lambda_arn(lambda_name: str) -> str:
+    return f"arn:aws:lambda:{LOCAL_REGION}:{LOCAL_ACCOUNT_ID}:function:{lambda_name}"
+
+
+def get_lambda_name_from_arn(function_arn: str) -> str:
+    """
+    arn:aws:lambda:ap-southeast-2:123456789012:function:get_libraries(:version) -> get_libraries
+    """
+    return function_arn.split(":function:", 1)[-1].split(":", 1)[0]
+
+
+def load_state_machine_definition(
+        template_name: str, substitutions: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Read a template (i.e. 'populate_draft_data'), substituting the placeholders like CDK does,
+    lambda ARN placeholders get the local ARN of the lambda of the same name
+    """
+    substitutions = {**DEFAULT_SUBSTITUTIONS, **(substitutions or {})}
+    template_path = STEP_FUNCTIONS_TEMPLATES_DIR / f"{template_name}{TEMPLATE_SUFFIX}"
+
+    def substitute(match: re.Match) -> str:
+        placeholder = match.group(1)
+        if placeholder in substitutions:
+            return substitutions[placeholder]
+        lambda_arn_match = LAMBDA_ARN_PLACEHOLDER_REGEX.match(placeholder)
+        if lambda_arn_match is not None:
+            return get_local_lambda_arn(lambda_arn_match.group(1))
+        raise ValueError(f"No substitution for {placeholder} in {template_path.name}")
+
+    return json.loads(PLACEHOLDER_REGEX.sub(substitute, template_path.read_text()))
+
+
+def get_template_names() -> List[str]:
+    return sorted(map(
+        lambda template_path_iter_: template_path_iter_.name[:-len(TEMPLATE_SUFFIX)],
+        STEP_FUNCTIONS_TEMPLATES_DIR.glob(f"*{TEMPLATE_SUFFIX}")
+    ))
+
+
+def get_lambda_names(definition: Dict[str, Any]) -> List[str]:
+    """
+    The lambdas invoked anywhere in a (substituted) definition
+    """
+    lambda_names = set()
+
+    def walk(obj: Any) -> None:
+        if isinstance(obj, dict):
+            if obj.get("Resource") == LAMBDA_INVOKE_RESOURCE:
+                lambda_names.add(get_lambda_name_from_arn(obj['Arguments']['FunctionName']))
+            list(map(walk, obj.values()))
+        elif isinstance(obj, list):
+            list(map(walk, obj))
+
+    walk(definition)
+    return sorted(lambda_names)
+
+
+def evaluate_jsonata(expression: str, bindings: Dict[str, Any]) -> Any:
+    # Compiled expressions are not shared between threads
+    import jsonata
+
+    if not hasattr(_COMPILED_EXPRESSIONS, "cache"):
+        _COMPILED_EXPRESSIONS.cache = {}
+    if expression not in _COMPILED_EXPRESSIONS.cache:
+        _COMPILED_EXPRESSIONS.cache[expression] = jsonata.Jsonata(expression)
+    try:
+        return _COMPILED_EXPRESSIONS.cache[expression].evaluate(None, bindings)
+    except Exception as e:
+        raise StatesError("States.QueryEvaluationError", f"{expression}: {e}")
+
+
+def evaluate_template(value: Any, bindings: Dict[str, Any]) -> Any:
+    """
+    Evaluate every '{% ... %}' string in a field (recursively for objects and arrays)
+    """
+    if isinstance(value, str) and value.startswith("{%") and value.endswith("%}"):
+        return evaluate_jsonata(value[2:-2].strip(), bindings)
+    if isinstance(value, dict):
+        return {key: evaluate_template(item, bindings) for key, item in value.items()}
+    if isinstance(value, list):
+        return list(map(lambda item_iter_: evaluate_template(item_iter_, bindings), value))
+    return value
+
+
+def to_json_value(value: Any) -> Any:
+    """
+    Round trip through JSON, as the value would be between states and lambdas
+    """
+    return json.loads(json.dumps(value))
+
+
+def is_error_matched(error_equals: List[str], error: str) -> bool:
+    if "States.ALL" in error_equals or error in error_equals:
+        return True
+    # States.TaskFailed matches any task failure except a timeout
+    return "States.TaskFailed" in error_equals and error != "States.Timeout"
+
+
+def get_default_sdk_integrations(ssm_parameters: Dict[str, str]) -> Dict[str, Callable[[Dict[str, Any]], Any]]:
+    """
+    Stubs for the SSM SDK integrations, answered from ssm_parameters
+    """
+    def get_parameter(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        if arguments['Name'] not in ssm_parameters:
+            raise StatesError("Ssm.ParameterNotFoundException", arguments['Name'])
+        return {"Parameter": {"Name": arguments['Name'], "Value": ssm_parameters[arguments['Name']]}}
+
+    def get_parameters(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "Parameters": [
+                {"Name": name, "Value": ssm_parameters[name]}
+                for name in arguments['Names']
+                if name in ssm_parameters
+            ],
+            "InvalidParameters": list(filter(lambda name_iter_: name_iter_ not in ssm_parameters, arguments['Names'])),
+        }
+
+    def get_parameters_by_path(arguments: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "Parameters": [
+                {"Name": name, "Value": value}
+                for name, value in ssm_parameters.items()
+                if name.startswith(arguments['Path'])
+            ]
+        }
+
+    return {
+        "ssm:getParameter": get_parameter,
+        "ssm:getParameters": get_parameters,
+        "ssm:getParametersByPath": get_parameters_by_path,
+    }
+
+
+def respond_to_task_token(state_name: str, arguments: Dict[str, Any]) -> Any:
+    """
+    The default task token responder, SendTaskSuccess with an empty output straight away
+    """
+    return {}
+
+
+class LocalExecution:
+    """
+    The state of a single execution, shared by its branches
+    """
+
+    def __init__(self, state_machine: "LocalStateMachine", execution_input: Any):
+        self.state_machine = state_machine
+        self.execution_id = (
+            f"arn:aws:states:{LOCAL_REGION}:{LOCAL_ACCOUNT_ID}:execution:"
+            f"{state_machine.name}:{uuid4()}"
+        )
+        self.start_time = datetime.now(timezone.utc)
+        self.execution_input = execution_input
+        self.started_at = monotonic()
+        self.lock = threading.Lock()
+        self.timeline: List[StateTiming] = []
+        self.events: List[Dict[str, Any]] = []
+
+    def get_elapsed_ms(self) -> float:
+        return (monotonic() - self.started_at) * 1000
+
+    def get_context(
+            self, state_name: str, entered_time: str, retry_count: int, task_token: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            **({"Task": {"Token": task_token}} if task_token is not None else {}),
+            "Execution": {
+                "Id": self.execution_id,
+                "Name": self.execution_id.rsplit(":", 1)[-1],
+                "StartTime": self.start_time.isoformat(timespec="milliseconds").replace("+00:00", "Z"),
+                "Input": self.execution_input,
+            },
+            "State": {"Name": state_name, "EnteredTime": entered_time, "RetryCount": retry_count},
+            "StateMachine": {
+                "Id": f"arn:aws:states:{LOCAL_REGION}:{LOCAL_ACCOUNT_ID}:stateMachine:{self.state_machine.name}",
+                "Name": self.state_machine.name,
+            },
+        }
+
+    def record(self, state_timing: StateTiming) -> None:
+        with self.lock:
+            self.timeline.append(state_timing)
+
+    def run_states(
+            self, states_definition: Dict[str, Any], state_input: Any, variables: Dict[str, Any], path_prefix: str
+    ) -> Any:
+        """
+        Run a StartAt / States block (the state machine, a Parallel branch or a Map item processor)
+        """
+        state_name = states_definition['StartAt']
+        while True:
+            state = states_definition['States'][state_name]
+            state_output, next_state_name = self.run_state(state_name, state, state_input, variables, path_prefix)
+            if next_state_name is None:
+                return state_output
+            state_name, state_input = next_state_name, state_output
+
+    def run_state(
+            self, state_name: str, state: Dict[str, Any], state_input: Any, variables: Dict[str, Any], path_prefix: str
+    ):
+        """
+        Run a single state, with its retries and catchers
+        :return: the state output and the next state name (None if the state ends its block)
+        """
+        path = f"{path_prefix}{state_name}"
+        start_ms = self.get_elapsed_ms()
+        entered_time = datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+        attempts = 0
+        simulated_delay_seconds = 0.0
+        retry_attempts = [0] * len(state.get("Retry", []))
+        status = "SUCCEEDED"
+
+        try:
+            while True:
+                attempts += 1
+                task_token = (
+                    str(uuid4()) if state.get("Resource", "").endswith(WAIT_FOR_TASK_TOKEN_SUFFIX) else None
+                )
+                bindings = {
+                    **variables,
+                    "states": {
+                        "input": state_input,
+                        "context": self.get_context(state_name, entered_time, attempts - 1, task_token),
+                    },
+                }
+                try:
+                    result, delay_seconds = self.run_state_type(state_name, state, state_input, bindings, path)
+                    simulated_delay_seconds += delay_seconds
+                    break
+                except StatesError as e:
+                    retry_delay_seconds = self.get_retry_delay_seconds(state, retry_attempts, e.error)
+                    if retry_delay_seconds is None:
+                        raise
+                    simulated_delay_seconds += retry_delay_seconds
+                    sleep(retry_delay_seconds * self.state_machine.time_scale)
+
+            return self.apply_output(state_name, state, state_input, result, bindings, variables)
+
+        except StatesError as e:
+            for catcher in state.get("Catch", []):
+                if not is_error_matched(catcher['ErrorEquals'], e.error):
+                    continue
+                status = "CAUGHT"
+                error_output = {"Error": e.error, "Cause": e.cause}
+                catcher_bindings = {**bindings, "states": {**bindings['states'], "errorOutput": error_output}}
+                variables.update(evaluate_template(catcher.get("Assign", {}), catcher_bindings))
+                return evaluate_template(catcher.get("Output", error_output), catcher_bindings), catcher['Next']
+            status = "FAILED"
+            raise
+
+        finally:
+            self.record(StateTiming(
+                path=path,
+                state_name=state_name,
+                state_type=state['Type'],
+                resource=self.get_resource_name(state),
+                start_ms=start_ms,
+                end_ms=self.get_elapsed_ms(),
+                attempts=attempts,
+                simulated_delay_seconds=simulated_delay_seconds,
+                status=status,
+            ))
+
+    @staticmethod
+    def get_resource_name(state: Dict[str, Any]) -> Optional[str]:
+        resource = state.get("Resource")
+        if resource is None:
+            return None
+        if resource == LAMBDA_INVOKE_RESOURCE:
+            return get_lambda_name_from_arn(state['Arguments']['FunctionName'])
+        return resource.split(":::", 1)[-1]
+
+    def get_retry_delay_seconds(self, state: Dict[str, Any], retry_attempts: List[int], error: str) -> Optional[float]:
+        """
+        The delay before the next attempt, from the first retrier that matches the error
+        (None if there is no retrier, or it has run out of attempts)
+        """
+        for retrier_index, retrier in enumerate(state.get("Retry", [])):
+            if not is_error_matched(retrier['ErrorEquals'], error):
+                continue
+            if retry_attempts[retrier_index] >= retrier.get("MaxAttempts", DEFAULT_RETRY_MAX_ATTEMPTS):
+                return None
+            delay_seconds = (
+                retrier.get("IntervalSeconds", DEFAULT_RETRY_INTERVAL_SECONDS) *
+                retrier.get("BackoffRate", DEFAULT_RETRY_BACKOFF_RATE) ** retry_attempts[retrier_index]
+            )
+            if "MaxDelaySeconds" in retrier:
+                delay_seconds = min(delay_seconds, retrier['MaxDelaySeconds'])
+            if retrier.get("JitterStrategy") == "FULL":
+                delay_seconds = random.uniform(0, delay_seconds)
+            retry_attempts[retrier_index] += 1
+            return delay_seconds
+        return None
+
+    def apply_output(
+            self,
+            state_name: str,
+            state: Dict[str, Any],
+            state_input: Any,
+            result: Any,
+            bindings: Dict[str, Any],
+            variables: Dict[str, Any],
+    ):
+        """
+        Evaluate Assign and Output (both see the variables from before the state) and pick the next state
+        """
+        state_type = state['Type']
+        next_state_name = state.get("Next")
+
+        if state_type == "Choice":
+            # result is the matched choice rule (or None for the default)
+            next_state_name = result['Next'] if result is not None else state.get("Default")
+            if next_state_name is None:
+                raise StatesError("States.NoChoiceMatched", f"No choice matched in {state_name}")
+            output_source = result if result is not None and "Output" in result else state
+            assign_sources = [state] + ([result] if result is not None else [])
+            result_bindings = bindings
+            default_output = state_input
+        else:
+            output_source = state
+            assign_sources = [state]
+            result_bindings = {**bindings, "states": {**bindings['states'], "result": result}}
+            default_output = state_input if state_type in ("Pass", "Succeed", "Wait") else result
+
+        assignments: Dict[str, Any] = {}
+        for assign_source in assign_sources:
+            assignments.update(evaluate_template(assign_source.get("Assign", {}), result_bindings))
+        state_output = (
+            to_json_value(evaluate_template(output_source['Output'], result_bindings))
+            if "Output" in output_source else default_output
+        )
+        variables.update(to_json_value(assignments))
+
+        if state_type in ("Succeed", "Fail") or state.get("End", False):
+            next_state_name = None
+        return state_output, next_state_name
+
+    def run_state_type(
+            self, state_name: str, state: Dict[str, Any], state_input: Any, bindings: Dict[str, Any], path: str
+    ):
+        """
+        :return: the state result (the matched choice rule for Choice states), and any simulated delay
+        """
+        state_type = state['Type']
+
+        if state_type in ("Pass", "Succeed"):
+            return None, 0.0
+
+        if state_type == "Fail":
+            raise StatesError(
+                evaluate_template(state.get("Error", "States.Fail"), bindings),
+                evaluate_template(state.get("Cause", ""), bindings),
+            )
+
+        if state_type == "Wait":
+            wait_seconds = float(evaluate_template(state.get("Seconds", 0), bindings))
+            sleep(wait_seconds * self.state_machine.time_scale)
+            return None, wait_seconds
+
+        if state_type == "Choice":
+            for choice_rule in state['Choices']:
+                if evaluate_template(choice_rule['Condition'], bindings) is True:
+                    return choice_rule, 0.0
+            return None, 0.0
+
+        arguments = to_json_value(evaluate_template(state.get("Arguments", {}), bindings))
+
+        if state_type == "Task":
+            return self.run_task(state_name, state['Resource'], arguments, bindings), 0.0
+
+        # Branches read the variables of the enclosing block, and their assignments stay in the branch
+        variables = {key: value for key, value in bindings.items() if key != "states"}
+
+        if state_type == "Parallel":
+            branch_input = arguments if "Arguments" in state else bindings['states']['input']
+            with ThreadPoolExecutor(max_workers=len(state['Branches'])) as executor:
+                return list(executor.map(
+                    lambda branch_iter_: self.run_states(
+                        branch_iter_[1], branch_input, dict(variables), f"{path}/{branch_iter_[0]}/"
+                    ),
+                    enumerate(state['Branches'])
+                )), 0.0
+
+        if state_type == "Map":
+            items = evaluate_template(state.get("Items", "{% $states.input %}"), bindings)
+            item_processor = state.get("ItemProcessor", state.get("Iterator"))
+
+            def run_item(item_index: int, item: Any) -> Any:
+                item_bindings = {
+                    **bindings,
+                    "states": {
+                        **bindings['states'],
+                        "context": {
+                            **bindings['states']['context'],
+                            "Map": {"Item": {"Index": item_index, "Value": item}},
+                        },
+                    },
+                }
+                item_input = evaluate_template(state['ItemSelector'], item_bindings) if "ItemSelector" in state else item
+                return self.run_states(item_processor, item_input, dict(variables), f"{path}/{item_index}/")
+
+            with ThreadPoolExecutor(max_workers=state.get("MaxConcurrency") or max(len(items), 1)) as executor:
+                return list(executor.map(lambda item_iter_: run_item(*item_iter_), enumerate(items))), 0.0
+
+        raise StatesError("States.Runtime", f"Unsupported state type {state_type} in {state_name}")
+
+    def run_task(self, state_name: str, resource: str, arguments: Dict[str, Any], bindings: Dict[str, Any]) -> Any:
+        state_machine = self.state_machine
+        wait_for_task_token = resource.endswith(WAIT_FOR_TASK_TOKEN_SUFFIX)
+        if wait_for_task_token:
+            resource = resource[:-len(WAIT_FOR_TASK_TOKEN_SUFFIX)]
+
+        if resource == LAMBDA_INVOKE_RESOURCE:
+            lambda_name = get_lambda_name_from_arn(arguments['FunctionName'])
+            if lambda_name not in state_machine.lambda_handlers:
+                raise StatesError("Lambda.ResourceNotFoundException", f"No local handler for {lambda_name}")
+            lambda_context = SimpleNamespace(
+                function_name=lambda_name,
+                aws_request_id=str(uuid4()),
+                get_remaining_time_in_millis=lambda: 900000,
+            )
+            try:
+                payload = state_machine.lambda_handlers[lambda_name](
+                    to_json_value(arguments.get("Payload", {})), lambda_context
+                )
+            except Exception as e:
+                raise StatesError(type(e).__name__, str(e))
+            result = {"StatusCode": 200, "ExecutedVersion": "$LATEST", "Payload": to_json_value(payload)}
+
+        elif resource == PUT_EVENTS_RESOURCE:
+            entries = list(map(
+                lambda entry_iter_: {
+                    **entry_iter_,
+                    # Detail is sent as a JSON string
+                    "Detail": entry_iter_['Detail'] if isinstance(entry_iter_['Detail'], str) else json.dumps(entry_iter_['Detail']),
+                },
+                arguments['Entries']
+            ))
+            with self.lock:
+                self.events.extend(entries)
+            result = {"Entries": list(map(lambda _: {"EventId": str(uuid4())}, entries)), "FailedEntryCount": 0}
+
+        elif resource.startswith(AWS_SDK_RESOURCE_PREFIX):
+            integration_name = resource[len(AWS_SDK_RESOURCE_PREFIX):]
+            if integration_name not in state_machine.sdk_integrations:
+                raise StatesError("States.Runtime", f"No stub for the {integration_name} SDK integration")
+            result = state_machine.sdk_integrations[integration_name](arguments)
+
+        else:
+            raise StatesError("States.Runtime", f"Unsupported resource {resource} in {state_name}")
+
+        if wait_for_task_token:
+            return to_json_value(state_machine.task_token_responder(state_name, arguments))
+        return result
+
+
+class LocalStateMachine:
+    """
+    A state machine definition, with the local handlers and stubs its tasks call
+    """
+
+    def __init__(
+            self,
+            name: str,
+            definition: Dict[str, Any],
+            lambda_handlers: Dict[str, Callable[[Dict[str, Any], Any], Any]],
+            sdk_integrations: Optional[Dict[str, Callable[[Dict[str, Any]], Any]]] = None,
+            task_token_responder: Callable[[str, Dict[str, Any]], Any] = respond_to_task_token,
+            time_scale: float = 0.0,
+    ):
+        if definition.get("QueryLanguage") != "JSONata":
+            raise ValueError(f"{name}: only JSONata state machines are supported")
+        self.name = name
+        self.definition = definition
+        self.lambda_handlers = lambda_handlers
+        self.sdk_integrations = sdk_integrations or {}
+        self.task_token_responder = task_token_responder
+        self.time_scale = time_scale
+
+    def start_execution(self, execution_input: Any) -> ExecutionResult:
+        execution = LocalExecution(self, to_json_value(execution_input))
+        try:
+            output = execution.run_states(self.definition, execution.execution_input, {}, "")
+            status, error, cause = "SUCCEEDED", None, None
+        except StatesError as e:
+            output, status, error, cause = None, "FAILED", e.error, e.cause
+        return ExecutionResult(
+            status=status,
+            output=output,
+            error=error,
+            cause=cause,
+            duration_ms=execution.get_elapsed_ms(),
+            timeline=sorted(execution.timeline, key=lambda timing_iter_: timing_iter_.start_ms),
+            events=execution.events,
+        )
+
+
+def format_timeline_text(execution_result: ExecutionResult, width: int = 40) -> str:
+    """
+    The timeline as a table, with a bar per state over the execution
+    """
+    total_ms = max(execution_result.duration_ms, 1e-6)
+    path_width = max([len(timing.path) for timing in execution_result.timeline] + [10])
+
+    def get_bar(timing: StateTiming) -> str:
+        bar_start = int(timing.start_ms / total_ms * width)
+        bar_length = max(int(round(timing.duration_ms / total_ms * width)), 1)
+        return (" " * bar_start + "#" * bar_length)[:width].ljust(width)
+
+    lines = [
+        f"{execution_result.status} in {execution_result.duration_ms:.1f} ms"
+        + (f" ({execution_result.error}: {execution_result.cause})" if execution_result.error else ""),
+        "",
+        f"{'state':<{path_width}}  {'start ms':>9}  {'ms':>9}  {'tries':>5}  |{'':<{width}}|",
+        *map(
+            lambda timing_iter_: (
+                f"{timing_iter_.path:<{path_width}}  {timing_iter_.start_ms:>9.1f}  {timing_iter_.duration_ms:>9.1f}  "
+                f"{timing_iter_.attempts:>5}  |{get_bar(timing_iter_)}|"
+            ),
+            execution_result.timeline
+        ),
+    ]
+    return "\n".join(lines)
+
+
+def get_default_execution_input(template_name: str, dataset: SyntheticDataset) -> Dict[str, Any]:
+    """
+    An execution input for each template, built from the synthetic dataset
+    """
+    workflow_run = dataset.workflow_run
+    draft_detail = dataset.get_draft_detail()
+    if template_name in ("populate_draft_data", "populate_draft_data_async"):
+        # An empty draft (for a single library, as get_libraries expects), everything is populated
+        return {**draft_detail, "libraries": workflow_run['libraries'][:1]}
+    if template_name == "validate_draft_data_and_put_ready_event":
+        return {**draft_detail, "payload": dataset.get_payload()}
+    if template_name == "ready_event_to_icav2_wes_request_event":
+        return {**draft_detail, "status": "READY", "payload": dataset.get_payload()}
+    if template_name == "icav2_wes_event_to_wrsc_event":
+        return {
+            "id": "iwa.01K7XBENCHMARKANALYSIS00",
+            "name": workflow_run['workflowRunName'],
+            "status": "SUCCEEDED",
+            "submissionTime": "2026-10-19T00:00:00Z",
+            "startTime": "2026-10-19T00:05:00Z",
+            "endTime": "2026-10-19T02:00:00Z",
+            "icav2AnalysisId": "b1a2c3d4-0000-4000-8000-000000000001",
+            "tags": {"portalRunId": workflow_run['portalRunId']},
+        }
+    raise ValueError(f"No default input for {template_name}")
+
+
+def get_local_state_machine(
+        template_name: str,
+        fake_backend: FakeBackend,
+        task_token_responder: Callable[[str, Dict[str, Any]], Any] = respond_to_task_token,
+        time_scale: float = 0.0,
+        lambda_router: bool = False,
+) -> LocalStateMachine:
+    """
+    A template wired to the in-process handlers, with the SDK integrations answered from the fake backend
+    (the lambda environment must have been set up, see harness.set_up_lambda_environment).
+    With lambda_router, every lambda is invoked through its alias of the lambda router (the 'router' deployment mode)
+    """
+    from harness import load_handler_module
+
+    def get_routed_handler(lambda_name: str) -> Callable[[Dict[str, Any], Any], Any]:
+        router_handler = load_handler_module("lambda_router").handler
+        return lambda event_iter_, context_iter_: router_handler(
+            event_iter_,
+            SimpleNamespace(
+                **vars(context_iter_),
+                invoked_function_arn=f"{get_local_lambda_arn('lambda_router')}:{lambda_name}",
+            )
+        )
+
+    definition = load_state_machine_definition(template_name)
+    return LocalStateMachine(
+        name=template_name,
+        definition=definition,
+        lambda_handlers={
+            lambda_name: (
+                get_routed_handler(lambda_name) if lambda_router
+                else load_handler_module(lambda_name).handler
+            )
+            for lambda_name in get_lambda_names(definition)
+        },
+        sdk_integrations=get_default_sdk_integrations(fake_backend.ssm_parameters),
+        task_token_responder=task_token_responder,
+        time_scale=time_scale,
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import boto3
+
+    from fakes import fake_boto3_client, set_fake_backend
+    from harness import set_up_lambda_environment
+
+    parser = argparse.ArgumentParser(description="Run a step functions template locally, with in-process handlers")
+    parser.add_argument("template_name", choices=get_template_names())
+    parser.add_argument("--input", help="Execution input (JSON file), defaults to one built from the synthetic dataset")
+    parser.add_argument("--library-count", type=int, default=1)
+    parser.add_argument("--lane-count", type=int, default=1)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latency added to every fake remote call")
+    parser.add_argument(
+        "--task-token-delay-ms", type=float, default=0.0,
+        help="How long the callback of a .waitForTaskToken task takes (i.e. the fastq sync)"
+    )
+    parser.add_argument("--time-scale", type=float, default=0.0, help="Scale of the retry and Wait delays that are slept")
+    parser.add_argument(
+        "--lambda-router", action="store_true",
+        help="Invoke every lambda through the lambda router (the 'router' deployment mode)"
+    )
+    parser.add_argument("--format", choices=["json", "text"], default="text")
+    args = parser.parse_args()
+
+    set_up_lambda_environment()
+    boto3.client = fake_boto3_client
+    synthetic_dataset = SyntheticDataset(library_count=args.library_count, lane_count=args.lane_count)
+    local_fake_backend = FakeBackend(synthetic_dataset, latency_seconds=args.latency_ms / 1000)
+    set_fake_backend(local_fake_backend)
+
+    def respond_after_delay(state_name: str, arguments: Dict[str, Any]) -> Any:
+        sleep(args.task_token_delay_ms / 1000)
+        return {}
+
+    local_execution_result = get_local_state_machine(
+        args.template_name, local_fake_backend,
+        task_token_responder=respond_after_delay,
+        time_scale=args.time_scale,
+        lambda_router=args.lambda_router,
+    ).start_execution(
+        json.loads(Path(args.input).read_text()) if args.input
+        else get_default_execution_input(args.template_name, synthetic_dataset)
+    )
+
+    if args.format == "text":
+        print(format_timeline_text(local_execution_result))
+    else:
+        print(json.dumps(local_execution_result.to_dict(), indent=4))
@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+
+"""
+Cold start comparison of the lambda deployment modes.
+
+Replays a mix of lambda invocations over the execution environments of each deployment mode
+(see infrastructure/stage/lambda):
+  * perHandler: one function per lambda, so one pool of execution environments per lambda
+  * router: the routed lambdas are deployed as the lambda router, so they share one pool
+
+An invocation that finds no environment of its function free (and idle for less than --cold-start-idle-minutes)
+is a cold start, as in the execution history profiler (see execution_profiler.get_cold_start_flags).
+The report gives the cold starts and cold start rate of each mode, by lambda.
+
+The invocation mix is replayed from either:
+  * execution histories exported from a perHandler deployment (as for execution_profiler.py):
+
+        python3 router_cold_starts.py --histories histories/ --format text
+
+  * a synthetic mix: the templates are run locally (see local_sfn.py) and their lambda invocations are replayed
+    for each workflow run, arriving at random (a Poisson process, one every --arrival-interval-minutes on average),
+    at the offsets of SYNTHETIC_EVENT_MIX from its arrival:
+
+        python3 router_cold_starts.py --workflow-run-count 200 --arrival-interval-minutes 30 --format text
+
+Invocations of the lambdas that are not in the routed lambdas (--routed-lambda-names, every lambda by default)
+keep their own pool in both modes.
+"""
+
+# Standard imports
+import json
+import random
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+# Local imports
+from execution_profiler import DEFAULT_COLD_START_IDLE_MINUTES, get_cold_start_flags, get_execution_profiles
+from fakes import FakeBackend
+from local_sfn import ExecutionResult, get_default_execution_input, get_local_state_machine
+
+# Globals
+ROUTER_FUNCTION_NAME = "lambda_router"
+DEPLOYMENT_MODES = ("perHandler", "router")
+
+# The executions of a workflow run, (template name, minutes after the DRAFT event)
+SYNTHETIC_EVENT_MIX: List[Tuple[str, float]] = [
+    # The draft is populated, the DRAFT update events it puts start it again
+    ("populate_draft_data", 0.0),
+    ("populate_draft_data", 0.5),
+    ("populate_draft_data", 1.0),
+    ("validate_draft_data_and_put_ready_event", 1.5),
+    ("ready_event_to_icav2_wes_request_event", 2.0),
+    # The ICAv2 WES analysis state changes, queued, running and succeeded
+    ("icav2_wes_event_to_wrsc_event", 5.0),
+    ("icav2_wes_event_to_wrsc_event", 15.0),
+    ("icav2_wes_event_to_wrsc_event", 180.0),
+]
+
+
+class Invocation(NamedTuple):
+    lambda_name: str
+    # Seconds
+    start: float
+    end: float
+
+
+def get_history_invocations(
+        history_paths: Iterable[Union[str, Path]], template_name: Optional[str] = None
+) -> List[Invocation]:
+    """
+    The lambda invocations of exported execution histories (one per attempt)
+    """
+    return [
+        Invocation(lambda_name=visit.resource, start=invocation_start, end=invocation_end)
+        for execution_profile in get_execution_profiles(history_paths)
+        if template_name is None or execution_profile.template_name == template_name
+        for visit in execution_profile.visits
+        for invocation_start, invocation_end in visit.invocations
+    ]
+
+
+def get_execution_invocations(execution_result: ExecutionResult) -> List[Invocation]:
+    """
+    The lambda invocations of a local execution, from its start
+    """
+    return list(map(
+        lambda timing_iter_: Invocation(
+            lambda_name=timing_iter_.resource,
+            start=timing_iter_.start_ms / 1000,
+            end=timing_iter_.end_ms / 1000,
+        ),
+        filter(
+            lambda timing_iter_: timing_iter_.state_type == "Task" and timing_iter_.resource is not None
+            and ":" not in timing_iter_.resource,
+            execution_result.timeline
+        )
+    ))
+
+
+def get_synthetic_invocations(
+        fake_backend: FakeBackend,
+        workflow_run_count: int,
+        arrival_interval_minutes: float,
+        event_mix: Optional[List[Tuple[str, float]]] = None,
+        seed: int = 0,
+) -> List[Invocation]:
+    """
+    The lambda invocations of workflow runs arriving at random, each running the executions of the event mix.
+    The executions of the event mix are run locally once
+    (the lambda environment must have been set up, see harness.set_up_lambda_environment),
+    a template that is run again starts from the detail of the last event its previous execution put,
+    i.e. the DRAFT update events of populate_draft_data
+    """
+    event_mix = event_mix if event_mix is not None else SYNTHETIC_EVENT_MIX
+
+    execution_invocations: List[List[Invocation]] = []
+    previous_results_by_template: Dict[str, ExecutionResult] = {}
+    for template_name, _ in event_mix:
+        previous_result = previous_results_by_template.get(template_name)
+        execution_result = get_local_state_machine(template_name, fake_backend).start_execution(
+            json.loads(previous_result.events[-1]['Detail']) if previous_result is not None and previous_result.events
+            else get_default_execution_input(template_name, fake_backend.dataset)
+        )
+        previous_results_by_template[template_name] = execution_result
+        execution_invocations.append(get_execution_invocations(execution_result))
+
+    random_generator = random.Random(seed)
+    invocations: List[Invocation] = []
+    arrival = 0.0
+    for _ in range(workflow_run_count):
+        arrival += random_generator.expovariate(1 / (arrival_interval_minutes * 60))
+        for (_, offset_minutes), template_invocations in zip(event_mix, execution_invocations):
+            execution_start = arrival + offset_minutes * 60
+            invocations.extend(map(
+                lambda invocation_iter_: invocation_iter_._replace(
+                    start=execution_start + invocation_iter_.start,
+                    end=execution_start + invocation_iter_.end,
+                ),
+                template_invocations
+            ))
+    return invocations
+
+
+def get_function_name(lambda_name: str, deployment_mode: str, routed_lambda_names: Optional[List[str]] = None) -> str:
+    """
+    The function a lambda is deployed as
+    """
+    if deployment_mode == "router" and (routed_lambda_names is None or lambda_name in routed_lambda_names):
+        return ROUTER_FUNCTION_NAME
+    return lambda_name
+
+
+def get_cold_start_report(
+        invocations: List[Invocation],
+        routed_lambda_names: Optional[List[str]] = None,
+        idle_minutes: float = DEFAULT_COLD_START_IDLE_MINUTES,
+) -> Dict[str, Any]:
+    """
+    The cold starts of the invocations in each deployment mode
+
+    Output:
+      {
+        "invocations": 480,
+        "idleMinutes": 15,
+        "deploymentModes": {
+          "perHandler": {
+            "functions": 17,
+            "coldStarts": 310,
+            "coldStartRate": 0.646,
+            "coldStartsByLambda": {"get_libraries": 28, ...}
+          },
+          "router": {...}
+        }
+      }
+    """
+    def get_deployment_mode_report(deployment_mode: str) -> Dict[str, Any]:
+        function_names = list(map(
+            lambda invocation_iter_: get_function_name(invocation_iter_.lambda_name, deployment_mode, routed_lambda_names),
+            invocations
+        ))
+        cold_start_flags = get_cold_start_flags(
+            list(map(
+                lambda invocation_iter_: (invocation_iter_[0], invocation_iter_[1].start, invocation_iter_[1].end),
+                zip(function_names, invocations)
+            )),
+            idle_minutes=idle_minutes
+        )
+        return {
+            "functions": len(set(function_names)),
+            "coldStarts": sum(cold_start_flags),
+            "coldStartRate": round(sum(cold_start_flags) / len(invocations), 3) if invocations else 0.0,
+            "coldStartsByLambda": dict(sorted(Counter(map(
+                lambda invocation_iter_: invocation_iter_[1].lambda_name,
+                filter(lambda invocation_iter_: invocation_iter_[0], zip(cold_start_flags, invocations))
+            )).items())),
+        }
+
+    return {
+        "invocations": len(invocations),
+        "idleMinutes": idle_minutes,
+        "deploymentModes": {
+            deployment_mode: get_deployment_mode_report(deployment_mode)
+            for deployment_mode in DEPLOYMENT_MODES
+        },
+    }
+
+
+def format_report_text(cold_start_report: Dict[str, Any]) -> str:
+    deployment_mode_reports = cold_start_report['deploymentModes']
+    lambda_names = sorted(set(sum(map(
+        lambda report_iter_: list(report_iter_['coldStartsByLambda'].keys()),
+        deployment_mode_reports.values()
+    ), [])))
+    name_width = max([len(lambda_name) for lambda_name in lambda_names] + [10])
+
+    return "\n".join([
+        f"{cold_start_report['invocations']} invocations, environments idle for {cold_start_report['idleMinutes']} minutes",
+        "",
+        f"{'mode':<{name_width}}{'functions':>11}{'cold':>8}{'rate':>8}",
+        *map(
+            lambda mode_iter_: (
+                f"{mode_iter_[0]:<{name_width}}{mode_iter_[1]['functions']:>11}"
+                f"{mode_iter_[1]['coldStarts']:>8}{mode_iter_[1]['coldStartRate']:>8.3f}"
+            ),
+            deployment_mode_reports.items()
+        ),
+        "",
+        f"{'lambda':<{name_width}}" + "".join(map(lambda mode_iter_: f"{mode_iter_:>12}", deployment_mode_reports)),
+        *map(
+            lambda lambda_name_iter_: f"{lambda_name_iter_:<{name_width}}" + "".join(map(
+                lambda report_iter_: f"{report_iter_['coldStartsByLambda'].get(lambda_name_iter_, 0):>12}",
+                deployment_mode_reports.values()
+            )),
+            lambda_names
+        ),
+    ])
+
+
+if __name__ == "__main__":
+    import argparse
+
+    import boto3
+
+    from fakes import SyntheticDataset, fake_boto3_client, set_fake_backend
+    from harness import set_up_lambda_environment
+
+    parser = argparse.ArgumentParser(description="Compare the cold starts of the lambda deployment modes")
+    parser.add_argument("--histories", nargs="+", help="Replay the invocations of exported execution histories")
+    parser.add_argument("--template-name", help="Only replay the executions of this template (histories)")
+    parser.add_argument("--workflow-run-count", type=int, default=100, help="Workflow runs in the synthetic mix")
+    parser.add_argument("--arrival-interval-minutes", type=float, default=30.0)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Latency added to every fake remote call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--routed-lambda-names", help="Comma separated, the lambdas deployed in the router (every lambda by default)"
+    )
+    parser.add_argument("--cold-start-idle-minutes", type=float, default=DEFAULT_COLD_START_IDLE_MINUTES)
+    parser.add_argument("--format", choices=["json", "text"], default="text")
+    args = parser.parse_args()
+
+    if args.histories:
+        replayed_invocations = get_history_invocations(args.histories, template_name=args.template_name)
+    else:
+        set_up_lambda_environment()
+        boto3.client = fake_boto3_client
+        local_fake_backend = FakeBackend(SyntheticDataset(), latency_seconds=args.latency_ms / 1000)
+        set_fake_backend(local_fake_backend)
+        replayed_invocations = get_synthetic_invocations(
+            local_fake_backend,
+            workflow_run_count=args.workflow_run_count,
+            arrival_interval_minutes=args.arrival_interval_minutes,
+            seed=args.seed,
+        )
+
+    report = get_cold_start_report(
+        replayed_invocations,
+        routed_lambda_names=args.routed_lambda_names.split(",") if args.routed_lambda_names else None,
+        idle_minutes=args.cold_start_idle_minutes,
+    )
+    print(format_report_text(report) if args.format == "text" else json.dumps(report, indent=4))
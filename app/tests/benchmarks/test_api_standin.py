@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+"""
+The OrcaBus API stand-in server, and the throughput of the pooled API session against it over real HTTP
+"""
+
+# Standard imports
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+# Test imports
+import pytest
+
+# Local imports
+from api_standin import ServiceConfig, redirect_to_standin
+from fakes import PORTAL_RUN_ID, TEST_DATA_BUCKET
+
+
+def get_standin_request(standin_server, method: str):
+    """
+    A request through the pooled OrcaBus API session, redirected to the stand-in server as install_standin_redirect would
+    """
+    from dragen_wgts_rna_tools.api_client import get_session
+
+    def standin_request(url: str, **kwargs):
+        url, kwargs["headers"] = redirect_to_standin(url, kwargs.get("headers"), standin_server.url)
+        return get_session().request(method, url, **kwargs)
+
+    return standin_request
+
+
+def get_standin_get(standin_server):
+    return get_standin_request(standin_server, "GET")
+
+
+def test_api_standin_endpoints(api_standin):
+    standin_server = api_standin(library_count=2, lane_count=4)
+    standin_get = get_standin_get(standin_server)
+    dataset = standin_server.api.dataset
+    rgid = dataset.get_rgid_list()[0]
+
+    fastq = standin_get(f"https://fastq.dev.umccr.org/api/v1/fastq?rgid={quote(rgid)}").json()['results'][0]
+    assert standin_get(f"https://fastq.dev.umccr.org/api/v1/fastq/{fastq['id']}/toFastqListRow").json()['rgid'] == rgid
+
+    fastq_set = standin_get(
+        f"https://fastq.dev.umccr.org/api/v1/fastqSet?library={fastq['library']['orcabusId']}&currentFastqSet=true"
+    ).json()['results'][0]
+    assert len(standin_get(f"https://fastq.dev.umccr.org/api/v1/fastqSet/{fastq_set['id']}/toFastqListRows").json()) == 4
+    assert standin_get(f"https://fastq.dev.umccr.org/api/v1/fastqSet/{fastq_set['id']}/validateNtsmInternal").json() == {"related": True}
+
+    library = standin_get(
+        f"https://metadata.dev.umccr.org/api/v1/library?libraryId={fastq['library']['libraryId']}"
+    ).json()['results'][0]
+    assert standin_get(f"https://metadata.dev.umccr.org/api/v1/library/{library['orcabusId']}").json() == library
+
+    workflow_run = standin_get(
+        f"https://workflow.dev.umccr.org/api/v1/workflowrun?portalRunId={PORTAL_RUN_ID}"
+    ).json()['results'][0]
+    state = standin_get(f"https://workflow.dev.umccr.org/api/v1/workflowrun/{workflow_run['orcabusId']}/state").json()[-1]
+    payload = standin_get(f"https://workflow.dev.umccr.org/api/v1/payload/{state['payload']}").json()
+    assert payload['data']['tags']['fastqRgidList'] == dataset.get_rgid_list()
+
+    s3_objects = standin_get(
+        f"https://file.dev.umccr.org/api/v1/s3?bucket={TEST_DATA_BUCKET}&key=primary/*_R1_001.fastq.ora&rowsPerPage=5"
+    ).json()
+    assert s3_objects['pagination']['count'] == 8
+    assert len(s3_objects['results']) == 5 and s3_objects['links']['next'] is not None
+
+    assert standin_get("https://workflow.dev.umccr.org/api/v1/workflowrun/wfr.unknown").status_code == 404
+
+
+def test_api_standin_comments(api_standin):
+    standin_server = api_standin()
+    standin_post = get_standin_request(standin_server, "POST")
+    comment_url = (
+        f"https://workflow.dev.umccr.org/api/v1/workflowrun/"
+        f"{standin_server.api.dataset.workflow_run['orcabusId']}/comment"
+    )
+
+    response = standin_post(comment_url, json={"comment": "Draft populated", "createdBy": "benchmark"})
+    assert response.status_code == 201
+    assert get_standin_get(standin_server)(comment_url).json()[0]['comment'] == "Draft populated"
+
+
+def test_requests_calls_share_the_session(api_standin, api_standin_redirect, monkeypatch):
+    """
+    The module level requests calls (that orcabus_api_tools makes) go through the shared session
+    """
+    import requests
+    from dragen_wgts_rna_tools.api_client import get_session
+
+    standin_server = api_standin()
+    api_standin_redirect(standin_server)
+
+    session_methods = []
+    session_request = get_session().request
+
+    def counted_request(method, url, **kwargs):
+        session_methods.append(method)
+        return session_request(method, url, **kwargs)
+
+    monkeypatch.setattr(get_session(), "request", counted_request)
+
+    workflow_run_url = f"https://workflow.dev.umccr.org/api/v1/workflowrun?portalRunId={PORTAL_RUN_ID}"
+    assert requests.get(workflow_run_url).status_code == 200
+    assert requests.request("GET", workflow_run_url).status_code == 200
+    assert session_methods == ["get", "GET"]
+
+
+def test_api_standin_rate_limit(api_standin):
+    standin_server = api_standin(service_config=ServiceConfig(rate_limit=5))
+    standin_get = get_standin_get(standin_server)
+    rgid = standin_server.api.dataset.get_rgid_list()[0]
+
+    responses = list(map(
+        lambda _: standin_get(f"https://fastq.dev.umccr.org/api/v1/fastq?rgid={quote(rgid)}"),
+        range(20)
+    ))
+    throttled_responses = list(filter(lambda response_iter_: response_iter_.status_code == 429, responses))
+    assert throttled_responses
+    assert throttled_responses[0].headers['Retry-After'] == "1"
+    # Other services have their own bucket
+    assert standin_get(f"https://workflow.dev.umccr.org/api/v1/workflowrun?portalRunId={PORTAL_RUN_ID}").status_code == 200
+
+
+def test_api_standin_error_injection(api_standin):
+    standin_server = api_standin(service_config=ServiceConfig(error_rate=0.5), seed=7)
+    standin_get = get_standin_get(standin_server)
+
+    status_codes = list(map(
+        lambda _: standin_get(f"https://workflow.dev.umccr.org/api/v1/workflowrun?portalRunId={PORTAL_RUN_ID}").status_code,
+        range(40)
+    ))
+    assert set(status_codes) == {200, 503}
+    assert standin_server.api.get_stats()['requestsByStatus'] == {
+        "200": status_codes.count(200), "503": status_codes.count(503)
+    }
+
+    # Turned off at run time
+    standin_server.api.update_config({"errorRate": 0})
+    assert standin_get(f"https://workflow.dev.umccr.org/api/v1/workflowrun?portalRunId={PORTAL_RUN_ID}").status_code == 200
+
+
+@pytest.mark.parametrize("worker_count", [1, 8], ids=["workers1", "workers8"])
+def test_api_standin_fastq_by_rgid_throughput(api_standin, benchmark, worker_count, library_count):
+    """
+    Fetch the fastq of every RGID of library_count libraries over 8 lanes, with 5 ms latency per call
+    """
+    standin_server = api_standin(
+        library_count=library_count, lane_count=8, service_config=ServiceConfig(latency_ms=5)
+    )
+    standin_get = get_standin_get(standin_server)
+    rgid_list = standin_server.api.dataset.get_rgid_list()
+
+    def get_fastq(rgid: str):
+        return standin_get(f"https://fastq.dev.umccr.org/api/v1/fastq?rgid={quote(rgid)}").json()['results'][0]
+
+    def get_fastqs():
+        with ThreadPoolExecutor(max_workers=worker_count) as executor:
+            return list(executor.map(get_fastq, rgid_list))
+
+    fastqs = benchmark.pedantic(get_fastqs, rounds=3, warmup_rounds=1)
+    benchmark.extra_info['requests'] = standin_server.api.get_stats()['requests']
+    assert len(fastqs) == len(rgid_list)
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+"""
+The static critical path analysis of the ASL templates, against the committed baseline
+"""
+
+# Standard imports
+import json
+from pathlib import Path
+
+# Local imports
+from asl_critical_path import (
+    analyse_definition,
+    analyse_template,
+    get_baseline_regressions,
+    get_expression_variables,
+)
+from local_sfn import get_template_names
+
+CRITICAL_PATHS_BASELINE_PATH = Path(__file__).parent / "baselines" / "critical_paths.json"
+
+
+def lambda_task(function_name: str, arguments: str, **fields):
+    return {
+        "Type": "Task",
+        "Resource": "arn:aws:states:::lambda:invoke",
+        "Arguments": {"FunctionName": function_name, "Payload": arguments},
+        **fields,
+    }
+
+
+def test_expression_variables():
+    assert get_expression_variables(
+        "/* $commented */ $merge([$tags, {'a': $x, 'b': '$quoted'}]) ~> $sift(function($v, $k){$v != null})"
+    ) == {"tags", "x"}
+    assert get_expression_variables("( $count := $count($inputs); $count > 0 and $states.input.ok )") == {"inputs"}
+
+
+def test_independent_tasks_could_share_a_parallel():
+    template_report = analyse_definition("independent", {
+        "QueryLanguage": "JSONata",
+        "StartAt": "Get a",
+        "States": {
+            "Get a": lambda_task("get_a", "{% $detail %}", Assign={"a": "{% $states.result %}"}, Next="Get b"),
+            "Get b": lambda_task("get_b", "{% $detail %}", Assign={"b": "{% $states.result %}"}, Next="Both"),
+            "Both": {
+                "Type": "Parallel",
+                "Branches": [
+                    {"StartAt": "Use a", "States": {"Use a": lambda_task("use_a", "{% $a %}", End=True)}},
+                    {
+                        "StartAt": "Use b",
+                        "States": {
+                            "Use b": lambda_task("use_b", "{% $b %}", Next="Again"),
+                            "Again": lambda_task("again", "{% $states.input %}", End=True),
+                        },
+                    },
+                ],
+                "Next": "Update a",
+            },
+            # Overwrites the $a that Both reads, so may start with Both
+            "Update a": lambda_task("update_a", "{% $detail %}", Assign={"a": "{% $states.result %}"}, Next="Put event"),
+            "Put event": {
+                "Type": "Task",
+                "Resource": "arn:aws:states:::events:putEvents",
+                "Arguments": {"Entries": [{"Detail": "{% $a %}"}]},
+                "End": True,
+            },
+        },
+    })
+
+    # The event is put once everything before it has finished
+    assert template_report.get_summary() == {"sequentialTasks": 6, "lambdaHops": 5, "dependencyDepth": 4}
+    assert template_report.parallel_candidates == [["Get a", "Get b"], ["Both", "Update a"]]
+
+
+def test_ordering_barriers_are_not_parallel_candidates():
+    template_report = analyse_definition("barriers", {
+        "QueryLanguage": "JSONata",
+        "StartAt": "Prepare",
+        "States": {
+            "Prepare": lambda_task("prepare", "{% $detail %}", Assign={"fastqIdList": "{% $states.result %}"}, Next="Wait"),
+            # Reads nothing the next states write, but the fastq sync works on what Prepare produced
+            "Wait": {
+                "Type": "Task",
+                "Resource": "arn:aws:states:::events:putEvents.waitForTaskToken",
+                "Arguments": {"Entries": [{"Detail": {"taskToken": "{% $states.context.Task.Token %}"}}]},
+                "Next": "Comment",
+            },
+            "Comment": lambda_task("${__add_populate_draft_comment_lambda_function_arn__}", "{% $detail %}", Next="Complete"),
+            "Complete": lambda_task("complete", "{% $detail %}", End=True),
+        },
+    })
+
+    assert template_report.parallel_candidates == []
+    assert template_report.get_summary()['dependencyDepth'] == 4
+
+
+def test_populate_draft_data_parallel_candidates():
+    template_report = analyse_template("populate_draft_data")
+
+    assert ["Get tags", "Resolve default parameters"] in template_report.parallel_candidates
+    assert template_report.get_summary()['dependencyDepth'] < template_report.get_summary()['sequentialTasks']
+    # Comments and events stay where they are
+    candidate_state_names = [state_name for candidate in template_report.parallel_candidates for state_name in candidate]
+    assert not list(filter(
+        lambda state_name_iter_: "comment" in state_name_iter_ or "event" in state_name_iter_,
+        candidate_state_names
+    ))
+
+
+def test_populate_draft_data_async_waits_for_fastq():
+    template_report = analyse_template("populate_draft_data_async")
+
+    assert ["Wait for fastq", "Complete draft"] not in template_report.parallel_candidates
+    assert template_report.parallel_candidates == []
+
+
+def test_templates_within_critical_path_baseline():
+    """
+    Update the baseline with 'python3 asl_critical_path.py --baseline baselines/critical_paths.json --update-baseline'
+    """
+    assert get_baseline_regressions(
+        list(map(analyse_template, get_template_names())),
+        json.loads(CRITICAL_PATHS_BASELINE_PATH.read_text())
+    ) == []
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+
+"""
+The record / replay harness, recording every lambda in lambdaNameList against the fake backend
+and replaying it offline
+"""
+
+# Standard imports
+import json
+
+# Test imports
+import pytest
+
+# Local imports
+from cassettes import (
+    Cassette,
+    Interaction,
+    decode_value,
+    encode_value,
+    read_cassette,
+    record_cassette,
+    replay_cassette,
+    write_cassette,
+)
+from fakes import FakeBackend, FakeProjectData, FakeStreamingBody, SyntheticDataset, set_fake_backend
+from harness import LAMBDAS_DIR, get_default_handler_event, get_lambda_name_list
+
+# Results that depend on the clock (i.e. the delivery lag of the comment outbox)
+TIME_DEPENDENT_RESULTS = {"drain_comment_outbox"}
+
+
+@pytest.fixture
+def recording_backend():
+    fake_backend = FakeBackend(SyntheticDataset(library_count=2, lane_count=2))
+    set_fake_backend(fake_backend)
+    yield fake_backend
+    set_fake_backend(None)
+
+
+def test_lambda_name_list_covers_every_lambda():
+    assert sorted(get_lambda_name_list()) == sorted(map(
+        lambda lambda_dir_iter_: lambda_dir_iter_.name[:-len("_py")],
+        filter(lambda lambda_dir_iter_: lambda_dir_iter_.is_dir(), LAMBDAS_DIR.iterdir())
+    ))
+
+
+def test_encode_decode_values():
+    project_data = decode_value(json.loads(json.dumps(encode_value(FakeProjectData("fil.0123")))))
+    assert project_data.data.id == "fil.0123"
+
+    streaming_body = decode_value(encode_value({"Body": FakeStreamingBody(b"line\n" * 3)}))['Body']
+    assert b"".join(streaming_body.iter_chunks(chunk_size=4)) == b"line\n" * 3
+
+    exception = decode_value(encode_value(KeyError("missing")))
+    assert isinstance(exception, KeyError)
+
+
+@pytest.mark.parametrize("lambda_name", get_lambda_name_list())
+def test_record_and_replay(lambda_name, recording_backend, tmp_path):
+    cassette_path = tmp_path / f"{lambda_name}.json"
+    write_cassette(
+        record_cassette(
+            lambda_name,
+            get_default_handler_event(lambda_name, recording_backend.dataset),
+            fake_backend=recording_backend,
+        ),
+        cassette_path
+    )
+    cassette = read_cassette(cassette_path)
+    # Every call the fake backend answered is in the cassette
+    assert len(cassette.interactions) == sum(recording_backend.calls.values())
+
+    replay_report = replay_cassette(cassette, rounds=2, latency_scale=0, cassette_path=str(cassette_path))
+
+    assert replay_report.misses == []
+    assert replay_report.call_deltas == {}
+    assert replay_report.replay_calls == replay_report.recorded_calls
+    assert replay_report.output_matches or lambda_name in TIME_DEPENDENT_RESULTS
+
+
+def test_replay_reports_misses(recording_backend):
+    lambda_name = "get_fastq_list_rows_from_rgid_list"
+    cassette = record_cassette(
+        lambda_name, get_default_handler_event(lambda_name, recording_backend.dataset), fake_backend=recording_backend
+    )
+    # Drop the last recorded call
+    replay_report = replay_cassette(
+        Cassette(**{**cassette._asdict(), "interactions": cassette.interactions[:-1]}),
+        rounds=1,
+        latency_scale=0,
+    )
+
+    assert len(replay_report.misses) == 1
+    assert replay_report.replay_calls == replay_report.recorded_calls + 1
+
+
+def test_replay_latency_scale(recording_backend):
+    lambda_name = "get_metadata_tags"
+    cassette = record_cassette(
+        lambda_name, get_default_handler_event(lambda_name, recording_backend.dataset), fake_backend=recording_backend
+    )
+    # Every recorded call took 50ms
+    cassette = Cassette(**{
+        **cassette._asdict(),
+        "interactions": list(map(
+            lambda interaction_iter_: Interaction(**{**interaction_iter_._asdict(), "duration_ms": 50}),
+            cassette.interactions
+        )),
+    })
+
+    replay_report = replay_cassette(cassette, rounds=1, latency_scale=1.0)
+
+    assert replay_report.recorded_calls > 0
+    assert replay_report.replay_duration_ms >= 50 * replay_report.recorded_calls
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+
+"""
+The execution history profiler, against histories shaped like the get-execution-history output
+"""
+
+# Standard imports
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+# Local imports
+from execution_profiler import (
+    format_report_text,
+    get_execution_profiles,
+    get_profile_report,
+    get_trace_events,
+)
+
+EXECUTION_START = datetime(2026, 10, 19, 1, 0, tzinfo=timezone.utc)
+LAMBDA_ARN_PREFIX = "arn:aws:lambda:ap-southeast-2:123456789012:function:"
+
+
+class HistoryBuilder:
+    """
+    Appends events as step functions does, each pointing back to the event it follows
+    """
+
+    def __init__(self, started_at: datetime = EXECUTION_START):
+        self.started_at = started_at
+        self.events: List[Dict[str, Any]] = []
+        self.add("ExecutionStarted", 0, 0, {"input": "{}"})
+
+    def add(
+            self, event_type: str, at_ms: float, previous_event_id: int, details: Optional[Dict[str, Any]] = None
+    ) -> int:
+        event_id = len(self.events) + 1
+        # i.e. taskScheduledEventDetails, but stateEnteredEventDetails for every type of state
+        details_type = next(
+            filter(lambda suffix_iter_: event_type.endswith(suffix_iter_), ["StateEntered", "StateExited"]),
+            event_type
+        )
+        self.events.append({
+            "timestamp": (self.started_at + timedelta(milliseconds=at_ms)).isoformat(),
+            "type": event_type,
+            "id": event_id,
+            "previousEventId": previous_event_id,
+            **({f"{details_type[0].lower()}{details_type[1:]}EventDetails": details} if details is not None else {}),
+        })
+        return event_id
+
+    def add_pass(self, state_name: str, at_ms: float, previous_event_id: int, state_type: str = "Pass") -> int:
+        entered_id = self.add(f"{state_type}StateEntered", at_ms, previous_event_id, {"name": state_name})
+        return self.add(f"{state_type}StateExited", at_ms, entered_id, {"name": state_name})
+
+    def add_lambda_task(
+            self, state_name: str, function_name: str, attempt_ms: List[List[float]], previous_event_id: int
+    ) -> int:
+        """
+        attempt_ms: the [start, end] of each attempt, all but the last one fail
+        """
+        event_id = self.add("TaskStateEntered", attempt_ms[0][0], previous_event_id, {"name": state_name})
+        for attempt_index, (start_ms, end_ms) in enumerate(attempt_ms):
+            event_id = self.add("TaskScheduled", start_ms, event_id, {
+                "resourceType": "lambda",
+                "resource": "invoke",
+                "parameters": json.dumps({"FunctionName": f"{LAMBDA_ARN_PREFIX}{function_name}", "Payload": {}}),
+            })
+            event_id = self.add("TaskStarted", start_ms, event_id, {"resourceType": "lambda", "resource": "invoke"})
+            if attempt_index < len(attempt_ms) - 1:
+                event_id = self.add("TaskFailed", end_ms, event_id, {"error": "Lambda.TooManyRequestsException"})
+            else:
+                event_id = self.add("TaskSucceeded", end_ms, event_id, {"resourceType": "lambda", "resource": "invoke"})
+        return self.add("TaskStateExited", attempt_ms[-1][1], event_id, {"name": state_name})
+
+    def add_wait_for_task_token(self, state_name: str, start_ms: float, end_ms: float, previous_event_id: int) -> int:
+        resource_details = {"resourceType": "events", "resource": "putEvents.waitForTaskToken"}
+        event_id = self.add("TaskStateEntered", start_ms, previous_event_id, {"name": state_name})
+        event_id = self.add("TaskScheduled", start_ms, event_id, {**resource_details, "parameters": "{}"})
+        event_id = self.add("TaskStarted", start_ms, event_id, resource_details)
+        event_id = self.add("TaskSubmitted", start_ms + 20, event_id, resource_details)
+        event_id = self.add("TaskSucceeded", end_ms, event_id, resource_details)
+        return self.add("TaskStateExited", end_ms, event_id, {"name": state_name})
+
+
+def get_populate_draft_data_history(
+        started_at: datetime, fastq_wait_ms: float, coverage_ms: float, ntsm_attempt_ms: List[List[float]]
+) -> Dict[str, Any]:
+    """
+    The tail of a populate_draft_data execution, from 'Get Inputs' through 'Add qc tags'
+    (the lambdas of 'Add qc tags' are timed from the start of 'Add qc tags')
+    """
+    history = HistoryBuilder(started_at)
+
+    get_inputs_started_id = history.add(
+        "ParallelStateStarted", 0, history.add("ParallelStateEntered", 0, 0, {"name": "Get Inputs"})
+    )
+    history.add_pass("Get default input params", 0, get_inputs_started_id)
+    event_id = history.add_pass("Has Sequence Data", 0, get_inputs_started_id, state_type="Choice")
+    event_id = history.add_wait_for_task_token("Wait for fastq", 0, fastq_wait_ms, event_id)
+    event_id = history.add("ParallelStateSucceeded", fastq_wait_ms, event_id)
+    event_id = history.add("ParallelStateExited", fastq_wait_ms, event_id, {"name": "Get Inputs"})
+    event_id = history.add_pass("Add reference data", fastq_wait_ms, event_id)
+
+    add_qc_tags_started_id = history.add(
+        "ParallelStateStarted", fastq_wait_ms,
+        history.add("ParallelStateEntered", fastq_wait_ms, event_id, {"name": "Add qc tags"})
+    )
+    # The branches in the reverse order to the definition
+    ntsm_exited_id = history.add_lambda_task(
+        "check ntsm passing", "check_ntsm_internal",
+        list(map(lambda attempt_iter_: [fastq_wait_ms + attempt_iter_[0], fastq_wait_ms + attempt_iter_[1]], ntsm_attempt_ms)),
+        add_qc_tags_started_id
+    )
+    coverage_exited_id = history.add_lambda_task(
+        "Get coverage and dup-frac estimates", "get_qc_summary_stats_from_rgid_list",
+        [[fastq_wait_ms, fastq_wait_ms + coverage_ms]], add_qc_tags_started_id
+    )
+    end_ms = fastq_wait_ms + max(coverage_ms, ntsm_attempt_ms[-1][1])
+    event_id = history.add(
+        "ParallelStateSucceeded", end_ms,
+        coverage_exited_id if coverage_ms >= ntsm_attempt_ms[-1][1] else ntsm_exited_id
+    )
+    event_id = history.add("ParallelStateExited", end_ms, event_id, {"name": "Add qc tags"})
+    history.add("ExecutionSucceeded", end_ms, event_id, {"output": "{}"})
+    return {
+        "executionArn": f"arn:aws:states:ap-southeast-2:123456789012:execution:populate:{started_at:%H%M}",
+        "events": history.events,
+    }
+
+
+def test_execution_profiles(tmp_path):
+    (tmp_path / "histories.json").write_text(json.dumps([
+        get_populate_draft_data_history(EXECUTION_START, 5000, 400, [[0, 100], [1100, 1300]]),
+        # A minute later, the lambdas are warm
+        get_populate_draft_data_history(EXECUTION_START + timedelta(minutes=1), 5000, 900, [[0, 200]]),
+    ]))
+
+    execution_profiles = get_execution_profiles([tmp_path])
+    assert list(map(lambda profile_iter_: profile_iter_.template_name, execution_profiles)) == ["populate_draft_data"] * 2
+
+    visits_by_path = {visit.path: visit for visit in execution_profiles[0].visits}
+    assert set(visits_by_path) == {
+        "Get Inputs", "Get Inputs/0/Has Sequence Data", "Get Inputs/0/Wait for fastq", "Get Inputs/1/Get default input params",
+        "Add reference data", "Add qc tags",
+        "Add qc tags/0/Get coverage and dup-frac estimates", "Add qc tags/1/check ntsm passing",
+    }
+    assert visits_by_path["Add qc tags"].start_ms == 5000
+    assert visits_by_path["Add qc tags"].duration_ms == 1300
+    assert visits_by_path["Add qc tags/1/check ntsm passing"].attempts == 2
+    assert visits_by_path["Add qc tags/1/check ntsm passing"].resource == "check_ntsm_internal"
+    assert visits_by_path["Get Inputs/0/Wait for fastq"].callback_wait_ms == 4980
+    assert visits_by_path["Add qc tags/0/Get coverage and dup-frac estimates"].likely_cold_start
+    assert not any(map(lambda visit_iter_: visit_iter_.likely_cold_start, execution_profiles[1].visits))
+
+    template_report = get_profile_report(execution_profiles)['templates']['populate_draft_data']
+    assert template_report['states']["Add qc tags/1/check ntsm passing"]['retries'] == 1
+    assert template_report['branches']["Add qc tags"]["0"]['slowest'] == 1
+    assert template_report['branches']["Add qc tags"]["1"]['slowest'] == 1
+    assert template_report['durationMs']['max'] == 6300
+
+    report_text = format_report_text(get_profile_report(execution_profiles), execution_profiles, timeline_count=1)
+    assert "Add qc tags/1/check ntsm passing" in report_text
+    assert len(list(filter(
+        lambda event_iter_: event_iter_['ph'] == "X", get_trace_events(execution_profiles)['traceEvents']
+    ))) == 16
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+
+"""
+Micro-benchmarks of every lambda handler against the fake OrcaBus, ICAv2 and AWS backends.
+
+Handlers whose work grows with the payload are swept over the library and / or lane counts,
+the rest run on a single library, single lane dataset.
+"""
+
+# Standard imports
+import json
+from time import time
+
+# Local imports
+from fakes import PAYLOAD_VERSION, PORTAL_RUN_ID, TEST_DATA_BUCKET, WORKFLOW_VERSION
+from harness import get_icav2_wes_event
+
+# Globals
+EXECUTION_ARN = "arn:aws:states:ap-southeast-2:123456789012:execution:populateDraftDataSfn:benchmark"
+
+
+# Populate draft data
+def test_get_libraries(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "get_libraries", fake_backend,
+        {"libraries": fake_backend.dataset.workflow_run['libraries']}
+    )
+    assert result['libraryId'] == fake_backend.dataset.libraries[0]['libraryId']
+
+
+def test_get_metadata_tags(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "get_metadata_tags", fake_backend,
+        {"libraryId": fake_backend.dataset.libraries[0]['libraryId']}
+    )
+    assert result['tags']['subjectId'] == fake_backend.dataset.libraries[0]['subject']['subjectId']
+
+
+def test_invalidate_library_cache(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    run_handler_benchmark(
+        "invalidate_library_cache", fake_backend,
+        {"action": "UPDATE", "model": "LIBRARY", "data": {"libraryId": fake_backend.dataset.libraries[0]['libraryId']}}
+    )
+
+
+def test_get_fastq_rgids_from_library_id(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    result = run_handler_benchmark(
+        "get_fastq_rgids_from_library_id", fake_backend,
+        {"libraryId": fake_backend.dataset.libraries[0]['libraryId']}
+    )
+    assert len(result['fastqRgidList']) == lane_count
+
+
+def test_get_fastq_id_list_from_rgid_list(fake_backend_factory, run_handler_benchmark, library_count, lane_count):
+    fake_backend = fake_backend_factory(library_count=library_count, lane_count=lane_count)
+    result = run_handler_benchmark(
+        "get_fastq_id_list_from_rgid_list", fake_backend,
+        {"fastqRgidList": fake_backend.dataset.get_rgid_list()}
+    )
+    assert len(result['fastqIdList']) == library_count * lane_count
+
+
+def test_get_fastq_list_rows_from_rgid_list(fake_backend_factory, run_handler_benchmark, library_count, lane_count):
+    from dragen_wgts_rna_tools.claim_check import rehydrate
+
+    fake_backend = fake_backend_factory(library_count=library_count, lane_count=lane_count)
+    result = run_handler_benchmark(
+        "get_fastq_list_rows_from_rgid_list", fake_backend,
+        {"fastqRgidList": fake_backend.dataset.get_rgid_list()}
+    )
+    # The rows of the larger runs are offloaded to the claim check store
+    assert len(rehydrate(result['fastqListRows'])) == library_count * lane_count
+
+
+def test_get_qc_summary_stats_from_rgid_list(fake_backend_factory, run_handler_benchmark, library_count, lane_count):
+    fake_backend = fake_backend_factory(library_count=library_count, lane_count=lane_count)
+    result = run_handler_benchmark(
+        "get_qc_summary_stats_from_rgid_list", fake_backend,
+        {"fastqRgidList": fake_backend.dataset.get_rgid_list()}
+    )
+    assert result['coverageSum'] > 0
+
+
+def test_check_ntsm_internal(fake_backend_factory, run_handler_benchmark, library_count, lane_count):
+    fake_backend = fake_backend_factory(library_count=library_count, lane_count=lane_count)
+    result = run_handler_benchmark(
+        "check_ntsm_internal", fake_backend,
+        {"fastqRgidList": fake_backend.dataset.get_rgid_list()}
+    )
+    assert result['related'] is True
+
+
+def test_resolve_default_parameters(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "resolve_default_parameters", fake_backend,
+        {"workflowVersion": WORKFLOW_VERSION, "portalRunId": PORTAL_RUN_ID}
+    )
+    assert result['defaults']['engineParameters']['outputUri'].endswith(f"/{PORTAL_RUN_ID}/")
+
+
+def test_validate_draft_complete_schema(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    result = run_handler_benchmark(
+        "validate_draft_complete_schema", fake_backend,
+        {
+            "payloadVersion": PAYLOAD_VERSION,
+            "data": fake_backend.dataset.get_payload_data(),
+            "workflowRunId": fake_backend.dataset.workflow_run['orcabusId'],
+            "addCommentOnError": False,
+        }
+    )
+    assert result['isValid'] is True
+
+
+def test_get_missing_schema_fields(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    payload_data = fake_backend.dataset.get_payload_data()
+    del payload_data['inputs']['annotationFile']
+    result = run_handler_benchmark(
+        "get_missing_schema_fields", fake_backend,
+        {"payloadVersion": PAYLOAD_VERSION, "data": payload_data}
+    )
+    assert result['missingFields'] == ["inputs.annotationFile"]
+
+
+def test_compare_payload(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    new_payload = fake_backend.dataset.get_payload()
+    new_payload['data']['inputs']['sequenceData']['fastqListRows'][-1]['lane'] += 1
+    result = run_handler_benchmark(
+        "compare_payload", fake_backend,
+        {"oldPayload": fake_backend.dataset.get_payload(), "newPayload": new_payload}
+    )
+    assert result['hasChanged'] is True
+
+
+def test_generate_wru_event_object_with_merged_data(fake_backend_factory, run_handler_benchmark, library_count):
+    fake_backend = fake_backend_factory(library_count=library_count)
+    result = run_handler_benchmark(
+        "generate_wru_event_object_with_merged_data", fake_backend,
+        {
+            "portalRunId": PORTAL_RUN_ID,
+            "libraries": fake_backend.dataset.workflow_run['libraries'],
+            "payload": fake_backend.dataset.get_payload(),
+        }
+    )
+    assert len(result['workflowRunUpdate']['libraries']) == library_count
+
+
+def test_add_populate_draft_comment(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "add_populate_draft_comment", fake_backend,
+        {
+            "workflowRunId": fake_backend.dataset.workflow_run['orcabusId'],
+            "commentType": "no_change_missing_fields",
+            "missingFields": ["inputs.sequenceData", "inputs.annotationFile"],
+            "executionArn": EXECUTION_ARN,
+        }
+    )
+    assert result['commentAdded'] is True
+
+
+# Validate draft data
+def test_post_schema_validation(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    result = run_handler_benchmark(
+        "post_schema_validation", fake_backend,
+        {
+            "workflowRunId": fake_backend.dataset.workflow_run['orcabusId'],
+            "executionArn": EXECUTION_ARN,
+            "data": fake_backend.dataset.get_payload_data(),
+        }
+    )
+    assert result['isValid'] is True
+
+
+# Ready to ICAv2 WES request
+def test_convert_ready_event_inputs_to_icav2_wes_event_inputs(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    result = run_handler_benchmark(
+        "convert_ready_event_inputs_to_icav2_wes_event_inputs", fake_backend,
+        {"inputs": fake_backend.dataset.get_payload_data()['inputs']}
+    )
+    assert "reference" in result['inputs']
+
+
+# ICAv2 WES events to workflow run updates
+def test_convert_icav2_wes_event_to_wru_event(fake_backend_factory, run_handler_benchmark, lane_count):
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    result = run_handler_benchmark(
+        "convert_icav2_wes_event_to_wru_event", fake_backend,
+        {"icav2WesStateChangeEvent": get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED")}
+    )
+    assert result['workflowRunUpdateEvent']['payload']['data']['outputs']
+
+
+def test_put_icav2_wes_wru_events(fake_backend_factory, run_handler_benchmark, library_count):
+    """
+    A batch of RUNNING, SUCCEEDED and a late RUNNING event for library_count workflow runs
+    """
+    fake_backend = fake_backend_factory()
+    portal_run_ids = list(map(lambda run_index_iter_: f"20261019abcd{run_index_iter_:04d}", range(library_count)))
+    result = run_handler_benchmark(
+        "put_icav2_wes_wru_events", fake_backend,
+        {
+            "Records": [
+                {
+                    "messageId": f"{portal_run_id}-{status_index}",
+                    "body": json.dumps({"detail": get_icav2_wes_event(portal_run_id, status)}),
+                }
+                for portal_run_id in portal_run_ids
+                for status_index, status in enumerate(("RUNNING", "SUCCEEDED", "RUNNING"))
+            ]
+        },
+    )
+    assert result['batchItemFailures'] == []
+    assert result['putEventCount'] == library_count
+
+
+def test_add_wes_failure_comment(fake_backend_factory, run_handler_benchmark):
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "add_wes_failure_comment", fake_backend,
+        {
+            "errorType": "RuntimeError",
+            "errorMessageUri": f"s3://{TEST_DATA_BUCKET}/logs/{PORTAL_RUN_ID}/error.log",
+            "portalRunId": PORTAL_RUN_ID,
+            "executionArn": EXECUTION_ARN,
+        }
+    )
+    assert result['status'] == "comment_added"
+
+
+# Comment outbox
+def test_drain_comment_outbox(fake_backend_factory, run_handler_benchmark, library_count):
+    """
+    Two outbox messages for each of library_count workflow runs
+    """
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "drain_comment_outbox", fake_backend,
+        {
+            "Records": [
+                {
+                    "messageId": f"{run_index}-{message_index}",
+                    "receiptHandle": f"{run_index}-{message_index}",
+                    "body": json.dumps({
+                        "workflowRunId": f"wfr.01K7XBENCHMARKRUN{run_index:08d}",
+                        "author": "dragen-wgts-rna-populate-draft-data-service",
+                        "executionArn": EXECUTION_ARN,
+                        "messages": [f"Comment {message_index}"],
+                        "enqueuedAt": time(),
+                    }),
+                    "attributes": {"ApproximateReceiveCount": "1"},
+                }
+                for run_index in range(library_count)
+                for message_index in range(2)
+            ]
+        }
+    )
+    assert result['batchItemFailures'] == []
+
+
+# Draft population scheduling
+def test_schedule_draft_population(fake_backend_factory, run_handler_benchmark, library_count):
+    """
+    A draft for each of library_count libraries of the same instrument run, in one batch
+    """
+    fake_backend = fake_backend_factory(library_count=library_count)
+    result = run_handler_benchmark(
+        "schedule_draft_population", fake_backend,
+        {
+            "Records": [
+                {
+                    "messageId": str(library_index),
+                    "receiptHandle": str(library_index),
+                    "body": json.dumps({
+                        "id": f"7bf73129-1428-4cd3-a780-{library_index:012d}",
+                        "detail-type": "WorkflowRunStateChange",
+                        "detail": fake_backend.dataset.get_library_draft_detail(library_index),
+                    }),
+                }
+                for library_index in range(library_count)
+            ]
+        }
+    )
+    assert result['batchItemFailures'] == []
+    assert result['startedExecutionCount'] == library_count
+    assert sum(result['draftCountByInstrumentRun'].values()) == library_count
+
+
+# Lambda router
+def test_lambda_router(fake_backend_factory, run_handler_benchmark):
+    """
+    get_metadata_tags through the lambda router, to compare with test_get_metadata_tags
+    """
+    fake_backend = fake_backend_factory()
+    result = run_handler_benchmark(
+        "lambda_router", fake_backend,
+        {"action": "get_metadata_tags", "event": {"libraryId": fake_backend.dataset.libraries[0]['libraryId']}}
+    )
+    assert result['tags']['subjectId'] == fake_backend.dataset.libraries[0]['subject']['subjectId']
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+
+"""
+The local step functions executor, and end-to-end benchmarks of the state machines it runs
+"""
+
+# Standard imports
+import json
+from os import environ
+from typing import Any, Dict, List, Optional, Tuple
+
+# Test imports
+import pytest
+
+# Local imports
+from fakes import WORKFLOW_VERSION
+from harness import load_handler_module, reset_container_state
+from local_sfn import (
+    PLACEHOLDER_REGEX,
+    LocalStateMachine,
+    get_default_execution_input,
+    get_lambda_names,
+    get_local_state_machine,
+    get_template_names,
+    load_state_machine_definition,
+)
+
+
+def test_templates_are_fully_substituted():
+    for template_name in get_template_names():
+        definition = load_state_machine_definition(template_name)
+        assert not PLACEHOLDER_REGEX.search(json.dumps(definition)), template_name
+
+
+@pytest.mark.parametrize("template_name", get_template_names())
+def test_templates_run(fake_backend_factory, template_name):
+    fake_backend = fake_backend_factory(lane_count=2)
+    execution_result = get_local_state_machine(template_name, fake_backend).start_execution(
+        get_default_execution_input(template_name, fake_backend.dataset)
+    )
+    assert execution_result.status == "SUCCEEDED", execution_result.cause
+    assert len(execution_result.events) == 1
+
+
+def test_retry_catch_and_parallel_timeline():
+    attempts = []
+
+    def flaky_handler(event, context):
+        attempts.append(event)
+        if len(attempts) < 3:
+            raise ConnectionError("Try again")
+        return {"value": event['value'] * 2}
+
+    def failing_handler(event, context):
+        raise ValueError("Bad input")
+
+    def lambda_task(function_name: str, retry_errors, **transition):
+        return {
+            "Type": "Task",
+            "Resource": "arn:aws:states:::lambda:invoke",
+            "Arguments": {"FunctionName": function_name, "Payload": {"value": "{% $states.input.value %}"}},
+            "Retry": [{"ErrorEquals": retry_errors, "IntervalSeconds": 1, "MaxAttempts": 3, "BackoffRate": 2}],
+            "Output": "{% $states.result.Payload %}",
+            **(transition or {"End": True}),
+        }
+
+    state_machine = LocalStateMachine(
+        name="retry_catch_parallel",
+        definition={
+            "QueryLanguage": "JSONata",
+            "StartAt": "Both",
+            "States": {
+                "Both": {
+                    "Type": "Parallel",
+                    "Branches": [
+                        {"StartAt": "Flaky", "States": {"Flaky": lambda_task("flaky", ["ConnectionError"])}},
+                        {
+                            "StartAt": "Failing",
+                            "States": {
+                                "Failing": lambda_task(
+                                    "failing", ["ConnectionError"],
+                                    Catch=[{
+                                        "ErrorEquals": ["States.TaskFailed"],
+                                        "Output": {"error": "{% $states.errorOutput.Error %}"},
+                                        "Next": "Recovered",
+                                    }],
+                                    End=True,
+                                ),
+                                "Recovered": {"Type": "Pass", "End": True},
+                            },
+                        },
+                    ],
+                    "Assign": {"results": "{% $states.result %}"},
+                    "Next": "Done",
+                },
+                "Done": {"Type": "Pass", "Output": "{% $results %}", "End": True},
+            },
+        },
+        lambda_handlers={"flaky": flaky_handler, "failing": failing_handler},
+    )
+
+    execution_result = state_machine.start_execution({"value": 21})
+
+    assert execution_result.status == "SUCCEEDED"
+    assert execution_result.output == [{"value": 42}, {"error": "ValueError"}]
+
+    timings_by_path = {timing.path: timing for timing in execution_result.timeline}
+    assert timings_by_path["Both/0/Flaky"].attempts == 3
+    # 1 + 2 seconds of backoff, recorded but not slept
+    assert timings_by_path["Both/0/Flaky"].simulated_delay_seconds == 3
+    assert timings_by_path["Both/1/Failing"].status == "CAUGHT"
+    assert set(timings_by_path) == {"Both", "Both/0/Flaky", "Both/1/Failing", "Both/1/Recovered", "Done"}
+
+
+def test_populate_draft_data_end_to_end(fake_backend_factory, benchmark, lane_count):
+    """
+    The populate draft data state machine, from a draft with tags to the full DRAFT update
+    (the first execution only adds the tags and re-publishes the draft, as in the deployed service)
+    """
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    state_machine = get_local_state_machine("populate_draft_data", fake_backend)
+    tags_execution_result = state_machine.start_execution(
+        get_default_execution_input("populate_draft_data", fake_backend.dataset)
+    )
+    draft_with_tags = json.loads(tags_execution_result.events[0]['Detail'])
+
+    execution_result = benchmark.pedantic(
+        state_machine.start_execution, args=(draft_with_tags,), rounds=5, warmup_rounds=1
+    )
+
+    assert execution_result.status == "SUCCEEDED", execution_result.cause
+    benchmark.extra_info['timeline'] = list(map(lambda timing_iter_: timing_iter_.to_dict(), execution_result.timeline))
+    # After the fastq sync request
+    workflow_run_update = json.loads(execution_result.events[-1]['Detail'])
+    assert len(workflow_run_update['payload']['data']['inputs']['sequenceData']['fastqListRows']) == lane_count
+
+
+def populate_draft(
+        fake_backend, template_name: str, lambda_router: bool = False,
+        engine_parameters: Optional[Dict[str, Any]] = None,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Populate an empty draft (but for the engine parameters given) until nothing changes,
+    i.e. the tags update, the full update, then no change
+    :return: the published events (without their timestamp) and the comments added
+    """
+    for lambda_name in get_lambda_names(load_state_machine_definition(template_name)):
+        reset_container_state(load_handler_module(lambda_name))
+    fake_backend.reset_calls()
+
+    state_machine = get_local_state_machine(template_name, fake_backend, lambda_router=lambda_router)
+    events = []
+    draft = get_default_execution_input(template_name, fake_backend.dataset)
+    if engine_parameters is not None:
+        draft = {**draft, "payload": {"data": {"engineParameters": engine_parameters}}}
+    for _ in range(3):
+        execution_result = state_machine.start_execution(draft)
+        assert execution_result.status == "SUCCEEDED", execution_result.cause
+        if not execution_result.events:
+            break
+        # After the fastq sync request, if there was one
+        draft = json.loads(execution_result.events[-1]['Detail'])
+        events.append({key: value for key, value in draft.items() if key != "timestamp"})
+    return events, list(map(lambda comment_iter_: comment_iter_['comment'].split("\n---\n")[0], fake_backend.comments))
+
+
+def test_populate_draft_data_engines_are_equivalent(fake_backend_factory, lane_count):
+    """
+    The asyncio engine publishes the same DRAFT updates (and comments) as the step functions engine
+    """
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    step_functions_events, step_functions_comments = populate_draft(fake_backend, "populate_draft_data")
+    asyncio_events, asyncio_comments = populate_draft(fake_backend, "populate_draft_data_async")
+
+    # The tags update and the full update, then no change
+    assert len(step_functions_events) == 2
+    assert asyncio_events == step_functions_events
+    assert asyncio_comments == step_functions_comments
+
+    # The fastqs are ora compressed, so both engines add the ora reference
+    assert step_functions_events[-1]['payload']['data']['inputs']['oraReference']
+
+
+def test_populate_draft_data_engines_are_equivalent_without_reference_defaults(fake_backend_factory):
+    """
+    Without reference defaults, both engines leave the reference data out of the draft,
+    and comment on the same missing fields (the reference inputs)
+    """
+    fake_backend = fake_backend_factory(lane_count=2)
+    reference_catalog = fake_backend.dataset.get_reference_catalog()
+    reference_catalog['workflowDefaults'] = {}
+    fake_backend.ssm_parameters[environ["REFERENCE_CATALOG_SSM_PARAMETER_NAME"]] = json.dumps(reference_catalog)
+
+    step_functions_events, step_functions_comments = populate_draft(fake_backend, "populate_draft_data")
+    asyncio_events, asyncio_comments = populate_draft(fake_backend, "populate_draft_data_async")
+
+    assert asyncio_events == step_functions_events
+    assert asyncio_comments == step_functions_comments
+    assert "reference" not in step_functions_events[-1]['payload']['data']['inputs']
+    assert "oraReference" not in step_functions_events[-1]['payload']['data']['inputs']
+    assert "- inputs.reference" in step_functions_comments[-1]
+
+
+def test_populate_draft_data_engines_are_equivalent_with_a_manual_pipeline_id(fake_backend_factory):
+    """
+    A draft with its own pipeline id needs no pipeline id default, both engines keep the draft's pipeline id
+    """
+    fake_backend = fake_backend_factory()
+    del fake_backend.ssm_parameters[f"{environ['PIPELINE_ID_SSM_PARAMETER_PREFIX']}/{WORKFLOW_VERSION}"]
+    engine_parameters = {"pipelineId": "0c1d2e3f-4a5b-4c6d-8e7f-000000000001"}
+
+    step_functions_events, step_functions_comments = populate_draft(
+        fake_backend, "populate_draft_data", engine_parameters=engine_parameters
+    )
+    asyncio_events, asyncio_comments = populate_draft(
+        fake_backend, "populate_draft_data_async", engine_parameters=engine_parameters
+    )
+
+    assert asyncio_events == step_functions_events
+    assert asyncio_comments == step_functions_comments
+    populated_engine_parameters = step_functions_events[-1]['payload']['data']['engineParameters']
+    assert populated_engine_parameters['pipelineId'] == engine_parameters['pipelineId']
+
+
+def test_populate_draft_data_through_the_lambda_router(fake_backend_factory):
+    """
+    The 'router' lambda deployment mode publishes the same DRAFT updates (and comments)
+    """
+    fake_backend = fake_backend_factory(lane_count=2)
+    per_handler_events, per_handler_comments = populate_draft(fake_backend, "populate_draft_data")
+    router_events, router_comments = populate_draft(fake_backend, "populate_draft_data", lambda_router=True)
+
+    assert len(per_handler_events) == 2
+    assert router_events == per_handler_events
+    assert router_comments == per_handler_comments
+
+
+def test_populate_draft_data_with_offloaded_fastq_list_rows(fake_backend_factory, monkeypatch):
+    """
+    Offloading the fastq list rows to the claim check store publishes the same DRAFT updates (and comments),
+    and the rows are stored once, whichever container offloads them
+    """
+    fake_backend = fake_backend_factory(lane_count=8)
+    events, comments = populate_draft(fake_backend, "populate_draft_data")
+    assert not fake_backend.s3_objects
+
+    monkeypatch.setenv("CLAIM_CHECK_THRESHOLD_BYTES", "1024")
+    for _ in range(2):
+        offloaded_events, offloaded_comments = populate_draft(fake_backend, "populate_draft_data")
+        assert offloaded_events == events
+        assert offloaded_comments == comments
+    assert len(fake_backend.s3_objects) == 1
+
+
+def test_populate_draft_data_async_end_to_end(fake_backend_factory, benchmark, lane_count):
+    """
+    The asyncio engine, from a draft with tags to the full DRAFT update (see test_populate_draft_data_end_to_end)
+    """
+    fake_backend = fake_backend_factory(lane_count=lane_count)
+    state_machine = get_local_state_machine("populate_draft_data_async", fake_backend)
+    tags_execution_result = state_machine.start_execution(
+        get_default_execution_input("populate_draft_data_async", fake_backend.dataset)
+    )
+    draft_with_tags = json.loads(tags_execution_result.events[0]['Detail'])
+
+    execution_result = benchmark.pedantic(
+        state_machine.start_execution, args=(draft_with_tags,), rounds=5, warmup_rounds=1
+    )
+
+    assert execution_result.status == "SUCCEEDED", execution_result.cause
+    benchmark.extra_info['timeline'] = list(map(lambda timing_iter_: timing_iter_.to_dict(), execution_result.timeline))
+    workflow_run_update = json.loads(execution_result.events[-1]['Detail'])
+    assert len(workflow_run_update['payload']['data']['inputs']['sequenceData']['fastqListRows']) == lane_count
+
+
+def populate_library_drafts(fake_backend, scheduled: bool) -> List[List[Dict[str, Any]]]:
+    """
+    Populate the draft of every library of the dataset until nothing changes,
+    either each draft on its own, or the drafts of each iteration in one batch through the scheduler
+    :return: the published events of each library (without their timestamp)
+    """
+    scheduler_module = load_handler_module("schedule_draft_population")
+    for module in [
+        scheduler_module,
+        *map(load_handler_module, get_lambda_names(load_state_machine_definition("populate_draft_data")))
+    ]:
+        reset_container_state(module)
+    fake_backend.reset_calls()
+    fake_backend.executions.clear()
+
+    state_machine = get_local_state_machine("populate_draft_data", fake_backend)
+    library_count = len(fake_backend.dataset.libraries)
+    events_by_library: List[List[Dict[str, Any]]] = [[] for _ in range(library_count)]
+    drafts_by_library = dict(map(
+        lambda library_index_iter_: (library_index_iter_, fake_backend.dataset.get_library_draft_detail(library_index_iter_)),
+        range(library_count)
+    ))
+    for iteration in range(3):
+        if scheduled:
+            # The drafts of the iteration arrive in one batch, the scheduler starts their executions
+            result = scheduler_module.handler(
+                {
+                    "Records": [
+                        {
+                            "messageId": f"{library_index}-{iteration}",
+                            "body": json.dumps({
+                                "id": f"7bf73129-1428-4cd3-a780-{iteration:04d}{library_index:08d}",
+                                "detail": draft,
+                            }),
+                        }
+                        for library_index, draft in drafts_by_library.items()
+                    ]
+                },
+                None
+            )
+            assert result['batchItemFailures'] == []
+            assert list(result['draftCountByInstrumentRun'].values()) == [len(drafts_by_library)]
+            execution_inputs = list(map(
+                lambda execution_iter_: json.loads(execution_iter_['input']),
+                list(fake_backend.executions.values())[-len(drafts_by_library):]
+            ))
+        else:
+            execution_inputs = list(drafts_by_library.values())
+
+        next_drafts_by_library = {}
+        for library_index, execution_input in zip(list(drafts_by_library.keys()), execution_inputs):
+            execution_result = state_machine.start_execution(execution_input)
+            assert execution_result.status == "SUCCEEDED", execution_result.cause
+            if not execution_result.events:
+                continue
+            draft = json.loads(execution_result.events[-1]['Detail'])
+            events_by_library[library_index].append({key: value for key, value in draft.items() if key != "timestamp"})
+            next_drafts_by_library[library_index] = draft
+        drafts_by_library = next_drafts_by_library
+        if not drafts_by_library:
+            break
+    return events_by_library
+
+
+def test_populate_draft_data_scheduled_by_instrument_run(fake_backend_factory):
+    """
+    Drafts scheduled by instrument run publish the same DRAFT updates,
+    from one bulk fastq call for the instrument run rather than a call per rgid
+    """
+    fake_backend = fake_backend_factory(library_count=8, lane_count=2)
+    per_draft_events = populate_library_drafts(fake_backend, scheduled=False)
+    scheduled_events = populate_library_drafts(fake_backend, scheduled=True)
+
+    # The tags update and the full update of each library, then no change
+    assert list(map(len, per_draft_events)) == [2] * 8
+    assert scheduled_events == per_draft_events
+    assert fake_backend.calls['fastq.get_fastqs_in_instrument_run_id'] == 1
+    assert fake_backend.calls['fastq.get_fastq_by_rgid'] == 0
+    assert fake_backend.calls['stepfunctions.StartExecution'] == 8 * 3
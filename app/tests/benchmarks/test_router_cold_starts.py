@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+The lambda router, and the cold start comparison of the lambda deployment modes over a replayed event mix
+"""
+
+# Standard imports
+import json
+from time import monotonic
+from types import SimpleNamespace
+
+# Test imports
+import pytest
+
+# Local imports
+from fakes import FakeBackend, SyntheticDataset, set_fake_backend
+from harness import get_default_handler_event, load_handler_module, reset_container_state
+from local_sfn import get_local_lambda_arn
+from router_cold_starts import (
+    Invocation,
+    format_report_text,
+    get_cold_start_report,
+    get_synthetic_invocations,
+)
+
+
+def get_alias_context(lambda_name: str) -> SimpleNamespace:
+    return SimpleNamespace(
+        function_name="lambda_router",
+        invoked_function_arn=f"{get_local_lambda_arn('lambda_router')}:{lambda_name}",
+        get_remaining_time_in_millis=lambda: 60000,
+    )
+
+
+def test_router_routes_by_alias_and_action(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    lambda_router = load_handler_module("lambda_router")
+    reset_container_state(lambda_router)
+    event = get_default_handler_event("get_metadata_tags", fake_backend.dataset)
+    expected_result = load_handler_module("get_metadata_tags").handler(event, None)
+
+    assert lambda_router.handler({"action": "get_metadata_tags", "event": event}, None) == expected_result
+    assert lambda_router.handler(event, get_alias_context("get_metadata_tags")) == expected_result
+
+    # The event of invalidate_library_cache has an action of its own, it is routed by the alias
+    invalidate_event = get_default_handler_event("invalidate_library_cache", fake_backend.dataset)
+    lambda_router.handler(invalidate_event, get_alias_context("invalidate_library_cache"))
+    with pytest.raises(ValueError):
+        lambda_router.handler(invalidate_event, None)
+
+
+def test_router_handler_timeout(monkeypatch, capsys):
+    dataset = SyntheticDataset()
+    set_fake_backend(FakeBackend(dataset, latency_seconds=0.2))
+    lambda_router = load_handler_module("lambda_router")
+    reset_container_state(lambda_router)
+    monkeypatch.setenv("ROUTED_HANDLER_TIMEOUT_SECONDS", json.dumps({"get_fastq_rgids_from_library_id": 0.05}))
+    monkeypatch.setenv("DEPENDENCY_INSTRUMENTATION", "emf")
+    try:
+        # The handler is not interrupted (the Lambda timeout of the alias is), its overrun is logged
+        lambda_router.handler(
+            get_default_handler_event("get_fastq_rgids_from_library_id", dataset),
+            get_alias_context("get_fastq_rgids_from_library_id")
+        )
+    finally:
+        set_fake_backend(None)
+
+    routed_invocation_record = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+    assert routed_invocation_record['RecordType'] == "RoutedInvocation"
+    assert routed_invocation_record['LambdaName'] == "get_fastq_rgids_from_library_id"
+    assert routed_invocation_record['RoutedTimeouts'] == 1
+    assert routed_invocation_record['Error'] is None
+
+
+def test_routed_context():
+    lambda_router = load_handler_module("lambda_router")
+    routed_context = lambda_router.RoutedContext(
+        SimpleNamespace(function_name="router", aws_request_id="0", get_remaining_time_in_millis=lambda: 60000),
+        "get_libraries",
+        deadline=None,
+    )
+    assert routed_context.function_name == "router:get_libraries"
+    assert routed_context.aws_request_id == "0"
+    assert routed_context.get_remaining_time_in_millis() == 60000
+
+    # The remaining time is capped at the handler's own timeout
+    routed_context = lambda_router.RoutedContext(
+        SimpleNamespace(function_name="router", get_remaining_time_in_millis=lambda: 60000),
+        "get_libraries",
+        deadline=monotonic() + 10,
+    )
+    assert 9000 < routed_context.get_remaining_time_in_millis() <= 10000
+
+
+def test_cold_start_report():
+    invocations = [
+        # Each lambda is idle for over 15 minutes between invocations, the router for at most 15 minutes
+        Invocation("get_libraries", 0, 1),
+        Invocation("get_metadata_tags", 600, 601),
+        Invocation("get_libraries", 1400, 1401),
+        # Concurrent invocations need an environment each
+        Invocation("get_libraries", 1400.5, 1410),
+        Invocation("get_metadata_tags", 1600, 1601),
+    ]
+
+    cold_start_report = get_cold_start_report(invocations, idle_minutes=15)
+
+    assert cold_start_report['deploymentModes']['perHandler']['coldStarts'] == 5
+    assert cold_start_report['deploymentModes']['router'] == {
+        "functions": 1,
+        "coldStarts": 2,
+        "coldStartRate": 0.4,
+        "coldStartsByLambda": {"get_libraries": 2},
+    }
+    assert "router" in format_report_text(cold_start_report)
+
+
+def test_router_cold_starts_under_synthetic_event_mix(fake_backend_factory, benchmark):
+    fake_backend = fake_backend_factory()
+    invocations = get_synthetic_invocations(fake_backend, workflow_run_count=50, arrival_interval_minutes=30)
+
+    cold_start_report = benchmark.pedantic(get_cold_start_report, args=(invocations,), rounds=3, warmup_rounds=1)
+
+    benchmark.extra_info['coldStartReport'] = cold_start_report
+    per_handler_report = cold_start_report['deploymentModes']['perHandler']
+    router_report = cold_start_report['deploymentModes']['router']
+    assert router_report['functions'] == 1
+    assert router_report['coldStartRate'] < per_handler_report['coldStartRate']
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests of the lambdas and the layer.
+
+The handlers and the layer modules run in-process against the fake backends of the handler
+benchmarks (app/tests/benchmarks/fakes.py and harness.py), so no AWS or OrcaBus access is needed.
+Unlike the benchmarks, every test runs once, at a single size and without injected latency.
+"""
+
+# Standard imports
+import sys
+from pathlib import Path
+from typing import Callable
+
+# Test imports
+import pytest
+
+# Globals
+BENCHMARKS_DIR = Path(__file__).parent.parent / "benchmarks"
+
+# The fakes and the harness are shared with the benchmarks
+sys.path.insert(0, str(BENCHMARKS_DIR))
+
+# Local imports
+from fakes import FakeBackend, SyntheticDataset, fake_boto3_client, set_fake_backend  # noqa: E402
+from harness import set_up_lambda_environment  # noqa: E402
+
+
+def pytest_configure(config):
+    set_up_lambda_environment()
+
+
+@pytest.fixture(autouse=True)
+def fake_boto3(monkeypatch):
+    import boto3
+    monkeypatch.setattr(boto3, "client", fake_boto3_client)
+
+
+@pytest.fixture
+def fake_backend_factory() -> Callable[..., FakeBackend]:
+    """
+    Build the synthetic dataset and make its fake backend current
+    """
+
+    def make_fake_backend(library_count: int = 1, lane_count: int = 1) -> FakeBackend:
+        fake_backend = FakeBackend(SyntheticDataset(library_count=library_count, lane_count=lane_count))
+        set_fake_backend(fake_backend)
+        return fake_backend
+
+    yield make_fake_backend
+    set_fake_backend(None)
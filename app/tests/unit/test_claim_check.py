@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+
+"""
+The claim check store, offloading large payload sections and rehydrating them, against the fake S3
+"""
+
+# Standard imports
+from hashlib import sha256
+
+# Test imports
+import pytest
+
+# Local imports
+from fakes import CLAIM_CHECK_BUCKET
+
+
+def test_offload_and_rehydrate(fake_backend_factory, monkeypatch):
+    from dragen_wgts_rna_tools.claim_check import (
+        LocalClaimCheckStore,
+        is_claim_check,
+        offload,
+        rehydrate,
+        set_claim_check_store,
+    )
+
+    fake_backend = fake_backend_factory(library_count=2, lane_count=4)
+    fastq_list_rows = list(map(fake_backend.dataset.get_fastq_list_row, fake_backend.dataset.fastqs))
+    claim_check_store = LocalClaimCheckStore()
+    set_claim_check_store(claim_check_store)
+    try:
+        # Small sections stay in place
+        assert offload(fastq_list_rows, threshold_bytes=1024 * 1024) == fastq_list_rows
+
+        reference = offload(fastq_list_rows, summary={"hasOraFastqs": True}, threshold_bytes=1024)
+        assert is_claim_check(reference)
+        assert reference['summary'] == {"hasOraFastqs": True}
+        assert reference['claimCheck']['sizeBytes'] > 1024
+        # References are not offloaded again
+        assert offload(reference, threshold_bytes=0) == reference
+
+        # The same rows, whatever their key order, are stored once
+        reordered_reference = offload(
+            list(map(lambda row_iter_: dict(reversed(list(row_iter_.items()))), fastq_list_rows)),
+            threshold_bytes=1024
+        )
+        assert reordered_reference['claimCheck'] == reference['claimCheck']
+        assert len(claim_check_store) == 1
+        assert claim_check_store.deduplicated_count == 1
+
+        event = {"payload": {"data": {"inputs": {"sequenceData": {"fastqListRows": reference}}}}}
+        assert rehydrate(event)['payload']['data']['inputs']['sequenceData']['fastqListRows'] == fastq_list_rows
+    finally:
+        set_claim_check_store(None)
+
+    # Nothing is offloaded without a store
+    monkeypatch.delenv("CLAIM_CHECK_BUCKET_NAME")
+    assert offload(fastq_list_rows, threshold_bytes=0) == fastq_list_rows
+    set_claim_check_store(None)
+
+
+def test_s3_claim_check_store_deduplicates_across_containers(fake_backend_factory):
+    from dragen_wgts_rna_tools.claim_check import S3ClaimCheckStore, to_canonical_json
+
+    fake_backend = fake_backend_factory(lane_count=8)
+    fastq_list_rows = list(map(fake_backend.dataset.get_fastq_list_row, fake_backend.dataset.fastqs))
+    body = to_canonical_json(fastq_list_rows)
+
+    # The container that put the rows does not put them again (or read them back)
+    first_container_store = S3ClaimCheckStore(CLAIM_CHECK_BUCKET)
+    claim_check = first_container_store.put(body)
+    first_container_store.put(body)
+    assert first_container_store.get(claim_check) == fastq_list_rows
+    assert fake_backend.calls['s3.PutObject'] == 1
+    assert fake_backend.calls['s3.GetObject'] == 0
+    assert claim_check['uri'] == (
+        f"s3://{CLAIM_CHECK_BUCKET}/claim-check/sha256/{claim_check['sha256'][:2]}/{claim_check['sha256']}.json"
+    )
+
+    # Another container's conditional put finds the rows already stored, then reads them once
+    second_container_store = S3ClaimCheckStore(CLAIM_CHECK_BUCKET)
+    assert second_container_store.put(body) == claim_check
+    assert second_container_store.deduplicated_count == 1
+    assert len(fake_backend.s3_objects) == 1
+
+    third_container_store = S3ClaimCheckStore(CLAIM_CHECK_BUCKET)
+    assert third_container_store.get(claim_check) == fastq_list_rows
+    assert third_container_store.get(claim_check) == fastq_list_rows
+    assert fake_backend.calls['s3.GetObject'] == 1
+
+    # Objects that do not match their claim check are not rehydrated
+    bucket_key = (CLAIM_CHECK_BUCKET, claim_check['uri'].split(f"{CLAIM_CHECK_BUCKET}/", 1)[-1])
+    fake_backend.s3_objects[bucket_key] = body.replace(b"L001", b"L002")
+    with pytest.raises(ValueError):
+        S3ClaimCheckStore(CLAIM_CHECK_BUCKET).get(claim_check)
+    assert sha256(body).hexdigest() == claim_check['sha256']
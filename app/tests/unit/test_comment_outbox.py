@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+The comment outbox and its drainer, against the fake backends
+"""
+
+# Standard imports
+import json
+
+# Local imports
+from harness import HANDLER_EXECUTION_ARN, load_handler_module, reset_container_state
+
+# Globals
+WORKFLOW_RUN_ID = "wfr.01K7XCOMMENTSRUN00000000"
+OTHER_WORKFLOW_RUN_ID = "wfr.01K7XCOMMENTSRUN00000001"
+AUTHOR = "dragen-wgts-rna-populate-draft-data-service"
+
+
+def test_sqs_outbox_sends_in_batches_of_ten(fake_backend_factory):
+    from dragen_wgts_rna_tools.comment_outbox import SqsCommentOutbox, build_outbox_message
+
+    fake_backend = fake_backend_factory()
+    queue_url = "https://sqs.ap-southeast-2.amazonaws.com/123456789012/commentOutboxQueue"
+    outbox = SqsCommentOutbox(queue_url)
+    outbox.enqueue([
+        build_outbox_message(f"wfr.{run_index:026d}", AUTHOR, HANDLER_EXECUTION_ARN, ["Draft populated"])
+        for run_index in range(12)
+    ])
+    assert fake_backend.calls['sqs.SendMessageBatch'] == 2
+    assert len(fake_backend.sqs_messages[queue_url]) == 12
+
+    outbox.delay("receipt-handle", 30)
+    assert fake_backend.sqs_visibility_timeouts == {"receipt-handle": 30}
+
+
+def get_drainer_module(monkeypatch):
+    module = load_handler_module("drain_comment_outbox")
+    reset_container_state(module)
+    # No need to wait between the delivery attempts
+    monkeypatch.setattr(module, "sleep", lambda seconds: None)
+    return module
+
+
+def enqueue_comments(comment_outbox) -> None:
+    from dragen_wgts_rna_tools.comments import CommentWriter
+
+    for message in ("First message", "Second message"):
+        with CommentWriter(author=AUTHOR, execution_arn=HANDLER_EXECUTION_ARN) as comment_writer:
+            comment_writer.add(WORKFLOW_RUN_ID, message)
+            comment_writer.add(OTHER_WORKFLOW_RUN_ID, message)
+    assert len(comment_outbox) == 4
+
+
+def test_drainer_retries_and_reports_failed_groups(fake_backend_factory, monkeypatch):
+    from dragen_wgts_rna_tools.comment_outbox import LocalCommentOutbox, set_comment_outbox
+
+    fake_backend = fake_backend_factory()
+    module = get_drainer_module(monkeypatch)
+    comment_outbox = LocalCommentOutbox()
+    set_comment_outbox(comment_outbox)
+    try:
+        enqueue_comments(comment_outbox)
+        # Nothing is written until the outbox is drained
+        assert fake_backend.comments == []
+
+        # Comments on one workflow run fail on every attempt, the other fails once then succeeds
+        add_comment_to_workflow_run = fake_backend.add_comment_to_workflow_run
+        attempts = {WORKFLOW_RUN_ID: 0, OTHER_WORKFLOW_RUN_ID: 0}
+
+        def flaky_add_comment_to_workflow_run(workflow_run_orcabus_id: str, comment: str, author: str):
+            attempts[workflow_run_orcabus_id] += 1
+            if workflow_run_orcabus_id == WORKFLOW_RUN_ID or attempts[workflow_run_orcabus_id] == 1:
+                raise ConnectionError("Workflow manager unavailable")
+            return add_comment_to_workflow_run(workflow_run_orcabus_id, comment, author)
+
+        monkeypatch.setattr(fake_backend, "add_comment_to_workflow_run", flaky_add_comment_to_workflow_run)
+
+        records = comment_outbox.receive()
+        result = module.handler({"Records": records}, None)
+
+        assert attempts == {WORKFLOW_RUN_ID: module.DELIVERY_ATTEMPTS, OTHER_WORKFLOW_RUN_ID: 2}
+        assert sorted(map(lambda failure_iter_: failure_iter_['itemIdentifier'], result['batchItemFailures'])) == sorted(
+            record_iter_['messageId'] for record_iter_ in records
+            if json.loads(record_iter_['body'])['workflowRunId'] == WORKFLOW_RUN_ID
+        )
+        assert list(result['deliveryLagSeconds'].keys()) == [OTHER_WORKFLOW_RUN_ID]
+
+        # The two messages of the delivered group were coalesced into one comment, and acknowledged
+        assert len(fake_backend.comments) == 1
+        assert "First message" in fake_backend.comments[0]['comment']
+        assert "Second message" in fake_backend.comments[0]['comment']
+        assert len(comment_outbox) == 2
+
+        # The failed messages are hidden for the redelivery backoff
+        assert comment_outbox.receive() == []
+    finally:
+        set_comment_outbox(None)
+
+
+def test_drainer_reports_invalid_messages_on_their_own(fake_backend_factory, monkeypatch):
+    from dragen_wgts_rna_tools.comment_outbox import LocalCommentOutbox, set_comment_outbox
+
+    fake_backend = fake_backend_factory()
+    module = get_drainer_module(monkeypatch)
+    comment_outbox = LocalCommentOutbox()
+    set_comment_outbox(comment_outbox)
+    try:
+        enqueue_comments(comment_outbox)
+        # An outbox message without an author, and a body that is not JSON
+        comment_outbox.enqueue([{"workflowRunId": WORKFLOW_RUN_ID, "messages": ["No author"]}])
+        records = [
+            *comment_outbox.receive(),
+            {"messageId": "not-json", "receiptHandle": "not-json", "body": "{\"workflowRunId\": "},
+        ]
+        # The outbox message without an author was received last
+        invalid_message_ids = [records[-2]['messageId'], "not-json"]
+
+        result = module.handler({"Records": records}, None)
+
+        # The valid messages are delivered, only the invalid ones are reported
+        assert sorted(map(lambda failure_iter_: failure_iter_['itemIdentifier'], result['batchItemFailures'])) == sorted(
+            invalid_message_ids
+        )
+        assert len(fake_backend.comments) == 2
+        assert len(comment_outbox) == 1
+    finally:
+        set_comment_outbox(None)
+
+
+def test_drainer_redelivery_backoff():
+    module = load_handler_module("drain_comment_outbox")
+    assert list(map(module.get_redelivery_backoff_seconds, (1, 2, 3, 10))) == [
+        module.REDELIVERY_BACKOFF_BASE_SECONDS,
+        module.REDELIVERY_BACKOFF_BASE_SECONDS * 2,
+        module.REDELIVERY_BACKOFF_BASE_SECONDS * 4,
+        module.REDELIVERY_BACKOFF_MAX_SECONDS,
+    ]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+"""
+The comment writer (dedup and coalescing), against the fake backends
+"""
+
+# Local imports
+from harness import HANDLER_EXECUTION_ARN
+
+# Globals
+WORKFLOW_RUN_ID = "wfr.01K7XCOMMENTSRUN00000000"
+OTHER_WORKFLOW_RUN_ID = "wfr.01K7XCOMMENTSRUN00000001"
+AUTHOR = "dragen-wgts-rna-populate-draft-data-service"
+
+
+def test_comments_are_deduplicated_within_the_window(fake_backend_factory, monkeypatch):
+    from dragen_wgts_rna_tools import state_store
+    from dragen_wgts_rna_tools.comments import CommentWriter
+
+    fake_backend = fake_backend_factory()
+    local_state_store = state_store.LocalStateStore()
+
+    def write(body: str) -> list:
+        comment_writer = CommentWriter(
+            author=AUTHOR, dedup_window_seconds=60, state_store=local_state_store, use_outbox=False
+        )
+        comment_writer.add(WORKFLOW_RUN_ID, body)
+        return comment_writer.flush()
+
+    assert write("No change, missing fields") == [WORKFLOW_RUN_ID]
+    # Within the window the same body is skipped, another body is not
+    assert write("No change, missing fields") == []
+    assert write("Draft populated") == [WORKFLOW_RUN_ID]
+    assert len(fake_backend.comments) == 2
+
+    # Once the window has passed, the body is posted again
+    now = state_store.time()
+    monkeypatch.setattr(state_store, "time", lambda: now + 61)
+    assert write("No change, missing fields") == [WORKFLOW_RUN_ID]
+    assert len(fake_backend.comments) == 3
+
+
+def test_comments_are_coalesced_per_workflow_run(fake_backend_factory):
+    from dragen_wgts_rna_tools.comments import MESSAGE_SEPARATOR, CommentWriter
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory()
+    with CommentWriter(
+            author=AUTHOR, execution_arn=HANDLER_EXECUTION_ARN, state_store=LocalStateStore(), use_outbox=False
+    ) as comment_writer:
+        comment_writer.add(WORKFLOW_RUN_ID, "First message")
+        comment_writer.add(OTHER_WORKFLOW_RUN_ID, "Other message")
+        comment_writer.add(WORKFLOW_RUN_ID, "Second message")
+        # Repeats within the writer are dropped
+        comment_writer.add(WORKFLOW_RUN_ID, "First message")
+
+    # One call per workflow run, in order of the first message
+    assert fake_backend.calls['workflow.add_comment_to_workflow_run'] == 2
+    assert list(map(lambda comment_iter_: comment_iter_['workflowRunId'], fake_backend.comments)) == [
+        WORKFLOW_RUN_ID, OTHER_WORKFLOW_RUN_ID
+    ]
+    assert fake_backend.comments[0]['comment'].startswith(MESSAGE_SEPARATOR.join(["First message", "Second message"]))
+    assert fake_backend.comments[0]['comment'].endswith(f"Step Functions Execution: {HANDLER_EXECUTION_ARN}")
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+The draft population helpers shared by the populate draft data lambdas
+"""
+
+# Standard imports
+import json
+from os import environ
+
+# Test imports
+import pytest
+
+# Local imports
+from fakes import PORTAL_RUN_ID, WORKFLOW_VERSION
+from harness import load_handler_module, reset_container_state
+
+
+@pytest.mark.parametrize(
+    "parameter_name_env_var",
+    ["DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME", "DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME"]
+)
+def test_missing_engine_parameter_default_fails(fake_backend_factory, parameter_name_env_var):
+    fake_backend = fake_backend_factory()
+    module = load_handler_module("resolve_default_parameters")
+    reset_container_state(module)
+    del fake_backend.ssm_parameters[environ[parameter_name_env_var]]
+
+    with pytest.raises(KeyError, match=environ[parameter_name_env_var]):
+        module.handler({"workflowVersion": WORKFLOW_VERSION, "portalRunId": PORTAL_RUN_ID}, None)
+
+
+def test_missing_reference_default_is_omitted(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    module = load_handler_module("resolve_default_parameters")
+    reset_container_state(module)
+
+    # No reference data for the workflow version, the draft has to provide it
+    reference_catalog = fake_backend.dataset.get_reference_catalog()
+    reference_catalog['workflowDefaults'] = {}
+    fake_backend.ssm_parameters[environ["REFERENCE_CATALOG_SSM_PARAMETER_NAME"]] = json.dumps(reference_catalog)
+
+    result = module.handler({"workflowVersion": WORKFLOW_VERSION, "portalRunId": PORTAL_RUN_ID}, None)
+    assert "reference" not in result['defaults']
+    assert result['defaults']['engineParameters']['projectId'] is not None
+
+
+def test_provided_engine_parameter_default_is_not_required(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    module = load_handler_module("resolve_default_parameters")
+    reset_container_state(module)
+
+    # The draft has its own pipeline id, so the workflow version needs no pipeline id default
+    del fake_backend.ssm_parameters[f"{environ['PIPELINE_ID_SSM_PARAMETER_PREFIX']}/{WORKFLOW_VERSION}"]
+
+    result = module.handler({
+        "workflowVersion": WORKFLOW_VERSION,
+        "portalRunId": PORTAL_RUN_ID,
+        "providedEngineParameterKeys": ["pipelineId"],
+    }, None)
+    assert "pipelineId" not in result['defaults']['engineParameters']
+    assert result['defaults']['engineParameters']['projectId'] is not None
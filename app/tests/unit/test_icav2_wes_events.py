@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+ICAv2 WES state change events to workflow run updates, against the fake backends
+"""
+
+# Standard imports
+import json
+
+# Local imports
+from fakes import PORTAL_RUN_ID
+from harness import get_icav2_wes_event, load_handler_module, reset_container_state
+
+# Globals
+ICAV2_ANALYSIS_ID = "b1a2c3d4-0000-4000-8000-000000000001"
+
+
+def get_converter_module():
+    module = load_handler_module("convert_icav2_wes_event_to_wru_event")
+    reset_container_state(module)
+    return module
+
+
+def test_running_event_carries_the_analysis_id(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    module = get_converter_module()
+
+    result = module.handler({"icav2WesStateChangeEvent": get_icav2_wes_event(PORTAL_RUN_ID, "RUNNING")}, None)
+    payload = result['workflowRunUpdateEvent']['payload']
+    assert payload['data']['engineParameters']['analysisId'] == ICAV2_ANALYSIS_ID
+    assert 'outputs' not in payload['data']
+    assert result['workflowRunUpdateEvent']['executionId'] == ICAV2_ANALYSIS_ID
+
+    # Before the analysis is launched there is nothing to add to the payload
+    fake_backend.reset_calls()
+    submitted_event = {**get_icav2_wes_event(PORTAL_RUN_ID, "SUBMITTED"), "icav2AnalysisId": None}
+    result = get_converter_module().handler({"icav2WesStateChangeEvent": submitted_event}, None)
+    assert 'payload' not in result['workflowRunUpdateEvent']
+    assert fake_backend.calls['workflow.get_latest_payload_from_workflow_run'] == 0
+
+
+def get_batch_module():
+    module = load_handler_module("put_icav2_wes_wru_events")
+    reset_container_state(module)
+    return module
+
+
+def get_sqs_record(message_id: str, icav2_wes_event: dict) -> dict:
+    return {
+        "messageId": message_id,
+        "body": json.dumps({"detail-type": "Icav2WesAnalysisStateChange", "detail": icav2_wes_event}),
+    }
+
+
+def test_batch_puts_the_latest_status_of_each_run_in_chunks_of_ten(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    module = get_batch_module()
+    portal_run_ids = list(map(lambda run_index_iter_: f"20261019abcd{run_index_iter_:04d}", range(12)))
+
+    result = module.handler({
+        "Records": [
+            get_sqs_record(f"{portal_run_id}-{status}", get_icav2_wes_event(portal_run_id, status))
+            for portal_run_id in portal_run_ids
+            for status in ("RUNNING", "FAILED")
+        ]
+    }, None)
+
+    assert result['batchItemFailures'] == []
+    assert result['putEventCount'] == 12
+    assert fake_backend.calls['events.PutEvents'] == 2
+    assert list(map(lambda entry_iter_: json.loads(entry_iter_['Detail'])['status'], fake_backend.events)) == (
+        ["FAILED"] * 12
+    )
+    # A failure comment per run
+    assert len(fake_backend.comments) == 12
+
+    # The ledger has seen FAILED, so a late RUNNING event is not put again
+    fake_backend.reset_calls()
+    result = module.handler({
+        "Records": [get_sqs_record("late", get_icav2_wes_event(portal_run_ids[0], "RUNNING"))]
+    }, None)
+    assert result['staleEventCount'] == 1
+    assert fake_backend.calls['events.PutEvents'] == 0
+
+
+def test_batch_reports_the_messages_of_failed_runs(fake_backend_factory, monkeypatch):
+    fake_backend = fake_backend_factory()
+    module = get_batch_module()
+    failing_portal_run_id = "20261019abcd0001"
+
+    # The event bus rejects the WRU event of one run
+    put_events = fake_backend.put_events
+
+    def put_events_rejecting_one_run(Entries, **kwargs):
+        response = put_events(Entries, **kwargs)
+        response['Entries'] = [
+            {"ErrorCode": "InternalFailure", "ErrorMessage": "Rejected"}
+            if json.loads(entry_iter_['Detail'])['portalRunId'] == failing_portal_run_id else result_entry_iter_
+            for entry_iter_, result_entry_iter_ in zip(Entries, response['Entries'])
+        ]
+        return response
+
+    monkeypatch.setattr(fake_backend, "put_events", put_events_rejecting_one_run)
+
+    result = module.handler({
+        "Records": [
+            get_sqs_record("0-RUNNING", get_icav2_wes_event("20261019abcd0000", "RUNNING")),
+            get_sqs_record("1-RUNNING", get_icav2_wes_event(failing_portal_run_id, "RUNNING")),
+            get_sqs_record("1-SUCCEEDED", get_icav2_wes_event(failing_portal_run_id, "SUCCEEDED")),
+            {"messageId": "unparseable", "body": "{"},
+        ]
+    }, None)
+
+    # Every message of the rejected run is redelivered, as is the unparseable message
+    assert sorted(map(lambda failure_iter_: failure_iter_['itemIdentifier'], result['batchItemFailures'])) == [
+        "1-RUNNING", "1-SUCCEEDED", "unparseable",
+    ]
+    assert result['putEventCount'] == 1
+
+    # The rejected run was not recorded in the ledger, so its redelivery is put
+    monkeypatch.setattr(fake_backend, "put_events", put_events)
+    result = module.handler({
+        "Records": [get_sqs_record("1-SUCCEEDED", get_icav2_wes_event(failing_portal_run_id, "SUCCEEDED"))]
+    }, None)
+    assert result['batchItemFailures'] == []
+    assert result['putEventCount'] == 1
+
+
+def test_resubmission_after_failure_is_not_stale():
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+    from dragen_wgts_rna_tools.status_ledger import RunStatusLedger
+
+    run_status_ledger = RunStatusLedger(state_store=LocalStateStore())
+    assert run_status_ledger.record_event(get_icav2_wes_event(PORTAL_RUN_ID, "FAILED"))
+    assert run_status_ledger.is_stale_event(get_icav2_wes_event(PORTAL_RUN_ID, "RUNNING"))
+
+    # The resubmitted run is a new ICAv2 WES analysis
+    resubmitted_event = {
+        **get_icav2_wes_event(PORTAL_RUN_ID, "SUBMITTED"),
+        "id": "iwa.01K7XBENCHMARKANALYSIS01",
+        "icav2AnalysisId": None,
+    }
+    assert not run_status_ledger.is_stale_event(resubmitted_event)
+
+
+def test_event_times_are_compared_as_instants():
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+    from dragen_wgts_rna_tools.status_ledger import RunStatusLedger, get_icav2_wes_event_time
+
+    # The same instant, with and without a timezone
+    assert get_icav2_wes_event_time({"submissionTime": "2026-10-19T00:00:00.5"}) == (
+        get_icav2_wes_event_time({"startTime": "2026-10-19T10:00:00.500+10:00"})
+    )
+
+    # 01:00Z is later than 10:30+10:00 (00:30Z), though it sorts first as a string
+    run_status_ledger = RunStatusLedger(state_store=LocalStateStore())
+    assert run_status_ledger.record_event(get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED", end_time="2026-10-19T01:00:00Z"))
+    assert run_status_ledger.is_stale_event(
+        get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED", end_time="2026-10-19T10:30:00+10:00")
+    )
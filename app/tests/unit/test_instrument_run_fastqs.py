@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+
+"""
+The instrument run fastq cache, answering the rgid lookups of every draft of a run from one bulk call
+"""
+
+
+def test_one_bulk_call_per_instrument_run(fake_backend_factory):
+    from dragen_wgts_rna_tools.instrument_run_fastqs import InstrumentRunFastqCache
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory(library_count=8, lane_count=2)
+    rgid_list = fake_backend.dataset.get_rgid_list()
+    state_store = LocalStateStore()
+
+    # Every library of the run is looked up from the one snapshot
+    instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=state_store)
+    assert instrument_run_fastq_cache.prefetch(fake_backend.dataset.fastqs[0]['instrumentRunId'])
+    for library_index in range(8):
+        library_rgid_list = rgid_list[library_index * 2:(library_index + 1) * 2]
+        fastq_list = instrument_run_fastq_cache.get_fastqs_by_rgid_list(
+            library_rgid_list, required_fields=("qc",)
+        )
+        assert list(map(fake_backend.dataset.get_rgid, fastq_list)) == library_rgid_list
+        assert 'readSet' not in fastq_list[0]
+    assert fake_backend.calls['fastq.get_fastqs_in_instrument_run_id'] == 1
+    assert fake_backend.calls['fastq.get_fastq_by_rgid'] == 0
+    assert instrument_run_fastq_cache.get_metrics()['hits'] == 8
+
+    # Another container reads the persisted snapshot
+    other_instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=state_store)
+    assert other_instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list) == (
+        instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list)
+    )
+    assert other_instrument_run_fastq_cache.get_metrics()['persistentHits'] == 1
+    assert fake_backend.calls['fastq.get_fastqs_in_instrument_run_id'] == 1
+
+
+def test_snapshot_is_refreshed_once(fake_backend_factory):
+    from dragen_wgts_rna_tools.instrument_run_fastqs import InstrumentRunFastqCache
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory(library_count=2, lane_count=2)
+    rgid_list = fake_backend.dataset.get_rgid_list()
+    instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=LocalStateStore())
+
+    # The snapshot was taken before the fastqs were QC'd
+    qc = fake_backend.dataset.fastqs[0]['qc']
+    fake_backend.dataset.fastqs[0]['qc'] = None
+    assert instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list)[0]['qc'] is None
+    fake_backend.dataset.fastqs[0]['qc'] = qc
+    assert instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list, required_fields=("qc",))[0]['qc'] == qc
+    assert instrument_run_fastq_cache.get_metrics()['refreshes'] == 1
+
+    # The snapshot was taken before the fastqs were assigned to a fastq set
+    fastq_set_id = fake_backend.dataset.fastqs[0]['fastqSetId']
+    fake_backend.dataset.fastqs[0]['fastqSetId'] = None
+    instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=LocalStateStore())
+    assert instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list)[0]['fastqSetId'] is None
+    fake_backend.dataset.fastqs[0]['fastqSetId'] = fastq_set_id
+    assert instrument_run_fastq_cache.get_fastqs_by_rgid_list(
+        rgid_list, required_fields=("fastqSetId",)
+    )[0]['fastqSetId'] == fastq_set_id
+    assert instrument_run_fastq_cache.get_metrics()['refreshes'] == 1
+
+    # A fastq the instrument run does not list (even once refreshed) is looked up by its rgid
+    unlisted_fastq = fake_backend.dataset.fastqs.pop()
+    fake_backend.reset_calls()
+    instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=LocalStateStore())
+    assert instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list)[-1]['id'] == unlisted_fastq['id']
+    assert dict(fake_backend.calls) == {
+        "fastq.get_fastqs_in_instrument_run_id": 1,
+        "fastq.get_fastq_by_rgid": 1,
+    }
+    assert instrument_run_fastq_cache.get_metrics()['fallbackLookups'] == 1
+
+
+def test_duplicate_rgids_are_looked_up_by_rgid(fake_backend_factory):
+    from dragen_wgts_rna_tools.instrument_run_fastqs import InstrumentRunFastqCache
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory(library_count=2, lane_count=2)
+    rgid_list = fake_backend.dataset.get_rgid_list()
+    state_store = LocalStateStore()
+
+    # The instrument run lists a second fastq for the first rgid
+    fake_backend.dataset.fastqs.append({**fake_backend.dataset.fastqs[0], "id": "fqr.DUPLICATE"})
+    instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=state_store)
+    fastq_list = instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list)
+    assert fastq_list[0]['id'] == fake_backend.dataset.fastqs[0]['id']
+    assert instrument_run_fastq_cache.get_metrics()['duplicateRgids'] == 1
+    assert dict(fake_backend.calls) == {
+        "fastq.get_fastqs_in_instrument_run_id": 1,
+        "fastq.get_fastq_by_rgid": 1,
+    }
+
+    # Another container reads the duplicate from the persisted snapshot, without refreshing it
+    fake_backend.reset_calls()
+    other_instrument_run_fastq_cache = InstrumentRunFastqCache(state_store=state_store)
+    assert other_instrument_run_fastq_cache.get_fastqs_by_rgid_list(rgid_list) == fastq_list
+    assert other_instrument_run_fastq_cache.get_metrics()['refreshes'] == 0
+    assert dict(fake_backend.calls) == {"fastq.get_fastq_by_rgid": 1}
+
+
+def test_large_snapshot_is_offloaded(fake_backend_factory, monkeypatch):
+    from dragen_wgts_rna_tools import instrument_run_fastqs
+    from dragen_wgts_rna_tools.claim_check import LocalClaimCheckStore, is_claim_check, set_claim_check_store
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory(library_count=4, lane_count=4)
+    instrument_run_id = fake_backend.dataset.fastqs[0]['instrumentRunId']
+    monkeypatch.setattr(instrument_run_fastqs, "MAX_PERSISTED_SNAPSHOT_BYTES", 1024)
+    claim_check_store = LocalClaimCheckStore()
+    set_claim_check_store(claim_check_store)
+    try:
+        state_store = LocalStateStore()
+        instrument_run_fastq_cache = instrument_run_fastqs.InstrumentRunFastqCache(state_store=state_store)
+        fastqs_by_rgid = instrument_run_fastq_cache.fetch(instrument_run_id)
+        assert is_claim_check(
+            state_store.get(instrument_run_id, instrument_run_fastqs.INSTRUMENT_RUN_FASTQS_ID_TYPE)['fastqs']
+        )
+        assert len(claim_check_store) == 1
+
+        other_instrument_run_fastq_cache = instrument_run_fastqs.InstrumentRunFastqCache(state_store=state_store)
+        assert other_instrument_run_fastq_cache.get_fastqs_by_rgid_list(
+            list(fastqs_by_rgid.keys())
+        ) == list(fastqs_by_rgid.values())
+        assert fake_backend.calls['fastq.get_fastqs_in_instrument_run_id'] == 1
+    finally:
+        set_claim_check_store(None)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+
+"""
+The library record cache and its invalidation on metadata manager state changes
+"""
+
+# Local imports
+from harness import load_handler_module, reset_container_state
+
+
+def test_invalidation_drops_both_levels(fake_backend_factory):
+    from dragen_wgts_rna_tools.library_cache import LibraryCache
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+
+    fake_backend = fake_backend_factory()
+    library_id = fake_backend.dataset.libraries[0]['libraryId']
+    state_store = LocalStateStore()
+    fetched_library_ids = []
+
+    def fetch(library_id_: str) -> dict:
+        fetched_library_ids.append(library_id_)
+        return {"libraryId": library_id_, "version": len(fetched_library_ids)}
+
+    library_cache = LibraryCache(state_store=state_store)
+    other_library_cache = LibraryCache(state_store=state_store)
+    assert library_cache.get(library_id, fetch)['version'] == 1
+    # Another container reads the persisted record
+    assert other_library_cache.get(library_id, fetch)['version'] == 1
+    assert fetched_library_ids == [library_id]
+
+    library_cache.invalidate(library_id)
+    assert library_cache.get(library_id, fetch)['version'] == 2
+    assert fetched_library_ids == [library_id, library_id]
+
+
+def test_library_event_invalidates_the_cached_record(fake_backend_factory):
+    from dragen_wgts_rna_tools.library_cache import LIBRARY_ID_TYPE
+    from dragen_wgts_rna_tools.state_store import get_state_store
+
+    fake_backend = fake_backend_factory()
+    library_id = fake_backend.dataset.libraries[0]['libraryId']
+    module = load_handler_module("invalidate_library_cache")
+    reset_container_state(module)
+
+    module.LIBRARY_CACHE.get(library_id, lambda library_id_: {"libraryId": library_id_})
+    assert get_state_store().get(library_id, LIBRARY_ID_TYPE) is not None
+
+    result = module.handler(
+        {"action": "UPDATE", "model": "LIBRARY", "refId": "lib.01J", "data": {"libraryId": library_id}}, None
+    )
+    assert result == {"model": "LIBRARY", "libraryIds": [library_id]}
+    assert get_state_store().get(library_id, LIBRARY_ID_TYPE) is None
+
+
+def test_subject_and_individual_events_invalidate_the_dependent_records(fake_backend_factory):
+    from dragen_wgts_rna_tools.library_cache import LIBRARY_ID_TYPE
+    from dragen_wgts_rna_tools.state_store import get_state_store
+
+    fake_backend = fake_backend_factory(library_count=3)
+    library_by_id = {library['libraryId']: library for library in fake_backend.dataset.libraries}
+    first_library, second_library, other_library = fake_backend.dataset.libraries
+    # Two libraries of the same subject
+    second_library['subject'] = first_library['subject']
+    module = load_handler_module("invalidate_library_cache")
+    reset_container_state(module)
+
+    for library_id in library_by_id:
+        module.LIBRARY_CACHE.get(library_id, lambda library_id_: library_by_id[library_id_])
+
+    result = module.handler(
+        {
+            "action": "UPDATE", "model": "SUBJECT", "refId": "sbj.01J",
+            "data": {"subjectId": first_library['subject']['subjectId']}
+        }, None
+    )
+    assert sorted(result['libraryIds']) == sorted([first_library['libraryId'], second_library['libraryId']])
+    assert get_state_store().get(first_library['libraryId'], LIBRARY_ID_TYPE) is None
+    assert get_state_store().get(second_library['libraryId'], LIBRARY_ID_TYPE) is None
+    assert get_state_store().get(other_library['libraryId'], LIBRARY_ID_TYPE) is not None
+
+    result = module.handler(
+        {
+            "action": "UPDATE", "model": "INDIVIDUAL", "refId": "idv.01J",
+            "data": {"individualId": other_library['subject']['individualSet'][0]['individualId']}
+        }, None
+    )
+    assert result == {"model": "INDIVIDUAL", "libraryIds": [other_library['libraryId']]}
+    assert get_state_store().get(other_library['libraryId'], LIBRARY_ID_TYPE) is None
+
+    # The dependency items went with the records
+    assert module.handler(
+        {
+            "action": "UPDATE", "model": "SUBJECT", "refId": "sbj.01J",
+            "data": {"subjectId": first_library['subject']['subjectId']}
+        }, None
+    ) == {"model": "SUBJECT", "libraryIds": []}
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+"""
+The reference catalog index, and when it is rebuilt
+"""
+
+# Standard imports
+import json
+
+# Local imports
+from fakes import REF_DATA_BUCKET, SyntheticDataset, WORKFLOW_VERSION
+
+
+def test_index_is_rebuilt_when_the_document_changes():
+    from dragen_wgts_rna_tools import reference_catalog
+
+    catalog = SyntheticDataset.get_reference_catalog()
+    try:
+        reference_catalog.set_reference_catalog(None)
+        index = reference_catalog.load_reference_catalog(json.dumps(catalog))
+        assert reference_catalog.load_reference_catalog(json.dumps(catalog)) is index
+
+        # The annotation file moves, without a catalog version bump
+        annotation_file = f"s3://{REF_DATA_BUCKET}/gencode/hg38/v44/gencode.v44.primary_assembly.annotation.gtf"
+        catalog['annotations'][0]['annotationFile'] = annotation_file
+        updated_index = reference_catalog.load_reference_catalog(json.dumps(catalog))
+        assert updated_index is not index
+        assert updated_index.catalog_version == index.catalog_version
+        assert updated_index.get_reference_inputs_for_workflow_version(WORKFLOW_VERSION)['annotationFile'] == annotation_file
+    finally:
+        reference_catalog.set_reference_catalog(None)
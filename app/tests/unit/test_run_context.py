@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+
+"""
+The run context, skipping the workflow run lookups of the handlers that are given it
+"""
+
+# Local imports
+from fakes import PORTAL_RUN_ID
+from harness import load_handler_module, reset_container_state
+
+
+def test_run_context_gives_the_same_workflow_run_update(fake_backend_factory):
+    from dragen_wgts_rna_tools.run_context import RunContext
+
+    fake_backend = fake_backend_factory(library_count=2)
+    workflow_run = fake_backend.dataset.workflow_run
+    module = load_handler_module("generate_wru_event_object_with_merged_data")
+    reset_container_state(module)
+    event = {
+        "portalRunId": PORTAL_RUN_ID,
+        "libraries": workflow_run['libraries'],
+        "payload": fake_backend.dataset.get_payload(),
+    }
+
+    looked_up_result = module.handler(event, None)
+    assert fake_backend.calls['workflow.get_workflow_run_from_portal_run_id'] == 1
+
+    fake_backend.reset_calls()
+    run_context_result = module.handler(
+        {**event, "runContext": RunContext.from_workflow_run(workflow_run).to_dict()}, None
+    )
+    assert fake_backend.calls['workflow.get_workflow_run_from_portal_run_id'] == 0
+
+    # The linked libraries of the run context are not carried into the update
+    assert run_context_result == looked_up_result
+    assert run_context_result['workflowRunUpdate']['linkedLibraries'] == []
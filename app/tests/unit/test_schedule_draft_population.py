@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+
+"""
+The draft population scheduler, against the fake backends
+"""
+
+# Local imports
+from harness import get_default_handler_event, load_handler_module, reset_container_state
+
+
+def test_invalid_messages_do_not_fail_the_batch(fake_backend_factory):
+    fake_backend = fake_backend_factory()
+    module = load_handler_module("schedule_draft_population")
+    reset_container_state(module)
+
+    event = get_default_handler_event("schedule_draft_population", fake_backend.dataset)
+    event['Records'].extend([
+        # A body that is not JSON, and an event without a detail
+        {"messageId": "not-json", "receiptHandle": "not-json", "body": "{\"id\": "},
+        {"messageId": "no-detail", "receiptHandle": "no-detail", "body": "{\"id\": \"7bf73129\"}"},
+    ])
+
+    result = module.handler(event, None)
+
+    # The draft is still started, only the invalid messages are reported
+    assert sorted(map(lambda failure_iter_: failure_iter_['itemIdentifier'], result['batchItemFailures'])) == [
+        "no-detail", "not-json"
+    ]
+    assert result['startedExecutionCount'] == 1
+    assert fake_backend.calls['stepfunctions.StartExecution'] == 1
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+The run status ledger, recording the highest ICAv2 WES status per analysis with conditional puts
+"""
+
+# Local imports
+from fakes import PORTAL_RUN_ID
+from harness import get_icav2_wes_event
+
+
+def test_only_newer_statuses_are_recorded():
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+    from dragen_wgts_rna_tools.status_ledger import RunStatusLedger, get_run_status_key
+
+    run_status_ledger = RunStatusLedger(state_store=LocalStateStore())
+    running_event = get_icav2_wes_event(PORTAL_RUN_ID, "RUNNING")
+    succeeded_event = get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED")
+
+    assert not run_status_ledger.is_stale_event(running_event)
+    assert run_status_ledger.record_event(running_event)
+    # Repeats of the recorded event (i.e. retries) are not stale, and may be recorded again
+    assert not run_status_ledger.is_stale_event(running_event)
+    assert run_status_ledger.record_event(running_event)
+
+    assert run_status_ledger.record_event(succeeded_event)
+    assert run_status_ledger.get_latest_status(get_run_status_key(succeeded_event))['status'] == "SUCCEEDED"
+
+    # A late RUNNING event is stale, and the conditional put leaves SUCCEEDED in place
+    assert run_status_ledger.is_stale_event(running_event)
+    assert not run_status_ledger.record_event(running_event)
+    assert run_status_ledger.get_latest_status(get_run_status_key(running_event))['status'] == "SUCCEEDED"
+
+    # The same terminal status at an earlier time is stale, at a later time it is newer
+    assert run_status_ledger.is_stale_event(
+        get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED", end_time="2026-10-19T01:00:00Z")
+    )
+    assert run_status_ledger.record_event(
+        get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED", end_time="2026-10-19T03:00:00Z")
+    )
+
+
+def test_unranked_statuses_are_never_stale():
+    from dragen_wgts_rna_tools.state_store import LocalStateStore
+    from dragen_wgts_rna_tools.status_ledger import RunStatusLedger
+
+    run_status_ledger = RunStatusLedger(state_store=LocalStateStore())
+    assert run_status_ledger.record_event(get_icav2_wes_event(PORTAL_RUN_ID, "SUCCEEDED"))
+
+    unknown_event = get_icav2_wes_event(PORTAL_RUN_ID, "PAUSED")
+    assert not run_status_ledger.is_stale_event(unknown_event)
+    assert not run_status_ledger.record_event(unknown_event)
@@ -14,18 +14,33 @@ import {
   WORKFLOW_VERSION_TO_DEFAULT_ICAV2_PIPELINE_ID_MAP,
   EVENT_BUS_NAME,
   SSM_PARAMETER_PATH_PREFIX,
-  SSM_PARAMETER_PATH_PREFIX_REFERENCE_PATHS_BY_WORKFLOW_VERSION,
-  SSM_PARAMETER_PATH_PREFIX_ORA_REFERENCE_PATHS_BY_WORKFLOW_VERSION,
   WORKFLOW_VERSION_TO_DEFAULT_REFERENCE_PATHS_MAP,
   ORA_VERSION_TO_DEFAULT_ORA_REFERENCE_PATHS_MAP,
   SSM_PARAMETER_PATH_PREFIX_INPUTS_BY_WORKFLOW_VERSION,
   DEFAULT_WORKFLOW_INPUTS_BY_VERSION_MAP,
   WORKFLOW_VERSION_TO_DEFAULT_ANNOTATION_PATHS_MAP,
   ANNOTATION_VERSION_TO_ANNOTATION_PATHS_MAP,
-  SSM_PARAMETER_PATH_PREFIX_ANNOTATION_VERSIONS_BY_WORKFLOW_VERSION,
-  SSM_PARAMETER_PATH_PREFIX_ANNOTATION_REFERENCE_PATHS_BY_ANNOTATION_VERSION,
+  STATE_TABLE_NAME,
+  DEFAULT_ORA_VERSION,
+  REFERENCE_CATALOG_VERSION,
+  SSM_PARAMETER_PATH_REFERENCE_CATALOG,
+  POPULATE_DRAFT_DATA_ENGINE_BY_STAGE,
+  LAMBDA_DEPLOYMENT_MODE_BY_STAGE,
+  DRAFT_POPULATION_SCHEDULING_BY_STAGE,
+  ICAV2_WES_EVENT_PROCESSING_BY_STAGE,
+  COMMENT_OUTBOX_QUEUE_NAME,
+  DRAFT_POPULATION_QUEUE_NAME,
+  ICAV2_WES_EVENT_QUEUE_NAME,
+  SSM_PARAMETER_PATH_CLAIM_CHECK_BUCKET_NAME,
 } from './constants';
-import { StatefulApplicationStackConfig, StatelessApplicationStackConfig } from './interfaces';
+import {
+  AnnotationVersionType,
+  OraReferenceVersionType,
+  ReferenceCatalog,
+  StatefulApplicationStackConfig,
+  StatelessApplicationStackConfig,
+  WorkflowVersionType,
+} from './interfaces';
 import { StageName } from '@orcabus/platform-cdk-constructs/shared-config/accounts';
 import { ICAV2_PROJECT_ID } from '@orcabus/platform-cdk-constructs/shared-config/icav2';
 import { substituteBucketConstants } from './utils';
@@ -35,6 +50,44 @@ import {
   PIPELINE_CACHE_PREFIX,
 } from '@orcabus/platform-cdk-constructs/shared-config/s3';
 
+/**
+ * Reference catalog, built from the reference, ORA reference and annotation maps
+ */
+export const getReferenceCatalog = (): ReferenceCatalog => {
+  return {
+    catalogVersion: REFERENCE_CATALOG_VERSION,
+    references: Object.values(WORKFLOW_VERSION_TO_DEFAULT_REFERENCE_PATHS_MAP),
+    oraReferences: Object.entries(ORA_VERSION_TO_DEFAULT_ORA_REFERENCE_PATHS_MAP).map(
+      ([oraVersion, oraReference]) => ({
+        oraVersion: oraVersion as OraReferenceVersionType,
+        oraReference: oraReference,
+      })
+    ),
+    annotations: Object.entries(ANNOTATION_VERSION_TO_ANNOTATION_PATHS_MAP).map(
+      ([annotationVersion, annotationFile]) => ({
+        annotationVersion: annotationVersion as AnnotationVersionType,
+        annotationFile: annotationFile,
+      })
+    ),
+    workflowDefaults: Object.fromEntries(
+      Object.entries(WORKFLOW_VERSION_TO_DEFAULT_REFERENCE_PATHS_MAP).map(
+        ([workflowVersion, reference]) => [
+          workflowVersion,
+          {
+            genome: reference.name,
+            structure: reference.structure,
+            annotationVersion:
+              WORKFLOW_VERSION_TO_DEFAULT_ANNOTATION_PATHS_MAP[
+                workflowVersion as WorkflowVersionType
+              ],
+            oraVersion: DEFAULT_ORA_VERSION,
+          },
+        ]
+      )
+    ) as ReferenceCatalog['workflowDefaults'],
+  };
+};
+
 /**
  * Stateful stack properties for the workflow.
  * Mainly just linking values from SSM parameters
@@ -61,10 +114,7 @@ export const getSsmParameterValues = (stage: StageName): SsmParameterValues => {
     outputPrefix: substituteBucketConstants(WORKFLOW_OUTPUT_PREFIX, stage),
 
     // References
-    referenceByWorkflowVersionMap: WORKFLOW_VERSION_TO_DEFAULT_REFERENCE_PATHS_MAP,
-    oraReferenceByOraVersionMap: ORA_VERSION_TO_DEFAULT_ORA_REFERENCE_PATHS_MAP,
-    annotationVersionByWorkflowVersionMap: WORKFLOW_VERSION_TO_DEFAULT_ANNOTATION_PATHS_MAP,
-    annotationReferenceByAnnotationVersionMap: ANNOTATION_VERSION_TO_ANNOTATION_PATHS_MAP,
+    referenceCatalog: getReferenceCatalog(),
   };
 };
 
@@ -90,12 +140,7 @@ export const getSsmParameterPaths = (): SsmParameterPaths => {
     outputPrefix: SSM_PARAMETER_PATH_OUTPUT_PREFIX,
 
     // Reference SSM Paths
-    referenceSsmRootPrefix: SSM_PARAMETER_PATH_PREFIX_REFERENCE_PATHS_BY_WORKFLOW_VERSION,
-    oraCompressionSsmRootPrefix: SSM_PARAMETER_PATH_PREFIX_ORA_REFERENCE_PATHS_BY_WORKFLOW_VERSION,
-    annotationVersionByWorkflowSsmRootPrefix:
-      SSM_PARAMETER_PATH_PREFIX_ANNOTATION_VERSIONS_BY_WORKFLOW_VERSION,
-    annotationReferenceSsmRootPrefix:
-      SSM_PARAMETER_PATH_PREFIX_ANNOTATION_REFERENCE_PATHS_BY_ANNOTATION_VERSION,
+    referenceCatalog: SSM_PARAMETER_PATH_REFERENCE_CATALOG,
   };
 };
 
@@ -106,6 +151,21 @@ export const getStatefulStackProps = (stage: StageName): StatefulApplicationStac
 
     // SSM Parameter Values
     ssmParameterValues: getSsmParameterValues(stage),
+
+    // State table
+    stateTableName: STATE_TABLE_NAME,
+
+    // Comment outbox queue
+    commentOutboxQueueName: COMMENT_OUTBOX_QUEUE_NAME,
+
+    // Draft population queue
+    draftPopulationQueueName: DRAFT_POPULATION_QUEUE_NAME,
+
+    // ICAv2 WES event queue
+    icav2WesEventQueueName: ICAV2_WES_EVENT_QUEUE_NAME,
+
+    // Claim check bucket
+    claimCheckBucketNameSsmParameterPath: SSM_PARAMETER_PATH_CLAIM_CHECK_BUCKET_NAME,
   };
 };
 
@@ -123,5 +183,32 @@ export const getStatelessStackProps = (stage: StageName): StatelessApplicationSt
     // Pipeline cache bucket
     pipelineCacheBucketName: PIPELINE_CACHE_BUCKET[stage],
     pipelineCachePrefix: PIPELINE_CACHE_PREFIX[stage],
+
+    // State table
+    stateTableName: STATE_TABLE_NAME,
+
+    // Comment outbox queue
+    commentOutboxQueueName: COMMENT_OUTBOX_QUEUE_NAME,
+
+    // Draft population queue
+    draftPopulationQueueName: DRAFT_POPULATION_QUEUE_NAME,
+
+    // ICAv2 WES event queue
+    icav2WesEventQueueName: ICAV2_WES_EVENT_QUEUE_NAME,
+
+    // Claim check bucket
+    claimCheckBucketNameSsmParameterPath: SSM_PARAMETER_PATH_CLAIM_CHECK_BUCKET_NAME,
+
+    // Populate draft data engine
+    populateDraftDataEngine: POPULATE_DRAFT_DATA_ENGINE_BY_STAGE[stage],
+
+    // Lambda deployment mode
+    lambdaDeploymentMode: LAMBDA_DEPLOYMENT_MODE_BY_STAGE[stage],
+
+    // Draft population scheduling
+    draftPopulationScheduling: DRAFT_POPULATION_SCHEDULING_BY_STAGE[stage],
+
+    // ICAv2 WES event processing
+    icav2WesEventProcessing: ICAV2_WES_EVENT_PROCESSING_BY_STAGE[stage],
   };
 };
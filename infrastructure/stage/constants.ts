@@ -2,11 +2,16 @@
 import path from 'path';
 import {
   AnnotationVersionType,
+  LambdaDeploymentModeType,
   OraReferenceVersionType,
   PayloadVersionType,
+  PopulateDraftDataEngineType,
+  DraftPopulationSchedulingType,
+  Icav2WesEventProcessingType,
   Reference,
   WorkflowVersionType,
 } from './interfaces';
+import { StageName } from '@orcabus/platform-cdk-constructs/shared-config/accounts';
 import { DATA_SCHEMA_REGISTRY_NAME } from '@orcabus/platform-cdk-constructs/shared-config/event-bridge';
 import {
   REFERENCE_DATA_BUCKET,
@@ -15,6 +20,8 @@ import {
 
 export const APP_ROOT = path.join(__dirname, '../../app');
 export const LAMBDA_DIR = path.join(APP_ROOT, 'lambdas');
+export const LAYERS_DIR = path.join(APP_ROOT, 'layers');
+export const DRAGEN_WGTS_RNA_TOOLS_LAYER_DIR = path.join(LAYERS_DIR, 'dragen_wgts_rna_tools_layer');
 export const STEP_FUNCTIONS_DIR = path.join(APP_ROOT, 'step-functions-templates');
 export const EVENT_SCHEMAS_DIR = path.join(APP_ROOT, 'event-schemas');
 
@@ -72,6 +79,9 @@ export const WORKFLOW_VERSION_TO_DEFAULT_ANNOTATION_PATHS_MAP: Record<
   '4.4.4': '44',
 };
 
+/* Bump whenever the reference, ORA reference or annotation maps above change */
+export const REFERENCE_CATALOG_VERSION = '2026.10.19';
+
 export const DEFAULT_WORKFLOW_INPUTS_BY_VERSION_MAP: Record<WorkflowVersionType, object> = {
   '4.4.4': {
     alignmentOptions: {
@@ -129,21 +139,9 @@ export const SSM_PARAMETER_PATH_OUTPUT_PREFIX = path.join(
 );
 
 // Reference Parameters
-export const SSM_PARAMETER_PATH_PREFIX_REFERENCE_PATHS_BY_WORKFLOW_VERSION = path.join(
-  SSM_PARAMETER_PATH_PREFIX,
-  'default-reference-paths-by-workflow-version'
-);
-export const SSM_PARAMETER_PATH_PREFIX_ORA_REFERENCE_PATHS_BY_WORKFLOW_VERSION = path.join(
-  SSM_PARAMETER_PATH_PREFIX,
-  'ora-reference-paths-by-ora-version'
-);
-export const SSM_PARAMETER_PATH_PREFIX_ANNOTATION_VERSIONS_BY_WORKFLOW_VERSION = path.join(
+export const SSM_PARAMETER_PATH_REFERENCE_CATALOG = path.join(
   SSM_PARAMETER_PATH_PREFIX,
-  'annotation-versions-by-workflow-version'
-);
-export const SSM_PARAMETER_PATH_PREFIX_ANNOTATION_REFERENCE_PATHS_BY_ANNOTATION_VERSION = path.join(
-  SSM_PARAMETER_PATH_PREFIX,
-  'annotation-paths-by-annotation-version'
+  'reference-catalog'
 );
 
 /* Event Constants */
@@ -156,6 +154,14 @@ export const ICAV2_WES_STATE_CHANGE_DETAIL_TYPE = 'Icav2WesAnalysisStateChange';
 
 export const WORKFLOW_MANAGER_EVENT_SOURCE = 'orcabus.workflowmanager';
 export const ICAV2_WES_EVENT_SOURCE = 'orcabus.icav2wesmanager';
+export const METADATA_MANAGER_EVENT_SOURCE = 'orcabus.metadatamanager';
+
+// Metadata manager state change, used to invalidate the library cache
+// (library records embed their subject and individuals, so changes to those invalidate the cached libraries too)
+export const METADATA_STATE_CHANGE_DETAIL_TYPE = 'MetadataStateChange';
+export const METADATA_LIBRARY_MODEL = 'LIBRARY';
+export const METADATA_SUBJECT_MODEL = 'SUBJECT';
+export const METADATA_INDIVIDUAL_MODEL = 'INDIVIDUAL';
 
 // Fastq Sync Service detail type
 export const FASTQ_SYNC_DETAIL_TYPE = 'FastqSync';
@@ -171,6 +177,79 @@ export const SSM_SCHEMA_ROOT = path.join(SSM_PARAMETER_PATH_PREFIX, 'schemas');
 // Used to group event rules and step functions
 export const STACK_PREFIX = 'orca-dragen-wgts-rna';
 
+/* State table constants */
+// Shared key-value state (run status ledger etc.) for the lambdas, items are keyed by id + idType
+export const STATE_TABLE_NAME = 'dragenWgtsRnaStateTable';
+export const STATE_TABLE_PARTITION_KEY = 'id';
+export const STATE_TABLE_SORT_KEY = 'idType';
+export const STATE_TABLE_TTL_ATTRIBUTE = 'expiresAt';
+
+/* Comment outbox constants */
+// Built in the stateful stack, and looked up by name in the stateless stack
+export const COMMENT_OUTBOX_QUEUE_NAME = `${STACK_PREFIX}-comment-outbox`;
+// Messages that still cannot be delivered after this many receives are moved to the dead letter queue
+export const COMMENT_OUTBOX_MAX_RECEIVE_COUNT = 5;
+export const COMMENT_OUTBOX_BATCH_SIZE = 10;
+
+/* Claim check constants */
+// Large payload sections are offloaded to the claim check bucket (see dragen_wgts_rna_tools/claim_check.py)
+// Objects are keyed by their sha256 under the prefix, and expire well after the drafts that reference them are populated
+export const CLAIM_CHECK_KEY_PREFIX = 'claim-check/';
+export const CLAIM_CHECK_EXPIRY_DAYS = 30;
+// Built in the stateful stack with a generated name (bucket names are global),
+// which is published in this SSM parameter for the stateless stack to look the bucket up
+export const SSM_PARAMETER_PATH_CLAIM_CHECK_BUCKET_NAME = path.join(
+  SSM_PARAMETER_PATH_PREFIX,
+  'claim-check-bucket-name'
+);
+
+/* Populate draft data engine constants */
+// Switch a stage to 'asyncio' to populate drafts in a single lambda invocation (per phase)
+export const POPULATE_DRAFT_DATA_ENGINE_BY_STAGE: Record<StageName, PopulateDraftDataEngineType> = {
+  BETA: 'stepFunctions',
+  GAMMA: 'stepFunctions',
+  PROD: 'stepFunctions',
+};
+
+/* Draft population scheduling constants */
+// Switch a stage to 'byInstrumentRun' to queue the drafts, and populate them from the bulk fetched fastqs of their instrument run
+export const DRAFT_POPULATION_SCHEDULING_BY_STAGE: Record<StageName, DraftPopulationSchedulingType> = {
+  BETA: 'perDraft',
+  GAMMA: 'perDraft',
+  PROD: 'perDraft',
+};
+// Built in the stateful stack, and looked up by name in the stateless stack
+export const DRAFT_POPULATION_QUEUE_NAME = `${STACK_PREFIX}-draft-population`;
+// The drafts of a demultiplexed instrument run arrive within seconds of each other
+export const DRAFT_POPULATION_BATCH_SIZE = 100;
+export const DRAFT_POPULATION_MAX_BATCHING_WINDOW_SECONDS = 20;
+export const DRAFT_POPULATION_MAX_RECEIVE_COUNT = 3;
+
+/* ICAv2 WES event processing constants */
+// Switch a stage to 'batched' to queue the ICAv2 WES state change events, and put their WRU events in batches
+export const ICAV2_WES_EVENT_PROCESSING_BY_STAGE: Record<StageName, Icav2WesEventProcessingType> = {
+  BETA: 'perEvent',
+  GAMMA: 'perEvent',
+  PROD: 'perEvent',
+};
+// Built in the stateful stack, and looked up by name in the stateless stack
+export const ICAV2_WES_EVENT_QUEUE_NAME = `${STACK_PREFIX}-icav2-wes-events`;
+// Short enough a window that the workflow manager sees the status changes promptly
+export const ICAV2_WES_EVENT_BATCH_SIZE = 50;
+export const ICAV2_WES_EVENT_MAX_BATCHING_WINDOW_SECONDS = 5;
+export const ICAV2_WES_EVENT_MAX_RECEIVE_COUNT = 5;
+
+/* Lambda deployment mode constants */
+// Switch a stage to 'router' to deploy the routed lambdas as a single function (see lambda/interfaces.ts)
+export const LAMBDA_DEPLOYMENT_MODE_BY_STAGE: Record<StageName, LambdaDeploymentModeType> = {
+  BETA: 'perHandler',
+  GAMMA: 'perHandler',
+  PROD: 'perHandler',
+};
+export const DEFAULT_LAMBDA_TIMEOUT_SECONDS = 60;
+// The lambda router times out after the routed handlers, so it can log their timeouts
+export const LAMBDA_ROUTER_TIMEOUT_HEADROOM_SECONDS = 5;
+
 /* Bucket constants */
 export const TEST_DATA_BUCKET_NAME = TEST_DATA_BUCKET;
 export const REFERENCE_DATA_BUCKET_NAME = REFERENCE_DATA_BUCKET;
@@ -0,0 +1,31 @@
+import { Construct } from 'constructs';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import { RemovalPolicy } from 'aws-cdk-lib';
+import { BuildStateTableProps } from './interfaces';
+import {
+  STATE_TABLE_PARTITION_KEY,
+  STATE_TABLE_SORT_KEY,
+  STATE_TABLE_TTL_ATTRIBUTE,
+} from '../constants';
+
+export function buildStateTable(scope: Construct, props: BuildStateTableProps): dynamodb.TableV2 {
+  /*
+  Key-value state shared across the lambdas,
+  all items are derived from other services and expire via the TTL attribute
+  so the table does not need to be retained or backed up
+  */
+  return new dynamodb.TableV2(scope, 'stateTable', {
+    tableName: props.tableName,
+    partitionKey: {
+      name: STATE_TABLE_PARTITION_KEY,
+      type: dynamodb.AttributeType.STRING,
+    },
+    sortKey: {
+      name: STATE_TABLE_SORT_KEY,
+      type: dynamodb.AttributeType.STRING,
+    },
+    billing: dynamodb.Billing.onDemand(),
+    timeToLiveAttribute: STATE_TABLE_TTL_ATTRIBUTE,
+    removalPolicy: RemovalPolicy.DESTROY,
+  });
+}
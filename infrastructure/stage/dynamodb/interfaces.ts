@@ -0,0 +1,3 @@
+export interface BuildStateTableProps {
+  tableName: string;
+}
@@ -4,6 +4,7 @@ import {
   BuildDraftRuleProps,
   BuildReadyRuleProps,
   BuildIcav2AnalysisStateChangeRuleProps,
+  BuildMetadataStateChangeRuleProps,
   eventBridgeRuleNameList,
   EventBridgeRuleObject,
   EventBridgeRuleProps,
@@ -17,6 +18,11 @@ import {
   ICAV2_WES_EVENT_SOURCE,
   DRAFT_STATUS,
   ICAV2_WES_STATE_CHANGE_DETAIL_TYPE,
+  METADATA_INDIVIDUAL_MODEL,
+  METADATA_LIBRARY_MODEL,
+  METADATA_SUBJECT_MODEL,
+  METADATA_MANAGER_EVENT_SOURCE,
+  METADATA_STATE_CHANGE_DETAIL_TYPE,
   READY_STATUS,
   STACK_PREFIX,
   WORKFLOW_MANAGER_EVENT_SOURCE,
@@ -71,6 +77,16 @@ function buildWorkflowManagerReadyEventPattern(): EventPattern {
   };
 }
 
+function buildMetadataStateChangeEventPattern(): EventPattern {
+  return {
+    detailType: [METADATA_STATE_CHANGE_DETAIL_TYPE],
+    source: [METADATA_MANAGER_EVENT_SOURCE],
+    detail: {
+      model: [METADATA_LIBRARY_MODEL, METADATA_SUBJECT_MODEL, METADATA_INDIVIDUAL_MODEL],
+    },
+  };
+}
+
 function buildEventRule(scope: Construct, props: EventBridgeRuleProps): Rule {
   return new events.Rule(scope, props.ruleName, {
     ruleName: `${STACK_PREFIX}--${props.ruleName}`,
@@ -112,6 +128,17 @@ function buildWorkflowRunStateChangeReadyEventRule(
   });
 }
 
+function buildMetadataStateChangeRule(
+  scope: Construct,
+  props: BuildMetadataStateChangeRuleProps
+): Rule {
+  return buildEventRule(scope, {
+    ruleName: props.ruleName,
+    eventPattern: buildMetadataStateChangeEventPattern(),
+    eventBus: props.eventBus,
+  });
+}
+
 export function buildAllEventRules(
   scope: Construct,
   props: EventBridgeRulesProps
@@ -152,6 +179,18 @@ export function buildAllEventRules(
             eventBus: props.eventBus,
           }),
         });
+        break;
+      }
+      // Cache invalidation
+      case 'metadataStateChange': {
+        eventBridgeRuleObjects.push({
+          ruleName: ruleName,
+          ruleObject: buildMetadataStateChangeRule(scope, {
+            ruleName: ruleName,
+            eventBus: props.eventBus,
+          }),
+        });
+        break;
       }
     }
   }
@@ -9,7 +9,9 @@ export type EventBridgeRuleName =
   // Pre-ready
   | 'wrscReady'
   // Post-submitted
-  | 'icav2WesAnalysisStateChange';
+  | 'icav2WesAnalysisStateChange'
+  // Cache invalidation
+  | 'metadataStateChange';
 
 export const eventBridgeRuleNameList: EventBridgeRuleName[] = [
   // Pre-draft
@@ -18,6 +20,8 @@ export const eventBridgeRuleNameList: EventBridgeRuleName[] = [
   'wrscReady',
   // Post-submitted
   'icav2WesAnalysisStateChange',
+  // Cache invalidation
+  'metadataStateChange',
 ];
 
 export interface EventBridgeRuleProps {
@@ -38,3 +42,4 @@ export interface EventBridgeRuleObject {
 export type BuildIcav2AnalysisStateChangeRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
 export type BuildDraftRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
 export type BuildReadyRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
+export type BuildMetadataStateChangeRuleProps = Omit<EventBridgeRuleProps, 'eventPattern'>;
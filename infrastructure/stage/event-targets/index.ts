@@ -1,10 +1,19 @@
 import {
+  AddLambdaAsEventBridgeTargetProps,
   AddSfnAsEventBridgeTargetProps,
+  AddSqsAsEventBridgeTargetProps,
   eventBridgeTargetsNameList,
   EventBridgeTargetsProps,
 } from './interfaces';
 import * as eventsTargets from 'aws-cdk-lib/aws-events-targets';
 import * as events from 'aws-cdk-lib/aws-events';
+import { IFunction } from 'aws-cdk-lib/aws-lambda';
+import { LambdaObject } from '../lambda/interfaces';
+
+// Routed lambdas are targeted through their alias of the lambda router
+function getLambdaTarget(lambdaObject?: LambdaObject): IFunction | undefined {
+  return lambdaObject?.lambdaAlias ?? lambdaObject?.lambdaFunction;
+}
 
 export function buildWrscToSfnTarget(props: AddSfnAsEventBridgeTargetProps) {
   // We take in the event detail from the dragen wgts rna ready event
@@ -16,6 +25,11 @@ export function buildWrscToSfnTarget(props: AddSfnAsEventBridgeTargetProps) {
   );
 }
 
+export function buildWrscToSqsTarget(props: AddSqsAsEventBridgeTargetProps) {
+  // We queue the entire event, the scheduler needs the event id to name the execution
+  props.eventBridgeRuleObj.addTarget(new eventsTargets.SqsQueue(props.queueObj));
+}
+
 export function buildIcav2WesEventStateChangeToWrscSfnTarget(
   props: AddSfnAsEventBridgeTargetProps
 ) {
@@ -27,11 +41,37 @@ export function buildIcav2WesEventStateChangeToWrscSfnTarget(
   );
 }
 
+export function buildIcav2WesEventStateChangeToSqsTarget(props: AddSqsAsEventBridgeTargetProps) {
+  // We queue the entire event, the batch lambda reads the detail of each record
+  props.eventBridgeRuleObj.addTarget(new eventsTargets.SqsQueue(props.queueObj));
+}
+
+export function buildMetadataStateChangeToLambdaTarget(
+  props: AddLambdaAsEventBridgeTargetProps
+) {
+  // We take in the event detail from the metadata state change event
+  props.eventBridgeRuleObj.addTarget(
+    new eventsTargets.LambdaFunction(props.lambdaFunctionObj, {
+      event: events.RuleTargetInput.fromEventPath('$.detail'),
+    })
+  );
+}
+
 export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
   for (const eventBridgeTargetsName of eventBridgeTargetsNameList) {
     switch (eventBridgeTargetsName) {
       // Draft targets
       case 'draftToPopulateDraftSfnTarget': {
+        // Drafts are queued for the scheduler, that starts the state machine, when scheduled by instrument run
+        if (props.draftPopulationScheduling === 'byInstrumentRun') {
+          buildWrscToSqsTarget(<AddSqsAsEventBridgeTargetProps>{
+            eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
+              (eventBridgeObject) => eventBridgeObject.ruleName === 'wrscDraft'
+            )?.ruleObject,
+            queueObj: props.draftPopulationQueue,
+          });
+          break;
+        }
         buildWrscToSfnTarget(<AddSfnAsEventBridgeTargetProps>{
           eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
             (eventBridgeObject) => eventBridgeObject.ruleName === 'wrscDraft'
@@ -67,6 +107,16 @@ export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
       }
       // Post Running
       case 'icav2WesAnalysisStateChangeEventToWrscSfnTarget': {
+        // Events are queued for the putIcav2WesWruEvents lambda, when the ICAv2 WES events are batched
+        if (props.icav2WesEventProcessing === 'batched') {
+          buildIcav2WesEventStateChangeToSqsTarget(<AddSqsAsEventBridgeTargetProps>{
+            eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
+              (eventBridgeObject) => eventBridgeObject.ruleName === 'icav2WesAnalysisStateChange'
+            )?.ruleObject,
+            queueObj: props.icav2WesEventQueue,
+          });
+          break;
+        }
         buildIcav2WesEventStateChangeToWrscSfnTarget(<AddSfnAsEventBridgeTargetProps>{
           eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
             (eventBridgeObject) => eventBridgeObject.ruleName === 'icav2WesAnalysisStateChange'
@@ -77,6 +127,20 @@ export function buildAllEventBridgeTargets(props: EventBridgeTargetsProps) {
         });
         break;
       }
+      // Cache invalidation
+      case 'metadataStateChangeToInvalidateLibraryCacheLambdaTarget': {
+        buildMetadataStateChangeToLambdaTarget(<AddLambdaAsEventBridgeTargetProps>{
+          eventBridgeRuleObj: props.eventBridgeRuleObjects.find(
+            (eventBridgeObject) => eventBridgeObject.ruleName === 'metadataStateChange'
+          )?.ruleObject,
+          lambdaFunctionObj: getLambdaTarget(
+            props.lambdaObjects.find(
+              (lambdaObject) => lambdaObject.lambdaName === 'invalidateLibraryCache'
+            )
+          ),
+        });
+        break;
+      }
     }
   }
 }
@@ -2,6 +2,10 @@ import { StateMachine } from 'aws-cdk-lib/aws-stepfunctions';
 import { Rule } from 'aws-cdk-lib/aws-events';
 import { EventBridgeRuleObject } from '../event-rules/interfaces';
 import { StepFunctionObject } from '../step-functions/interfaces';
+import { LambdaObject } from '../lambda/interfaces';
+import { IFunction } from 'aws-cdk-lib/aws-lambda';
+import { IQueue } from 'aws-cdk-lib/aws-sqs';
+import { DraftPopulationSchedulingType, Icav2WesEventProcessingType } from '../interfaces';
 
 /**
  * EventBridge Target Interfaces
@@ -13,7 +17,9 @@ export type EventBridgeTargetName =
   // Ready to WES State Machine Targets
   | 'readyToIcav2WesSubmittedSfnTarget'
   // WES Analysis State Change Event to WRSC State Machine Target
-  | 'icav2WesAnalysisStateChangeEventToWrscSfnTarget';
+  | 'icav2WesAnalysisStateChangeEventToWrscSfnTarget'
+  // Metadata (Library, Subject and Individual) State Change Event to Library Cache Invalidation Target
+  | 'metadataStateChangeToInvalidateLibraryCacheLambdaTarget';
 
 export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   // Draft to Ready State Machine Targets
@@ -23,6 +29,8 @@ export const eventBridgeTargetsNameList: EventBridgeTargetName[] = [
   'readyToIcav2WesSubmittedSfnTarget',
   // WES Analysis State Change Event to WRSC State Machine Target
   'icav2WesAnalysisStateChangeEventToWrscSfnTarget',
+  // Metadata (Library, Subject and Individual) State Change Event to Library Cache Invalidation Target
+  'metadataStateChangeToInvalidateLibraryCacheLambdaTarget',
 ];
 
 export interface AddSfnAsEventBridgeTargetProps {
@@ -30,7 +38,22 @@ export interface AddSfnAsEventBridgeTargetProps {
   eventBridgeRuleObj: Rule;
 }
 
+export interface AddLambdaAsEventBridgeTargetProps {
+  lambdaFunctionObj: IFunction;
+  eventBridgeRuleObj: Rule;
+}
+
+export interface AddSqsAsEventBridgeTargetProps {
+  queueObj: IQueue;
+  eventBridgeRuleObj: Rule;
+}
+
 export interface EventBridgeTargetsProps {
   eventBridgeRuleObjects: EventBridgeRuleObject[];
   stepFunctionObjects: StepFunctionObject[];
+  lambdaObjects: LambdaObject[];
+  draftPopulationScheduling: DraftPopulationSchedulingType;
+  draftPopulationQueue: IQueue;
+  icav2WesEventProcessing: Icav2WesEventProcessingType;
+  icav2WesEventQueue: IQueue;
 }
@@ -18,6 +18,21 @@ export interface StatefulApplicationStackConfig {
 
   // Keys
   ssmParameterPaths: SsmParameterPaths;
+
+  // State table
+  stateTableName: string;
+
+  // Comment outbox queue
+  commentOutboxQueueName: string;
+
+  // Draft population queue
+  draftPopulationQueueName: string;
+
+  // ICAv2 WES event queue
+  icav2WesEventQueueName: string;
+
+  // Claim check bucket, its generated name is published in this SSM parameter
+  claimCheckBucketNameSsmParameterPath: string;
 }
 
 /**
@@ -36,8 +51,66 @@ export interface StatelessApplicationStackConfig {
   // Pipeline cache bucket
   pipelineCacheBucketName: string;
   pipelineCachePrefix: string;
+
+  // State table
+  stateTableName: string;
+
+  // Comment outbox queue
+  commentOutboxQueueName: string;
+
+  // Draft population queue
+  draftPopulationQueueName: string;
+
+  // ICAv2 WES event queue
+  icav2WesEventQueueName: string;
+
+  // Claim check bucket, its generated name is published in this SSM parameter
+  claimCheckBucketNameSsmParameterPath: string;
+
+  // Populate draft data engine
+  populateDraftDataEngine: PopulateDraftDataEngineType;
+
+  // Lambda deployment mode
+  lambdaDeploymentMode: LambdaDeploymentModeType;
+
+  // Draft population scheduling
+  draftPopulationScheduling: DraftPopulationSchedulingType;
+
+  // ICAv2 WES event processing
+  icav2WesEventProcessing: Icav2WesEventProcessingType;
 }
 
+/*
+Populate draft data engines
+stepFunctions: a lambda per stage, orchestrated by the state machine
+asyncio: every stage in a single lambda invocation (per phase, the fastq sync is a callback)
+*/
+export type PopulateDraftDataEngineType = 'stepFunctions' | 'asyncio';
+
+/*
+Lambda deployment modes
+perHandler: a function per lambda
+router: the routed lambdas are deployed as a single lambda router function, invoked through an alias per lambda,
+  so they share warm execution environments, connection pools and caches
+*/
+export type LambdaDeploymentModeType = 'perHandler' | 'router';
+
+/*
+Draft population scheduling
+perDraft: each draft event starts its populate draft data execution
+byInstrumentRun: draft events are queued, the scheduleDraftPopulation lambda groups a batch by instrument run,
+  fetches the fastqs of each run in one call, then starts the populate draft data executions
+*/
+export type DraftPopulationSchedulingType = 'perDraft' | 'byInstrumentRun';
+
+/*
+ICAv2 WES event processing
+perEvent: each ICAv2 WES state change event starts an icav2WesEventToWrscEvent execution
+batched: ICAv2 WES state change events are queued, the putIcav2WesWruEvents lambda coalesces a batch per run,
+  converts the latest status of each run and puts the WRU events (at most 10 per putEvents call)
+*/
+export type Icav2WesEventProcessingType = 'perEvent' | 'batched';
+
 /* Set versions */
 export type WorkflowVersionType = '4.4.4';
 export type PayloadVersionType = '2025.08.05';
@@ -52,3 +125,19 @@ export interface Reference {
   structure: string;
   tarball: string;
 }
+
+/* Versioned reference data catalog, indexed by (genome, structure, annotation version, ORA version) */
+export interface ReferenceCatalogDefaults {
+  genome: string;
+  structure: string;
+  annotationVersion: AnnotationVersionType;
+  oraVersion: OraReferenceVersionType;
+}
+
+export interface ReferenceCatalog {
+  catalogVersion: string;
+  references: Reference[];
+  oraReferences: { oraVersion: OraReferenceVersionType; oraReference: string }[];
+  annotations: { annotationVersion: AnnotationVersionType; annotationFile: string }[];
+  workflowDefaults: Record<WorkflowVersionType, ReferenceCatalogDefaults>;
+}
@@ -1,4 +1,12 @@
-import { LambdaInput, lambdaNameList, LambdaObject, lambdaRequirementsMap } from './interfaces';
+import {
+  BuildAllLambdasProps,
+  BuildLambdaProps,
+  getLambdaRequirements,
+  lambdaNameList,
+  LambdaObject,
+  lambdaRequirementsMap,
+  routedLambdaNameList,
+} from './interfaces';
 import { PythonUvFunction } from '@orcabus/platform-cdk-constructs/lambda';
 import {
   DEFAULT_PAYLOAD_VERSION,
@@ -9,6 +17,17 @@ import {
   TEST_DATA_BUCKET_NAME,
   REFERENCE_DATA_BUCKET_NAME,
   WORKFLOW_NAME,
+  COMMENT_OUTBOX_BATCH_SIZE,
+  DEFAULT_LAMBDA_TIMEOUT_SECONDS,
+  LAMBDA_ROUTER_TIMEOUT_HEADROOM_SECONDS,
+  CLAIM_CHECK_KEY_PREFIX,
+  DRAFT_POPULATION_BATCH_SIZE,
+  DRAFT_POPULATION_MAX_BATCHING_WINDOW_SECONDS,
+  ICAV2_WES_EVENT_BATCH_SIZE,
+  ICAV2_WES_EVENT_MAX_BATCHING_WINDOW_SECONDS,
+  EVENT_SOURCE,
+  WORKFLOW_RUN_UPDATE_DETAIL_TYPE,
+  STACK_PREFIX,
 } from '../constants';
 import { REPO_NAME } from '../../toolchain/constants';
 import * as lambda from 'aws-cdk-lib/aws-lambda';
@@ -17,28 +36,120 @@ import { NagSuppressions } from 'cdk-nag';
 import { Construct } from 'constructs';
 import { camelCaseToKebabCase, camelCaseToSnakeCase } from '../utils';
 import * as cdk from 'aws-cdk-lib';
+import * as fs from 'fs';
+import * as os from 'os';
 import * as path from 'path';
 import * as iam from 'aws-cdk-lib/aws-iam';
+import * as dynamodb from 'aws-cdk-lib/aws-dynamodb';
+import { SqsEventSource } from 'aws-cdk-lib/aws-lambda-event-sources';
 import { SchemaNames } from '../event-schemas/interfaces';
+import { buildDragenWgtsRnaToolsLayer } from '../layers';
+
+function getRoutedHandlerTimeoutSeconds(): Record<string, number> {
+  return Object.fromEntries(
+    routedLambdaNameList.map((routedLambdaName) => [
+      camelCaseToSnakeCase(routedLambdaName),
+      lambdaRequirementsMap[routedLambdaName].timeoutSeconds ?? DEFAULT_LAMBDA_TIMEOUT_SECONDS,
+    ])
+  );
+}
+
+/*
+The python requirements of the lambda router, every requirement of the lambdas it routes to
+(a package the routed lambdas pin to different versions cannot be bundled)
+*/
+export function getLambdaRouterRequirements(): string[] {
+  const requirementsByPackageName: Record<string, string> = {};
+  for (const routedLambdaName of routedLambdaNameList) {
+    const requirementsPath = path.join(
+      LAMBDA_DIR,
+      camelCaseToSnakeCase(routedLambdaName) + '_py',
+      'requirements.txt'
+    );
+    if (!fs.existsSync(requirementsPath)) {
+      continue;
+    }
+    const requirements = fs
+      .readFileSync(requirementsPath, 'utf-8')
+      .split('\n')
+      .map((requirement) => requirement.trim())
+      .filter((requirement) => requirement !== '' && !requirement.startsWith('#'));
+    for (const requirement of requirements) {
+      const packageName = requirement.split(/[\s<>=!~;[]/)[0].toLowerCase();
+      const bundledRequirement = requirementsByPackageName[packageName];
+      if (bundledRequirement !== undefined && bundledRequirement !== requirement) {
+        throw new Error(
+          `The routed lambdas require both ${bundledRequirement} and ${requirement}, ` +
+            `pin ${packageName} to the same version to deploy them in the lambda router`
+        );
+      }
+      requirementsByPackageName[packageName] = requirement;
+    }
+  }
+  return Object.values(requirementsByPackageName).sort();
+}
+
+/*
+The lambda router is bundled from a copy of the lambda directory, as it imports the routed handlers from it,
+with the routed lambdas' requirements at its root where the bundling looks for them
+*/
+export function getLambdaRouterEntry(): string {
+  const lambdaRouterEntry = fs.mkdtempSync(path.join(os.tmpdir(), 'lambda-router-'));
+  fs.cpSync(LAMBDA_DIR, lambdaRouterEntry, {
+    recursive: true,
+    filter: (source) => path.basename(source) !== '__pycache__',
+  });
+  fs.writeFileSync(
+    path.join(lambdaRouterEntry, 'requirements.txt'),
+    getLambdaRouterRequirements().join('\n') + '\n'
+  );
+  return lambdaRouterEntry;
+}
 
-function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
+function buildLambda(scope: Construct, props: BuildLambdaProps): LambdaObject {
   const lambdaNameToSnakeCase = camelCaseToSnakeCase(props.lambdaName);
-  const lambdaRequirements = lambdaRequirementsMap[props.lambdaName];
+  const lambdaRequirements = getLambdaRequirements(props.lambdaName);
+  const isLambdaRouter = props.lambdaName === 'lambdaRouter';
+
+  // The lambda router outlasts the handlers it routes to, so it can log their timeouts
+  const timeoutSeconds = isLambdaRouter
+    ? Math.max(...Object.values(getRoutedHandlerTimeoutSeconds())) +
+      LAMBDA_ROUTER_TIMEOUT_HEADROOM_SECONDS
+    : (lambdaRequirements.timeoutSeconds ?? DEFAULT_LAMBDA_TIMEOUT_SECONDS);
 
   // Create the lambda function
+  // The lambda router is bundled with the lambda directories it imports the handlers from
   const lambdaFunction = new PythonUvFunction(scope, props.lambdaName, {
-    entry: path.join(LAMBDA_DIR, lambdaNameToSnakeCase + '_py'),
+    entry: isLambdaRouter
+      ? getLambdaRouterEntry()
+      : path.join(LAMBDA_DIR, lambdaNameToSnakeCase + '_py'),
     runtime: lambda.Runtime.PYTHON_3_14,
     architecture: lambda.Architecture.ARM_64,
-    index: lambdaNameToSnakeCase + '.py',
+    index: isLambdaRouter
+      ? path.join(lambdaNameToSnakeCase + '_py', lambdaNameToSnakeCase + '.py')
+      : lambdaNameToSnakeCase + '.py',
     handler: 'handler',
-    timeout: Duration.seconds(60),
+    timeout: Duration.seconds(timeoutSeconds),
     memorySize:
       lambdaRequirements.needsIcav2Tools || lambdaRequirements.needsHigherMemory ? 1024 : 512,
     includeOrcabusApiToolsLayer: lambdaRequirements.needsOrcabusApiTools,
     includeIcav2Layer: lambdaRequirements.needsIcav2Tools,
   });
 
+  /*
+  The lambdas the lambda router routes to, and their timeouts
+   */
+  if (isLambdaRouter) {
+    lambdaFunction.addEnvironment(
+      'ROUTED_LAMBDA_NAMES',
+      routedLambdaNameList.map((routedLambdaName) => camelCaseToSnakeCase(routedLambdaName)).join(',')
+    );
+    lambdaFunction.addEnvironment(
+      'ROUTED_HANDLER_TIMEOUT_SECONDS',
+      JSON.stringify(getRoutedHandlerTimeoutSeconds())
+    );
+  }
+
   // AwsSolutions-L1 - Python 3.14 is not yet in the cdk-nag approved list but is our target runtime
   // AwsSolutions-IAM4 - Basic execution role provides CloudWatch Logs permissions needed by all Lambdas
   NagSuppressions.addResourceSuppressions(
@@ -64,7 +175,7 @@ function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
   if (lambdaRequirements.needsSsmParametersAccess) {
     lambdaFunction.addToRolePolicy(
       new iam.PolicyStatement({
-        actions: ['ssm:GetParameter'],
+        actions: ['ssm:GetParameter', 'ssm:GetParameters'],
         resources: [
           `arn:aws:ssm:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:parameter${path.join(SSM_SCHEMA_ROOT, '/*')}`,
         ],
@@ -154,6 +265,197 @@ function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
     );
   }
 
+  /*
+  Shared python helpers layer
+   */
+  if (lambdaRequirements.needsDragenWgtsRnaToolsLayer) {
+    lambdaFunction.addLayers(props.dragenWgtsRnaToolsLayer);
+  }
+
+  /*
+  State table, i.e. for the run status ledger
+   */
+  if (lambdaRequirements.needsStateTableAccess) {
+    props.stateTable.grantReadWriteData(lambdaFunction);
+    lambdaFunction.addEnvironment('STATE_TABLE_NAME', props.stateTable.tableName);
+  }
+
+  /*
+  Read access to the pipeline cache, i.e. to read the tail of the WES error logs
+   */
+  if (lambdaRequirements.needsPipelineCacheReadAccess) {
+    lambdaFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['s3:GetObject'],
+        resources: [`arn:aws:s3:::${props.pipelineCacheBucketName}/${props.pipelineCachePrefix}*`],
+      })
+    );
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers objects under the pipeline cache prefix; error log keys include the portal run id determined at runtime',
+        },
+      ],
+      true
+    );
+  }
+
+  /*
+  Comment outbox, comments are enqueued rather than written on the state machine paths
+   */
+  if (lambdaRequirements.needsCommentOutboxAccess) {
+    props.commentOutboxQueue.grantSendMessages(lambdaFunction);
+    lambdaFunction.addEnvironment('COMMENT_OUTBOX_QUEUE_URL', props.commentOutboxQueue.queueUrl);
+  }
+
+  /*
+  Comment outbox drainer, delivers the enqueued comments in batches
+   */
+  if (lambdaRequirements.isCommentOutboxConsumer) {
+    lambdaFunction.addEventSource(
+      new SqsEventSource(props.commentOutboxQueue, {
+        batchSize: COMMENT_OUTBOX_BATCH_SIZE,
+        maxBatchingWindow: Duration.seconds(5),
+        reportBatchItemFailures: true,
+      })
+    );
+    // Used to back off redelivery of failed messages
+    lambdaFunction.addEnvironment('COMMENT_OUTBOX_QUEUE_URL', props.commentOutboxQueue.queueUrl);
+  }
+
+  /*
+  Draft population scheduler, groups the drafts of a batch by instrument run
+   */
+  if (lambdaRequirements.isDraftPopulationQueueConsumer) {
+    lambdaFunction.addEventSource(
+      new SqsEventSource(props.draftPopulationQueue, {
+        batchSize: DRAFT_POPULATION_BATCH_SIZE,
+        maxBatchingWindow: Duration.seconds(DRAFT_POPULATION_MAX_BATCHING_WINDOW_SECONDS),
+        reportBatchItemFailures: true,
+      })
+    );
+  }
+
+  /*
+  ICAv2 WES event batches, coalesced per run before the WRU events are put
+   */
+  if (lambdaRequirements.isIcav2WesEventQueueConsumer) {
+    lambdaFunction.addEventSource(
+      new SqsEventSource(props.icav2WesEventQueue, {
+        batchSize: ICAV2_WES_EVENT_BATCH_SIZE,
+        maxBatchingWindow: Duration.seconds(ICAV2_WES_EVENT_MAX_BATCHING_WINDOW_SECONDS),
+        reportBatchItemFailures: true,
+      })
+    );
+  }
+
+  /*
+  Put events on the event bus, i.e. the WRU events
+   */
+  if (lambdaRequirements.needsEventBusPutEvents) {
+    props.eventBus.grantPutEventsTo(lambdaFunction);
+    lambdaFunction.addEnvironment('EVENT_BUS_NAME', props.eventBus.eventBusName);
+    lambdaFunction.addEnvironment('EVENT_SOURCE', EVENT_SOURCE);
+    lambdaFunction.addEnvironment('WORKFLOW_RUN_UPDATE_DETAIL_TYPE', WORKFLOW_RUN_UPDATE_DETAIL_TYPE);
+  }
+
+  /*
+  Start the populate draft data executions,
+  the state machine name is fixed so we do not depend on the state machines (that depend on the lambdas)
+   */
+  if (lambdaRequirements.needsPopulateDraftDataStartExecution) {
+    const populateDraftDataStateMachineArn = `arn:aws:states:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:stateMachine:${STACK_PREFIX}--populateDraftData`;
+    lambdaFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['states:StartExecution'],
+        resources: [populateDraftDataStateMachineArn],
+      })
+    );
+    lambdaFunction.addEnvironment(
+      'POPULATE_DRAFT_DATA_STATE_MACHINE_ARN',
+      populateDraftDataStateMachineArn
+    );
+  }
+
+  /*
+  Claim check bucket, large payload sections are offloaded here rather than passed through the state machine
+   */
+  if (lambdaRequirements.needsClaimCheckAccess) {
+    props.claimCheckBucket.grantRead(lambdaFunction, `${CLAIM_CHECK_KEY_PREFIX}*`);
+    props.claimCheckBucket.grantPut(lambdaFunction, `${CLAIM_CHECK_KEY_PREFIX}*`);
+    lambdaFunction.addEnvironment('CLAIM_CHECK_BUCKET_NAME', props.claimCheckBucket.bucketName);
+    lambdaFunction.addEnvironment('CLAIM_CHECK_KEY_PREFIX', CLAIM_CHECK_KEY_PREFIX);
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers objects under the claim check prefix; object keys are the sha256 of their content, determined at runtime',
+        },
+      ],
+      true
+    );
+  }
+
+  /*
+  Default parameters (engine parameters, inputs and reference data) in SSM, resolved in batches
+   */
+  if (lambdaRequirements.needsDefaultParametersSsmAccess) {
+    lambdaFunction.addToRolePolicy(
+      new iam.PolicyStatement({
+        actions: ['ssm:GetParameter', 'ssm:GetParameters', 'ssm:GetParametersByPath'],
+        resources: [
+          `arn:aws:ssm:${cdk.Aws.REGION}:${cdk.Aws.ACCOUNT_ID}:parameter${path.join(props.ssmParameterPaths.ssmRootPrefix, '/*')}`,
+        ],
+      })
+    );
+    NagSuppressions.addResourceSuppressions(
+      lambdaFunction,
+      [
+        {
+          id: 'AwsSolutions-IAM5',
+          reason:
+            'Wildcard covers SSM parameters under the workflow root prefix; individual parameter paths include dynamic workflow versions that cannot be enumerated at deploy time',
+        },
+      ],
+      true
+    );
+
+    // Engine parameter defaults
+    lambdaFunction.addEnvironment(
+      'DEFAULT_PROJECT_ID_SSM_PARAMETER_NAME',
+      props.ssmParameterPaths.icav2ProjectId
+    );
+    lambdaFunction.addEnvironment(
+      'DEFAULT_OUTPUT_URI_PREFIX_SSM_PARAMETER_NAME',
+      props.ssmParameterPaths.outputPrefix
+    );
+    lambdaFunction.addEnvironment(
+      'DEFAULT_LOGS_URI_PREFIX_SSM_PARAMETER_NAME',
+      props.ssmParameterPaths.logsPrefix
+    );
+    lambdaFunction.addEnvironment(
+      'PIPELINE_ID_SSM_PARAMETER_PREFIX',
+      props.ssmParameterPaths.prefixPipelineIdsByWorkflowVersion
+    );
+
+    // Default inputs
+    lambdaFunction.addEnvironment(
+      'DEFAULT_INPUTS_SSM_PARAMETER_PREFIX',
+      props.ssmParameterPaths.prefixDefaultInputsByWorkflowVersion
+    );
+
+    // Reference defaults, from the reference catalog
+    lambdaFunction.addEnvironment(
+      'REFERENCE_CATALOG_SSM_PARAMETER_NAME',
+      props.ssmParameterPaths.referenceCatalog
+    );
+  }
+
   /* Return the function */
   return {
     lambdaName: props.lambdaName,
@@ -161,16 +463,57 @@ function buildLambda(scope: Construct, props: LambdaInput): LambdaObject {
   };
 }
 
-export function buildAllLambdas(scope: Construct): LambdaObject[] {
+export function buildAllLambdas(scope: Construct, props: BuildAllLambdasProps): LambdaObject[] {
+  // Shared resources for the lambda functions
+  const dragenWgtsRnaToolsLayer = buildDragenWgtsRnaToolsLayer(scope);
+  const stateTable = dynamodb.TableV2.fromTableName(scope, 'stateTable', props.stateTableName);
+
+  // In the router deployment mode, the routed lambdas are deployed as the lambda router
+  const lambdaNamesToBuild = lambdaNameList.filter((lambdaName) =>
+    props.lambdaDeploymentMode === 'router'
+      ? !routedLambdaNameList.includes(lambdaName)
+      : lambdaName !== 'lambdaRouter'
+  );
+
   // Iterate over lambdaLayerToMapping and create the lambda functions
   const lambdaObjects: LambdaObject[] = [];
-  for (const lambdaName of lambdaNameList) {
+  for (const lambdaName of lambdaNamesToBuild) {
     lambdaObjects.push(
       buildLambda(scope, {
         lambdaName: lambdaName,
+        dragenWgtsRnaToolsLayer: dragenWgtsRnaToolsLayer,
+        stateTable: stateTable,
+        pipelineCacheBucketName: props.pipelineCacheBucketName,
+        pipelineCachePrefix: props.pipelineCachePrefix,
+        commentOutboxQueue: props.commentOutboxQueue,
+        draftPopulationQueue: props.draftPopulationQueue,
+        icav2WesEventQueue: props.icav2WesEventQueue,
+        claimCheckBucket: props.claimCheckBucket,
+        eventBus: props.eventBus,
+        ssmParameterPaths: props.ssmParameterPaths,
       })
     );
   }
 
+  /*
+  Each routed lambda is invoked through its own alias of the lambda router,
+  the router routes by the alias name (and the invocation metrics of each alias are kept)
+   */
+  const lambdaRouterObject = lambdaObjects.find(
+    (lambdaObject) => lambdaObject.lambdaName === 'lambdaRouter'
+  );
+  if (lambdaRouterObject !== undefined) {
+    for (const routedLambdaName of routedLambdaNameList) {
+      lambdaObjects.push({
+        lambdaName: routedLambdaName,
+        lambdaFunction: lambdaRouterObject.lambdaFunction,
+        lambdaAlias: new lambda.Alias(scope, `${routedLambdaName}RouterAlias`, {
+          aliasName: camelCaseToSnakeCase(routedLambdaName),
+          version: lambdaRouterObject.lambdaFunction.currentVersion,
+        }),
+      });
+    }
+  }
+
   return lambdaObjects;
 }
@@ -1,4 +1,12 @@
 import { PythonUvFunction } from '@orcabus/platform-cdk-constructs/lambda';
+import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import { ITableV2 } from 'aws-cdk-lib/aws-dynamodb';
+import { IQueue } from 'aws-cdk-lib/aws-sqs';
+import { IBucket } from 'aws-cdk-lib/aws-s3';
+import { IEventBus } from 'aws-cdk-lib/aws-events';
+import { SsmParameterPaths } from '../ssm/interfaces';
+import { LambdaDeploymentModeType } from '../interfaces';
+import * as lambda from 'aws-cdk-lib/aws-lambda';
 
 /**
  * Lambda function interface.
@@ -11,21 +19,32 @@ export type LambdaNameList =
   | 'getFastqRgidsFromLibraryId'
   | 'getLibraries'
   | 'getMetadataTags'
+  | 'invalidateLibraryCache'
   | 'getQcSummaryStatsFromRgidList'
+  // Single invocation draft population (the asyncio populate draft data engine)
+  | 'populateDraftDataAsync'
+  // Draft population scheduling (when drafts are scheduled by instrument run)
+  | 'scheduleDraftPopulation'
   // Payload comparison and WRU generation
   | 'comparePayload'
   | 'generateWruEventObjectWithMergedData'
   | 'getMissingSchemaFields'
+  | 'resolveDefaultParameters'
   // Validation lambdas
   | 'validateDraftCompleteSchema'
   | 'postSchemaValidation'
   // Commentary Functions
   | 'addPopulateDraftComment'
+  | 'drainCommentOutbox'
   // Ready to ICAv2 WES lambdas
   | 'convertReadyEventInputsToIcav2WesEventInputs'
   // ICAv2 WES to WRSC Event lambdas
   | 'convertIcav2WesEventToWruEvent'
-  | 'addWesFailureComment';
+  | 'addWesFailureComment'
+  // ICAv2 WES events to WRU events in batches (when the ICAv2 WES events are batched)
+  | 'putIcav2WesWruEvents'
+  // Single function for the routed lambdas, in the router lambda deployment mode
+  | 'lambdaRouter';
 
 export const lambdaNameList: LambdaNameList[] = [
   // Draft Data lambdas
@@ -35,23 +54,46 @@ export const lambdaNameList: LambdaNameList[] = [
   'getFastqRgidsFromLibraryId',
   'getLibraries',
   'getMetadataTags',
+  'invalidateLibraryCache',
   'getQcSummaryStatsFromRgidList',
+  // Single invocation draft population (the asyncio populate draft data engine)
+  'populateDraftDataAsync',
+  // Draft population scheduling (when drafts are scheduled by instrument run)
+  'scheduleDraftPopulation',
   // Payload comparison and WRU generation
   'comparePayload',
   'generateWruEventObjectWithMergedData',
   'getMissingSchemaFields',
+  'resolveDefaultParameters',
   // Validation lambdas
   'validateDraftCompleteSchema',
   'postSchemaValidation',
   // Commentary Functions
   'addPopulateDraftComment',
+  'drainCommentOutbox',
   // Ready to ICAv2 WES lambdas
   'convertReadyEventInputsToIcav2WesEventInputs',
   // ICAv2 WES to WRSC Event lambdas
   'convertIcav2WesEventToWruEvent',
   'addWesFailureComment',
+  // ICAv2 WES events to WRU events in batches (when the ICAv2 WES events are batched)
+  'putIcav2WesWruEvents',
+  // Single function for the routed lambdas, in the router lambda deployment mode
+  'lambdaRouter',
 ];
 
+/*
+The lambdas deployed in the lambda router in the 'router' lambda deployment mode,
+every lambda but the queue consumers (their concurrency and batching are set by their queues)
+*/
+export const routedLambdaNameList: LambdaNameList[] = lambdaNameList.filter(
+  (lambdaName) =>
+    lambdaName !== 'lambdaRouter' &&
+    lambdaName !== 'drainCommentOutbox' &&
+    lambdaName !== 'scheduleDraftPopulation' &&
+    lambdaName !== 'putIcav2WesWruEvents'
+);
+
 // Requirements interface for Lambda functions
 export interface LambdaRequirements {
   needsOrcabusApiTools?: boolean;
@@ -62,6 +104,19 @@ export interface LambdaRequirements {
   needsExternalBucketInfo?: boolean;
   needsWorkflowInfo?: boolean;
   needsRepoUrl?: boolean;
+  needsDragenWgtsRnaToolsLayer?: boolean;
+  needsStateTableAccess?: boolean;
+  needsPipelineCacheReadAccess?: boolean;
+  needsCommentOutboxAccess?: boolean;
+  isCommentOutboxConsumer?: boolean;
+  needsDefaultParametersSsmAccess?: boolean;
+  needsClaimCheckAccess?: boolean;
+  isDraftPopulationQueueConsumer?: boolean;
+  needsPopulateDraftDataStartExecution?: boolean;
+  isIcav2WesEventQueueConsumer?: boolean;
+  needsEventBusPutEvents?: boolean;
+  // Defaults to DEFAULT_LAMBDA_TIMEOUT_SECONDS
+  timeoutSeconds?: number;
 }
 
 // Lambda requirements mapping
@@ -69,65 +124,202 @@ export const lambdaRequirementsMap: Record<LambdaNameList, LambdaRequirements> =
   // Draft Data lambdas
   checkNtsmInternal: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
   },
   getFastqIdListFromRgidList: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
   },
   getFastqListRowsFromRgidList: {
     needsOrcabusApiTools: true,
     needsExternalBucketInfo: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
   },
   getFastqRgidsFromLibraryId: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
   },
   getLibraries: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
   },
   getMetadataTags: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+  },
+  invalidateLibraryCache: {
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
   },
   getQcSummaryStatsFromRgidList: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
+  },
+  // Single invocation draft population, needs everything the populate draft data lambdas need
+  populateDraftDataAsync: {
+    needsOrcabusApiTools: true,
+    needsHigherMemory: true,
+    needsSsmParametersAccess: true,
+    needsSchemaRegistryAccess: true,
+    needsExternalBucketInfo: true,
+    needsWorkflowInfo: true,
+    needsRepoUrl: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
+    needsDefaultParametersSsmAccess: true,
+    needsClaimCheckAccess: true,
+  },
+  // Draft population scheduling, prefetches the instrument run fastqs then starts the populate draft data executions
+  scheduleDraftPopulation: {
+    needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
+    isDraftPopulationQueueConsumer: true,
+    needsPopulateDraftDataStartExecution: true,
   },
   // Payload comparison and WRU generation
   comparePayload: {},
-  generateWruEventObjectWithMergedData: { needsOrcabusApiTools: true },
-  getMissingSchemaFields: { needsSchemaRegistryAccess: true, needsSsmParametersAccess: true },
+  generateWruEventObjectWithMergedData: {
+    needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsClaimCheckAccess: true,
+  },
+  getMissingSchemaFields: {
+    needsSchemaRegistryAccess: true,
+    needsSsmParametersAccess: true,
+    needsDragenWgtsRnaToolsLayer: true,
+  },
+  resolveDefaultParameters: {
+    needsDragenWgtsRnaToolsLayer: true,
+    needsDefaultParametersSsmAccess: true,
+  },
   // Validation lambdas
   validateDraftCompleteSchema: {
     needsSchemaRegistryAccess: true,
     needsSsmParametersAccess: true,
     needsOrcabusApiTools: true,
     needsWorkflowInfo: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
   },
   postSchemaValidation: {
     needsOrcabusApiTools: true,
     needsIcav2Tools: true,
     needsExternalBucketInfo: true,
     needsWorkflowInfo: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
   },
   // Commentary Functions
   addPopulateDraftComment: {
     needsOrcabusApiTools: true,
     needsWorkflowInfo: true,
     needsRepoUrl: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
+  },
+  drainCommentOutbox: {
+    needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    isCommentOutboxConsumer: true,
   },
   // Ready to ICAv2 WES lambdas - no requirements
   convertReadyEventInputsToIcav2WesEventInputs: {},
   // ICAv2 WES to WRSC Event lambdas
   convertIcav2WesEventToWruEvent: {
     needsOrcabusApiTools: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
   },
   addWesFailureComment: {
     needsOrcabusApiTools: true,
     needsWorkflowInfo: true,
+    needsPipelineCacheReadAccess: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
+  },
+  // ICAv2 WES events to WRU events in batches, adds the failure comments and puts the WRU events itself
+  putIcav2WesWruEvents: {
+    needsOrcabusApiTools: true,
+    needsWorkflowInfo: true,
+    needsPipelineCacheReadAccess: true,
+    needsDragenWgtsRnaToolsLayer: true,
+    needsStateTableAccess: true,
+    needsCommentOutboxAccess: true,
+    isIcav2WesEventQueueConsumer: true,
+    needsEventBusPutEvents: true,
   },
+  // Lambda router - the requirements of the routed lambdas, see getLambdaRequirements
+  lambdaRouter: {},
 };
 
+/*
+The requirements of a lambda, the lambda router needs everything the lambdas it routes to need
+*/
+export function getLambdaRequirements(lambdaName: LambdaNameList): LambdaRequirements {
+  if (lambdaName !== 'lambdaRouter') {
+    return lambdaRequirementsMap[lambdaName];
+  }
+  return routedLambdaNameList.reduce(
+    (routerRequirements: LambdaRequirements, routedLambdaName) => ({
+      ...routerRequirements,
+      ...Object.fromEntries(
+        Object.entries(lambdaRequirementsMap[routedLambdaName]).filter(([, value]) => value === true)
+      ),
+    }),
+    lambdaRequirementsMap.lambdaRouter
+  );
+}
+
 export interface LambdaInput {
   lambdaName: LambdaNameList;
 }
 
+export interface BuildLambdaProps extends LambdaInput {
+  dragenWgtsRnaToolsLayer: PythonLayerVersion;
+  stateTable: ITableV2;
+  pipelineCacheBucketName: string;
+  pipelineCachePrefix: string;
+  commentOutboxQueue: IQueue;
+  draftPopulationQueue: IQueue;
+  icav2WesEventQueue: IQueue;
+  claimCheckBucket: IBucket;
+  eventBus: IEventBus;
+  ssmParameterPaths: SsmParameterPaths;
+}
+
+export interface BuildAllLambdasProps {
+  lambdaDeploymentMode: LambdaDeploymentModeType;
+  stateTableName: string;
+  pipelineCacheBucketName: string;
+  pipelineCachePrefix: string;
+  commentOutboxQueue: IQueue;
+  draftPopulationQueue: IQueue;
+  icav2WesEventQueue: IQueue;
+  claimCheckBucket: IBucket;
+  eventBus: IEventBus;
+  ssmParameterPaths: SsmParameterPaths;
+}
+
 export interface LambdaObject extends LambdaInput {
   lambdaFunction: PythonUvFunction;
+  // The alias of the lambda router the lambda is invoked through, in the 'router' lambda deployment mode
+  lambdaAlias?: lambda.Alias;
 }
@@ -0,0 +1,16 @@
+import { Construct } from 'constructs';
+import { PythonLayerVersion } from '@aws-cdk/aws-lambda-python-alpha';
+import * as lambda from 'aws-cdk-lib/aws-lambda';
+import { DRAGEN_WGTS_RNA_TOOLS_LAYER_DIR } from '../constants';
+
+export function buildDragenWgtsRnaToolsLayer(scope: Construct): PythonLayerVersion {
+  /*
+  Shared python helpers for the lambdas, imported as 'dragen_wgts_rna_tools'
+  */
+  return new PythonLayerVersion(scope, 'dragenWgtsRnaToolsLayer', {
+    entry: DRAGEN_WGTS_RNA_TOOLS_LAYER_DIR,
+    compatibleRuntimes: [lambda.Runtime.PYTHON_3_14],
+    compatibleArchitectures: [lambda.Architecture.ARM_64],
+    description: 'Shared python helpers for the dragen wgts rna pipeline manager lambdas',
+  });
+}
@@ -0,0 +1,45 @@
+import { Construct } from 'constructs';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as ssm from 'aws-cdk-lib/aws-ssm';
+import { Duration } from 'aws-cdk-lib';
+import { NagSuppressions } from 'cdk-nag';
+import { CLAIM_CHECK_EXPIRY_DAYS, CLAIM_CHECK_KEY_PREFIX } from '../constants';
+import { BuildClaimCheckBucketProps } from './interfaces';
+
+export function buildClaimCheckBucket(
+  scope: Construct,
+  props: BuildClaimCheckBucketProps
+): s3.Bucket {
+  /*
+  Large payload sections (i.e. fastq list rows) are offloaded here by the lambdas,
+  so only a reference travels through the state machine state, objects expire via the lifecycle rule.
+  The bucket name is generated (bucket names are global), and published in SSM for the stateless stack
+  */
+  const bucket = new s3.Bucket(scope, 'claimCheckBucket', {
+    enforceSSL: true,
+    blockPublicAccess: s3.BlockPublicAccess.BLOCK_ALL,
+    encryption: s3.BucketEncryption.S3_MANAGED,
+    lifecycleRules: [
+      {
+        prefix: CLAIM_CHECK_KEY_PREFIX,
+        expiration: Duration.days(CLAIM_CHECK_EXPIRY_DAYS),
+      },
+    ],
+  });
+
+  // AwsSolutions-S1 - objects are short-lived, content addressed copies of data held by other services
+  NagSuppressions.addResourceSuppressions(bucket, [
+    {
+      id: 'AwsSolutions-S1',
+      reason:
+        'Claim check objects are short-lived, content addressed copies of payload sections held by other services',
+    },
+  ]);
+
+  new ssm.StringParameter(scope, 'claimCheckBucketNameSsmParameter', {
+    parameterName: props.bucketNameSsmParameterPath,
+    stringValue: bucket.bucketName,
+  });
+
+  return bucket;
+}
@@ -0,0 +1,3 @@
+export interface BuildClaimCheckBucketProps {
+  bucketNameSsmParameterPath: string;
+}
@@ -0,0 +1,165 @@
+import { Construct } from 'constructs';
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+import * as iam from 'aws-cdk-lib/aws-iam';
+import { Aws, Duration, Stack } from 'aws-cdk-lib';
+import { NagSuppressions } from 'cdk-nag';
+import {
+  BuildQueuesProps,
+  CommentOutboxQueues,
+  DraftPopulationQueues,
+  Icav2WesEventQueues,
+} from './interfaces';
+import {
+  COMMENT_OUTBOX_MAX_RECEIVE_COUNT,
+  DRAFT_POPULATION_MAX_RECEIVE_COUNT,
+  ICAV2_WES_EVENT_MAX_RECEIVE_COUNT,
+} from '../constants';
+
+/*
+The queues are built in the stateful stack, so the stateless stack looks them up by name
+*/
+export function getQueueFromQueueName(scope: Construct, id: string, queueName: string): sqs.IQueue {
+  return sqs.Queue.fromQueueArn(
+    scope,
+    id,
+    Stack.of(scope).formatArn({ service: 'sqs', resource: queueName })
+  );
+}
+
+/*
+The event rules that target the queue are in the stateless stack,
+and an imported queue cannot be given their resource policy there
+*/
+function allowEventRulesToSendMessages(queue: sqs.Queue) {
+  queue.addToResourcePolicy(
+    new iam.PolicyStatement({
+      principals: [new iam.ServicePrincipal('events.amazonaws.com')],
+      actions: ['sqs:SendMessage'],
+      resources: [queue.queueArn],
+      conditions: {
+        StringEquals: { 'aws:SourceAccount': Aws.ACCOUNT_ID },
+      },
+    })
+  );
+}
+
+export function buildCommentOutboxQueues(
+  scope: Construct,
+  props: BuildQueuesProps
+): CommentOutboxQueues {
+  /*
+  Comments are enqueued here by the lambdas on the state machine paths,
+  and delivered to the workflow manager by the drainCommentOutbox lambda
+  */
+  const deadLetterQueue = new sqs.Queue(scope, 'commentOutboxDeadLetterQueue', {
+    queueName: `${props.queueName}-dlq`,
+    enforceSSL: true,
+    retentionPeriod: Duration.days(14),
+  });
+
+  // AwsSolutions-SQS3 - this is the dead letter queue
+  NagSuppressions.addResourceSuppressions(deadLetterQueue, [
+    {
+      id: 'AwsSolutions-SQS3',
+      reason: 'This queue is the dead letter queue for the comment outbox',
+    },
+  ]);
+
+  const queue = new sqs.Queue(scope, 'commentOutboxQueue', {
+    queueName: props.queueName,
+    enforceSSL: true,
+    // Six times the drainer lambda timeout, as recommended for SQS event sources
+    visibilityTimeout: Duration.minutes(6),
+    deadLetterQueue: {
+      queue: deadLetterQueue,
+      maxReceiveCount: COMMENT_OUTBOX_MAX_RECEIVE_COUNT,
+    },
+  });
+
+  return {
+    queue: queue,
+    deadLetterQueue: deadLetterQueue,
+  };
+}
+
+export function buildDraftPopulationQueues(
+  scope: Construct,
+  props: BuildQueuesProps
+): DraftPopulationQueues {
+  /*
+  Draft events are queued here by the draft event rule (in the 'byInstrumentRun' draft population scheduling mode),
+  and grouped by instrument run by the scheduleDraftPopulation lambda
+  */
+  const deadLetterQueue = new sqs.Queue(scope, 'draftPopulationDeadLetterQueue', {
+    queueName: `${props.queueName}-dlq`,
+    enforceSSL: true,
+    retentionPeriod: Duration.days(14),
+  });
+
+  // AwsSolutions-SQS3 - this is the dead letter queue
+  NagSuppressions.addResourceSuppressions(deadLetterQueue, [
+    {
+      id: 'AwsSolutions-SQS3',
+      reason: 'This queue is the dead letter queue for the draft population queue',
+    },
+  ]);
+
+  const queue = new sqs.Queue(scope, 'draftPopulationQueue', {
+    queueName: props.queueName,
+    enforceSSL: true,
+    // Six times the scheduler lambda timeout, as recommended for SQS event sources
+    visibilityTimeout: Duration.minutes(6),
+    deadLetterQueue: {
+      queue: deadLetterQueue,
+      maxReceiveCount: DRAFT_POPULATION_MAX_RECEIVE_COUNT,
+    },
+  });
+
+  allowEventRulesToSendMessages(queue);
+
+  return {
+    queue: queue,
+    deadLetterQueue: deadLetterQueue,
+  };
+}
+
+export function buildIcav2WesEventQueues(
+  scope: Construct,
+  props: BuildQueuesProps
+): Icav2WesEventQueues {
+  /*
+  ICAv2 WES state change events are queued here by the ICAv2 WES event rule (in the 'batched' ICAv2 WES event processing mode),
+  and converted to WRU events in batches by the putIcav2WesWruEvents lambda
+  */
+  const deadLetterQueue = new sqs.Queue(scope, 'icav2WesEventDeadLetterQueue', {
+    queueName: `${props.queueName}-dlq`,
+    enforceSSL: true,
+    retentionPeriod: Duration.days(14),
+  });
+
+  // AwsSolutions-SQS3 - this is the dead letter queue
+  NagSuppressions.addResourceSuppressions(deadLetterQueue, [
+    {
+      id: 'AwsSolutions-SQS3',
+      reason: 'This queue is the dead letter queue for the ICAv2 WES event queue',
+    },
+  ]);
+
+  const queue = new sqs.Queue(scope, 'icav2WesEventQueue', {
+    queueName: props.queueName,
+    enforceSSL: true,
+    // Six times the batch lambda timeout, as recommended for SQS event sources
+    visibilityTimeout: Duration.minutes(6),
+    deadLetterQueue: {
+      queue: deadLetterQueue,
+      maxReceiveCount: ICAV2_WES_EVENT_MAX_RECEIVE_COUNT,
+    },
+  });
+
+  allowEventRulesToSendMessages(queue);
+
+  return {
+    queue: queue,
+    deadLetterQueue: deadLetterQueue,
+  };
+}
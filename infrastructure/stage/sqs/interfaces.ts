@@ -0,0 +1,20 @@
+import * as sqs from 'aws-cdk-lib/aws-sqs';
+
+export interface BuildQueuesProps {
+  queueName: string;
+}
+
+export interface CommentOutboxQueues {
+  queue: sqs.IQueue;
+  deadLetterQueue: sqs.IQueue;
+}
+
+export interface DraftPopulationQueues {
+  queue: sqs.IQueue;
+  deadLetterQueue: sqs.IQueue;
+}
+
+export interface Icav2WesEventQueues {
+  queue: sqs.IQueue;
+  deadLetterQueue: sqs.IQueue;
+}
@@ -79,45 +79,12 @@ export function buildSsmParameters(scope: Construct, props: BuildSsmParameterPro
   /**
    * Reference Parameters
    */
-
-  // Reference by workflow version map
-  for (const [key, value] of Object.entries(
-    props.ssmParameterValues.referenceByWorkflowVersionMap
-  )) {
-    new ssm.StringParameter(scope, `reference-${key}`, {
-      parameterName: path.join(props.ssmParameterPaths.referenceSsmRootPrefix, key),
-      stringValue: JSON.stringify(value),
-    });
-  }
-
-  // Annotation by workflow version map
-  for (const [key, value] of Object.entries(
-    props.ssmParameterValues.annotationVersionByWorkflowVersionMap
-  )) {
-    new ssm.StringParameter(scope, `annotation-version-by-workflow-version-${key}`, {
-      parameterName: path.join(
-        props.ssmParameterPaths.annotationVersionByWorkflowSsmRootPrefix,
-        key
-      ),
-      stringValue: value,
-    });
-  }
-
-  // Annotation by workflow version map
-  for (const [key, value] of Object.entries(
-    props.ssmParameterValues.annotationReferenceByAnnotationVersionMap
-  )) {
-    new ssm.StringParameter(scope, `annotation-reference-path-by-annotation-version-${key}`, {
-      parameterName: path.join(props.ssmParameterPaths.annotationReferenceSsmRootPrefix, key),
-      stringValue: value,
-    });
-  }
-
-  // Ora Reference by Ora version map
-  for (const [key, value] of Object.entries(props.ssmParameterValues.oraReferenceByOraVersionMap)) {
-    new ssm.StringParameter(scope, `ora-version-${key}`, {
-      parameterName: path.join(props.ssmParameterPaths.oraCompressionSsmRootPrefix, key),
-      stringValue: value,
-    });
-  }
+  // Reference catalog, the references, ORA references and annotations (and the default of each
+  // workflow version) in a single versioned document, the only source of the reference defaults
+  // (advanced tier, the document outgrows the 4 KB standard tier limit as references are added)
+  new ssm.StringParameter(scope, 'reference-catalog', {
+    parameterName: props.ssmParameterPaths.referenceCatalog,
+    stringValue: JSON.stringify(props.ssmParameterValues.referenceCatalog),
+    tier: ssm.ParameterTier.ADVANCED,
+  });
 }
@@ -1,9 +1,4 @@
-import {
-  AnnotationVersionType,
-  OraReferenceVersionType,
-  Reference,
-  WorkflowVersionType,
-} from '../interfaces';
+import { ReferenceCatalog } from '../interfaces';
 
 export interface SsmParameterValues {
   // Payload defaults
@@ -21,10 +16,7 @@ export interface SsmParameterValues {
   outputPrefix: string;
 
   // Reference defaults
-  referenceByWorkflowVersionMap: Record<WorkflowVersionType, Reference>;
-  oraReferenceByOraVersionMap: Record<OraReferenceVersionType, string>;
-  annotationVersionByWorkflowVersionMap: Record<WorkflowVersionType, AnnotationVersionType>;
-  annotationReferenceByAnnotationVersionMap: Record<AnnotationVersionType, string>;
+  referenceCatalog: ReferenceCatalog;
 }
 
 export interface SsmParameterPaths {
@@ -46,10 +38,7 @@ export interface SsmParameterPaths {
   outputPrefix: string;
 
   // Reference defaults
-  referenceSsmRootPrefix: string;
-  oraCompressionSsmRootPrefix: string;
-  annotationVersionByWorkflowSsmRootPrefix: string;
-  annotationReferenceSsmRootPrefix: string;
+  referenceCatalog: string;
 }
 
 export interface BuildSsmParameterProps {
@@ -3,6 +3,13 @@ import { Construct } from 'constructs';
 import { StatefulApplicationStackConfig } from './interfaces';
 import { buildSchemas } from './event-schemas';
 import { buildSsmParameters } from './ssm';
+import { buildStateTable } from './dynamodb';
+import {
+  buildCommentOutboxQueues,
+  buildDraftPopulationQueues,
+  buildIcav2WesEventQueues,
+} from './sqs';
+import { buildClaimCheckBucket } from './s3';
 import { GitStack } from '@orcabus/platform-cdk-constructs/deployment-stack-pipeline';
 
 export type StatefulApplicationStackProps = StatefulApplicationStackConfig & cdk.StackProps;
@@ -19,5 +26,30 @@ export class StatefulApplicationStack extends GitStack {
 
     // Build Schema stack
     buildSchemas(this);
+
+    // Build the state table
+    buildStateTable(this, {
+      tableName: props.stateTableName,
+    });
+
+    // Build the comment outbox
+    buildCommentOutboxQueues(this, {
+      queueName: props.commentOutboxQueueName,
+    });
+
+    // Build the draft population queue, for the drafts scheduled by instrument run
+    buildDraftPopulationQueues(this, {
+      queueName: props.draftPopulationQueueName,
+    });
+
+    // Build the ICAv2 WES event queue, for the ICAv2 WES events converted in batches
+    buildIcav2WesEventQueues(this, {
+      queueName: props.icav2WesEventQueueName,
+    });
+
+    // Build the claim check bucket, for the payload sections too large to pass through the state machines
+    buildClaimCheckBucket(this, {
+      bucketNameSsmParameterPath: props.claimCheckBucketNameSsmParameterPath,
+    });
   }
 }
@@ -1,7 +1,10 @@
 import * as cdk from 'aws-cdk-lib';
 import { Construct } from 'constructs';
 import * as events from 'aws-cdk-lib/aws-events';
+import * as s3 from 'aws-cdk-lib/aws-s3';
+import * as ssm from 'aws-cdk-lib/aws-ssm';
 import { buildAllLambdas } from './lambda';
+import { getQueueFromQueueName } from './sqs';
 import { buildAllStepFunctions } from './step-functions';
 import { StatelessApplicationStackConfig } from './interfaces';
 import { buildAllEventRules } from './event-rules';
@@ -31,8 +34,48 @@ export class StatelessApplicationStack extends GitStack {
       props.eventBusName
     );
 
+    // Get the comment outbox (built in the stateful stack)
+    const commentOutboxQueue = getQueueFromQueueName(
+      this,
+      'commentOutboxQueue',
+      props.commentOutboxQueueName
+    );
+
+    // Get the draft population queue, for the drafts scheduled by instrument run
+    const draftPopulationQueue = getQueueFromQueueName(
+      this,
+      'draftPopulationQueue',
+      props.draftPopulationQueueName
+    );
+
+    // Get the ICAv2 WES event queue, for the ICAv2 WES events converted in batches
+    const icav2WesEventQueue = getQueueFromQueueName(
+      this,
+      'icav2WesEventQueue',
+      props.icav2WesEventQueueName
+    );
+
+    // Get the claim check bucket, for the payload sections too large to pass through the state machines
+    // (its name is generated, the stateful stack publishes it in SSM)
+    const claimCheckBucket = s3.Bucket.fromBucketName(
+      this,
+      'claimCheckBucket',
+      ssm.StringParameter.valueForStringParameter(this, props.claimCheckBucketNameSsmParameterPath)
+    );
+
     // Build the lambdas
-    const lambdas = buildAllLambdas(this);
+    const lambdas = buildAllLambdas(this, {
+      lambdaDeploymentMode: props.lambdaDeploymentMode,
+      stateTableName: props.stateTableName,
+      pipelineCacheBucketName: props.pipelineCacheBucketName,
+      pipelineCachePrefix: props.pipelineCachePrefix,
+      commentOutboxQueue: commentOutboxQueue,
+      draftPopulationQueue: draftPopulationQueue,
+      icav2WesEventQueue: icav2WesEventQueue,
+      claimCheckBucket: claimCheckBucket,
+      eventBus: orcabusMainEventBus,
+      ssmParameterPaths: props.ssmParameterPaths,
+    });
 
     // Build the state machines
     const stateMachines = buildAllStepFunctions(this, {
@@ -41,6 +84,7 @@ export class StatelessApplicationStack extends GitStack {
       ssmParameterPaths: props.ssmParameterPaths,
       pipelineCacheBucketName: props.pipelineCacheBucketName,
       pipelineCachePrefix: props.pipelineCachePrefix,
+      populateDraftDataEngine: props.populateDraftDataEngine,
     });
 
     // Add event rules
@@ -52,6 +96,11 @@ export class StatelessApplicationStack extends GitStack {
     buildAllEventBridgeTargets({
       eventBridgeRuleObjects: eventRules,
       stepFunctionObjects: stateMachines,
+      lambdaObjects: lambdas,
+      draftPopulationScheduling: props.draftPopulationScheduling,
+      draftPopulationQueue: draftPopulationQueue,
+      icav2WesEventProcessing: props.icav2WesEventProcessing,
+      icav2WesEventQueue: icav2WesEventQueue,
     });
   }
 }
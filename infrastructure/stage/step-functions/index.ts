@@ -3,6 +3,7 @@ import {
   BuildStepFunctionProps,
   BuildStepFunctionsProps,
   stateMachineNameList,
+  stateMachineTemplateNameMap,
   StepFunctionObject,
   stepFunctionsRequirementsMap,
   stepFunctionToLambdasMap,
@@ -14,7 +15,6 @@ import * as iam from 'aws-cdk-lib/aws-iam';
 import * as cdk from 'aws-cdk-lib';
 import path from 'path';
 import {
-  DEFAULT_ORA_VERSION,
   DEFAULT_PAYLOAD_VERSION,
   DRAFT_STATUS,
   EVENT_SOURCE,
@@ -41,9 +41,11 @@ function createStateMachineDefinitionSubstitutions(props: BuildStepFunctionProps
   );
 
   /* Substitute lambdas in the state machine definition */
+  /* (routed lambdas are invoked through their alias of the lambda router) */
   for (const lambdaObject of lambdaFunctions) {
     const sfnSubstitutionKey = `__${camelCaseToSnakeCase(lambdaObject.lambdaName)}_lambda_function_arn__`;
     definitionSubstitutions[sfnSubstitutionKey] =
+      lambdaObject.lambdaAlias?.functionArn ??
       lambdaObject.lambdaFunction.latestVersion.functionArn;
   }
 
@@ -83,19 +85,6 @@ function createStateMachineDefinitionSubstitutions(props: BuildStepFunctionProps
     // Path to mapping workflow version to ICAv2 Pipeline ID
     definitionSubstitutions['__workflow_id_to_pipeline_id_ssm_parameter_path_prefix__'] =
       props.ssmParameterPaths.prefixPipelineIdsByWorkflowVersion;
-
-    /* Reference */
-    definitionSubstitutions['__default_reference_ssm_parameter_prefix__'] =
-      props.ssmParameterPaths.referenceSsmRootPrefix;
-    definitionSubstitutions['__default_ora_reference_ssm_parameter_prefix__'] =
-      props.ssmParameterPaths.oraCompressionSsmRootPrefix;
-    definitionSubstitutions['__default_ora_version__'] = DEFAULT_ORA_VERSION;
-    definitionSubstitutions[
-      '__default_annotation_version_by_workflow_version_ssm_parameter_prefix__'
-    ] = props.ssmParameterPaths.annotationVersionByWorkflowSsmRootPrefix;
-    definitionSubstitutions[
-      '__default_annotation_path_by_annotation_version_ssm_parameter_prefix__'
-    ] = props.ssmParameterPaths.annotationReferenceSsmRootPrefix;
   }
 
   // Pipeline cache
@@ -147,7 +136,7 @@ function wireUpStateMachinePermissions(props: WireUpPermissionsProps): void {
 
   /* Allow the state machine to invoke the lambda function */
   for (const lambdaObject of lambdaFunctions) {
-    lambdaObject.lambdaFunction.grantInvoke(props.sfnObject);
+    (lambdaObject.lambdaAlias ?? lambdaObject.lambdaFunction).grantInvoke(props.sfnObject);
   }
   NagSuppressions.addResourceSuppressions(
     props.sfnObject,
@@ -163,13 +152,16 @@ function wireUpStateMachinePermissions(props: WireUpPermissionsProps): void {
 }
 
 function buildStepFunction(scope: Construct, props: BuildStepFunctionProps): StepFunctionObject {
-  const sfnNameToSnakeCase = camelCaseToSnakeCase(props.stateMachineName);
+  /* The template is named after the state machine, unless it depends on the populate draft data engine */
+  const sfnTemplateName =
+    stateMachineTemplateNameMap[props.stateMachineName]?.[props.populateDraftDataEngine] ??
+    camelCaseToSnakeCase(props.stateMachineName);
 
   /* Create the state machine definition substitutions */
   const stateMachine = new sfn.StateMachine(scope, props.stateMachineName, {
     stateMachineName: `${STACK_PREFIX}--${props.stateMachineName}`,
     definitionBody: sfn.DefinitionBody.fromFile(
-      path.join(STEP_FUNCTIONS_DIR, sfnNameToSnakeCase + `_sfn_template.asl.json`)
+      path.join(STEP_FUNCTIONS_DIR, sfnTemplateName + `_sfn_template.asl.json`)
     ),
     definitionSubstitutions: createStateMachineDefinitionSubstitutions(props),
   });
@@ -220,6 +212,7 @@ export function buildAllStepFunctions(
         ssmParameterPaths: props.ssmParameterPaths,
         pipelineCacheBucketName: props.pipelineCacheBucketName,
         pipelineCachePrefix: props.pipelineCachePrefix,
+        populateDraftDataEngine: props.populateDraftDataEngine,
       })
     );
   }
@@ -3,6 +3,7 @@ import { StateMachine } from 'aws-cdk-lib/aws-stepfunctions';
 
 import { LambdaNameList, LambdaObject } from '../lambda/interfaces';
 import { SsmParameterPaths } from '../ssm/interfaces';
+import { PopulateDraftDataEngineType } from '../interfaces';
 
 /**
  * Step Function Interfaces
@@ -47,6 +48,7 @@ export interface BuildStepFunctionProps extends StepFunctionInput {
   ssmParameterPaths: SsmParameterPaths;
   pipelineCacheBucketName: string;
   pipelineCachePrefix: string;
+  populateDraftDataEngine: PopulateDraftDataEngineType;
 }
 
 export interface StepFunctionObject extends StepFunctionInput {
@@ -58,9 +60,9 @@ export type WireUpPermissionsProps = BuildStepFunctionProps & StepFunctionObject
 export type BuildStepFunctionsProps = Omit<BuildStepFunctionProps, 'stateMachineName'>;
 
 export const stepFunctionsRequirementsMap: Record<StateMachineName, StepFunctionRequirements> = {
+  // SSM defaults are resolved by the resolveDefaultParameters lambda (batched and cached)
   populateDraftData: {
     needsEventPutPermission: true,
-    needsSsmParameterStoreAccess: true,
   },
   validateDraftDataAndPutReadyEvent: {
     needsEventPutPermission: true,
@@ -73,6 +75,19 @@ export const stepFunctionsRequirementsMap: Record<StateMachineName, StepFunction
   },
 };
 
+/*
+The template of each state machine, by populate draft data engine
+(the asyncio engine populates the draft in a single lambda invocation per phase)
+*/
+export const stateMachineTemplateNameMap: Partial<
+  Record<StateMachineName, Record<PopulateDraftDataEngineType, string>>
+> = {
+  populateDraftData: {
+    stepFunctions: 'populate_draft_data',
+    asyncio: 'populate_draft_data_async',
+  },
+};
+
 export const stepFunctionToLambdasMap: Record<StateMachineName, LambdaNameList[]> = {
   populateDraftData: [
     'validateDraftCompleteSchema',
@@ -87,6 +102,9 @@ export const stepFunctionToLambdasMap: Record<StateMachineName, LambdaNameList[]
     'comparePayload',
     'generateWruEventObjectWithMergedData',
     'getMissingSchemaFields',
+    'resolveDefaultParameters',
+    // The asyncio engine
+    'populateDraftDataAsync',
   ],
   validateDraftDataAndPutReadyEvent: ['validateDraftCompleteSchema', 'postSchemaValidation'],
   readyEventToIcav2WesRequestEvent: ['convertReadyEventInputsToIcav2WesEventInputs'],
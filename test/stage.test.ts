@@ -4,6 +4,12 @@ import { SynthesisMessage } from 'aws-cdk-lib/cx-api';
 import { AwsSolutionsChecks, NagSuppressions } from 'cdk-nag';
 import { StatelessApplicationStack } from '../infrastructure/stage/stateless-application-stack';
 import { getStatelessStackProps } from '../infrastructure/stage/config';
+import { getLambdaRouterEntry } from '../infrastructure/stage/lambda';
+import { routedLambdaNameList } from '../infrastructure/stage/lambda/interfaces';
+import { LAMBDA_DIR } from '../infrastructure/stage/constants';
+import { camelCaseToSnakeCase } from '../infrastructure/stage/utils';
+import * as fs from 'fs';
+import * as path from 'path';
 
 function synthesisMessageToString(sm: SynthesisMessage): string {
   return `${sm.entry.data} [${sm.id}]`;
@@ -38,6 +44,90 @@ describe('cdk-nag-stateless-toolchain-stack', () => {
   });
 });
 
+describe('cdk-nag-stateless-toolchain-stack-lambda-router', () => {
+  const app = new App({});
+
+  // The 'router' lambda deployment mode, the routed lambdas are aliases of a single function
+  const applicationStack = new StatelessApplicationStack(app, 'DeployStack', {
+    ...getStatelessStackProps('PROD'),
+    lambdaDeploymentMode: 'router',
+  });
+
+  Aspects.of(applicationStack).add(new AwsSolutionsChecks());
+  applyNagSuppression(applicationStack);
+
+  test(`cdk-nag AwsSolutions Pack errors`, () => {
+    const errors = Annotations.fromStack(applicationStack)
+      .findError('*', Match.stringLikeRegexp('AwsSolutions-.*'))
+      .map(synthesisMessageToString);
+    expect(errors).toHaveLength(0);
+  });
+});
+
+describe('lambda-router-bundle', () => {
+  // The lambda router is bundled with the requirements of every lambda it routes to
+  const lambdaRouterEntry = getLambdaRouterEntry();
+  const bundledRequirements = fs
+    .readFileSync(path.join(lambdaRouterEntry, 'requirements.txt'), 'utf-8')
+    .split('\n');
+
+  test.each(routedLambdaNameList)(`%s requirements are bundled`, (routedLambdaName) => {
+    const routedLambdaDir = camelCaseToSnakeCase(routedLambdaName) + '_py';
+    const requirementsPath = path.join(LAMBDA_DIR, routedLambdaDir, 'requirements.txt');
+    const requirements = fs.existsSync(requirementsPath)
+      ? fs
+          .readFileSync(requirementsPath, 'utf-8')
+          .split('\n')
+          .map((requirement) => requirement.trim())
+          .filter((requirement) => requirement !== '')
+      : [];
+    for (const requirement of requirements) {
+      expect(bundledRequirements).toContain(requirement);
+    }
+    expect(fs.existsSync(path.join(lambdaRouterEntry, routedLambdaDir))).toBe(true);
+  });
+});
+
+describe('cdk-nag-stateless-toolchain-stack-draft-population-by-instrument-run', () => {
+  const app = new App({});
+
+  // The 'byInstrumentRun' draft population scheduling mode, drafts are queued for the scheduler lambda
+  const applicationStack = new StatelessApplicationStack(app, 'DeployStack', {
+    ...getStatelessStackProps('PROD'),
+    draftPopulationScheduling: 'byInstrumentRun',
+  });
+
+  Aspects.of(applicationStack).add(new AwsSolutionsChecks());
+  applyNagSuppression(applicationStack);
+
+  test(`cdk-nag AwsSolutions Pack errors`, () => {
+    const errors = Annotations.fromStack(applicationStack)
+      .findError('*', Match.stringLikeRegexp('AwsSolutions-.*'))
+      .map(synthesisMessageToString);
+    expect(errors).toHaveLength(0);
+  });
+});
+
+describe('cdk-nag-stateless-toolchain-stack-batched-icav2-wes-events', () => {
+  const app = new App({});
+
+  // The 'batched' ICAv2 WES event processing mode, ICAv2 WES events are queued for the batch lambda
+  const applicationStack = new StatelessApplicationStack(app, 'DeployStack', {
+    ...getStatelessStackProps('PROD'),
+    icav2WesEventProcessing: 'batched',
+  });
+
+  Aspects.of(applicationStack).add(new AwsSolutionsChecks());
+  applyNagSuppression(applicationStack);
+
+  test(`cdk-nag AwsSolutions Pack errors`, () => {
+    const errors = Annotations.fromStack(applicationStack)
+      .findError('*', Match.stringLikeRegexp('AwsSolutions-.*'))
+      .map(synthesisMessageToString);
+    expect(errors).toHaveLength(0);
+  });
+});
+
 /**
  * apply nag suppression
  * @param stack